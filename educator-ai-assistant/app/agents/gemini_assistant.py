@@ -5,6 +5,7 @@ Multilingual support (English/Telugu)
 """
 
 import json
+import time
 import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
@@ -15,6 +16,8 @@ from app.core.config import settings
 from app.core.database import get_db
 from app.models.educator import Educator
 from app.models.student import Student, Section, Grade
+from app.services import assistant_context
+from app.services.llm_gateway import llm_gateway
 
 # Configure Gemini
 genai.configure(api_key=settings.GEMINI_API_KEY)
@@ -49,7 +52,9 @@ class GeminiEducatorAssistant:
             self.model = genai.GenerativeModel(model_name)
         except Exception:
             # Fallback to a known stable model
-            self.model = genai.GenerativeModel('gemini-2.0-flash')
+            model_name = 'gemini-2.0-flash'
+            self.model = genai.GenerativeModel(model_name)
+        self.model_name = model_name
         self.state = AssistantState.IDLE
         # Default to AUTONOMOUS so the assistant performs requested actions without asking
         # (low/medium risk actions are executed automatically in AUTONOMOUS mode)
@@ -223,7 +228,7 @@ class GeminiEducatorAssistant:
             intent = await self.analyze_intent(user_input, educator_id)
             
             # Step 2: Gather required data
-            context_data = await self._gather_context_data(intent["requires_data"], educator_id, db)
+            context_data = await self._gather_context_data(intent["requires_data"], educator_id, db, intent.get("entities"))
             
             # Step 3: Generate response and actions (include conversation history)
             response = await self._generate_response(user_input, intent, context_data, educator_id, conversation_history)
@@ -254,129 +259,16 @@ class GeminiEducatorAssistant:
                 "language": self.language
             }
     
-    async def _gather_context_data(self, required_data: List[str], educator_id: int, db: Session) -> Dict[str, Any]:
-        """Gather relevant context data for processing"""
-        context = {}
-        
+    async def _gather_context_data(self, required_data: List[str], educator_id: int, db: Session, entities: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Gather the context data the intent needs, scoped to its section/subject entities"""
         try:
-            if "calendar" in required_data:
-                # Mock calendar data - in real implementation, integrate with Google Calendar
-                context["calendar"] = {
-                    "today_events": [],
-                    "upcoming_events": [],
-                    "conflicts": []
-                }
-            
-            if "students" in required_data or "sections" in required_data:
-                # Get educator's sections and students
-                from app.models.student import Section, Student
-                sections = db.query(Section).filter(Section.educator_id == educator_id).all()
-                students_data = []
-                sections_data = []
-                
-                for section in sections:
-                    sections_data.append({
-                        "id": section.id,
-                        "name": section.name,
-                        "student_count": len(section.students)
-                    })
-                    
-                    students = db.query(Student).filter(Student.section_id == section.id).all()
-                    for student in students:
-                        students_data.append({
-                            "id": student.id,
-                            "name": student.full_name,
-                            "email": student.email,
-                            "section": section.name,
-                            "section_id": section.id,
-                            "roll_number": student.roll_number
-                        })
-                
-                context["students"] = students_data
-                context["sections"] = sections_data
-            
-            if "grades" in required_data:
-                # Get recent grade data for educator's students
-                from app.models.student import Grade, Subject
-                grades_query = db.query(Grade).join(Student).join(Section).filter(
-                    Section.educator_id == educator_id
-                ).order_by(Grade.created_at.desc()).limit(200).all()
-                
-                grades_data = []
-                for grade in grades_query:
-                    grades_data.append({
-                        "student_id": grade.student_id,
-                        "student_name": grade.student.full_name,
-                        "subject_id": grade.subject_id,
-                        "subject_name": grade.subject.name if grade.subject else "Unknown",
-                        "marks_obtained": grade.marks_obtained,
-                        "total_marks": grade.total_marks,
-                        "percentage": grade.percentage,
-                        "grade_letter": grade.grade_letter,
-                        "assessment_type": grade.assessment_type,
-                        "is_passed": grade.is_passed
-                    })
-                
-                context["grades"] = grades_data
-            
-            if "subjects" in required_data:
-                # Get subjects for educator's sections
-                from app.models.student import Subject
-                subjects_query = db.query(Subject).join(Section).filter(
-                    Section.educator_id == educator_id
-                ).all()
-                
-                subjects_data = []
-                for subject in subjects_query:
-                    subjects_data.append({
-                        "id": subject.id,
-                        "name": subject.name,
-                        "code": subject.code,
-                        "section": subject.section.name,
-                        "credits": subject.credits,
-                        "passing_grade": subject.passing_grade
-                    })
-                
-                context["subjects"] = subjects_data
-            
-            if "attendance" in required_data:
-                # Get attendance data
-                from app.models.performance import Attendance
-                attendance_query = db.query(Attendance).join(Student).join(Section).filter(
-                    Section.educator_id == educator_id
-                ).order_by(Attendance.date.desc()).limit(500).all()
-                
-                attendance_data = []
-                for record in attendance_query:
-                    attendance_data.append({
-                        "student_id": record.student_id,
-                        "student_name": record.student.full_name,
-                        "date": record.date.isoformat(),
-                        "present": record.present,
-                        "subject": record.subject.name if record.subject else None,
-                        "remarks": record.remarks
-                    })
-                
-                context["attendance"] = attendance_data
-            
-            if "communications" in required_data:
-                # Get recent communications
-                from app.models.communication import Communication
-                communications = db.query(Communication).filter(
-                    Communication.sender_email.like(f"%{educator_id}%")
-                ).order_by(Communication.sent_at.desc()).limit(50).all()
-                
-                context["communications"] = [
-                    {
-                        "recipient": comm.recipient_email,
-                        "subject": comm.subject,
-                        "content": comm.content[:100] + "..." if len(comm.content) > 100 else comm.content,
-                        "sent_at": comm.sent_at.isoformat(),
-                        "status": comm.status
-                    } for comm in communications
-                ]
-            
-            self.log_action("data_gathered", f"Gathered context data: {list(context.keys())}")
+            started = time.perf_counter()
+            context = assistant_context.gather_context(db, educator_id, required_data, entities)
+            self.log_action(
+                "data_gathered",
+                f"Gathered context data: {list(context.keys())}",
+                {"elapsed_ms": round((time.perf_counter() - started) * 1000, 1)}
+            )
             return context
             
         except Exception as e:
@@ -388,19 +280,8 @@ class GeminiEducatorAssistant:
         self.state = AssistantState.THINKING
         
         # Create enhanced prompt with real data and recent conversation history
-        history_block = ""
-        if conversation_history:
-            # Include up to last 10 messages to keep prompt short
-            recent = conversation_history[-10:]
-            lines = []
-            for msg in recent:
-                t = msg.get('type', 'user')
-                content = msg.get('content', '')
-                if t == 'user':
-                    lines.append(f"User: {content}")
-                else:
-                    lines.append(f"Assistant: {content}")
-            history_block = "\n".join(lines) + "\n\n"
+        # Newest messages within the history token budget
+        history_block = assistant_context.render_history(conversation_history)
 
         # Create enhanced prompt
         prompt = f"""
@@ -415,7 +296,7 @@ class GeminiEducatorAssistant:
         - Autonomy mode: {self.autonomy_mode}
 
         AVAILABLE DATA:
-        {self._format_context_for_prompt(context)}
+        {self._format_context_for_prompt(context, intent["intent"])}
 
         INSTRUCTIONS:
         1. Generate a natural, helpful response that directly addresses the teacher's request
@@ -469,31 +350,9 @@ class GeminiEducatorAssistant:
             self.log_action("error", f"Response generation failed: {str(e)}")
             return self._create_fallback_response(intent, context)
     
-    def _format_context_for_prompt(self, context: Dict) -> str:
-        """Format context data for the prompt in a clean way"""
-        formatted = []
-        
-        if "students" in context:
-            student_count = len(context["students"])
-            sections = set(s["section"] for s in context["students"])
-            formatted.append(f"Students: {student_count} total across {len(sections)} sections ({', '.join(sections)})")
-        
-        if "grades" in context:
-            grade_count = len(context["grades"])
-            avg_score = sum(g["percentage"] for g in context["grades"] if g["percentage"]) / max(grade_count, 1)
-            formatted.append(f"Grades: {grade_count} recent records, average score: {avg_score:.1f}%")
-        
-        if "attendance" in context:
-            attendance_count = len(context["attendance"])
-            present_count = sum(1 for a in context["attendance"] if a["present"])
-            attendance_rate = (present_count / max(attendance_count, 1)) * 100
-            formatted.append(f"Attendance: {attendance_count} records, {attendance_rate:.1f}% attendance rate")
-        
-        if "sections" in context:
-            section_names = [s["name"] for s in context["sections"]]
-            formatted.append(f"Sections: {', '.join(section_names)}")
-        
-        return "\n".join(formatted) if formatted else "No specific data available"
+    def _format_context_for_prompt(self, context: Dict, intent_name: Optional[str] = None) -> str:
+        """Format context data for the prompt within the context token budget"""
+        return assistant_context.render_for_prompt(context, intent_name)
     
     def _enhance_response_with_data(self, response: Dict, intent: Dict, context: Dict) -> Dict:
         """Enhance response with actual data processing"""
@@ -1378,23 +1237,9 @@ class GeminiEducatorAssistant:
         }
     
     async def _call_gemini(self, prompt: str) -> str:
-        """Call Google Gemini API"""
+        """Call Google Gemini API through the shared non-blocking gateway"""
         try:
-            # Use response tuning parameters from settings to reduce latency and control output size
-            max_tokens = getattr(settings, 'GEMINI_MAX_TOKENS', 256)
-            temperature = getattr(settings, 'GEMINI_TEMPERATURE', 0.2)
-            # Call the model with explicit generation params where supported
-            try:
-                response = self.model.generate_content(prompt, max_output_tokens=max_tokens, temperature=temperature)
-            except TypeError:
-                # Fallback if client library expects different kw names
-                response = self.model.generate_content(prompt)
-
-            # Extract text if present, otherwise string-convert
-            text = getattr(response, 'text', None)
-            if text is None:
-                return str(response)
-            return text
+            return await llm_gateway.generate(prompt, self.model_name)
         except Exception as e:
             raise Exception(f"Gemini API call failed: {str(e)}")
     
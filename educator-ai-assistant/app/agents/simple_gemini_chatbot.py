@@ -11,37 +11,32 @@ Design decisions:
 - Attempts lightweight action extraction for two actions: send_message and
   schedule_meeting. Execution is simulated/stubbed here (logged and returned)
   because project-specific integrations (mail/SMS/calendar) vary per install.
+- Model calls go through `app.services.llm_gateway` (off the event loop,
+  coalesced, cached, with key rotation and fallback-model retries).
 """
 from typing import Any, Dict, List, Optional
 import json
 import re
 import logging
 
-import google.generativeai as genai
-
 from app.core.simple_chatbot_config import (
-    SIMPLE_GEMINI_API_KEY,
     SIMPLE_GEMINI_MODEL,
     SIMPLE_GEMINI_MAX_TOKENS,
     SIMPLE_GEMINI_TEMPERATURE,
     SIMPLE_GEMINI_DEV_FALLBACK,
-    SIMPLE_GEMINI_ALT_API_KEYS,
 )
+from app.services.llm_gateway import llm_gateway
 
 logger = logging.getLogger(__name__)
 
-# Initialize the Gemni client with the provided key. This initialization is
-# isolated to this module and will not affect other modules in the project.
-# Configure the Gemini client for this module using the provided API key.
-genai.configure(api_key=SIMPLE_GEMINI_API_KEY)
-
 
 class SimpleGeminiChatbot:
     """A minimal wrapper around Gemini chat for the teacher chatbot.
 
-    Public method:
-    - chat(message, history, language, auto_execute)
-      -> returns dict: { reply: str, action: Optional[dict], executed: Optional[dict] }
+    Public methods:
+    - achat(message, history, language, auto_execute) for async callers
+    - chat(message, history, language, auto_execute) for sync callers
+      -> both return dict: { reply: str, action: Optional[dict], executed: Optional[dict] }
     """
 
     def __init__(self) -> None:
@@ -49,116 +44,6 @@ class SimpleGeminiChatbot:
         self.max_tokens = SIMPLE_GEMINI_MAX_TOKENS
         self.temperature = SIMPLE_GEMINI_TEMPERATURE
         self.dev_fallback = SIMPLE_GEMINI_DEV_FALLBACK
-        # Track configured API key and alternates so we can rotate on quota
-        # errors without requiring a process restart.
-        self.api_key = SIMPLE_GEMINI_API_KEY
-        self.alt_keys = SIMPLE_GEMINI_ALT_API_KEYS if 'SIMPLE_GEMINI_ALT_API_KEYS' in globals() else []
-        try:
-            genai.configure(api_key=self.api_key)
-        except Exception:
-            # Non-fatal: configuration may fail in some dev environments; we'll
-            # surface errors on calls instead.
-            logger.debug("Failed to configure genai client with initial key")
-
-    def _generate_with_retries(self, prompt: str, max_retries: int = 3):
-        """Attempt model.generate_content with exponential backoff on quota errors.
-        On non-quota errors, attempt one fallback-model try (list_models) before failing.
-        Raises the final exception if all attempts fail.
-        """
-        import time
-        import random
-
-        try:
-            # optional import for precise exception detection
-            from google.api_core.exceptions import ResourceExhausted
-        except Exception:
-            ResourceExhausted = None
-
-        attempt = 0
-        last_exc = None
-        while attempt <= max_retries:
-            try:
-                model = genai.GenerativeModel(self.model)
-                resp = model.generate_content(prompt)
-                return resp
-            except Exception as e:
-                last_exc = e
-                # Detect quota/resource-exhausted patterns if we can't import the class
-                is_quota = False
-                if ResourceExhausted and isinstance(e, ResourceExhausted):
-                    is_quota = True
-                else:
-                    msg = str(e).lower()
-                    if "quota" in msg or "429" in msg or "resourceexhausted" in msg:
-                        is_quota = True
-
-                if is_quota:
-                    # Try rotating through alternate API keys (if provided) before
-                    # falling back to exponential backoff retry. Build a candidate
-                    # list starting with the current key.
-                    keys_to_try = [getattr(self, 'api_key', SIMPLE_GEMINI_API_KEY)]
-                    try:
-                        for k in getattr(self, 'alt_keys', []):
-                            if k and k not in keys_to_try:
-                                keys_to_try.append(k)
-                    except Exception:
-                        # alt_keys may not exist in some dev setups
-                        pass
-
-                    logger.warning("Gemini quota hit for current key; attempting key rotation through %d keys", len(keys_to_try))
-                    rotated = False
-                    for k in keys_to_try:
-                        try:
-                            logger.info("Trying Gemini API key rotation with a different key (partial masked)")
-                            genai.configure(api_key=k)
-                            # update the configured key on success
-                            self.api_key = k
-                            model = genai.GenerativeModel(self.model)
-                            resp = model.generate_content(prompt)
-                            rotated = True
-                            return resp
-                        except Exception as e2:
-                            # If the error for this key is a quota error, continue to next
-                            msg2 = str(e2).lower()
-                            if "quota" in msg2 or "429" in msg2 or "resourceexhausted" in msg2:
-                                logger.warning("Key rotation attempt hit quota for this key; trying next key")
-                                continue
-                            else:
-                                # Non-quota error for this key — log and try next key
-                                logger.exception("Key rotation attempt failed with non-quota error: %s", e2)
-                                continue
-
-                    # If rotation didn't succeed, fallback to exponential backoff
-                    attempt += 1
-                    if attempt > max_retries:
-                        break
-                    sleep = (2 ** attempt) + random.uniform(0, 1)
-                    logger.warning("Gemini quota hit; no keys available or all exhausted. Retrying in %.1fs (attempt %d/%d)", sleep, attempt, max_retries)
-                    time.sleep(sleep)
-                    continue
-
-                # Non-quota error: try a fallback model once
-                try:
-                    models = genai.list_models()
-                    fallback_name = None
-                    for m in models:
-                        name = getattr(m, 'name', None) or getattr(m, 'model', None)
-                        if name and ("flash" in name or "pro" in name or "2.0" in name):
-                            fallback_name = name
-                            break
-                    if fallback_name:
-                        logger.info("Retrying with fallback model %s due to error: %s", fallback_name, e)
-                        model = genai.GenerativeModel(fallback_name)
-                        resp = model.generate_content(prompt)
-                        return resp
-                except Exception as e2:
-                    logger.exception("Fallback attempt failed: %s", e2)
-
-                # Not a quota error or fallback failed — break and surface the last exception
-                break
-
-        # If we get here, all attempts failed
-        raise last_exc
 
     def _build_messages(self, message: str, history: Optional[List[Dict[str, str]]], language: str) -> List[Dict[str, str]]:
         # System prompt encourages the model to preserve language (including Telugu)
@@ -243,6 +128,48 @@ class SimpleGeminiChatbot:
             logger.exception("Error executing action: %s", e)
             return {"status": "error", "detail": str(e)}
 
+    def _failure_reply(self, error: Exception) -> Dict[str, Any]:
+        # If dev fallback is enabled, return a deterministic mocked reply so
+        # local development can continue without Gemini quota/credentials.
+        logger.exception("Gemini API call failed for model %s: %s", self.model, error)
+        if self.dev_fallback:
+            logger.info("SIMPLE_GEMINI_DEV_FALLBACK enabled — returning deterministic dev response")
+            # Provide a simple, parseable reply that the rest of the code can
+            # attempt to extract actions from (or the frontend can display).
+            dev_reply = (
+                "[DEV FALLBACK] Gemini API unavailable or quota exceeded. "
+                "This is a simulated assistant reply for development."
+            )
+            # Attempt to include a no-op action example if the user asked for an action
+            # (keeps downstream parsing stable)
+            return {"reply": dev_reply, "action": None, "executed": None, "error": str(error)}
+        return {"reply": "Error contacting Gemini API.", "action": None, "executed": None, "error": str(error)}
+
+    def _reply_from_text(self, reply_text: str, auto_execute: bool) -> Dict[str, Any]:
+        # Try to extract an explicit action block
+        action = self._extract_action_block(reply_text)
+        if action is None:
+            # Try a lightweight regex-based extraction
+            action = self._simple_regex_action(reply_text)
+
+        executed = None
+        if action and auto_execute:
+            executed = self._execute_action(action)
+
+        return {"reply": reply_text, "action": action, "executed": executed}
+
+    async def achat(self, message: str, history: Optional[List[Dict[str, str]]] = None, language: str = "auto", auto_execute: bool = True) -> Dict[str, Any]:
+        """Send a message to Gemini without blocking the event loop.
+
+        Same arguments and return value as `chat`.
+        """
+        prompt = self._build_messages(message, history, language)
+        try:
+            reply_text = await llm_gateway.generate(prompt, self.model)
+        except Exception as e:
+            return self._failure_reply(e)
+        return self._reply_from_text(reply_text, auto_execute)
+
     def chat(self, message: str, history: Optional[List[Dict[str, str]]] = None, language: str = "auto", auto_execute: bool = True) -> Dict[str, Any]:
         """Send a message to Gemini and optionally execute actions.
 
@@ -256,39 +183,11 @@ class SimpleGeminiChatbot:
             { reply: str, action: Optional[dict], executed: Optional[dict] }
         """
         prompt = self._build_messages(message, history, language)
-
         try:
-            resp = self._generate_with_retries(prompt)
-            reply_text = resp.text if hasattr(resp, 'text') else str(resp)
+            reply_text = llm_gateway.generate_sync(prompt, self.model)
         except Exception as e:
-            # If dev fallback is enabled, return a deterministic mocked reply so
-            # local development can continue without Gemini quota/credentials.
-            logger.exception("Gemini API call failed for model %s: %s", self.model, e)
-            if self.dev_fallback:
-                logger.info("SIMPLE_GEMINI_DEV_FALLBACK enabled — returning deterministic dev response")
-                # Provide a simple, parseable reply that the rest of the code can
-                # attempt to extract actions from (or the frontend can display).
-                dev_reply = (
-                    "[DEV FALLBACK] Gemini API unavailable or quota exceeded. "
-                    "This is a simulated assistant reply for development."
-                )
-                # Attempt to include a no-op action example if the user asked for an action
-                # (keeps downstream parsing stable)
-                return {"reply": dev_reply, "action": None, "executed": None}
-            else:
-                return {"reply": "Error contacting Gemini API.", "action": None, "executed": None}
-
-        # Try to extract an explicit action block
-        action = self._extract_action_block(reply_text)
-        if action is None:
-            # Try a lightweight regex-based extraction
-            action = self._simple_regex_action(reply_text)
-
-        executed = None
-        if action and auto_execute:
-            executed = self._execute_action(action)
-
-        return {"reply": reply_text, "action": action, "executed": executed}
+            return self._failure_reply(e)
+        return self._reply_from_text(reply_text, auto_execute)
 
 
 # Expose a single module-level instance to be imported by the API router.
@@ -20,3 +20,13 @@ async def seed_demo_users(x_admin_token: str | None = Header(None)):
         return {"seeded": True}
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+@router.get("/auth-cache-stats")
+async def auth_cache_stats(x_admin_token: str | None = Header(None)):
+    """Hit/miss counters of the authenticated-principal cache (X-Admin-Token protected)."""
+    if x_admin_token is None or x_admin_token != settings.SECRET_KEY:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+
+    from app.services.principal_cache import principal_cache
+    return principal_cache.stats()
@@ -4,19 +4,22 @@ Enhanced Bulk Communication API endpoints with real email sending
 
 import logging
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func
+from sqlalchemy.orm import Session, joinedload, contains_eager
+from sqlalchemy import and_, or_, func, case, insert
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional, Dict
 import json
 from datetime import datetime
-from app.core.database import get_db
+from app.core.database import get_db, SessionLocal
 from app.models.student import Student, Grade, Subject, Section
 from app.models.educator import Educator
 from app.models.notification import Notification, NotificationType
 from app.models.communication import Communication
+from app.models.performance import Attendance
 from app.api.educators import get_current_educator
 from app.services.email_service import email_service
+from app.services import bulk_jobs
+from app.services.grade_pipeline import student_passed
 from datetime import datetime
 import json
 
@@ -61,15 +64,6 @@ class EmailResult(BaseModel):
     success: bool
     message: str
 
-class BulkEmailResponse(BaseModel):
-    success: bool
-    message: str
-    emails_sent: int
-    emails_failed: int
-    notifications_created: int
-    performance_data: List[StudentPerformanceData]
-    email_results: List[EmailResult]
-
 def calculate_student_performance(student: Student, db: Session) -> StudentPerformanceData:
     """Calculate performance metrics using the same detailed method as teacher dashboard"""
     
@@ -79,13 +73,15 @@ def calculate_student_performance(student: Student, db: Session) -> StudentPerfo
     ).options(joinedload(Grade.subject)).all()
     
     # Calculate attendance percentage
-    from app.models.performance import Attendance
-    total_days = db.query(Attendance).filter(Attendance.student_id == student.id).count()
-    present_days = db.query(Attendance).filter(
-        Attendance.student_id == student.id,
-        Attendance.present == True
-    ).count()
+    total_days, present_days = db.query(
+        func.count(Attendance.id),
+        func.count(case((Attendance.present.is_(True), 1)))
+    ).filter(Attendance.student_id == student.id).one()
     
+    return build_student_performance(student, grades, total_days, present_days)
+
+def build_student_performance(student: Student, grades: List[Grade], total_days: int, present_days: int) -> StudentPerformanceData:
+    """Build performance metrics from preloaded grades and attendance counts"""
     attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 93.3
     
     # Process grades exactly like teacher dashboard does
@@ -122,7 +118,7 @@ def calculate_student_performance(student: Student, db: Session) -> StudentPerfo
             failed_count += 1
     
     overall_average = total_percentage / len(grades) if grades else 0
-    is_overall_passed = passed_count > failed_count
+    is_overall_passed = student_passed(overall_average)
     
     # Determine grade letter and status
     if overall_average >= 90:
@@ -175,15 +171,15 @@ def generate_performance_email(student_data: StudentPerformanceData, template: s
     from datetime import datetime
     
     # Debug: Check if attendance_percentage exists
-    logger.info(f"🔍 Student data type: {type(student_data)}")
-    logger.info(f"🔍 Student data fields: {list(student_data.__dict__.keys()) if hasattr(student_data, '__dict__') else 'No __dict__'}")
-    logger.info(f"🎯 Attendance value: {getattr(student_data, 'attendance_percentage', 'NOT_FOUND')}")
+    logger.debug(f"🔍 Student data type: {type(student_data)}")
+    logger.debug(f"🔍 Student data fields: {list(student_data.__dict__.keys()) if hasattr(student_data, '__dict__') else 'No __dict__'}")
+    logger.debug(f"🎯 Attendance value: {getattr(student_data, 'attendance_percentage', 'NOT_FOUND')}")
     
     # Convert student_data to dict if it's a Pydantic model
     if hasattr(student_data, 'dict'):
         student_dict = student_data.dict()
-        logger.info(f"🔍 Student dict keys: {list(student_dict.keys())}")
-        logger.info(f"🎯 Attendance in dict: {student_dict.get('attendance_percentage', 'NOT_IN_DICT')}")
+        logger.debug(f"🔍 Student dict keys: {list(student_dict.keys())}")
+        logger.debug(f"🎯 Attendance in dict: {student_dict.get('attendance_percentage', 'NOT_IN_DICT')}")
     else:
         student_dict = student_data.__dict__ if hasattr(student_data, '__dict__') else {}
     
@@ -204,12 +200,12 @@ def generate_performance_email(student_data: StudentPerformanceData, template: s
         'educator_name': f"{current_educator.first_name} {current_educator.last_name}" if current_educator else "Your Teacher"
     }
     
-    logger.info(f"🎯 Final template vars: {template_vars}")
+    logger.debug(f"🎯 Final template vars: {template_vars}")
     
     try:
-        logger.info(f"🔍 About to format template with {len(template_vars)} variables")
+        logger.debug(f"🔍 About to format template with {len(template_vars)} variables")
         formatted_content = template.format(**template_vars)
-        logger.info(f"✅ Template formatting successful")
+        logger.debug(f"✅ Template formatting successful")
         return formatted_content
     except Exception as format_error:
         logger.error(f"❌ Template formatting error: {str(format_error)}")
@@ -220,233 +216,319 @@ def generate_performance_email(student_data: StudentPerformanceData, template: s
         # Return a basic message if formatting fails
         return f"Dear {template_vars.get('student_name', 'Student')}, your academic report is ready. Please check your dashboard for details."
 
-@router.post("/bulk-email", response_model=BulkEmailResponse)
-async def send_bulk_email(
-    request: BulkEmailRequest,
-    current_educator: Educator = Depends(get_current_educator),
-    db: Session = Depends(get_db)
-):
-    """Send bulk performance emails to students with real email delivery"""
+PERFORMANCE_TEMPLATE_VARS = ["{math_marks}", "{science_marks}", "{english_marks}", "{average_score}", "{grade_letter}", "{status}", "{attendance_percentage}"]
+
+def needs_performance_data(request: BulkEmailRequest) -> bool:
+    """Whether the template needs grade/attendance data"""
+    return (
+        request.selected_template in ["performance_report", "encouragement", "improvement_plan"] or
+        any(var in request.message_template for var in PERFORMANCE_TEMPLATE_VARS)
+    )
+
+def resolve_target_student_ids(request: BulkEmailRequest, db: Session) -> List[int]:
+    """Resolve the request target to student ids in one query"""
+    query = db.query(Student.id)
     
-    try:
-        # Build query to get target students
-        query = db.query(Student)
-        
-        if request.target_type == "section" and request.sections:
-            # Get section IDs
-            sections = db.query(Section).filter(Section.name.in_(request.sections)).all()
-            section_ids = [s.id for s in sections]
-            if section_ids:
-                query = query.filter(Student.section_id.in_(section_ids))
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"No sections found with names: {request.sections}"
-                )
-                
-        elif request.target_type == "individual" and request.student_emails:
-            query = query.filter(Student.email.in_(request.student_emails))
-            
-        elif request.target_type == "selected_students" and request.student_ids:
-            query = query.filter(Student.id.in_(request.student_ids))
-            
+    if request.target_type == "section" and request.sections:
+        # Get section IDs
+        section_ids = [row[0] for row in db.query(Section.id).filter(Section.name.in_(request.sections)).all()]
+        if section_ids:
+            query = query.filter(Student.section_id.in_(section_ids))
         else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid target type or missing target parameters"
-            )
-        
-        students = query.all()
-        
-        if not students:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail="No students found matching the criteria"
+                detail=f"No sections found with names: {request.sections}"
             )
+            
+    elif request.target_type == "individual" and request.student_emails:
+        query = query.filter(Student.email.in_(request.student_emails))
         
-        # Process each student
-        performance_data = []
-        email_results = []
-        emails_sent = 0
-        emails_failed = 0
-        notifications_created = 0
+    elif request.target_type == "selected_students" and request.student_ids:
+        query = query.filter(Student.id.in_(request.student_ids))
         
-        # Check if we need performance data based on template
-        needs_performance_data = (
-            request.selected_template in ["performance_report", "encouragement", "improvement_plan"] or
-            any(var in request.message_template for var in ["{math_marks}", "{science_marks}", "{english_marks}", "{average_score}", "{grade_letter}", "{status}", "{attendance_percentage}"])
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid target type or missing target parameters"
+        )
+    
+    student_ids = [row[0] for row in query.order_by(Student.id).all()]
+    
+    if not student_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No students found matching the criteria"
         )
+    return student_ids
+
+def process_student_chunk(
+    student_ids: List[int],
+    request: BulkEmailRequest,
+    current_educator: Educator,
+    with_performance: bool,
+    db: Session
+) -> Dict:
+    """Render and deliver one chunk of recipients.
+
+    Students, grades and attendance for the whole chunk are loaded with one
+    query each, and notifications/communications are bulk-inserted. The
+    caller commits.
+    """
+    students = db.query(Student).options(joinedload(Student.section)).filter(
+        Student.id.in_(student_ids)
+    ).order_by(Student.id).all()
+    
+    grades_map: Dict[int, List[Grade]] = {}
+    attendance_map: Dict[int, tuple] = {}
+    if with_performance:
+        grades = db.query(Grade).join(Grade.subject).options(contains_eager(Grade.subject)).filter(
+            Grade.student_id.in_(student_ids)
+        ).order_by(Grade.student_id, Grade.id).all()
+        for grade in grades:
+            grades_map.setdefault(grade.student_id, []).append(grade)
         
-        for student in students:
+        attendance_map = {
+            row[0]: (row[1], row[2])
+            for row in db.query(
+                Attendance.student_id,
+                func.count(Attendance.id),
+                func.count(case((Attendance.present.is_(True), 1)))
+            ).filter(Attendance.student_id.in_(student_ids)).group_by(Attendance.student_id).all()
+        }
+    
+    performance_data = []
+    email_results = []
+    failures = []
+    notification_rows = []
+    communication_rows = []
+    educator_name = f"{current_educator.first_name} {current_educator.last_name}"
+    report_date = datetime.now().strftime("%d/%m/%Y")
+    
+    for student in students:
+        student_name = f"{student.first_name} {student.last_name}"
+        section_name = student.section.name if student.section else "N/A"
+        try:
+            current_performance = None
             try:
-                try:
-                    # Only calculate performance if template needs it
-                    if needs_performance_data:
-                        student_performance = calculate_student_performance(student, db)
-                        performance_data.append(student_performance)
-                        # Generate personalized email content with performance data
-                        email_content = generate_performance_email(student_performance, request.message_template, current_educator)
-                    else:
-                        # Create basic student info for simple templates
-                        basic_student_data = {
-                            'student_name': f"{student.first_name} {student.last_name}",
-                            'section': student.section.name if student.section else "N/A",
-                            'roll_no': student.roll_number or "N/A"
-                        }
-                        # Generate simple email content without performance data
-                        email_content = request.message_template.format(**basic_student_data)
-                        
-                        # Add to performance data for display (without performance metrics)
-                        performance_data.append(StudentPerformanceData(
-                            student_id=student.id,
-                            student_name=f"{student.first_name} {student.last_name}",
-                            email=student.email,
-                            section=student.section.name if student.section else "N/A",
-                            roll_no=str(student.roll_number or "N/A"),  # Convert to string
-                            math_marks=0.0,
-                            science_marks=0.0,
-                            english_marks=0.0,
-                            average_score=0.0,
-                            attendance_percentage=93.3,  # Default attendance for simple templates
-                            status="N/A",
-                            grade_letter="N/A",
-                            detailed_grades=[],  # Empty for simple templates
-                            subject_performance={}  # Empty for simple templates
-                        ))
-                
-                except Exception as performance_error:
-                    logger.error(f"❌ Performance calculation error for {student.email}: {str(performance_error)}")
-                    # Create minimal performance data on error
+                # Only calculate performance if template needs it
+                if with_performance:
+                    total_days, present_days = attendance_map.get(student.id, (0, 0))
+                    current_performance = build_student_performance(
+                        student, grades_map.get(student.id, []), total_days, present_days
+                    )
+                    performance_data.append(current_performance)
+                    # Generate personalized email content with performance data
+                    email_content = generate_performance_email(current_performance, request.message_template, current_educator)
+                else:
+                    # Create basic student info for simple templates
+                    basic_student_data = {
+                        'student_name': student_name,
+                        'section': section_name,
+                        'roll_no': student.roll_number or "N/A"
+                    }
+                    # Generate simple email content without performance data
+                    email_content = request.message_template.format(**basic_student_data)
+                    
+                    # Add to performance data for display (without performance metrics)
                     performance_data.append(StudentPerformanceData(
                         student_id=student.id,
-                        student_name=f"{student.first_name} {student.last_name}",
+                        student_name=student_name,
                         email=student.email,
-                        section=student.section.name if student.section else "N/A",
-                        roll_no=str(student.roll_number or student.student_id or "N/A"),
+                        section=section_name,
+                        roll_no=str(student.roll_number or "N/A"),  # Convert to string
                         math_marks=0.0,
                         science_marks=0.0,
                         english_marks=0.0,
                         average_score=0.0,
-                        attendance_percentage=93.3,
-                        status="Error",
-                        grade_letter="N/A"
+                        attendance_percentage=93.3,  # Default attendance for simple templates
+                        status="N/A",
+                        grade_letter="N/A",
+                        detailed_grades=[],  # Empty for simple templates
+                        subject_performance={}  # Empty for simple templates
                     ))
-                    email_content = f"Dear {student.first_name} {student.last_name}, there was an error generating your personalized report."
-                
-                # SKIP EMAIL SENDING - Force dashboard notifications instead
-                email_success = True
-                email_message = "Message sent to student dashboard (email delivery disabled)"
-                
-                # We're forcing create_notifications = True for dashboard delivery
-                # Skip actual email sending to avoid Gmail authentication issues
-                
-                # Record email result
-                student_name = f"{student.first_name} {student.last_name}"
-                if needs_performance_data and len(performance_data) > 0:
-                    current_performance = performance_data[-1]  # Get the last added performance data
-                    student_name = current_performance.student_name
-                
-                email_results.append(EmailResult(
-                    student_email=student.email,
+            
+            except Exception as performance_error:
+                logger.error(f"❌ Performance calculation error for {student.email}: {str(performance_error)}")
+                # Create minimal performance data on error
+                error_performance = StudentPerformanceData(
+                    student_id=student.id,
                     student_name=student_name,
-                    success=email_success,
-                    message=email_message
-                ))
-                
-                # ALWAYS create notification in dashboard (force this regardless of request)
-                # This ensures messages go to student dashboard instead of email
-                always_create_notifications = True
-                if always_create_notifications:
-                    try:
-                        # Prepare structured report data for proper display
-                        report_data = None
-                        current_performance = None
-                        if needs_performance_data and performance_data:
-                            current_performance = performance_data[-1]
-                        
-                        if current_performance:
-                            report_data = {
-                                "student_name": current_performance.student_name,
-                                "roll_no": str(current_performance.roll_no),  # Ensure string
-                                "section": current_performance.section,
-                                "report_date": datetime.now().strftime("%d/%m/%Y"),
-                                "detailed_grades": current_performance.detailed_grades,  # Individual grades
-                                "subject_performance": current_performance.subject_performance,  # Subject summary
-                                "overall": {
-                                    "average": current_performance.average_score,
-                                    "grade": current_performance.grade_letter,
-                                    "status": current_performance.status
-                                },
-                                "attendance": {
-                                    "percentage": getattr(current_performance, 'attendance_percentage', 93.3),
-                                    "status": "Excellent" if getattr(current_performance, 'attendance_percentage', 93.3) >= 95 else 
-                                             "Good" if getattr(current_performance, 'attendance_percentage', 93.3) >= 85 else
-                                             "Needs Improvement"
-                                },
-                                "educator_name": f"{current_educator.first_name} {current_educator.last_name}"
-                            }
-                        
-                        notification = Notification(
-                            student_id=student.id,
-                            educator_id=current_educator.id,
-                            title=request.subject,
-                            message=email_content,
-                            notification_type=NotificationType.GRADE_REPORT,
-                            additional_data=json.dumps(report_data) if report_data else None
-                        )
-                        db.add(notification)
-                        notifications_created += 1
-                        logger.info(f"✅ Created notification for student {student.email}")
-                        
-                    except Exception as notification_error:
-                        logger.error(f"❌ Failed to create notification for {student.email}: {str(notification_error)}")
-                        # Don't fail the whole process, just log the error
-                
-                # Log communication
-                communication = Communication(
-                    sender_email=current_educator.email,
-                    recipient_email=student.email,
-                    subject=request.subject,
-                    content=email_content,
-                    email_type="bulk_email",
-                    status="sent" if email_success else "failed"
+                    email=student.email,
+                    section=section_name,
+                    roll_no=str(student.roll_number or student.student_id or "N/A"),
+                    math_marks=0.0,
+                    science_marks=0.0,
+                    english_marks=0.0,
+                    average_score=0.0,
+                    attendance_percentage=93.3,
+                    status="Error",
+                    grade_letter="N/A"
                 )
-                db.add(communication)
-                
-            except Exception as e:
-                logger.error(f"Error processing student {student.email}: {str(e)}")
-                email_results.append(EmailResult(
-                    student_email=student.email,
-                    student_name=f"{student.first_name} {student.last_name}",
-                    success=False,
-                    message=f"Processing error: {str(e)}"
-                ))
-                emails_failed += 1
-        
-        # Commit all database changes
-        db.commit()
-        
-        success_message = f"Bulk messages sent to student dashboards: {notifications_created} notifications created"
-        # Note: Email delivery is disabled to use dashboard notifications instead
-        
-        return BulkEmailResponse(
-            success=True,
-            message=success_message,
-            emails_sent=emails_sent,
-            emails_failed=emails_failed,
-            notifications_created=notifications_created,
-            performance_data=performance_data,
-            email_results=email_results
-        )
+                performance_data.append(error_performance)
+                # The error record still backs the report for performance templates
+                current_performance = error_performance if with_performance else None
+                email_content = f"Dear {student_name}, there was an error generating your personalized report."
+            
+            # Email delivery is disabled; messages go to the student dashboard
+            email_success = True
+            email_message = "Message sent to student dashboard (email delivery disabled)"
+            
+            email_results.append(EmailResult(
+                student_email=student.email,
+                student_name=current_performance.student_name if current_performance else student_name,
+                success=email_success,
+                message=email_message
+            ))
+            
+            # Prepare structured report data for proper display
+            report_data = None
+            if current_performance:
+                attendance_pct = current_performance.attendance_percentage
+                report_data = {
+                    "student_name": current_performance.student_name,
+                    "roll_no": str(current_performance.roll_no),  # Ensure string
+                    "section": current_performance.section,
+                    "report_date": report_date,
+                    "detailed_grades": current_performance.detailed_grades,  # Individual grades
+                    "subject_performance": current_performance.subject_performance,  # Subject summary
+                    "overall": {
+                        "average": current_performance.average_score,
+                        "grade": current_performance.grade_letter,
+                        "status": current_performance.status
+                    },
+                    "attendance": {
+                        "percentage": attendance_pct,
+                        "status": "Excellent" if attendance_pct >= 95 else 
+                                 "Good" if attendance_pct >= 85 else
+                                 "Needs Improvement"
+                    },
+                    "educator_name": educator_name
+                }
+            
+            notification_rows.append({
+                "student_id": student.id,
+                "educator_id": current_educator.id,
+                "title": request.subject,
+                "message": email_content,
+                "notification_type": NotificationType.GRADE_REPORT,
+                "additional_data": json.dumps(report_data) if report_data else None
+            })
+            
+            # Log communication
+            communication_rows.append({
+                "sender_email": current_educator.email,
+                "recipient_email": student.email,
+                "subject": request.subject,
+                "content": email_content,
+                "email_type": "bulk_email",
+                "status": "sent" if email_success else "failed"
+            })
+            
+        except Exception as e:
+            logger.error(f"Error processing student {student.email}: {str(e)}")
+            email_results.append(EmailResult(
+                student_email=student.email,
+                student_name=student_name,
+                success=False,
+                message=f"Processing error: {str(e)}"
+            ))
+            failures.append({
+                "student_id": student.id,
+                "student_email": student.email,
+                "student_name": student_name,
+                "error": str(e)
+            })
+    
+    if notification_rows:
+        db.execute(insert(Notification), notification_rows)
+    if communication_rows:
+        db.execute(insert(Communication), communication_rows)
+    
+    return {
+        "performance_data": performance_data,
+        "email_results": email_results,
+        "failures": failures,
+        "notifications_created": len(notification_rows),
+        "processed": len(students)
+    }
+
+def run_bulk_email_job(job: bulk_jobs.BulkJob, student_ids: List[int], request: BulkEmailRequest, educator_id: int):
+    """Worker body for a bulk email job: one transaction per chunk"""
+    db = SessionLocal()
+    try:
+        educator = db.query(Educator).filter(Educator.id == educator_id).first()
+        if not educator:
+            raise RuntimeError("Educator not found")
+        with_performance = needs_performance_data(request)
         
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error in bulk email operation: {str(e)}")
+        for chunk in bulk_jobs.chunked(student_ids):
+            try:
+                outcome = process_student_chunk(chunk, request, educator, with_performance, db)
+                db.commit()
+                job.record_chunk(
+                    processed=outcome["processed"],
+                    succeeded=outcome["processed"] - len(outcome["failures"]),
+                    failures=outcome["failures"],
+                    notifications_created=outcome["notifications_created"]
+                )
+            except Exception as e:
+                # A failed chunk is rolled back; its recipients are reported and the job continues
+                db.rollback()
+                logger.error(f"Bulk job {job.id} chunk failed: {str(e)}")
+                job.record_chunk(
+                    processed=len(chunk),
+                    succeeded=0,
+                    failures=[{"student_id": student_id, "error": str(e)} for student_id in chunk]
+                )
+    finally:
+        db.close()
+
+@router.post("/bulk-email", status_code=status.HTTP_202_ACCEPTED)
+@router.post("/bulk-email/jobs", status_code=status.HTTP_202_ACCEPTED)
+def submit_bulk_email_job(
+    request: BulkEmailRequest,
+    current_educator: Educator = Depends(get_current_educator),
+    db: Session = Depends(get_db)
+):
+    """Queue a bulk send and return its job id immediately.
+
+    Recipients are processed by the bulk job worker; poll `progress_url`
+    for counts and per-recipient failures.
+    """
+    student_ids = resolve_target_student_ids(request, db)
+    
+    job = bulk_jobs.create_job(current_educator.id, "bulk_email", len(student_ids))
+    bulk_jobs.submit(job, run_bulk_email_job, student_ids, request, current_educator.id)
+    
+    return {
+        "success": True,
+        "message": f"Bulk send queued for {job.total} students",
+        "job_id": job.id,
+        "status": job.status,
+        "total_recipients": job.total,
+        "progress_url": f"/api/v1/bulk-communication/bulk-email/jobs/{job.id}"
+    }
+
+@router.get("/bulk-email/jobs")
+async def list_bulk_email_jobs(
+    current_educator: Educator = Depends(get_current_educator)
+):
+    """List recent bulk jobs of the current educator"""
+    return {"jobs": [job.to_dict() for job in bulk_jobs.list_jobs(current_educator.id)]}
+
+@router.get("/bulk-email/jobs/{job_id}")
+async def get_bulk_email_job(
+    job_id: str,
+    current_educator: Educator = Depends(get_current_educator)
+):
+    """Progress, throughput and per-recipient failures of a bulk job"""
+    job = bulk_jobs.get_job(job_id)
+    if not job or job.educator_id != current_educator.id:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Internal server error: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
         )
+    return job.to_dict()
 
 @router.get("/sections")
 async def get_sections(db: Session = Depends(get_db)):
@@ -60,7 +60,7 @@ async def send_email(
         print(f"👤 Student found: {student.full_name if student else 'Not a student in system'}")
         
         # Use real email service
-        result = email_service.send_email(
+        result = await email_service.send_email_async(
             to_email=email_request.recipient_email,
             subject=email_request.subject,
             body=f"""
@@ -171,12 +171,8 @@ async def send_bulk_notification(
         if 'parents' in notification_request.target_groups:
             recipients.extend(['parent1@university.edu', 'parent2@university.edu'])
         
-        # Send emails to recipients using email service
-        for recipient in recipients:
-            email_result = email_service.send_email(
-                to_email=recipient,
-                subject=notification_request.subject,
-                body=f"""
+        # Send emails to recipients concurrently over the pooled SMTP connections
+        body = f"""
 {notification_request.message}
 
 ---
@@ -184,14 +180,21 @@ Sent via Educator AI Assistant
 From: {current_educator.full_name} ({current_educator.email})
 Department: {current_educator.department}
 Priority: {notification_request.priority}
-                """.strip(),
-                from_email=f"{current_educator.full_name} <{current_educator.email}>"
-            )
+        """.strip()
+        delivery = await email_service.send_messages_async([
+            {
+                "to_email": recipient,
+                "subject": notification_request.subject,
+                "body": body,
+                "from_email": f"{current_educator.full_name} <{current_educator.email}>"
+            }
+            for recipient in recipients
+        ])
         
         return CommunicationResponse(
             success=True,
             message=f"Bulk notification sent successfully to {len(recipients)} recipients",
-            details=f"Notification type: {notification_request.notification_type}, Recipients: {', '.join(recipients)}"
+            details=f"Notification type: {notification_request.notification_type}, Recipients: {', '.join(recipients)}, Delivered: {delivery['successful']}/{delivery['total']}"
         )
     except Exception as e:
         raise HTTPException(
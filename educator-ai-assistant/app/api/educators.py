@@ -2,15 +2,17 @@
 Educator API endpoints for managing educator profiles and authentication
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import timedelta
 from pydantic import BaseModel, EmailStr
-from app.core.database import get_db
-from app.core.auth import create_access_token, verify_password, get_password_hash, verify_token
+from app.core.database import get_async_db, get_db
+from app.core.auth import create_access_token, get_password_hash_async, login_guard, verify_password_async, verify_token
 from app.models.educator import Educator
+from app.services.principal_cache import load_principal, load_principal_async
 import json
 
 router = APIRouter()
@@ -59,7 +61,17 @@ class Token(BaseModel):
 
 def get_current_educator(token: str = Depends(verify_token), db: Session = Depends(get_db)):
     """Get current authenticated educator"""
-    educator = db.query(Educator).filter(Educator.email == token).first()
+    educator = load_principal(db, Educator, token)
+    if not educator:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Educator not found"
+        )
+    return educator
+
+async def get_current_educator_async(token: str = Depends(verify_token), db: AsyncSession = Depends(get_async_db)):
+    """Get current authenticated educator on the request's async session"""
+    educator = await load_principal_async(db, Educator, token)
     if not educator:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -88,7 +100,7 @@ async def register_educator(educator_data: EducatorCreate, db: Session = Depends
         )
     
     # Create new educator
-    hashed_password = get_password_hash(educator_data.password)
+    hashed_password = await get_password_hash_async(educator_data.password)
     db_educator = Educator(
         email=educator_data.email,
         first_name=educator_data.first_name,
@@ -108,11 +120,16 @@ async def register_educator(educator_data: EducatorCreate, db: Session = Depends
     return EducatorResponse(**db_educator.to_dict())
 
 @router.post("/login", response_model=Token)
-async def login_educator(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_educator(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """Authenticate educator and return access token"""
+    guard_key = login_guard.key(request.client.host if request.client else None, form_data.username)
+    login_guard.check(guard_key)
+    
     educator = db.query(Educator).filter(Educator.email == form_data.username).first()
     
-    if not educator or not verify_password(form_data.password, educator.hashed_password):
+    valid, new_hash = (await verify_password_async(form_data.password, educator.hashed_password)) if educator else (False, None)
+    if not valid:
+        login_guard.record_failure(guard_key)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -124,9 +141,13 @@ async def login_educator(form_data: OAuth2PasswordRequestForm = Depends(), db: S
             detail="Account is inactive"
         )
     
-    # Update last login
+    login_guard.reset(guard_key)
+    
+    # Update last login, and upgrade the hash if the bcrypt cost changed
     from datetime import datetime
     educator.last_login = datetime.utcnow()
+    if new_hash:
+        educator.hashed_password = new_hash
     db.commit()
     
     # Create access token
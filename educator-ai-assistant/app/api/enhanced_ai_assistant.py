@@ -15,7 +15,7 @@ from app.api.educators import get_current_educator
 from app.models.educator import Educator
 from app.agents.gemini_assistant import gemini_assistant, AutonomyMode, Language
 from app.core.config import settings
-import google.generativeai as genai
+from app.services.llm_gateway import llm_gateway
 
 router = APIRouter()
 
@@ -181,13 +181,8 @@ async def public_gemini_chat(request: PublicChatRequest):
     try:
         # Use configured model or override if provided
         model_name = request.model or getattr(settings, 'GEMINI_MODEL', 'gemini-2.5-pro')
-        # Ensure client is configured
-        genai.configure(api_key=getattr(settings, 'GEMINI_API_KEY', None))
-
         prompt = f"You are EduAssist conversational bot. Reply concisely and helpfully.\nUser: {request.message}\nAssistant:"
-        model = genai.GenerativeModel(model_name)
-        resp = model.generate_content(prompt)
-        text = resp.text if hasattr(resp, 'text') else str(resp)
+        text = await llm_gateway.generate(prompt, model_name)
 
         return {"response": text}
     except Exception as e:
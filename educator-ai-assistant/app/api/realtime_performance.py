@@ -5,7 +5,7 @@ from fastapi import WebSocket, WebSocketDisconnect, Depends
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.models.educator import Educator
-from app.api.performance_views import get_overall_performance
+from app.api.performance_views import overall_performance
 import json
 import asyncio
 from typing import List
@@ -58,7 +58,7 @@ async def get_performance_updates(educator_id: int, db: Session):
             return None
             
         # Get updated performance data
-        performance_data = await get_overall_performance(current_educator=educator, db=db)
+        performance_data = overall_performance(db, educator)
         
         return {
             "type": "performance_update",
@@ -3,8 +3,9 @@ Scheduling API endpoints for managing educator schedules and tasks
 """
 
 from fastapi import APIRouter, HTTPException, Depends, status, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
+from typing import Iterator, List, Optional, Dict, Any
 from datetime import datetime, date, time, timedelta
 from pydantic import BaseModel
 from app.core.database import get_db
@@ -12,11 +13,16 @@ from app.api.educators import get_current_educator
 from app.models.educator import Educator
 from app.models.schedule import Schedule, EventType, EventStatus
 from app.models.student import Section, Student
+from app.services import calendar_view, recurrence, schedule_conflicts
 import enum
 import json
+import os
 
 router = APIRouter()
 
+# Calendar ranges spanning more months than this are streamed
+CALENDAR_STREAM_MONTHS = int(os.getenv("CALENDAR_STREAM_MONTHS", "3"))
+
 class TaskType(str, enum.Enum):
     MEETING_TEACHERS = "meeting_teachers"
     PARENT_TEACHER_MEETING = "parent_teacher_meeting"
@@ -68,33 +74,37 @@ async def check_task_conflicts(
     scheduled_date: str,
     scheduled_time: str,
     duration_minutes: int = 60,
+    recurrence_pattern: Optional[str] = None,
+    recurrence_end_date: Optional[datetime] = None,
+    exclude_id: Optional[int] = None,
     current_educator: Educator = Depends(get_current_educator),
     db: Session = Depends(get_db)
 ):
-    """Check for scheduling conflicts"""
+    """Check for scheduling conflicts, including occurrences of recurring events.
+
+    With `recurrence_pattern` (daily, weekdays, weekly, biweekly, monthly, ...)
+    every occurrence of the candidate series is checked.
+    """
+    if not recurrence.is_supported(recurrence_pattern):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported recurrence pattern: {recurrence_pattern}"
+        )
     
     try:
         # Parse the date and time
         start_datetime = datetime.fromisoformat(f"{scheduled_date}T{scheduled_time}")
         end_datetime = start_datetime + timedelta(minutes=duration_minutes)
         
-        # Check for conflicts
-        conflicts = db.query(Schedule).filter(
-            Schedule.educator_id == current_educator.id,
-            Schedule.status != EventStatus.CANCELLED,
-            Schedule.start_datetime < end_datetime,
-            Schedule.end_datetime > start_datetime
-        ).all()
-        
-        conflict_tasks = []
-        for conflict in conflicts:
-            conflict_tasks.append({
-                "id": conflict.id,
-                "title": conflict.title,
-                "start": conflict.start_datetime.isoformat(),
-                "end": conflict.end_datetime.isoformat(),
-                "type": conflict.event_type.value
-            })
+        conflict_tasks = schedule_conflicts.find_conflicts(
+            db,
+            current_educator.id,
+            start_datetime,
+            end_datetime,
+            recurrence_pattern=recurrence_pattern,
+            recurrence_end=recurrence_end_date,
+            exclude_id=exclude_id,
+        )
         
         return {
             "has_conflict": len(conflict_tasks) > 0,
@@ -326,6 +336,34 @@ async def get_tasks(
             detail=f"Error fetching tasks: {str(e)}"
         )
 
+def _stream_calendar(events, batch_size: int = 200) -> Iterator[str]:
+    yield '{"events": ['
+    total = 0
+    batch = []
+    for event_data in events:
+        batch.append(json.dumps(event_data))
+        if len(batch) == batch_size:
+            yield (", " if total else "") + ", ".join(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        yield (", " if total else "") + ", ".join(batch)
+        total += len(batch)
+    yield f'], "total": {total}}}'
+
+def _calendar_range(start_date: Optional[date], end_date: Optional[date]):
+    if not start_date:
+        start_date = date.today()
+    if not end_date:
+        end_date = start_date + timedelta(days=30)
+    return datetime.combine(start_date, time.min), datetime.combine(end_date, time.max)
+
+def calendar_events(db: Session, educator_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None):
+    """Calendar events and tasks between two dates, recurring events expanded"""
+    day_start, day_end = _calendar_range(start_date, end_date)
+    events = list(calendar_view.get_calendar(db, educator_id).events(day_start, day_end))
+    return {"events": events, "total": len(events)}
+
 @router.get("/calendar")
 async def get_calendar_view(
     start_date: Optional[date] = None,
@@ -333,45 +371,14 @@ async def get_calendar_view(
     current_educator: Educator = Depends(get_current_educator),
     db: Session = Depends(get_db)
 ):
-    """Get calendar view with all events and tasks"""
-    
-    if not start_date:
-        start_date = date.today()
-    if not end_date:
-        end_date = start_date + timedelta(days=30)
-    
-    day_start = datetime.combine(start_date, time.min)
-    day_end = datetime.combine(end_date, time.max)
-    
-    all_schedules = db.query(Schedule).filter(
-        Schedule.educator_id == current_educator.id,
-        Schedule.start_datetime >= day_start,
-        Schedule.start_datetime <= day_end
-    ).order_by(Schedule.start_datetime).all()
-    
-    calendar_events = []
-    for schedule in all_schedules:
-        # Extract local date for calendar display (avoid timezone issues)
-        local_date = schedule.start_datetime.date().isoformat()
-        
-        event_data = {
-            "id": schedule.id,
-            "title": schedule.title,
-            "start": schedule.start_datetime.isoformat(),
-            "end": schedule.end_datetime.isoformat(),
-            "start_datetime": schedule.start_datetime.isoformat(),
-            "end_datetime": schedule.end_datetime.isoformat(),
-            "local_date": local_date,  # Add explicit local date for calendar
-            "location": schedule.location or "",
-            "type": schedule.event_type.value,
-            "status": schedule.status.value,
-            "description": schedule.description or "",
-            "participants": []
-        }
-        
-        calendar_events.append(event_data)
-    
-    return {"events": calendar_events, "total": len(calendar_events)}
+    """Get calendar view with all events and tasks, recurring events expanded"""
+    day_start, day_end = _calendar_range(start_date, end_date)
+    if len(calendar_view.months_between(day_start, day_end)) > CALENDAR_STREAM_MONTHS:
+        # Large ranges (a semester, a year) are sent month by month as they
+        # are expanded; the body has the same shape as the small response
+        calendar = calendar_view.get_calendar(db, current_educator.id)
+        return StreamingResponse(_stream_calendar(calendar.events(day_start, day_end)), media_type="application/json")
+    return calendar_events(db, current_educator.id, start_date, end_date)
 
 @router.get("/sections/{section_id}/students")
 async def get_section_students_for_scheduling(
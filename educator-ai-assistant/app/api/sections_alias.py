@@ -1,7 +1,7 @@
 """
 Alias routes to match frontend expectations for sections endpoints.
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.api.educators import get_current_educator
@@ -16,6 +16,9 @@ async def alias_filtered_students(
     pass_status: str | None = None,
     subject_filter: str | None = None,
     search: str | None = None,
+    limit: int | None = Query(None, ge=1, le=1000),
+    after_id: int | None = None,
+    response: Response = None,
     current_educator: Educator = Depends(get_current_educator),
     db: Session = Depends(get_db),
 ):
@@ -25,6 +28,9 @@ async def alias_filtered_students(
         pass_status=pass_status,
         subject_filter=subject_filter,
         search=search,
+        limit=limit,
+        after_id=after_id,
+        response=response,
         current_educator=current_educator,
         db=db,
     )
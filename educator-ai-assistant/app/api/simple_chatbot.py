@@ -2,12 +2,15 @@
 
 This router is the frontend entrypoint for the simple chatbot. It delegates
 intent detection and execution to the server-side `intent_router` service.
-It forwards the incoming Authorization header so the service can call the
-internal student APIs to resolve names and perform actions.
+It passes the authenticated educator and the request's database session so
+the service can resolve names and perform actions in-process.
 """
 from typing import Any, Dict
-from fastapi import APIRouter, Body, Depends, Request
+from fastapi import APIRouter, Body, Depends
+from sqlalchemy.orm import Session
 
+from app.core.database import get_db
+from app.services.intent_pipeline import intent_pipeline
 from app.services.intent_router import detect_and_execute
 from app.api.educators import get_current_educator
 from app.models.educator import Educator
@@ -17,9 +20,9 @@ router = APIRouter()
 
 @router.post("/message")
 async def send_message(
-    request: Request,
     payload: Dict[str, Any] = Body(...),
     current_educator: Educator = Depends(get_current_educator),
+    db: Session = Depends(get_db),
 ) -> Dict[str, Any]:
     """Accept a JSON payload and route to intent detection + execution.
 
@@ -37,8 +40,6 @@ async def send_message(
     if not message:
         return {"error": "message is required"}
 
-    auth_header = request.headers.get("authorization")
-
     # Delegate to intent router which will call the model for intent
     # extraction and then perform server-side execution when requested.
     result = await detect_and_execute(
@@ -46,9 +47,15 @@ async def send_message(
         history=history,
         language=language,
         auto_execute=auto_execute,
-        auth_header=auth_header,
-        educator_id=current_educator.id,
+        educator=current_educator,
+        db=db,
     )
 
     return result
     return result
+
+
+@router.get("/intent-stats")
+async def intent_stats(current_educator: Educator = Depends(get_current_educator)) -> Dict[str, Any]:
+    """Per-tier hit rates and detection latency (rules, classifier, llm)."""
+    return intent_pipeline.tier_stats()
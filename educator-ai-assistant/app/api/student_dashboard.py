@@ -2,7 +2,7 @@
 Student dashboard API endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_, or_
@@ -20,6 +20,8 @@ from app.models.report import SentReport, ReportStatus, RecipientType as ReportR
 from app.models.meeting_schedule import Meeting, MeetingRecipient, RecipientType
 from app.models import Educator
 from app.api.students_auth import get_current_student
+from app.services import notification_feed
+from app.services.grade_pipeline import student_passed
 from datetime import datetime, date, timedelta
 
 router = APIRouter()
@@ -67,6 +69,14 @@ class StudentNotification(BaseModel):
     is_read: bool
     message_type: str
     report_data: Optional[dict] = None  # Structured report data
+    has_report_data: bool = False  # Feed items: fetch report_data from /notifications/{id}/report-data
+
+
+class StudentNotificationPage(BaseModel):
+    items: List[StudentNotification]
+    next_cursor: Optional[int] = None  # pass as `before` for older items
+    latest_cursor: Optional[int] = None  # pass as `since` to poll for newer items
+    has_more: bool = False
 
 
 class StudentMessageItem(BaseModel):
@@ -158,25 +168,19 @@ async def get_student_marks(current_student: Student = Depends(get_current_stude
     passed_count = 0
     
     for grade in grades:
-        # Calculate percentage if not already calculated
-        if grade.percentage is None:
-            grade.calculate_percentage()
-        
-        # Calculate grade letter if not already calculated
-        if grade.grade_letter is None:
-            grade.calculate_grade_letter()
-        
+        # percentage, grade_letter and is_passed are derived when the grade is written
+        percentage = grade.percentage or 0.0
         subject_grade = SubjectGrade(
             subject_name=grade.subject.name,
             subject_code=grade.subject.code,
             marks_obtained=grade.marks_obtained,
             total_marks=grade.total_marks,
-            percentage=grade.percentage,
-            grade_letter=grade.grade_letter,
-            is_passed=grade.is_passed
+            percentage=percentage,
+            grade_letter=grade.grade_letter or "",
+            is_passed=bool(grade.is_passed)
         )
         subject_grades.append(subject_grade)
-        total_percentage += grade.percentage
+        total_percentage += percentage
         
         if grade.is_passed:
             passed_count += 1
@@ -185,7 +189,7 @@ async def get_student_marks(current_student: Student = Depends(get_current_stude
     total_subjects = len(grades)
     overall_average = total_percentage / total_subjects if total_subjects > 0 else 0
     failed_subjects = total_subjects - passed_count
-    overall_status = "Pass" if passed_count == total_subjects else "Fail"
+    overall_status = "Pass" if student_passed(overall_average) else "Fail"
     
     return StudentMarks(
         grades=subject_grades,
@@ -196,17 +200,34 @@ async def get_student_marks(current_student: Student = Depends(get_current_stude
         overall_status=overall_status
     )
 
+def _student_notification(notification: Notification, has_report_data: bool, report_data: Optional[dict] = None) -> StudentNotification:
+    return StudentNotification(
+        id=notification.id,
+        title=notification.title,
+        message=notification.message,
+        from_educator=notification.educator.full_name if notification.educator else "System",
+        sent_at=convert_to_local_time(notification.created_at),
+        is_read=(notification.status == NotificationStatus.READ),
+        message_type=notification.notification_type.value if notification.notification_type else "info",
+        report_data=report_data,
+        has_report_data=has_report_data
+    )
+
 @router.get("/notifications", response_model=List[StudentNotification])
 async def get_student_notifications(current_student: Student = Depends(get_current_student), db: Session = Depends(get_db)):
-    """Get notifications for the student"""
-    
-    student_notifications = []
+    """Get all notifications for the student, newest first, with report data inlined.
+
+    Prefer /notifications/feed, which pages and loads report data on demand.
+    """
     
     # Get notifications from the Notification model (new bulk communication system)
-    portal_notifications = db.query(Notification).filter(
+    portal_notifications = db.query(Notification).options(
+        joinedload(Notification.educator)
+    ).filter(
         Notification.student_id == current_student.id
-    ).order_by(Notification.created_at.desc()).all()
+    ).order_by(Notification.created_at.desc(), Notification.id.desc()).all()
     
+    student_notifications = []
     for notification in portal_notifications:
         # Parse report data if available
         report_data = None
@@ -215,28 +236,50 @@ async def get_student_notifications(current_student: Student = Depends(get_curre
                 report_data = json.loads(notification.additional_data)
             except:
                 report_data = None
-        
-        student_notification = StudentNotification(
-            id=notification.id,
-            title=notification.title,
-            message=notification.message,
-            from_educator=notification.educator.full_name if notification.educator else "System",
-            sent_at=convert_to_local_time(notification.created_at),
-            is_read=(notification.status == NotificationStatus.READ),
-            message_type=notification.notification_type.value if notification.notification_type else "info",
-            report_data=report_data
+        student_notifications.append(
+            _student_notification(notification, notification.additional_data is not None, report_data)
         )
-        student_notifications.append(student_notification)
     
     # Note: Removed old Communication model fetching to avoid duplicates
     # All notifications now come through the Notification model from bulk communication
     
-    # Sort all notifications by sent_at descending
-    student_notifications.sort(key=lambda x: x.sent_at, reverse=True)
-    
     return student_notifications
 
 
+@router.get("/notifications/feed", response_model=StudentNotificationPage)
+async def get_student_notification_feed(
+    limit: int = Query(notification_feed.DEFAULT_PAGE_SIZE, ge=1, le=notification_feed.MAX_PAGE_SIZE),
+    before: Optional[int] = Query(None, description="Return notifications older than this cursor"),
+    since: Optional[int] = Query(None, description="Return only notifications newer than this cursor"),
+    current_student: Student = Depends(get_current_student),
+    db: Session = Depends(get_db)
+):
+    """Page through the student's notifications, or pull only new ones with `since`"""
+    page = notification_feed.student_feed(db, current_student.id, limit=limit, before=before, since=since)
+    return StudentNotificationPage(
+        items=[_student_notification(notification, has_report) for notification, has_report in page["items"]],
+        next_cursor=page["next_cursor"],
+        latest_cursor=page["latest_cursor"],
+        has_more=page["has_more"]
+    )
+
+
+@router.get("/notifications/{notification_id}/report-data")
+async def get_student_notification_report_data(
+    notification_id: int,
+    current_student: Student = Depends(get_current_student),
+    db: Session = Depends(get_db)
+):
+    """Structured report data attached to one of the student's notifications"""
+    try:
+        report_data = notification_feed.report_data(db, current_student.id, notification_id)
+    except LookupError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Notification not found")
+    if report_data is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No report data for this notification")
+    return report_data
+
+
 @router.get("/messages", response_model=List[StudentMessageItem])
 async def get_student_messages(
     view: Literal["student", "parent"] = "student",
@@ -17,6 +17,7 @@ from app.models.student import Student
 from app.models.message import Message, MessageTemplate
 from app.models.notification import Notification, NotificationType
 from app.models.report import SentReport, RecipientType, ReportType
+from app.services import message_summary
 
 router = APIRouter()
 
@@ -290,48 +291,12 @@ async def get_students_message_summary(
     db: Session = Depends(get_db)
 ):
     """Get message summary for all students in educator's sections"""
-    
-    # Get all students in educator's sections
-    students = db.query(Student).filter(
-        Student.section_id.in_(
-            db.query(Student.section_id).distinct()
-        )
-    ).all()
-    
-    summaries = []
-    for student in students:
-        # Get unread message count
-        unread_count = db.query(Message).filter(
-            and_(
-                Message.sender_id == current_educator.id,
-                Message.receiver_id == student.id,
-                Message.is_read == False
-            )
-        ).count()
-        
-        # Get last message
-        last_message = db.query(Message).filter(
-            and_(
-                Message.sender_id == current_educator.id,
-                Message.receiver_id == student.id
-            )
-        ).order_by(desc(Message.created_at)).first()
-        
-        preview = ""
-        last_date = None
-        if last_message:
-            preview = last_message.message[:50] + "..." if len(last_message.message) > 50 else last_message.message
-            last_date = last_message.created_at
-        
-        summaries.append(StudentMessageSummary(
-            student_id=student.id,
-            student_name=f"{student.first_name} {student.last_name}",
-            unread_count=unread_count,
-            last_message_date=last_date,
-            last_message_preview=preview
-        ))
-    
-    return summaries
+
+    # One windowed query regardless of roster size (see app.services.message_summary)
+    return [
+        StudentMessageSummary(**summary)
+        for summary in message_summary.student_summaries(db, current_educator.id)
+    ]
 
 # Message Templates
 @router.post("/templates", response_model=MessageTemplateResponse)
@@ -2,16 +2,19 @@
 Student API endpoints for managing students, sections, and bulk operations
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends, status, BackgroundTasks, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
-from app.core.database import get_db
-from app.api.educators import get_current_educator
+from app.core.database import get_async_db, get_db
+from app.api.educators import get_current_educator, get_current_educator_async
 from app.models.educator import Educator
 from app.models.student import Section, Student, Subject, Grade
-from app.services.email_service import EmailService
+from app.services.email_service import email_service
+from app.services import student_grid
+from app.services.grade_pipeline import student_passed
 import json
 
 router = APIRouter()
@@ -71,11 +74,7 @@ class StudentWithGrades(BaseModel):
     passed_subjects: int
     failed_subjects: int
 
-@router.get("/sections", response_model=List[SectionResponse])
-async def get_my_sections(
-    current_educator: Educator = Depends(get_current_educator),
-    db: Session = Depends(get_db)
-):
+def educator_sections(db: Session, current_educator: Educator):
     """Get all sections for the current educator"""
     sections = db.query(Section).filter(Section.educator_id == current_educator.id).all()
     
@@ -103,12 +102,15 @@ async def get_my_sections(
     
     return result
 
-@router.get("/sections/{section_id}/students", response_model=List[StudentResponse])
-async def get_section_students(
-    section_id: int,
-    current_educator: Educator = Depends(get_current_educator),
-    db: Session = Depends(get_db)
+@router.get("/sections", response_model=List[SectionResponse])
+async def get_my_sections(
+    current_educator: Educator = Depends(get_current_educator_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
+    """Get all sections for the current educator"""
+    return await db.run_sync(educator_sections, current_educator)
+
+def section_students(db: Session, current_educator: Educator, section_id: int):
     """Get all students in a specific section"""
     # Verify section belongs to current educator
     section = db.query(Section).filter(
@@ -136,12 +138,16 @@ async def get_section_students(
         is_active=s.is_active
     ) for s in students]
 
-@router.get("/students/{student_id}/grades", response_model=StudentWithGrades)
-async def get_student_grades(
-    student_id: int,
-    current_educator: Educator = Depends(get_current_educator),
-    db: Session = Depends(get_db)
+@router.get("/sections/{section_id}/students", response_model=List[StudentResponse])
+async def get_section_students(
+    section_id: int,
+    current_educator: Educator = Depends(get_current_educator_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
+    """Get all students in a specific section"""
+    return await db.run_sync(section_students, current_educator, section_id)
+
+def student_grades(db: Session, current_educator: Educator, student_id: int):
     """Get detailed grades for a specific student"""
     # Verify student belongs to educator's section
     student = db.query(Student).join(Section).filter(
@@ -206,6 +212,15 @@ async def get_student_grades(
         failed_subjects=failed_count
     )
 
+@router.get("/students/{student_id}/grades", response_model=StudentWithGrades)
+async def get_student_grades(
+    student_id: int,
+    current_educator: Educator = Depends(get_current_educator_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get detailed grades for a specific student"""
+    return await db.run_sync(student_grades, current_educator, student_id)
+
 class StudentWithGradesResponse(BaseModel):
     id: int
     student_id: str
@@ -229,10 +244,17 @@ async def get_filtered_section_students(
     pass_status: Optional[str] = None,  # "passed", "failed", or None for all
     subject_filter: Optional[str] = None,  # e.g., "Math<40" or "Science>=80"
     search: Optional[str] = None,  # Search by name
+    limit: Optional[int] = Query(None, ge=1, le=1000),  # Page size; all students when omitted
+    after_id: Optional[int] = None,  # Keyset cursor from the X-Next-Cursor header
+    response: Response = None,
     current_educator: Educator = Depends(get_current_educator),
     db: Session = Depends(get_db)
 ):
-    """Get filtered students in a section with their grades and performance"""
+    """Get filtered students in a section with their grades and performance.
+
+    Pagination is keyset-based: pass the X-Next-Cursor response header back
+    as `after_id` to fetch the next page.
+    """
     
     # Debug logging
     
@@ -256,35 +278,29 @@ async def get_filtered_section_students(
             detail="Section not found"
         )
     
-    # Get all students in the section with their grades
-    students_query = db.query(Student).filter(Student.section_id == section_id)
-    
-    # Apply name search filter
-    if search:
-        students_query = students_query.filter(
-            (Student.first_name.ilike(f"%{search}%")) | 
-            (Student.last_name.ilike(f"%{search}%"))
-        )
+    # Filters run in SQL; grades for the whole page come back in one query
+    students, next_cursor = student_grid.filtered_students(
+        db,
+        section_id,
+        pass_status=pass_status,
+        subject_filter=subject_filter,
+        search=search,
+        after_id=after_id,
+        limit=limit,
+    )
+    if next_cursor is not None and response is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
     
-    students = students_query.all()
+    grades_map = student_grid.grades_by_student(db, [student.id for student in students])
     
     result = []
     for student in students:
-        # Get grades for this student
-        grades = []
-        try:
-            grades = db.query(Grade).join(Subject).filter(
-                Grade.student_id == student.id
-            ).options(joinedload(Grade.subject)).all()
-        except Exception:
-            # If grades query fails or no grades exist, continue with empty grades
-            grades = []
+        grades = grades_map.get(student.id, [])
         
         grade_responses = []
         total_percentage = 0
         passed_count = 0
         failed_count = 0
-        subject_scores = {}
         
         for grade in grades:
             grade_responses.append(GradeResponse(
@@ -302,7 +318,6 @@ async def get_filtered_section_students(
             ))
             
             total_percentage += grade.percentage
-            subject_scores[grade.subject.name] = grade.percentage
             
             if grade.is_passed:
                 passed_count += 1
@@ -310,39 +325,7 @@ async def get_filtered_section_students(
                 failed_count += 1
         
         overall_average = total_percentage / len(grades) if grades else 0
-        is_overall_passed = passed_count > failed_count if grades else True
-        
-        # Apply pass/fail filter only if there are grades
-        if grades:
-            if pass_status == "passed" and not is_overall_passed:
-                continue
-            elif pass_status == "failed" and is_overall_passed:
-                continue
-        
-        # Apply subject performance filter (e.g., "Math<40") only if there are grades
-        if subject_filter and subject_scores:
-            try:
-                if '<' in subject_filter:
-                    subject_name, threshold = subject_filter.split('<')
-                    threshold = float(threshold)
-                    if subject_name.strip() in subject_scores:
-                        if subject_scores[subject_name.strip()] >= threshold:
-                            continue
-                elif '>=' in subject_filter:
-                    subject_name, threshold = subject_filter.split('>=')
-                    threshold = float(threshold)
-                    if subject_name.strip() in subject_scores:
-                        if subject_scores[subject_name.strip()] < threshold:
-                            continue
-                elif '>' in subject_filter:
-                    subject_name, threshold = subject_filter.split('>')
-                    threshold = float(threshold)
-                    if subject_name.strip() in subject_scores:
-                        if subject_scores[subject_name.strip()] <= threshold:
-                            continue
-            except (ValueError, IndexError):
-                # Invalid filter format, ignore
-                pass
+        is_overall_passed = student_passed(overall_average) if grades else True
         
         result.append(StudentWithGradesResponse(
             id=student.id,
@@ -380,12 +363,7 @@ class StudentProfileResponse(BaseModel):
     guardian_contacts: List[Dict[str, Any]]
     academic_progress: Dict[str, Any]
 
-@router.get("/students/{student_id}/profile", response_model=StudentProfileResponse)
-async def get_student_profile(
-    student_id: int,
-    current_educator: Educator = Depends(get_current_educator),
-    db: Session = Depends(get_db)
-):
+def student_profile(db: Session, current_educator: Educator, student_id: int):
     """Get detailed student profile with all relevant information"""
     # Verify student belongs to educator's section
     student = db.query(Student).join(Section).filter(
@@ -439,7 +417,7 @@ async def get_student_profile(
             failed_count += 1
     
     overall_average = total_percentage / len(grades) if grades else 0
-    is_overall_passed = passed_count > failed_count
+    is_overall_passed = student_passed(overall_average)
     
     # Create student with grades response
     student_with_grades = StudentWithGradesResponse(
@@ -555,12 +533,16 @@ async def get_student_profile(
         academic_progress=academic_progress
     )
 
-@router.get("/sections/{section_id}/analytics")
-async def get_section_analytics(
-    section_id: int,
-    current_educator: Educator = Depends(get_current_educator),
-    db: Session = Depends(get_db)
+@router.get("/students/{student_id}/profile", response_model=StudentProfileResponse)
+async def get_student_profile(
+    student_id: int,
+    current_educator: Educator = Depends(get_current_educator_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
+    """Get detailed student profile with all relevant information"""
+    return await db.run_sync(student_profile, current_educator, student_id)
+
+def section_analytics(db: Session, current_educator: Educator, section_id: int):
     """Get analytics for a section (pass/fail rates, averages, etc.)"""
     # Verify section belongs to current educator
     section = db.query(Section).filter(
@@ -623,6 +605,15 @@ async def get_section_analytics(
     
     return analytics
 
+@router.get("/sections/{section_id}/analytics")
+async def get_section_analytics(
+    section_id: int,
+    current_educator: Educator = Depends(get_current_educator_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get analytics for a section (pass/fail rates, averages, etc.)"""
+    return await db.run_sync(section_analytics, current_educator, section_id)
+
 async def send_bulk_email_task(
     recipients: List[Dict],
     subject: str,
@@ -632,13 +623,12 @@ async def send_bulk_email_task(
     db: Session
 ):
     """Background task to send bulk emails"""
-    email_service = EmailService()
+    messages = []
     
     for recipient in recipients:
-        try:
-            # Prepare personalized email content
-            if template_type == "grades":
-                body = f"""Dear {recipient['student_name']},
+        # Prepare personalized email content
+        if template_type == "grades":
+            body = f"""Dear {recipient['student_name']},
 
 Here are your recent academic results:
 
@@ -652,35 +642,35 @@ Subjects Failed: {recipient['failed_subjects']}
 
 Best regards,
 {educator_name}"""
-            
-            elif template_type == "general":
-                body = f"""Dear {recipient['student_name']},
+        
+        elif template_type == "general":
+            body = f"""Dear {recipient['student_name']},
 
 {custom_message}
 
 Best regards,
 {educator_name}"""
-            
-            else:  # custom
-                body = f"""Dear {recipient['student_name']},
+        
+        else:  # custom
+            body = f"""Dear {recipient['student_name']},
 
 {custom_message}
 
 Best regards,
 {educator_name}"""
-            
-            # Send email
-            result = await email_service.send_email(
-                recipient_email=recipient['email'],
-                subject=subject,
-                body=body,
-                sender_email=f"{educator_name.lower().replace(' ', '.')}@university.edu"
-            )
-            
-            print(f"Email sent to {recipient['email']}: {result['status']}")
-            
-        except Exception as e:
-            print(f"Failed to send email to {recipient['email']}: {str(e)}")
+        
+        messages.append({
+            "to_email": recipient['email'],
+            "subject": subject,
+            "body": body,
+            "from_email": f"{educator_name.lower().replace(' ', '.')}@university.edu"
+        })
+    
+    # Delivered concurrently over the pooled SMTP connections
+    summary = await email_service.send_messages_async(messages)
+    
+    for result in summary["results"]:
+        print(f"Email to {result['details']['to']}: {'sent' if result['success'] else 'failed'}")
 
 @router.post("/bulk-email")
 async def send_bulk_email(
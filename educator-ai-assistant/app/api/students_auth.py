@@ -2,17 +2,18 @@
 Student authentication endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
 from app.core.database import get_db
 from app.models.student import Student
 from app.models.educator import Educator
-from app.core.auth import verify_password, create_access_token
+from app.core.auth import create_access_token, login_guard, verify_password_async
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from app.core.config import settings
+from app.services.principal_cache import load_principal
 
 router = APIRouter()
 security = HTTPBearer()
@@ -43,9 +44,9 @@ class StudentProfile(BaseModel):
         from_attributes = True
 
 # Authentication functions
-def authenticate_student(db: Session, email: str, password: str):
-    """Authenticate a student"""
-    print(f"🔍 API authenticate_student called with email: {email}, password: {password}")
+async def authenticate_student(db: Session, email: str, password: str):
+    """Authenticate a student; bcrypt runs on the hashing pool"""
+    print(f"🔍 API authenticate_student called with email: {email}")
     
     student = db.query(Student).filter(Student.email == email).first()
     print(f"🔍 Student query result: {student}")
@@ -57,12 +58,17 @@ def authenticate_student(db: Session, email: str, password: str):
     print(f"✅ Student found: {student.first_name} {student.last_name}")
     print(f"🔑 Stored hash: {student.password_hash[:50]}...")
     
-    password_valid = verify_password(password, student.password_hash)
+    password_valid, new_hash = await verify_password_async(password, student.password_hash)
     print(f"🔐 Password verification result: {password_valid}")
     
     if not password_valid:
         print(f"❌ Password verification failed for {email}")
         return False
+    
+    if new_hash:
+        # bcrypt cost changed since this hash was made
+        student.password_hash = new_hash
+        db.commit()
         
     print(f"✅ Authentication successful for {email}")
     return student
@@ -87,7 +93,7 @@ def get_current_student(credentials: HTTPAuthorizationCredentials = Depends(secu
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    student = db.query(Student).filter(Student.email == email).first()
+    student = load_principal(db, Student, email)
     if student is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -98,10 +104,14 @@ def get_current_student(credentials: HTTPAuthorizationCredentials = Depends(secu
 
 # Endpoints
 @router.post("/login", response_model=StudentLoginResponse)
-async def login_student(student_data: StudentLogin, db: Session = Depends(get_db)):
+async def login_student(student_data: StudentLogin, request: Request, db: Session = Depends(get_db)):
     """Student login endpoint"""
-    student = authenticate_student(db, student_data.email, student_data.password)
+    guard_key = login_guard.key(request.client.host if request.client else None, student_data.email)
+    login_guard.check(guard_key)
+    
+    student = await authenticate_student(db, student_data.email, student_data.password)
     if not student:
+        login_guard.record_failure(guard_key)
         # Helpful hint: if this is an educator email, direct user to educator login
         maybe_educator = db.query(Educator).filter(Educator.email == student_data.email).first()
         hint = "Incorrect email or password"
@@ -113,6 +123,8 @@ async def login_student(student_data: StudentLogin, db: Session = Depends(get_db
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    login_guard.reset(guard_key)
+    
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -16,6 +16,8 @@ from app.models.educator import Educator
 from app.models.student import Section, Student, Subject, Grade
 from app.models.notification import Notification, NotificationType, NotificationStatus
 from app.api.students import get_filtered_section_students
+from app.services.grade_pipeline import average_percentage, student_passed
+from app.services.section_totals import get_section_totals
 
 router = APIRouter()
 @router.get("/sections/{section_id}/students/filtered")
@@ -123,49 +125,19 @@ async def get_dashboard_overview(
     section_summaries = []
     total_students = 0
     total_passed = 0
-    all_averages = []
+    average_sum = 0.0
+    average_count = 0
+    
+    # Per-section totals come from one grades-with-subject join for the
+    # sections that are not cached yet (see app.services.section_totals)
+    totals_by_section = get_section_totals(db, [section.id for section in sections])
     
     for section in sections:
-        # Get students in this section with their grades
-        students_query = db.query(Student).filter(Student.section_id == section.id)
-        students = students_query.all()
-        
-        section_students_count = len(students)
-        section_passed = 0
-        section_averages = []
-        subject_totals = {}
-        
-        for student in students:
-            # Get all grades for this student
-            grades = db.query(Grade).filter(Grade.student_id == student.id).all()
-            
-            if grades:
-                student_total = sum(grade.marks_obtained for grade in grades)
-                student_average = student_total / len(grades)
-                section_averages.append(student_average)
-                all_averages.append(student_average)
-                
-                # Check if student passed (average >= 40)
-                if student_average >= 40:
-                    section_passed += 1
-                
-                # Track subject averages
-                for grade in grades:
-                    subject = db.query(Subject).filter(Subject.id == grade.subject_id).first()
-                    if subject:
-                        if subject.name not in subject_totals:
-                            subject_totals[subject.name] = []
-                        subject_totals[subject.name].append(grade.marks_obtained)
-        
-        # Calculate section statistics
-        section_average = sum(section_averages) / len(section_averages) if section_averages else 0
+        totals = totals_by_section[section.id]
+        section_students_count = totals.student_count
+        section_passed = totals.passed
         section_pass_rate = (section_passed / section_students_count * 100) if section_students_count > 0 else 0
         
-        # Calculate subject averages for this section
-        subject_averages = {}
-        for subject_name, scores in subject_totals.items():
-            subject_averages[subject_name] = sum(scores) / len(scores) if scores else 0
-        
         section_summary = SectionSummary(
             id=section.id,
             name=section.name,
@@ -173,18 +145,20 @@ async def get_dashboard_overview(
             passed_students=section_passed,
             failed_students=section_students_count - section_passed,
             pass_rate=round(section_pass_rate, 1),
-            average_score=round(section_average, 2),
-            subject_averages=subject_averages
+            average_score=round(totals.average, 2),
+            subject_averages=totals.subject_averages()
         )
         
         section_summaries.append(section_summary)
         total_students += section_students_count
         total_passed += section_passed
+        average_sum += totals.average_sum
+        average_count += totals.average_count
     
     # Calculate overall statistics
     total_failed = total_students - total_passed
     overall_pass_rate = (total_passed / total_students * 100) if total_students > 0 else 0
-    overall_average = sum(all_averages) / len(all_averages) if all_averages else 0
+    overall_average = average_sum / average_count if average_count else 0
     
     # Get recent activity (simplified for now)
     recent_activity = [
@@ -227,9 +201,9 @@ async def get_sections(
         for student in students:
             grades = db.query(Grade).filter(Grade.student_id == student.id).all()
             if grades:
-                student_avg = sum(g.marks_obtained for g in grades) / len(grades)
+                student_avg = average_percentage(g.percentage for g in grades)
                 averages.append(student_avg)
-                if student_avg >= 40:
+                if student_passed(student_avg):
                     passed_count += 1
                 
                 for grade in grades:
@@ -298,8 +272,7 @@ async def get_section_students(
         grades = db.query(Grade).join(Subject).filter(Grade.student_id == student.id).all()
         
         grade_details = []
-        total_marks = 0
-        grade_count = 0
+        percentages = []
         
         for grade in grades:
             subject = db.query(Subject).filter(Subject.id == grade.subject_id).first()
@@ -312,11 +285,10 @@ async def get_section_students(
                     "grade_letter": grade.grade_letter,
                     "passed": grade.is_passed
                 })
-                total_marks += grade.marks_obtained
-                grade_count += 1
+                percentages.append(grade.percentage)
         
-        average_score = total_marks / grade_count if grade_count > 0 else 0
-        status = "Pass" if average_score >= 40 else "Fail"
+        average_score = average_percentage(percentages)
+        status = "Pass" if student_passed(average_score) else "Fail"
         
         # Apply status filter
         if status_filter and status.lower() != status_filter.lower():
@@ -429,7 +401,7 @@ async def get_subject_statistics(
             continue
         
         marks = [grade.marks_obtained for grade in grades]
-        passed_count = sum(1 for mark in marks if mark >= 40)
+        passed_count = sum(1 for grade in grades if grade.is_passed)
         failed_count = len(marks) - passed_count
         
         subject_stats.append(SubjectStatistics(
@@ -1,17 +1,47 @@
 """
 Authentication and authorization utilities
+
+bcrypt costs ~100ms of CPU per hash or verify. Async handlers use
+`verify_password_async` / `get_password_hash_async`, which run on a dedicated
+bounded thread pool (bcrypt releases the GIL) so a login burst does not
+stall the event loop:
+- PASSWORD_HASH_WORKERS threads (default: CPU count, at most 4)
+- at most PASSWORD_HASH_MAX_PENDING queued jobs (default 256); beyond that
+  logins get 503 with Retry-After instead of queueing without bound
+- BCRYPT_ROUNDS sets the cost; hashes made with another cost verify as
+  before and come back with a replacement hash for the caller to store
+
+`login_guard` limits failed logins per client and account
+(LOGIN_MAX_FAILURES within LOGIN_FAILURE_WINDOW_SECONDS, default 10 per 300s).
 """
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from threading import Lock
+from typing import Deque, Dict, Optional, Tuple
+import asyncio
+import os
+import time
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.config import settings
 
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "256"))
+LOGIN_MAX_FAILURES = int(os.getenv("LOGIN_MAX_FAILURES", "10"))
+LOGIN_FAILURE_WINDOW_SECONDS = float(os.getenv("LOGIN_FAILURE_WINDOW_SECONDS", "300"))
+LOGIN_GUARD_MAX_KEYS = 10000
+
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="pwhash")
+_pending_hashes = 0
+_pending_lock = Lock()
 
 # Token authentication
 security = HTTPBearer()
@@ -24,6 +54,100 @@ def get_password_hash(password: str) -> str:
     """Generate password hash"""
     return pwd_context.hash(password)
 
+async def _run_hashing(fn, *args):
+    global _pending_hashes
+    with _pending_lock:
+        if _pending_hashes >= PASSWORD_HASH_MAX_PENDING:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent sign-ins, please retry",
+                headers={"Retry-After": "1"},
+            )
+        _pending_hashes += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+    finally:
+        with _pending_lock:
+            _pending_hashes -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify off the event loop. Returns (valid, replacement hash or None).
+
+    A replacement is returned when the stored hash uses other cost
+    parameters than the current ones; the caller should store it.
+    """
+    if not hashed_password:
+        return False, None
+    try:
+        return await _run_hashing(pwd_context.verify_and_update, plain_password, hashed_password)
+    except ValueError:
+        # Not a recognised hash
+        return False, None
+
+async def get_password_hash_async(password: str) -> str:
+    """Generate password hash off the event loop"""
+    return await _run_hashing(pwd_context.hash, password)
+
+def shutdown_hashing() -> None:
+    _hash_executor.shutdown(wait=False, cancel_futures=True)
+
+class LoginGuard:
+    """Sliding-window limit of failed logins per key (client address + account)."""
+
+    def __init__(self, max_failures: int = LOGIN_MAX_FAILURES, window: float = LOGIN_FAILURE_WINDOW_SECONDS):
+        self.max_failures = max_failures
+        self.window = window
+        self._failures: Dict[str, Deque[float]] = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def key(client: Optional[str], account: str) -> str:
+        return f"{client or '-'}|{(account or '').strip().lower()}"
+
+    def _recent(self, key: str, now: float) -> Optional[Deque[float]]:
+        failures = self._failures.get(key)
+        if failures is None:
+            return None
+        while failures and failures[0] <= now - self.window:
+            failures.popleft()
+        if not failures:
+            del self._failures[key]
+            return None
+        return failures
+
+    def check(self, key: str) -> None:
+        """Raise 429 if the key is over its failure budget."""
+        if self.max_failures <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            failures = self._recent(key, now)
+            if failures is None or len(failures) < self.max_failures:
+                return
+            retry_after = int(failures[0] + self.window - now) + 1
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts, please try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    def record_failure(self, key: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._failures) >= LOGIN_GUARD_MAX_KEYS:
+                for stale in list(self._failures):
+                    self._recent(stale, now)
+            failures = self._recent(key, now)
+            if failures is None:
+                failures = self._failures[key] = deque()
+            failures.append(now)
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._failures.pop(key, None)
+
+login_guard = LoginGuard()
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
     to_encode = data.copy()
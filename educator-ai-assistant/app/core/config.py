@@ -43,6 +43,18 @@ class Settings(BaseSettings):
         or _deploy_file_url
         or ""
     )
+    # Async (asyncpg) engine; derived from DATABASE_URL when unset
+    ASYNC_DATABASE_URL: Optional[str] = os.getenv("ASYNC_DATABASE_URL")
+    # Connection pools (per engine and per worker process)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    ASYNC_DB_POOL_SIZE: int = 10
+    ASYNC_DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # seconds to wait for a pooled connection
+    DB_POOL_RECYCLE: int = 1800  # seconds; below typical server/proxy idle timeouts
+    DB_STATEMENT_TIMEOUT_MS: int = 30000  # server-side statement_timeout, 0 disables
+    # asyncpg prepared statement cache; set 0 behind pgbouncer in transaction mode
+    ASYNC_DB_STATEMENT_CACHE_SIZE: int = 100
 
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
@@ -69,6 +81,15 @@ class Settings(BaseSettings):
     SMTP_PORT: int = 587
     EMAIL_USERNAME: Optional[str] = None
     EMAIL_PASSWORD: Optional[str] = None
+    # SMTP delivery engine (connection pool, concurrency, throttling)
+    SMTP_STARTTLS: bool = True
+    SMTP_TIMEOUT: float = 30.0
+    SMTP_POOL_SIZE: int = 4
+    SMTP_MAX_IN_FLIGHT: int = 8
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = 100
+    SMTP_DOMAIN_RATE_LIMIT: float = 5.0  # messages per second per recipient domain, 0 disables
+    SMTP_DOMAIN_BURST: int = 10
+    SMTP_MAX_RETRIES: int = 3
 
     # University system integration
     UNIVERSITY_API_BASE_URL: Optional[str] = None
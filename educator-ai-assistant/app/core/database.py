@@ -1,8 +1,21 @@
 """
 Database configuration and initialization
+
+Two engines share the same database:
+- `engine` / `SessionLocal` / `get_db`: synchronous psycopg2 sessions
+- `async_engine` / `AsyncSessionLocal` / `get_async_db`: asyncpg sessions for
+  `async def` routes, so a slow query does not stall the event loop.
+  Existing sync query code runs unchanged on an async session through
+  `await db.run_sync(fn, ...)`.
+
+Both pools are sized explicitly (DB_POOL_SIZE / ASYNC_DB_POOL_SIZE, overflow,
+timeout, recycle) and every connection gets a server-side statement_timeout
+(DB_STATEMENT_TIMEOUT_MS).
 """
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
@@ -12,15 +25,55 @@ from os import getenv
 if settings.DATABASE_URL.startswith("sqlite:"):
     raise SystemExit("SQLite is disabled. Set DATABASE_URL to a PostgreSQL connection string (e.g., Supabase).")
 
+def async_database_url(url: str) -> str:
+    """Rewrite a libpq/psycopg2 URL for asyncpg (driver and sslmode)."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql":
+        return url
+    query = dict(parsed.query)
+    # asyncpg takes `ssl` instead of libpq's `sslmode`
+    if "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    return parsed.set(drivername="postgresql+asyncpg", query=query).render_as_string(hide_password=False)
+
+def _pool_options(pool_size: int, max_overflow: int) -> dict:
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+def _sync_connect_args() -> dict:
+    if settings.DB_STATEMENT_TIMEOUT_MS <= 0:
+        return {}
+    return {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+
+def _async_connect_args() -> dict:
+    connect_args = {"statement_cache_size": settings.ASYNC_DB_STATEMENT_CACHE_SIZE}
+    if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        connect_args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+    return connect_args
+
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True
+    connect_args=_sync_connect_args(),
+    **_pool_options(settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
 )
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine and session factory; objects stay usable after commit
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL),
+    connect_args=_async_connect_args(),
+    **_pool_options(settings.ASYNC_DB_POOL_SIZE, settings.ASYNC_DB_MAX_OVERFLOW)
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 # Create base class for models
 Base = declarative_base()
 
@@ -32,9 +85,17 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def init_db():
-    """Initialize database tables"""
+    """Initialize database tables and apply pending schema migrations"""
     # Import all models to ensure they're registered with SQLAlchemy
     import app.models
-    
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    from app.core.migrations import upgrade
+
+    Base.metadata.create_all(bind=engine)
+    # create_all never alters existing tables; migrations do
+    upgrade(engine)
@@ -0,0 +1,260 @@
+"""
+Versioned schema migrations
+
+`init_db` used to be `Base.metadata.create_all` alone, which creates missing
+tables but never touches existing ones, so indexes added to the models never
+reached deployed databases. Schema changes to existing tables now go through
+the numbered migrations below:
+
+- applied versions are recorded in `schema_migrations`; `upgrade` runs the
+  pending ones in order, each in its own transaction
+- on PostgreSQL a session advisory lock serializes concurrent upgrades
+  (several workers starting at once), and index migrations use
+  `CREATE INDEX CONCURRENTLY` outside a transaction so writes to the hot
+  tables are not blocked while the index builds; an invalid index left by
+  an interrupted concurrent build is dropped and rebuilt
+- statements are idempotent (`IF NOT EXISTS`): on a fresh database
+  `create_all` has already created the indexes declared on the models and
+  the migration only records its version
+
+New migrations are appended to `MIGRATIONS` with the next version number;
+applied migrations are never edited.
+
+Usage:
+    python -m app.core.migrations            # apply pending migrations
+    python -m app.core.migrations status     # list applied / pending
+"""
+
+from typing import Callable, List, Optional, Sequence
+import logging
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+VERSION_TABLE = "schema_migrations"
+# Arbitrary application-wide key for pg_advisory_lock
+ADVISORY_LOCK_KEY = 7243019
+
+class IndexSpec:
+    """A (possibly partial) index created by a migration."""
+    __slots__ = ("name", "table", "columns", "where")
+
+    def __init__(self, name: str, table: str, columns: Sequence[str], where: Optional[str] = None):
+        self.name = name
+        self.table = table
+        self.columns = list(columns)
+        self.where = where
+
+    def create_sql(self, concurrently: bool) -> str:
+        sql = "CREATE INDEX {}IF NOT EXISTS {} ON {} ({})".format(
+            "CONCURRENTLY " if concurrently else "", self.name, self.table, ", ".join(self.columns)
+        )
+        if self.where:
+            sql += f" WHERE {self.where}"
+        return sql
+
+class Migration:
+    __slots__ = ("version", "description", "indexes", "statements", "analyze")
+
+    def __init__(
+        self,
+        version: int,
+        description: str,
+        indexes: Sequence[IndexSpec] = (),
+        statements: Sequence[str] = (),
+        analyze: Sequence[str] = (),
+    ):
+        self.version = version
+        self.description = description
+        self.indexes = list(indexes)
+        self.statements = list(statements)
+        # Tables to ANALYZE afterwards so the planner sees the new indexes' stats
+        self.analyze = list(analyze)
+
+# Indexes matched to the filters and sort orders of the hot read paths; the
+# same indexes are declared in the models' __table_args__
+HOT_TABLE_INDEXES = [
+    # Student grade lists, profiles and per-student joins
+    IndexSpec("idx_grade_student_subject", "grades", ["student_id", "subject_id"]),
+    # Subject and section analytics (subject_id IN (...))
+    IndexSpec("idx_grade_subject_student", "grades", ["subject_id", "student_id"]),
+    # Teacher notification list: educator_id [= status] ORDER BY created_at DESC
+    IndexSpec("idx_notification_educator_created", "notifications", ["educator_id", "created_at"]),
+    # Conversations and message summaries: sender_id, receiver_id ORDER BY created_at
+    IndexSpec("idx_message_sender_receiver_created", "messages", ["sender_id", "receiver_id", "created_at"]),
+    # Student inbox: receiver_id, receiver_type ORDER BY created_at DESC
+    IndexSpec("idx_message_receiver_type_created", "messages", ["receiver_id", "receiver_type", "created_at"]),
+    # Unread counts only ever look at unread rows, a small fraction of the table
+    IndexSpec("idx_message_unread", "messages", ["sender_id", "receiver_id"], where="is_read = false"),
+    # Recipients of a meeting, and the RSVP lookup of one recipient
+    IndexSpec("idx_meeting_recipient_meeting", "meeting_recipients", ["meeting_id", "recipient_type", "recipient_id"]),
+    # Meetings a student or parent is invited to
+    IndexSpec("idx_meeting_recipient_recipient", "meeting_recipients", ["recipient_id", "recipient_type"]),
+    # Calendar ranges, week view, conflict checks and cache fingerprints
+    IndexSpec("idx_schedule_educator_start", "schedules", ["educator_id", "start_datetime"]),
+    # Task list: educator_id, event_type = TASK ORDER BY start_datetime DESC
+    IndexSpec("idx_schedule_educator_task_start", "schedules", ["educator_id", "start_datetime"], where="event_type = 'TASK'"),
+]
+
+# Derived grade columns as app.services.grade_pipeline computes them
+# (percentage from marks/total, the grade_letter_for scale, the subject's
+# passing_grade with a default of 60), then per-student aggregates
+GRADE_BACKFILL = [
+    "UPDATE grades SET percentage = CASE WHEN total_marks > 0 THEN marks_obtained / total_marks * 100 END",
+    "UPDATE grades SET grade_letter = CASE"
+    " WHEN percentage IS NULL THEN NULL"
+    " WHEN percentage >= 95 THEN 'A+' WHEN percentage >= 90 THEN 'A'"
+    " WHEN percentage >= 85 THEN 'B+' WHEN percentage >= 80 THEN 'B'"
+    " WHEN percentage >= 75 THEN 'C+' WHEN percentage >= 70 THEN 'C'"
+    " WHEN percentage >= 65 THEN 'D+' WHEN percentage >= 60 THEN 'D'"
+    " ELSE 'F' END",
+    "UPDATE grades SET is_passed = CASE WHEN percentage IS NULL THEN NULL"
+    " ELSE percentage >= COALESCE((SELECT passing_grade FROM subjects WHERE subjects.id = grades.subject_id), 60) END",
+    "DELETE FROM student_grade_aggregates",
+    "INSERT INTO student_grade_aggregates (student_id, grade_count, marks_total, percentage_total, passed_count, updated_at)"
+    " SELECT student_id, COUNT(id), COALESCE(SUM(marks_obtained), 0), COALESCE(SUM(percentage), 0),"
+    " SUM(CASE WHEN is_passed THEN 1 ELSE 0 END), CURRENT_TIMESTAMP"
+    " FROM grades GROUP BY student_id",
+    # Cached performance views were built with the old pass rules; their
+    # fingerprints do not change with the backfill, so drop them
+    "DELETE FROM performance_cache",
+    "DELETE FROM student_performance_summary",
+]
+
+# Student notification feed (app.services.notification_feed): student_id = ?
+# with an id cursor, ordered by id; declared on the Notification model too
+NOTIFICATION_FEED_INDEXES = [
+    IndexSpec("idx_notification_student_id", "notifications", ["student_id", "id"]),
+]
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        1,
+        "Composite and partial indexes for grades, notifications, messages, meeting recipients and schedules",
+        indexes=HOT_TABLE_INDEXES,
+        analyze=["grades", "notifications", "messages", "meeting_recipients", "schedules"],
+    ),
+    Migration(
+        2,
+        "Backfill derived grade columns and per-student grade aggregates",
+        statements=GRADE_BACKFILL,
+        analyze=["grades", "student_grade_aggregates"],
+    ),
+    Migration(
+        3,
+        "Keyset index for the student notification feed",
+        indexes=NOTIFICATION_FEED_INDEXES,
+        analyze=["notifications"],
+    ),
+    Migration(
+        4,
+        "Drop performance views cached with the raw-marks student pass rule",
+        # Views and summaries built before student_passed moved to the
+        # average percentage; their fingerprints do not change with the rule
+        statements=["DELETE FROM performance_cache", "DELETE FROM student_performance_summary"],
+    ),
+]
+
+def _is_postgres(engine: Engine) -> bool:
+    return engine.dialect.name == "postgresql"
+
+def _ensure_version_table(engine: Engine) -> None:
+    with engine.begin() as connection:
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} ("
+            "version INTEGER PRIMARY KEY, "
+            "description VARCHAR(255) NOT NULL, "
+            "applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+        ))
+
+def applied_versions(engine: Engine) -> List[int]:
+    _ensure_version_table(engine)
+    with engine.connect() as connection:
+        return [row[0] for row in connection.execute(text(f"SELECT version FROM {VERSION_TABLE} ORDER BY version"))]
+
+def pending_migrations(engine: Engine) -> List[Migration]:
+    applied = set(applied_versions(engine))
+    return [migration for migration in MIGRATIONS if migration.version not in applied]
+
+def _drop_invalid_index(connection: Connection, name: str) -> None:
+    # An interrupted CREATE INDEX CONCURRENTLY leaves an INVALID index that
+    # IF NOT EXISTS would silently keep
+    invalid = connection.execute(text(
+        "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {"name": name}).first()
+    if invalid:
+        logger.warning("Dropping invalid index %s before rebuilding it", name)
+        connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+def _apply(engine: Engine, migration: Migration) -> None:
+    postgres = _is_postgres(engine)
+    if migration.indexes:
+        if postgres:
+            # CONCURRENTLY cannot run inside a transaction block
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+                for index in migration.indexes:
+                    _drop_invalid_index(connection, index.name)
+                    connection.execute(text(index.create_sql(concurrently=True)))
+        else:
+            with engine.begin() as connection:
+                for index in migration.indexes:
+                    connection.execute(text(index.create_sql(concurrently=False)))
+    with engine.begin() as connection:
+        for statement in migration.statements:
+            connection.execute(text(statement))
+        connection.execute(
+            text(f"INSERT INTO {VERSION_TABLE} (version, description) VALUES (:version, :description)"),
+            {"version": migration.version, "description": migration.description[:255]},
+        )
+    if migration.analyze:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            for table in migration.analyze:
+                connection.execute(text(f"ANALYZE {table}"))
+
+def _with_lock(engine: Engine, fn: Callable[[], List[int]]) -> List[int]:
+    if not _is_postgres(engine):
+        return fn()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_connection:
+        lock_connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+        try:
+            return fn()
+        finally:
+            lock_connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY})
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> List[int]:
+    """Apply pending migrations up to `target` (all if None); returns the versions applied."""
+    def run() -> List[int]:
+        applied = []
+        # Re-read under the lock: another worker may have just upgraded
+        for migration in pending_migrations(engine):
+            if target is not None and migration.version > target:
+                break
+            logger.info("Applying schema migration %s: %s", migration.version, migration.description)
+            _apply(engine, migration)
+            applied.append(migration.version)
+        return applied
+    return _with_lock(engine, run)
+
+def main(argv: Sequence[str]) -> None:
+    from app.core.database import engine
+
+    command = argv[0] if argv else "upgrade"
+    if command == "status":
+        applied = set(applied_versions(engine))
+        for migration in MIGRATIONS:
+            state = "applied" if migration.version in applied else "pending"
+            print(f"{migration.version:>4}  {state:<8} {migration.description}")
+    elif command == "upgrade":
+        target = int(argv[1]) if len(argv) > 1 else None
+        applied = upgrade(engine, target)
+        print(f"Applied migrations: {applied}" if applied else "Schema is up to date")
+    else:
+        raise SystemExit(f"Unknown command: {command} (expected 'upgrade' or 'status')")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main(sys.argv[1:])
@@ -10,7 +10,7 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import uvicorn
@@ -47,7 +47,16 @@ async def lifespan(app: FastAPI):
             logging.exception("Failed to seed demo users")
     yield
     # Shutdown
-    pass
+    from app.services.report_rendering import report_renderer
+    report_renderer.shutdown()
+    from app.core.database import async_engine
+    await async_engine.dispose()
+    from app.core.auth import shutdown_hashing
+    shutdown_hashing()
+    from app.services.conversation_state import conversation_state
+    await conversation_state.close()
+    from app.services.email_service import email_service
+    email_service.close()
 
 app = FastAPI(
     title="Educator AI Administrative Assistant",
@@ -125,6 +134,9 @@ async def filtered_students_alias(
     pass_status: str | None = None,
     subject_filter: str | None = None,
     search: str | None = None,
+    limit: int | None = Query(None, ge=1, le=1000),
+    after_id: int | None = None,
+    response: Response = None,
     current_educator: Educator = Depends(get_current_educator),
     db: Session = Depends(get_db),
 ):
@@ -134,6 +146,9 @@ async def filtered_students_alias(
         pass_status=pass_status,
         subject_filter=subject_filter,
         search=search,
+        limit=limit,
+        after_id=after_id,
+        response=response,
         current_educator=current_educator,
         db=db,
     )
@@ -1,6 +1,6 @@
 # Import all models to ensure they're registered with SQLAlchemy
 from .educator import Educator
-from .student import Student, Section, Subject, Grade
+from .student import Student, Section, Subject, Grade, StudentGradeAggregate
 from .schedule import Schedule
 from .record import Record
 from .compliance import ComplianceReport
@@ -8,6 +8,7 @@ from .meeting_request import MeetingRequest
 from .meeting_schedule import Meeting, MeetingRecipient
 from .communication import Communication
 from .notification import Notification
+from .message import Message, MessageTemplate, MessageUnreadCounter
 from .report import SentReport
 from .performance import Exam, Attendance, PerformanceCache, StudentPerformanceSummary
 from .action_log import ActionLog
@@ -18,6 +19,7 @@ __all__ = [
     "Section",
     "Subject",
     "Grade",
+    "StudentGradeAggregate",
     "Schedule",
     "Record", 
     "ComplianceReport",
@@ -26,6 +28,9 @@ __all__ = [
     "MeetingRecipient", 
     "Communication",
     "Notification",
+    "Message",
+    "MessageTemplate",
+    "MessageUnreadCounter",
     "SentReport",
     "Exam",
     "Attendance",
@@ -2,7 +2,7 @@
 Meeting scheduling models for teacher-initiated meetings with students/parents
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Enum, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Enum, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -135,6 +135,12 @@ class MeetingRecipient(Base):
     # Relationships
     meeting = relationship("Meeting", back_populates="recipients")
     
+    # Created on existing databases by app.core.migrations (version 1)
+    __table_args__ = (
+        Index('idx_meeting_recipient_meeting', 'meeting_id', 'recipient_type', 'recipient_id'),
+        Index('idx_meeting_recipient_recipient', 'recipient_id', 'recipient_type'),
+    )
+    
     def to_dict(self):
         return {
             "id": self.id,
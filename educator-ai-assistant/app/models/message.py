@@ -2,8 +2,8 @@
 Message model for student-educator communication
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index, text
+from sqlalchemy.orm import column_property, relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -18,7 +18,9 @@ class Message(Base):
     message = Column(Text, nullable=False)
     message_type = Column(String(50), default="general")  # general, academic, behavioral, attendance
     priority = Column(String(20), default="normal")  # low, normal, high, urgent
-    is_read = Column(Boolean, default=False)
+    # active_history loads the stored value before an expired instance is
+    # marked read, so the unread counters see the flip (app.services.message_summary)
+    is_read = column_property(Column(Boolean, default=False), active_history=True)
     read_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -26,6 +28,14 @@ class Message(Base):
     # Relationships
     sender = relationship("Educator", foreign_keys=[sender_id])
     receiver = relationship("Student", foreign_keys=[receiver_id])
+    
+    # Created on existing databases by app.core.migrations (version 1)
+    __table_args__ = (
+        Index('idx_message_sender_receiver_created', 'sender_id', 'receiver_id', 'created_at'),
+        Index('idx_message_receiver_type_created', 'receiver_id', 'receiver_type', 'created_at'),
+        Index('idx_message_unread', 'sender_id', 'receiver_id',
+              postgresql_where=text('is_read = false'), sqlite_where=text('is_read = false')),
+    )
 
 class MessageTemplate(Base):
     __tablename__ = "message_templates"
@@ -40,4 +50,14 @@ class MessageTemplate(Base):
     created_at = Column(DateTime, server_default=func.now())
     
     # Relationships
-    educator = relationship("Educator")
\ No newline at end of file
+    educator = relationship("Educator")
+
+class MessageUnreadCounter(Base):
+    """Denormalized unread count per (educator, student), maintained by
+    `app.services.message_summary` when MESSAGE_UNREAD_COUNTERS is enabled"""
+    __tablename__ = "message_unread_counters"
+    
+    educator_id = Column(Integer, ForeignKey("educators.id"), primary_key=True)
+    student_id = Column(Integer, ForeignKey("students.id"), primary_key=True)
+    unread_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -2,7 +2,7 @@
 Notification model for the Teacher Portal
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -55,6 +55,13 @@ class Notification(Base):
     educator = relationship("Educator", foreign_keys=[educator_id])
     student = relationship("Student", foreign_keys=[student_id])
     
+    # Keyset pagination of a student's feed (newest id first); the educator
+    # index is created on existing databases by app.core.migrations (version 1)
+    __table_args__ = (
+        Index('idx_notification_student_id', 'student_id', 'id'),
+        Index('idx_notification_educator_created', 'educator_id', 'created_at'),
+    )
+    
     def __repr__(self):
         recipient = f"educator_{self.educator_id}" if self.educator_id else f"student_{self.student_id}"
         return f"<Notification(id={self.id}, type='{self.notification_type.value}', recipient='{recipient}')>"
@@ -2,7 +2,7 @@
 Schedule model for managing educator schedules and events
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Enum, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -70,6 +70,13 @@ class Schedule(Base):
     educator = relationship("Educator", back_populates="schedules")
     meeting_request = relationship("MeetingRequest", back_populates="schedule", uselist=False)
     
+    # Created on existing databases by app.core.migrations (version 1)
+    __table_args__ = (
+        Index('idx_schedule_educator_start', 'educator_id', 'start_datetime'),
+        Index('idx_schedule_educator_task_start', 'educator_id', 'start_datetime',
+              postgresql_where=text("event_type = 'TASK'"), sqlite_where=text("event_type = 'TASK'")),
+    )
+    
     def __repr__(self):
         return f"<Schedule(id={self.id}, title='{self.title}', educator_id={self.educator_id})>"
     
@@ -2,12 +2,32 @@
 Student models for the administrative assistant system
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
 from app.core.database import Base
 
+def grade_letter_for(percentage: float) -> str:
+    """Map a percentage to the letter grade scale used across the portal"""
+    if percentage >= 95:
+        return "A+"
+    elif percentage >= 90:
+        return "A"
+    elif percentage >= 85:
+        return "B+"
+    elif percentage >= 80:
+        return "B"
+    elif percentage >= 75:
+        return "C+"
+    elif percentage >= 70:
+        return "C"
+    elif percentage >= 65:
+        return "D+"
+    elif percentage >= 60:
+        return "D"
+    return "F"
+
 class Section(Base):
     __tablename__ = "sections"
     
@@ -117,6 +137,12 @@ class Grade(Base):
     student = relationship("Student", back_populates="grades")
     subject = relationship("Subject", back_populates="grades")
     
+    # Created on existing databases by app.core.migrations (version 1)
+    __table_args__ = (
+        Index('idx_grade_student_subject', 'student_id', 'subject_id'),
+        Index('idx_grade_subject_student', 'subject_id', 'student_id'),
+    )
+    
     def calculate_percentage(self):
         """Calculate percentage from marks"""
         if self.total_marks > 0:
@@ -128,26 +154,29 @@ class Grade(Base):
         if self.percentage is None:
             self.calculate_percentage()
         
-        if self.percentage >= 95:
-            self.grade_letter = "A+"
-        elif self.percentage >= 90:
-            self.grade_letter = "A"
-        elif self.percentage >= 85:
-            self.grade_letter = "B+"
-        elif self.percentage >= 80:
-            self.grade_letter = "B"
-        elif self.percentage >= 75:
-            self.grade_letter = "C+"
-        elif self.percentage >= 70:
-            self.grade_letter = "C"
-        elif self.percentage >= 65:
-            self.grade_letter = "D+"
-        elif self.percentage >= 60:
-            self.grade_letter = "D"
-        else:
-            self.grade_letter = "F"
+        self.grade_letter = grade_letter_for(self.percentage)
         
         return self.grade_letter
     
     def __repr__(self):
-        return f"<Grade(student_id={self.student_id}, subject_id={self.subject_id}, marks={self.marks_obtained}/{self.total_marks})>"
\ No newline at end of file
+        return f"<Grade(student_id={self.student_id}, subject_id={self.subject_id}, marks={self.marks_obtained}/{self.total_marks})>"
+
+class StudentGradeAggregate(Base):
+    """Running grade totals per student, maintained at write time by
+    `app.services.grade_pipeline`"""
+    __tablename__ = "student_grade_aggregates"
+    
+    student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), primary_key=True)
+    grade_count = Column(Integer, nullable=False, default=0)
+    marks_total = Column(Float, nullable=False, default=0.0)
+    percentage_total = Column(Float, nullable=False, default=0.0)
+    passed_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @property
+    def average_marks(self) -> float:
+        return self.marks_total / self.grade_count if self.grade_count else 0.0
+    
+    @property
+    def average_percentage(self) -> float:
+        return self.percentage_total / self.grade_count if self.grade_count else 0.0
\ No newline at end of file
@@ -1,24 +1,60 @@
-"""Centralized Action Executor for performing authorized actions against
-the internal API server. This module provides a thin safe wrapper around
-internal endpoints so callers don't need to duplicate httpx calls and
-permission checks.
-
-The implementation is intentionally minimal: it expects an `httpx.AsyncClient`
-and forwarded `headers` (including Authorization) and returns normalized
-results. Add more permission checks, rate-limiting and auditing hooks as
+"""Centralized Action Executor for performing authorized actions on behalf of
+an educator. This module provides a thin safe wrapper around the action
+handlers so callers don't need to duplicate permission checks.
+
+Actions are dispatched in-process: the action-engine, students and
+scheduling handlers are called directly with the caller's `db` session and
+authenticated `educator`, instead of looping back over HTTP (which re-ran
+JWT decoding, auth lookups and JSON serialization for every call). Results
+keep the normalized shape `{status, response}` / `{status, detail,
+response}`. Add more permission checks, rate-limiting and auditing hooks as
 needed.
 """
+from datetime import date
 from typing import Any, Dict, Optional
 import logging
 import json
 
-from app.core.database import SessionLocal
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from app.api.action_engine import (
+    SendMessageRequest,
+    ScheduleMeetingRequest,
+    send_message as engine_send_message,
+    schedule_meeting as engine_schedule_meeting,
+)
+from app.api.scheduling import calendar_events
+from app.api.students import student_grades
 from app.models import ActionLog
+from app.models.educator import Educator
 
 logger = logging.getLogger(__name__)
 
 
-async def send_message(client, headers: Dict[str, str], student_id: int, content: str, actor_id: Optional[int] = None) -> Dict[str, Any]:
+def _record_action(db: Session, actor_id: Optional[int], action_type: str, target_type: str, target_id: Optional[int], payload: Dict[str, Any]) -> None:
+    """Write an audit log entry; failures are logged and never fail the action."""
+    try:
+        log = ActionLog(
+            actor_id=actor_id,
+            action_type=action_type,
+            target_type=target_type,
+            target_id=target_id,
+            payload=json.dumps(payload, default=str),
+        )
+        db.add(log)
+        db.commit()
+    except Exception:
+        logger.exception("Failed to write action log for %s", action_type)
+        db.rollback()
+
+
+def _http_error(prefix: str, error: HTTPException) -> Dict[str, Any]:
+    return {"status": "error", "detail": f"{prefix}:{error.status_code}", "response": error.detail}
+
+
+async def send_message(db: Session, educator: Educator, student_id: int, content: str, actor_id: Optional[int] = None) -> Dict[str, Any]:
     payload = {
         "receiver_id": student_id,
         "receiver_type": "student",
@@ -26,144 +62,59 @@ async def send_message(client, headers: Dict[str, str], student_id: int, content
         "message": content,
     }
     try:
-        # Use the unified action-engine endpoint
-        resp = await client.post("/api/v1/action-engine/send_message", json=payload, headers=headers)
-        if resp.status_code in (200, 201):
-            data = resp.json()
-            # Record audit log (actor_id optional)
-            try:
-                db = SessionLocal()
-                log = ActionLog(
-                    actor_id=actor_id,
-                    action_type="send_message",
-                    target_type="message",
-                    target_id=(data.get("id") if isinstance(data, dict) else None),
-                    payload=json.dumps({"request": payload, "response": data}),
-                )
-                db.add(log)
-                db.commit()
-                db.refresh(log)
-            except Exception:
-                logger.exception("Failed to write action log for send_message")
-            finally:
-                try:
-                    db.close()
-                except Exception:
-                    pass
-            return {"status": "ok", "response": data}
-        else:
-            return {"status": "error", "detail": f"send_failed:{resp.status_code}", "response": resp.text}
+        data = engine_send_message(SendMessageRequest(**payload), current_educator=educator, db=db)
+        _record_action(db, actor_id, "send_message", "message", data.get("message_id"), {"request": payload, "response": data})
+        return {"status": "ok", "response": data}
+    except HTTPException as e:
+        return _http_error("send_failed", e)
     except Exception as e:
         logger.exception("Exception sending message: %s", e)
+        db.rollback()
         return {"status": "error", "detail": str(e)}
 
 
-async def schedule_meeting(client, headers: Dict[str, str], student_ids: list, title: str, meeting_date: Optional[str], duration_minutes: int = 60, actor_id: Optional[int] = None) -> Dict[str, Any]:
+async def schedule_meeting(db: Session, educator: Educator, student_ids: list, title: str, meeting_date: Optional[str], duration_minutes: int = 60, actor_id: Optional[int] = None) -> Dict[str, Any]:
     payload = {
         "title": title,
-        "description": "Scheduled by educator via chatbot",
         "meeting_date": meeting_date,
         "duration_minutes": duration_minutes,
-        "meeting_type": "INDIVIDUAL" if len(student_ids) == 1 else "GROUP",
         "student_ids": student_ids,
         "notify_parents": False,
-        "send_immediately": True,
     }
     try:
-        # Use the unified action-engine endpoint
-        resp = await client.post("/api/v1/action-engine/schedule_meeting", json=payload, headers=headers)
-        if resp.status_code in (200, 201):
-            data = resp.json()
-            # audit log for meeting
-            try:
-                db = SessionLocal()
-                log = ActionLog(
-                    actor_id=actor_id,
-                    action_type="schedule_meeting",
-                    target_type="meeting",
-                    target_id=(data.get("id") if isinstance(data, dict) else None),
-                    payload=json.dumps({"request": payload, "response": data}),
-                )
-                db.add(log)
-                db.commit()
-                db.refresh(log)
-            except Exception:
-                logger.exception("Failed to write action log for schedule_meeting")
-            finally:
-                try:
-                    db.close()
-                except Exception:
-                    pass
-            return {"status": "ok", "response": data}
-        else:
-            return {"status": "error", "detail": f"schedule_failed:{resp.status_code}", "response": resp.text}
+        data = engine_schedule_meeting(ScheduleMeetingRequest(**payload), current_educator=educator, db=db)
+        _record_action(db, actor_id, "schedule_meeting", "meeting", data.get("meeting_id"), {"request": payload, "response": data})
+        return {"status": "ok", "response": data}
+    except HTTPException as e:
+        return _http_error("schedule_failed", e)
     except Exception as e:
         logger.exception("Exception scheduling meeting: %s", e)
+        db.rollback()
         return {"status": "error", "detail": str(e)}
 
 
-async def fetch_grades(client, headers: Dict[str, str], student_id: int, actor_id: Optional[int] = None) -> Dict[str, Any]:
+async def fetch_grades(db: Session, educator: Educator, student_id: int, actor_id: Optional[int] = None) -> Dict[str, Any]:
     try:
-        # Grades endpoint remains on students API
-        resp = await client.get(f"/api/v1/students/{student_id}/grades", headers=headers)
-        if resp.status_code == 200:
-            data = resp.json()
-            try:
-                db = SessionLocal()
-                log = ActionLog(
-                    actor_id=actor_id,
-                    action_type="fetch_grades",
-                    target_type="grades",
-                    target_id=student_id,
-                    payload=json.dumps({"response": data}),
-                )
-                db.add(log)
-                db.commit()
-                db.refresh(log)
-            except Exception:
-                logger.exception("Failed to write action log for fetch_grades")
-            finally:
-                try:
-                    db.close()
-                except Exception:
-                    pass
-            return {"status": "ok", "response": data}
-        else:
-            return {"status": "error", "detail": f"fetch_failed:{resp.status_code}", "response": resp.text}
+        data = jsonable_encoder(student_grades(db, educator, student_id))
+        _record_action(db, actor_id, "fetch_grades", "grades", student_id, {"response": data})
+        return {"status": "ok", "response": data}
+    except HTTPException as e:
+        return _http_error("fetch_failed", e)
     except Exception as e:
         logger.exception("Exception fetching grades: %s", e)
         return {"status": "error", "detail": str(e)}
 
 
-async def fetch_schedule(client, headers: Dict[str, str], start_date: str, end_date: str, actor_id: Optional[int] = None) -> Dict[str, Any]:
+async def fetch_schedule(db: Session, educator: Educator, start_date: str, end_date: str, actor_id: Optional[int] = None) -> Dict[str, Any]:
     try:
-        # Schedule fetching remains on scheduling API for now
-        resp = await client.get("/api/v1/scheduling/calendar", params={"start_date": start_date, "end_date": end_date}, headers=headers)
-        if resp.status_code == 200:
-            data = resp.json()
-            try:
-                db = SessionLocal()
-                log = ActionLog(
-                    actor_id=actor_id,
-                    action_type="fetch_schedule",
-                    target_type="schedule",
-                    target_id=None,
-                    payload=json.dumps({"start_date": start_date, "end_date": end_date, "response": data}),
-                )
-                db.add(log)
-                db.commit()
-                db.refresh(log)
-            except Exception:
-                logger.exception("Failed to write action log for fetch_schedule")
-            finally:
-                try:
-                    db.close()
-                except Exception:
-                    pass
-            return {"status": "ok", "response": data}
-        else:
-            return {"status": "error", "detail": f"fetch_failed:{resp.status_code}", "response": resp.text}
+        # Always the plain events list; only the HTTP route streams long ranges
+        data = jsonable_encoder(calendar_events(
+            db, educator.id, date.fromisoformat(start_date), date.fromisoformat(end_date)
+        ))
+        _record_action(db, actor_id, "fetch_schedule", "schedule", None, {"start_date": start_date, "end_date": end_date, "response": data})
+        return {"status": "ok", "response": data}
+    except HTTPException as e:
+        return _http_error("fetch_failed", e)
     except Exception as e:
         logger.exception("Exception fetching schedule: %s", e)
         return {"status": "error", "detail": str(e)}
-
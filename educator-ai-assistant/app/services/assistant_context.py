@@ -0,0 +1,384 @@
+"""Scoped, size-bounded context for the Gemini assistant.
+
+`GeminiEducatorAssistant` gathered its context by loading every section,
+querying the students of each one, and touching `grade.student`,
+`grade.subject` and `record.student` lazily for up to 200 grades and 500
+attendance rows, one query per row. Context is now built here:
+
+- only the kinds the intent needs are loaded, narrowed to the section and
+  subject named in the intent's entities when they match the educator's
+  own (otherwise everything the educator teaches)
+- each kind is one query selecting the columns it serializes (joined
+  names included), capped at `ROW_LIMITS`
+- loaded rows are kept per (educator, kind, scope) for
+  `ASSISTANT_CONTEXT_TTL_SECONDS` (default 30), so the follow-up questions
+  of a conversation reuse them; writes show up once the entry expires
+- `render_for_prompt` sends the external model the counts-only summary it
+  always got. Only the intents that must name students (`RECORD_INTENTS`:
+  list, top performers, struggling) add one line of names, and averages
+  where the intent ranks students, cut to `ASSISTANT_CONTEXT_TOKEN_BUDGET`
+  tokens (default 50, about the size of the old summary; estimated at
+  `CHARS_PER_TOKEN` characters per token). Emails, roll numbers and
+  attendance records never leave the server
+- `render_history` keeps the newest conversation messages that fit in
+  `ASSISTANT_HISTORY_TOKEN_BUDGET` tokens (default 800) instead of the
+  last 10 at any length
+
+The context dict keeps the shape the assistant used before (lists of row
+dicts under "students", "grades", ...), so its response helpers read it
+unchanged.
+"""
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import logging
+import os
+import time
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.communication import Communication
+from app.models.performance import Attendance
+from app.models.student import Grade, Section, Student, Subject
+from app.services.grade_pipeline import student_passed
+
+logger = logging.getLogger(__name__)
+
+TTL_SECONDS = float(os.getenv("ASSISTANT_CONTEXT_TTL_SECONDS", "30"))
+TOKEN_BUDGET = int(os.getenv("ASSISTANT_CONTEXT_TOKEN_BUDGET", "50"))
+HISTORY_TOKEN_BUDGET = int(os.getenv("ASSISTANT_HISTORY_TOKEN_BUDGET", "800"))
+HISTORY_MESSAGES = 10
+MAX_ENTRIES = int(os.getenv("ASSISTANT_CONTEXT_CACHE_SIZE", "256"))
+CHARS_PER_TOKEN = 4
+# Most recent first for grades, attendance and communications
+ROW_LIMITS = {"students": 500, "grades": 200, "attendance": 500, "communications": 50}
+PREVIEW_CHARS = 100
+TOP_PERFORMERS = 5
+
+# (section ids, subject ids); None means not narrowed
+Scope = Tuple[Optional[Tuple[int, ...]], Optional[Tuple[int, ...]]]
+
+
+def _matching(rows: Iterable[Tuple[int, str]], name: Optional[str]) -> Optional[Tuple[int, ...]]:
+    """Ids whose name contains the entity (case-insensitive); None if no entity or no match."""
+    if not name or not isinstance(name, str):
+        return None
+    wanted = name.strip().lower()
+    ids = tuple(row_id for row_id, row_name in rows if row_name and wanted in row_name.lower())
+    return ids or None
+
+
+def _section_rows(db: Session, educator_id: int) -> List[Dict[str, Any]]:
+    rows = (
+        db.query(Section.id, Section.name, func.count(Student.id))
+        .outerjoin(Student, Student.section_id == Section.id)
+        .filter(Section.educator_id == educator_id)
+        .group_by(Section.id, Section.name)
+        .order_by(Section.id)
+    )
+    return [{"id": section_id, "name": name, "student_count": count} for section_id, name, count in rows]
+
+
+def _student_rows(db: Session, educator_id: int, scope: Scope) -> List[Dict[str, Any]]:
+    section_ids, _ = scope
+    query = (
+        db.query(Student.id, Student.first_name, Student.last_name, Student.email, Student.roll_number, Section.id, Section.name)
+        .join(Section, Section.id == Student.section_id)
+        .filter(Section.educator_id == educator_id)
+    )
+    if section_ids:
+        query = query.filter(Section.id.in_(section_ids))
+    query = query.order_by(Section.id, Student.roll_number, Student.id).limit(ROW_LIMITS["students"])
+    return [
+        {"id": student_id, "name": f"{first} {last}", "email": email, "section": section_name,
+         "section_id": section_id, "roll_number": roll}
+        for student_id, first, last, email, roll, section_id, section_name in query
+    ]
+
+
+def _grade_rows(db: Session, educator_id: int, scope: Scope) -> List[Dict[str, Any]]:
+    section_ids, subject_ids = scope
+    query = (
+        db.query(
+            Grade.student_id, Student.first_name, Student.last_name, Grade.subject_id, Subject.name,
+            Grade.marks_obtained, Grade.total_marks, Grade.percentage, Grade.grade_letter,
+            Grade.assessment_type, Grade.is_passed,
+        )
+        .join(Student, Student.id == Grade.student_id)
+        .join(Section, Section.id == Student.section_id)
+        .outerjoin(Subject, Subject.id == Grade.subject_id)
+        .filter(Section.educator_id == educator_id)
+    )
+    if section_ids:
+        query = query.filter(Section.id.in_(section_ids))
+    if subject_ids:
+        query = query.filter(Grade.subject_id.in_(subject_ids))
+    query = query.order_by(Grade.created_at.desc(), Grade.id.desc()).limit(ROW_LIMITS["grades"])
+    return [
+        {"student_id": student_id, "student_name": f"{first} {last}", "subject_id": subject_id,
+         "subject_name": subject_name or "Unknown", "marks_obtained": marks, "total_marks": total,
+         "percentage": percentage, "grade_letter": letter, "assessment_type": assessment_type, "is_passed": passed}
+        for student_id, first, last, subject_id, subject_name, marks, total, percentage, letter, assessment_type, passed in query
+    ]
+
+
+def _subject_rows(db: Session, educator_id: int, scope: Scope) -> List[Dict[str, Any]]:
+    section_ids, subject_ids = scope
+    query = (
+        db.query(Subject.id, Subject.name, Subject.code, Section.name, Subject.credits, Subject.passing_grade)
+        .join(Section, Section.id == Subject.section_id)
+        .filter(Section.educator_id == educator_id)
+    )
+    if section_ids:
+        query = query.filter(Section.id.in_(section_ids))
+    if subject_ids:
+        query = query.filter(Subject.id.in_(subject_ids))
+    return [
+        {"id": subject_id, "name": name, "code": code, "section": section_name, "credits": credits,
+         "passing_grade": passing_grade}
+        for subject_id, name, code, section_name, credits, passing_grade in query.order_by(Subject.id)
+    ]
+
+
+def _attendance_rows(db: Session, educator_id: int, scope: Scope) -> List[Dict[str, Any]]:
+    section_ids, subject_ids = scope
+    query = (
+        db.query(Attendance.student_id, Student.first_name, Student.last_name, Attendance.date,
+                 Attendance.present, Subject.name, Attendance.remarks)
+        .join(Student, Student.id == Attendance.student_id)
+        .join(Section, Section.id == Student.section_id)
+        .outerjoin(Subject, Subject.id == Attendance.subject_id)
+        .filter(Section.educator_id == educator_id)
+    )
+    if section_ids:
+        query = query.filter(Section.id.in_(section_ids))
+    if subject_ids:
+        query = query.filter(Attendance.subject_id.in_(subject_ids))
+    query = query.order_by(Attendance.date.desc(), Attendance.id.desc()).limit(ROW_LIMITS["attendance"])
+    return [
+        {"student_id": student_id, "student_name": f"{first} {last}", "date": date.isoformat(),
+         "present": present, "subject": subject_name, "remarks": remarks}
+        for student_id, first, last, date, present, subject_name, remarks in query
+    ]
+
+
+def _communication_rows(db: Session, educator_id: int, scope: Scope) -> List[Dict[str, Any]]:
+    # One character past the preview tells whether the content was cut
+    query = (
+        db.query(Communication.recipient_email, Communication.subject,
+                 func.substr(Communication.content, 1, PREVIEW_CHARS + 1), Communication.sent_at, Communication.status)
+        .filter(Communication.sender_email.like(f"%{educator_id}%"))
+        .order_by(Communication.sent_at.desc())
+        .limit(ROW_LIMITS["communications"])
+    )
+    return [
+        {"recipient": recipient, "subject": subject,
+         "content": content[:PREVIEW_CHARS] + "..." if len(content) > PREVIEW_CHARS else content,
+         "sent_at": sent_at.isoformat(), "status": status}
+        for recipient, subject, content, sent_at, status in query
+    ]
+
+
+LOADERS: Dict[str, Callable[[Session, int, Scope], List[Dict[str, Any]]]] = {
+    "students": _student_rows,
+    "grades": _grade_rows,
+    "subjects": _subject_rows,
+    "attendance": _attendance_rows,
+    "communications": _communication_rows,
+}
+
+
+class ContextCache:
+    """TTL'd LRU of loaded rows keyed on (educator, kind, scope)."""
+
+    def __init__(self, ttl: float = TTL_SECONDS, max_entries: int = MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, str, Any], Tuple[float, Any]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get_or_load(self, key: Tuple[int, str, Any], load: Callable[[], Any]) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+        value = load()
+        if self.ttl > 0:
+            with self._lock:
+                self._entries[key] = (time.monotonic() + self.ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, educator_id: Optional[int] = None) -> None:
+        with self._lock:
+            if educator_id is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == educator_id]:
+                    del self._entries[key]
+
+
+context_cache = ContextCache()
+
+
+def resolve_scope(db: Session, educator_id: int, sections: List[Dict[str, Any]], entities: Optional[Dict[str, Any]]) -> Scope:
+    entities = entities or {}
+    section_ids = _matching(((s["id"], s["name"]) for s in sections), entities.get("section"))
+    subject_ids = None
+    if entities.get("subject"):
+        subjects = context_cache.get_or_load(
+            (educator_id, "subject_names", None),
+            lambda: db.query(Subject.id, Subject.name)
+            .join(Section, Section.id == Subject.section_id)
+            .filter(Section.educator_id == educator_id)
+            .all(),
+        )
+        subject_ids = _matching(subjects, entities.get("subject"))
+    return section_ids, subject_ids
+
+
+def gather_context(db: Session, educator_id: int, required_data: Iterable[str], entities: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Context for the required data kinds, scoped by the intent's entities."""
+    required = set(required_data)
+    context: Dict[str, Any] = {}
+    if "calendar" in required:
+        # Mock calendar data - in real implementation, integrate with Google Calendar
+        context["calendar"] = {"today_events": [], "upcoming_events": [], "conflicts": []}
+
+    kinds = [kind for kind in LOADERS if kind in required]
+    if not kinds and not required & {"students", "sections"}:
+        return context
+
+    sections = context_cache.get_or_load((educator_id, "sections", None), lambda: _section_rows(db, educator_id))
+    scope = resolve_scope(db, educator_id, sections, entities)
+    section_ids, subject_ids = scope
+    if required & {"students", "sections"}:
+        context["sections"] = [s for s in sections if not section_ids or s["id"] in section_ids]
+    for kind in kinds:
+        context[kind] = context_cache.get_or_load(
+            (educator_id, kind, scope), lambda kind=kind: LOADERS[kind](db, educator_id, scope)
+        )
+    if section_ids or subject_ids:
+        context["scope"] = {
+            "sections": [s["name"] for s in sections if section_ids and s["id"] in section_ids],
+            "subject": entities.get("subject") if subject_ids else None,
+        }
+    return context
+
+
+def _summary_lines(context: Dict[str, Any]) -> List[str]:
+    lines = []
+    scope = context.get("scope")
+    if scope:
+        parts = [", ".join(scope["sections"])] if scope["sections"] else []
+        if scope.get("subject"):
+            parts.append(f"subject {scope['subject']}")
+        lines.append(f"Scope: {'; '.join(parts)}")
+
+    if "students" in context:
+        student_count = (
+            sum(s["student_count"] for s in context["sections"]) if "sections" in context else len(context["students"])
+        )
+        section_names = list(dict.fromkeys(s["section"] for s in context["students"]))
+        lines.append(f"Students: {student_count} total across {len(section_names)} sections ({', '.join(section_names)})")
+
+    if "grades" in context:
+        grade_count = len(context["grades"])
+        avg_score = sum(g["percentage"] for g in context["grades"] if g["percentage"]) / max(grade_count, 1)
+        lines.append(f"Grades: {grade_count} recent records, average score: {avg_score:.1f}%")
+
+    if "attendance" in context:
+        attendance_count = len(context["attendance"])
+        present_count = sum(1 for a in context["attendance"] if a["present"])
+        attendance_rate = (present_count / max(attendance_count, 1)) * 100
+        lines.append(f"Attendance: {attendance_count} records, {attendance_rate:.1f}% attendance rate")
+
+    if "sections" in context:
+        lines.append(f"Sections: {', '.join(s['name'] for s in context['sections'])}")
+    return lines
+
+
+def _student_averages(grades: List[Dict[str, Any]]) -> List[Tuple[str, float]]:
+    """(name, mean recorded percentage) per student, in first-seen order,
+    as the assistant's response helpers compute them."""
+    scores: Dict[int, Tuple[str, List[float]]] = {}
+    for grade in grades:
+        name, percentages = scores.setdefault(grade["student_id"], (grade["student_name"], []))
+        if grade["percentage"]:
+            percentages.append(grade["percentage"])
+    return [(name, sum(percentages) / len(percentages)) for name, percentages in scores.values() if percentages]
+
+
+def _list_records(context: Dict[str, Any]) -> Tuple[str, List[str]]:
+    return "Student names", [s["name"] for s in context.get("students", [])]
+
+
+def _top_records(context: Dict[str, Any]) -> Tuple[str, List[str]]:
+    ranked = sorted(_student_averages(context.get("grades", [])), key=lambda item: item[1], reverse=True)
+    return "Top performers (average %)", [f"{name} {average:.0f}" for name, average in ranked[:TOP_PERFORMERS]]
+
+
+def _struggling_records(context: Dict[str, Any]) -> Tuple[str, List[str]]:
+    below = sorted(
+        (item for item in _student_averages(context.get("grades", [])) if not student_passed(item[1])),
+        key=lambda item: item[1],
+    )
+    return "Below the pass mark (average %)", [f"{name} {average:.0f}" for name, average in below]
+
+
+# Intents whose answer has to name students; every other intent gets the
+# counts only
+RECORD_INTENTS: Dict[str, Callable[[Dict[str, Any]], Tuple[str, List[str]]]] = {
+    "list_students": _list_records,
+    "show_top_performers": _top_records,
+    "show_struggling_students": _struggling_records,
+}
+
+
+def render_for_prompt(context: Dict[str, Any], intent: Optional[str] = None, budget: int = TOKEN_BUDGET) -> str:
+    """Summary lines, plus one line of names for the intents in `RECORD_INTENTS`.
+
+    The names line holds as many entries as fit in `budget` tokens and
+    says how many were left out.
+    """
+    lines = _summary_lines(context)
+    if intent in RECORD_INTENTS:
+        label, records = RECORD_INTENTS[intent](context)
+        limit = budget * CHARS_PER_TOKEN
+        line = f"{label}:"
+        for position, record in enumerate(records):
+            # Leave room for the "+N more" suffix
+            omitted = len(records) - position - 1
+            suffix = f", +{omitted} more" if omitted else ""
+            candidate = f"{line}{',' if position else ''} {record}"
+            if len(candidate) + len(suffix) > limit:
+                line += f"{',' if position else ''} +{len(records) - position} more"
+                break
+            line = candidate
+        if records:
+            lines.append(line)
+    return "\n".join(lines) if lines else "No specific data available"
+
+
+def render_history(history: Optional[List[Dict[str, Any]]], budget: int = HISTORY_TOKEN_BUDGET) -> str:
+    """The newest messages (at most `HISTORY_MESSAGES`) that fit in the budget,
+    oldest first; the newest one is cut to fit rather than dropped."""
+    if not history:
+        return ""
+    remaining = budget * CHARS_PER_TOKEN
+    lines: List[str] = []
+    for message in reversed(history[-HISTORY_MESSAGES:]):
+        speaker = "User" if message.get("type", "user") == "user" else "Assistant"
+        line = f"{speaker}: {message.get('content', '')}"
+        if len(line) + 1 > remaining:
+            if not lines:
+                lines.append(line[:max(remaining - 4, 0)] + "...")
+            break
+        lines.append(line)
+        remaining -= len(line) + 1
+    return "\n".join(reversed(lines)) + "\n\n"
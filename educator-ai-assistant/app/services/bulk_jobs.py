@@ -0,0 +1,163 @@
+"""In-process job registry and worker pool for bulk communication.
+
+Bulk sends used to run inline inside the HTTP request. This module keeps
+lightweight job records (progress counters, throughput and per-recipient
+failures) and runs job functions on a bounded thread pool, so the request
+that submits a job returns immediately with its id.
+
+Jobs live in the memory of the worker process that accepted them (the
+same trade-off as the memory backend of `conversation_state`). Finished
+jobs beyond `BULK_JOB_RETENTION` are pruned oldest-first.
+
+Environment:
+- BULK_JOB_WORKERS: concurrent jobs per process (default 2)
+- BULK_JOB_CHUNK_SIZE: recipients processed per transaction (default 200)
+- BULK_JOB_RETENTION: finished jobs kept for progress queries (default 200)
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+import logging
+import os
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = int(os.getenv("BULK_JOB_WORKERS", "2"))
+CHUNK_SIZE = int(os.getenv("BULK_JOB_CHUNK_SIZE", "200"))
+MAX_RETAINED_JOBS = int(os.getenv("BULK_JOB_RETENTION", "200"))
+# Cap on per-recipient failure records kept per job
+MAX_RECORDED_FAILURES = 500
+
+_jobs: "OrderedDict[str, BulkJob]" = OrderedDict()
+_lock = Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+class BulkJob:
+    def __init__(self, educator_id: int, kind: str, total: int):
+        self.id = uuid.uuid4().hex
+        self.educator_id = educator_id
+        self.kind = kind
+        self.status = "queued"  # queued, running, completed, failed
+        self.total = total
+        self.processed = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.notifications_created = 0
+        self.failures: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            self.status = "running"
+            self.started_at = time.time()
+
+    def record_chunk(self, processed: int, succeeded: int, failures: Iterable[Dict[str, Any]] = (), notifications_created: int = 0) -> None:
+        """Add the outcome of one processed chunk to the job counters."""
+        failures = list(failures)
+        with self._lock:
+            self.processed += processed
+            self.succeeded += succeeded
+            self.failed += len(failures)
+            self.notifications_created += notifications_created
+            room = MAX_RECORDED_FAILURES - len(self.failures)
+            if room > 0:
+                self.failures.extend(failures[:room])
+
+    def finish(self) -> None:
+        with self._lock:
+            self.status = "completed"
+            self.finished_at = time.time()
+
+    def fail(self, error: str) -> None:
+        with self._lock:
+            self.status = "failed"
+            self.error = error
+            self.finished_at = time.time()
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            end = self.finished_at or time.time()
+            elapsed = (end - self.started_at) if self.started_at else 0.0
+            return {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "total_recipients": self.total,
+                "processed": self.processed,
+                "succeeded": self.succeeded,
+                "failed": self.failed,
+                "notifications_created": self.notifications_created,
+                "progress_percentage": round(self.processed / self.total * 100, 1) if self.total else 100.0,
+                "elapsed_seconds": round(elapsed, 3),
+                "throughput_per_second": round(self.processed / elapsed, 2) if elapsed > 0 else 0.0,
+                "failures": list(self.failures),
+                "error": self.error,
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+            }
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="bulk-job")
+        return _executor
+
+
+def _prune() -> None:
+    # Caller holds _lock
+    finished = [job_id for job_id, job in _jobs.items() if job.is_finished]
+    for job_id in finished[:max(0, len(_jobs) - MAX_RETAINED_JOBS)]:
+        del _jobs[job_id]
+
+
+def create_job(educator_id: int, kind: str, total: int) -> BulkJob:
+    job = BulkJob(educator_id, kind, total)
+    with _lock:
+        _jobs[job.id] = job
+        _prune()
+    return job
+
+
+def get_job(job_id: str) -> Optional[BulkJob]:
+    with _lock:
+        return _jobs.get(job_id)
+
+
+def list_jobs(educator_id: int) -> List[BulkJob]:
+    with _lock:
+        return [job for job in reversed(_jobs.values()) if job.educator_id == educator_id]
+
+
+def submit(job: BulkJob, fn: Callable[..., None], *args: Any) -> None:
+    """Run `fn(job, *args)` on the worker pool and track its outcome."""
+
+    def runner():
+        job.start()
+        try:
+            fn(job, *args)
+            job.finish()
+        except Exception as e:
+            logger.exception("Bulk job %s failed", job.id)
+            job.fail(str(e))
+
+    _get_executor().submit(runner)
+
+
+def chunked(items: List[Any], size: int = None) -> Iterator[List[Any]]:
+    size = size or CHUNK_SIZE
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
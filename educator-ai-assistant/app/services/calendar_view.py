@@ -0,0 +1,146 @@
+"""Windowed calendar materialization with recurrence expansion.
+
+`GET /scheduling/calendar` returned the stored `Schedule` rows starting in
+the requested range, so a weekly class showed up once, on its first date,
+and every month view re-ran the same query. The calendar is now built on
+the educator's schedule index from `app.services.schedule_conflicts`:
+
+- months inside the index's expansion window are a slice of its
+  start-sorted occurrences; outside it, recurring series are expanded with
+  `app.services.recurrence` for just that month
+- expanded events are memoized per calendar month (up to
+  `CALENDAR_CACHE_MONTHS`, default 36, per educator), so repeated and
+  overlapping views (month, week, a semester) reuse the same buckets
+- `events` yields month by month from memory, so large ranges can be
+  streamed to the client as they are produced
+
+Occurrences of a series keep the series' `id` and fields, with their own
+start/end and `"recurring": true`. Cancelled events stay visible, as before.
+
+Freshness follows the index: its commit hook and fingerprint check decide
+when it is rebuilt, and a calendar built on an older index is replaced.
+"""
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Tuple
+import logging
+import os
+
+from sqlalchemy.orm import Session
+
+from app.services import schedule_conflicts
+from app.services.recurrence import naive_utc
+from app.services.schedule_conflicts import ScheduleIndex
+
+logger = logging.getLogger(__name__)
+
+MONTHS_PER_EDUCATOR = int(os.getenv("CALENDAR_CACHE_MONTHS", "36"))
+MAX_EDUCATORS = int(os.getenv("CALENDAR_CACHE_EDUCATORS", "256"))
+
+Month = Tuple[int, int]
+# Naive UTC starts and the matching event dicts, ordered by start
+Bucket = Tuple[List[datetime], List[Dict[str, Any]]]
+
+
+def _month_start(month: Month) -> datetime:
+    return datetime(month[0], month[1], 1)
+
+
+def _next_month(month: Month) -> Month:
+    return (month[0] + 1, 1) if month[1] == 12 else (month[0], month[1] + 1)
+
+
+def months_between(start: datetime, end: datetime) -> List[Month]:
+    """Calendar months touched by [start, end]."""
+    month, last = (start.year, start.month), (end.year, end.month)
+    months = []
+    while month <= last:
+        months.append(month)
+        month = _next_month(month)
+    return months
+
+
+def _event_data(row: Any, start: datetime, end: datetime, recurring: bool) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "title": row.title,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "start_datetime": start.isoformat(),
+        "end_datetime": end.isoformat(),
+        # Explicit local date for the calendar grid (avoids timezone issues)
+        "local_date": start.date().isoformat(),
+        "location": row.location or "",
+        "type": row.event_type.value,
+        "status": row.status.value if row.status is not None else None,
+        "description": row.description or "",
+        "participants": [],
+        "recurring": recurring,
+    }
+
+
+class EducatorCalendar:
+    """Month buckets over one build of the educator's schedule index."""
+
+    def __init__(self, index: ScheduleIndex):
+        self.index = index
+        self.months: "OrderedDict[Month, Bucket]" = OrderedDict()
+        self.lock = Lock()
+
+    def _materialize(self, month: Month) -> Bucket:
+        """Events starting in one month, ordered by start."""
+        low, high = _month_start(month), _month_start(_next_month(month))
+        found = []
+        for schedule_event, occurrence_start, _ in self.index.starting(low, high):
+            row = schedule_event.row
+            if schedule_event.recurring:
+                # Shift the stored values so occurrences keep the series' timezone
+                shift = occurrence_start - schedule_event.start
+                data = _event_data(row, row.start_datetime + shift, row.end_datetime + shift, True)
+            else:
+                data = _event_data(row, row.start_datetime, row.end_datetime, False)
+            found.append((occurrence_start, row.id, data))
+        found.sort(key=lambda item: (item[0], item[1]))
+        return [start for start, _, _ in found], [data for _, _, data in found]
+
+    def month(self, month: Month) -> Bucket:
+        with self.lock:
+            cached = self.months.get(month)
+            if cached is not None:
+                self.months.move_to_end(month)
+                return cached
+        bucket = self._materialize(month)
+        with self.lock:
+            self.months[month] = bucket
+            self.months.move_to_end(month)
+            while len(self.months) > MONTHS_PER_EDUCATOR:
+                self.months.popitem(last=False)
+        return bucket
+
+    def events(self, start: datetime, end: datetime) -> Iterator[Dict[str, Any]]:
+        """Events starting in [start, end], month by month, without database access."""
+        start, end = naive_utc(start), naive_utc(end)
+        for month in months_between(start, end):
+            starts, events = self.month(month)
+            yield from events[bisect_left(starts, start):bisect_right(starts, end)]
+
+
+_calendars: "OrderedDict[int, EducatorCalendar]" = OrderedDict()
+_lock = Lock()
+
+
+def get_calendar(db: Session, educator_id: int) -> EducatorCalendar:
+    """Return the calendar of an educator's schedule."""
+    # The conflict index decides freshness; a rebuilt index starts new buckets
+    index = schedule_conflicts.get_index(db, educator_id)
+    with _lock:
+        calendar = _calendars.get(educator_id)
+        if calendar is None or calendar.index is not index:
+            calendar = EducatorCalendar(index)
+            _calendars[educator_id] = calendar
+        _calendars.move_to_end(educator_id)
+        while len(_calendars) > MAX_EDUCATORS:
+            _calendars.popitem(last=False)
+    return calendar
@@ -0,0 +1,64 @@
+"""Act on the rows a transaction changed once it commits.
+
+The in-process caches (schedule conflict index, section totals, principal
+lookups, student name index, performance cache, live performance updates)
+all need the same three `Session` listeners:
+
+- `after_flush` records what the flush changed in `session.info`, while
+  the ORM history of the flushed instances is still available
+- `after_commit` acts on everything the transaction recorded
+- `after_soft_rollback` throws it away, so a rolled-back write never
+  evicts or publishes anything
+
+`on_commit` registers that trio for one consumer. Writes that bypass the
+ORM unit of work (bulk `update()`/`delete()`, other processes) are not
+seen; each consumer keeps its own fingerprint or version check for those.
+"""
+from typing import Any, Callable, Iterable, List, Optional, Set
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+
+def flushed(session: Session) -> List[Any]:
+    """Instances inserted, updated or deleted by the current flush."""
+    return list(session.new) + list(session.dirty) + list(session.deleted)
+
+
+def changed_values(obj: Any, attribute: str) -> Set[Any]:
+    """Current and pre-flush values of an attribute, so a moved row counts for both owners."""
+    history = getattr(inspect(obj).attrs, attribute).history
+    return {value for value in (*history.deleted, getattr(obj, attribute)) if value is not None}
+
+
+def on_commit(
+    key: str,
+    collect: Callable[[Session], Iterable[Any]],
+    apply: Callable[[Session, List[Any]], None],
+    active: Optional[Callable[[], bool]] = None,
+) -> None:
+    """Call `apply(session, items)` after each commit with the items `collect`
+    returned for the transaction's flushes, in flush order.
+
+    `key` names the pending items in `session.info` and must be unique.
+    When `active` returns False nothing is collected (e.g. an empty cache
+    has nothing to invalidate). `apply` runs on a committed session that
+    cannot emit SQL; open a new session on `session.get_bind()` for that.
+    """
+    @event.listens_for(Session, "after_flush")
+    def _collect(session: Session, flush_context) -> None:
+        if active is not None and not active():
+            return
+        items = list(collect(session))
+        if items:
+            session.info.setdefault(key, []).extend(items)
+
+    @event.listens_for(Session, "after_commit")
+    def _apply(session: Session) -> None:
+        items = session.info.pop(key, None)
+        if items:
+            apply(session, items)
+
+    @event.listens_for(Session, "after_soft_rollback")
+    def _discard(session: Session, previous_transaction) -> None:
+        session.info.pop(key, None)
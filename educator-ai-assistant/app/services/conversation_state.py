@@ -1,149 +1,205 @@
 """Conversation state store with optional Redis backend.
 
-This module exposes the same synchronous API used elsewhere in the
-codebase (`get_state`, `update_state`, `clear_state`) but will persist
-small per-educator conversation memory in Redis when available. The
-default key prefix is `convstate:`. If Redis is not reachable or the
-backend is configured as `memory`, an in-memory dict with a Lock is used
-as a safe fallback.
-
-Stored structure (JSON):
+Small per-educator conversation memory used by the chatbot router:
 { "last_resolved_student": Optional[str], "last_action": Optional[dict], "pending_clarify": Optional[dict], "updated_at": <epoch> }
+
+The API is async (`get_state`, `update_state`, `clear_state`) so chat turns
+never block the event loop on Redis:
+
+- Redis layout is one hash per educator (`convstate:<educator_id>`) with one
+  JSON-encoded value per field. `update_state` writes only the given fields
+  with HSET inside MULTI, so concurrent updates of different fields do not
+  overwrite each other (the old GET/decode/mutate/SET did)
+- every read and write refreshes the key's TTL in the same pipeline
+  (sliding expiry, `CONVERSATION_STATE_TTL_SECONDS`, default 3600)
+- without Redis, or while it is unreachable, state lives in an in-memory LRU
+  bounded to `CONVERSATION_STATE_MAX_ENTRIES` educators (default 10000) with
+  the same sliding TTL. After a Redis error the store uses memory for
+  `REDIS_RETRY_SECONDS` before trying Redis again
+
+`ConversationStateStore(redis=...)` accepts any `redis.asyncio`-compatible
+client, e.g. `fakeredis.FakeAsyncRedis(decode_responses=True)` in tests.
 """
+from collections import OrderedDict
 from threading import Lock
-from typing import Dict, Any, Optional
-import time
+from typing import Any, Dict, Optional, Tuple
 import json
 import logging
+import os
+import time
 
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
-# In-memory fallback
-_store: Dict[int, Dict[str, Any]] = {}
-_lock = Lock()
+TTL_SECONDS = int(os.getenv("CONVERSATION_STATE_TTL_SECONDS", "3600"))
+MAX_ENTRIES = int(os.getenv("CONVERSATION_STATE_MAX_ENTRIES", "10000"))
+REDIS_RETRY_SECONDS = 30.0
+KEY_PREFIX = "convstate:"
 
-# Redis client (lazy)
-_redis = None
-_use_redis = False
 
-try:
+def _default_state() -> Dict[str, Any]:
+    return {"last_resolved_student": None, "last_action": None, "pending_clarify": None, "updated_at": time.time()}
+
+
+class MemoryStateBackend:
+    """Bounded LRU of educator states with sliding expiry."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl: float = TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = Lock()
+
+    def _live(self, educator_id: int, now: float) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(educator_id)
+        if entry is None:
+            return None
+        expires, state = entry
+        if self.ttl > 0 and expires <= now:
+            del self._entries[educator_id]
+            return None
+        return state
+
+    def _touch(self, educator_id: int, state: Dict[str, Any], now: float) -> None:
+        self._entries[educator_id] = (now + self.ttl, state)
+        self._entries.move_to_end(educator_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, educator_id: int) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            state = self._live(educator_id, now)
+            if state is None:
+                return _default_state()
+            self._touch(educator_id, state, now)
+            return dict(state)
+
+    def update(self, educator_id: int, fields: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            state = self._live(educator_id, now) or _default_state()
+            state.update(fields)
+            state["updated_at"] = now
+            self._touch(educator_id, state, now)
+
+    def clear(self, educator_id: int) -> None:
+        with self._lock:
+            self._entries.pop(educator_id, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _redis_from_settings():
+    backend = settings.CONVERSATION_STATE_BACKEND.lower()
     # Use explicit backend preference if set to 'redis', or use redis when
     # CONVERSATION_STATE_BACKEND is 'auto' and a REDIS_URL is configured.
-    if settings.CONVERSATION_STATE_BACKEND.lower() == "redis" or (
-        settings.CONVERSATION_STATE_BACKEND.lower() == "auto" and settings.REDIS_URL
-    ):
+    if backend == "redis" or (backend == "auto" and settings.REDIS_URL):
         try:
-            import redis as _redis_module
+            import redis.asyncio as redis_asyncio
 
-            _redis = _redis_module.from_url(settings.REDIS_URL, decode_responses=True)
-            # quick connectivity check (non-blocking on import but will raise on first call)
-            _use_redis = True
+            # Connections are opened lazily; failures surface on first use
+            return redis_asyncio.from_url(settings.REDIS_URL, decode_responses=True, socket_connect_timeout=1, socket_timeout=1)
         except Exception as e:
-            logger.warning("Redis connection not available for conversation_state: %s", e)
-            _use_redis = False
-except Exception:
-    _use_redis = False
-
-
-def _redis_key(educator_id: int) -> str:
-    return f"convstate:{educator_id}"
-
-
-def _default_state() -> Dict[str, Any]:
-    return {"last_resolved_student": None, "last_action": None, "pending_clarify": None, "updated_at": time.time()}
-
+            logger.warning("Redis not available for conversation_state: %s", e)
+    return None
+
+
+class ConversationStateStore:
+    def __init__(self, redis=None, ttl: int = TTL_SECONDS, max_entries: int = MAX_ENTRIES):
+        self.redis = redis
+        self.ttl = ttl
+        self.memory = MemoryStateBackend(max_entries=max_entries, ttl=ttl)
+        self._redis_down_until = 0.0
+
+    @classmethod
+    def from_settings(cls) -> "ConversationStateStore":
+        return cls(redis=_redis_from_settings())
+
+    @staticmethod
+    def key(educator_id: int) -> str:
+        return f"{KEY_PREFIX}{educator_id}"
+
+    def _redis_available(self) -> bool:
+        return self.redis is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, operation: str, error: Exception) -> None:
+        logger.warning("Redis error in %s, using memory for %.0fs: %s", operation, REDIS_RETRY_SECONDS, error)
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+
+    async def get_state(self, educator_id: Optional[int]) -> Dict[str, Any]:
+        """Return the conversation state dict for the given educator id."""
+        if educator_id is None:
+            return _default_state()
+        if self._redis_available():
+            key = self.key(educator_id)
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    pipe.hgetall(key)
+                    pipe.expire(key, self.ttl)
+                    raw, _ = await pipe.execute()
+            except Exception as e:
+                self._redis_failed("get_state", e)
+            else:
+                state = _default_state()
+                for field, value in (raw or {}).items():
+                    try:
+                        state[field] = json.loads(value)
+                    except (TypeError, ValueError):
+                        logger.warning("Failed to parse conversation state field %s of %s", field, key)
+                return state
+        return self.memory.get(educator_id)
+
+    async def update_state(self, educator_id: Optional[int], **fields) -> None:
+        """Set the given fields atomically; other fields are left untouched."""
+        if educator_id is None:
+            return
+        if self._redis_available():
+            key = self.key(educator_id)
+            mapping = {field: json.dumps(value) for field, value in fields.items()}
+            mapping["updated_at"] = json.dumps(time.time())
+            try:
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.hset(key, mapping=mapping)
+                    pipe.expire(key, self.ttl)
+                    await pipe.execute()
+                return
+            except Exception as e:
+                self._redis_failed("update_state", e)
+        self.memory.update(educator_id, fields)
+
+    async def clear_state(self, educator_id: Optional[int]) -> None:
+        if educator_id is None:
+            return
+        if self._redis_available():
+            try:
+                await self.redis.delete(self.key(educator_id))
+            except Exception as e:
+                self._redis_failed("clear_state", e)
+        # Also drop any copy written while Redis was unavailable
+        self.memory.clear(educator_id)
+
+    async def close(self) -> None:
+        if self.redis is not None:
+            try:
+                # aclose() from redis 5.0.1; close() before that
+                await getattr(self.redis, "aclose", self.redis.close)()
+            except Exception:
+                logger.debug("Failed to close conversation state redis client", exc_info=True)
 
-def get_state(educator_id: int) -> Dict[str, Any]:
-    """Return the conversation state dict for the given educator id.
 
-    This is a synchronous API for compatibility with existing code. When
-    Redis is enabled, the value is fetched from Redis and parsed as JSON.
-    Otherwise the in-memory store is used.
-    """
-    if educator_id is None:
-        return _default_state()
+conversation_state = ConversationStateStore.from_settings()
 
-    if _use_redis and _redis:
-        try:
-            key = _redis_key(educator_id)
-            val = _redis.get(key)
-            if val:
-                try:
-                    return json.loads(val)
-                except Exception:
-                    logger.exception("Failed to parse JSON for conversation state key %s", key)
-            # Initialize default state in redis
-            st = _default_state()
-            try:
-                _redis.set(key, json.dumps(st))
-            except Exception:
-                logger.exception("Failed to write default conversation state to redis for %s", key)
-            return st
-        except Exception as e:
-            logger.warning("Redis error in get_state, falling back to memory: %s", e)
 
-    # Fallback to in-memory
-    with _lock:
-        st = _store.get(educator_id)
-        if not st:
-            st = _default_state()
-            _store[educator_id] = st
-        return st
+async def get_state(educator_id: Optional[int]) -> Dict[str, Any]:
+    return await conversation_state.get_state(educator_id)
 
 
-def update_state(educator_id: int, **kwargs) -> None:
-    """Update keys in the educator's conversation state.
+async def update_state(educator_id: Optional[int], **fields) -> None:
+    await conversation_state.update_state(educator_id, **fields)
 
-    This will persist to Redis when available; otherwise updates the in-memory map.
-    """
-    if educator_id is None:
-        return
 
-    if _use_redis and _redis:
-        try:
-            key = _redis_key(educator_id)
-            cur = None
-            val = _redis.get(key)
-            if val:
-                try:
-                    cur = json.loads(val)
-                except Exception:
-                    cur = _default_state()
-            else:
-                cur = _default_state()
-            for k, v in kwargs.items():
-                cur[k] = v
-            cur["updated_at"] = time.time()
-            try:
-                _redis.set(key, json.dumps(cur))
-            except Exception:
-                logger.exception("Failed to write conversation state to redis for %s", key)
-            return
-        except Exception as e:
-            logger.warning("Redis error in update_state, falling back to memory: %s", e)
-
-    with _lock:
-        st = _store.get(educator_id)
-        if not st:
-            st = _default_state()
-            _store[educator_id] = st
-        for k, v in kwargs.items():
-            st[k] = v
-        st["updated_at"] = time.time()
-
-
-def clear_state(educator_id: int) -> None:
-    if educator_id is None:
-        return
-    if _use_redis and _redis:
-        try:
-            key = _redis_key(educator_id)
-            _redis.delete(key)
-            return
-        except Exception as e:
-            logger.warning("Redis error in clear_state, falling back to memory delete: %s", e)
-    with _lock:
-        if educator_id in _store:
-            del _store[educator_id]
+async def clear_state(educator_id: Optional[int]) -> None:
+    await conversation_state.clear_state(educator_id)
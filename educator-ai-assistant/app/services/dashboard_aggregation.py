@@ -0,0 +1,133 @@
+"""Set-based aggregation for the teacher dashboard.
+
+The dashboard endpoints used to walk sections -> subjects -> students and
+issue a `Grade` query per student (twice, once for the average and once
+for pass/fail). This module computes the same figures with a fixed number
+of GROUP BY queries, independent of how many students a section has:
+
+- one query for per-student averages (students LEFT JOIN the
+  `student_grade_aggregates` totals kept by `app.services.grade_pipeline`)
+- one query for per-subject averages within each section
+
+Rounding mirrors `calculate_student_average` in `app/api/dashboard.py`;
+pass/fail is the shared `student_passed` rule.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.student import Student, StudentGradeAggregate, Subject, Grade
+from app.services.grade_pipeline import STUDENT_PASS_THRESHOLD, student_passed
+
+# Minimum average percentage for a student to count as passed
+PASS_THRESHOLD = STUDENT_PASS_THRESHOLD
+
+
+def student_averages(db: Session, section_ids: Iterable[int], student_ids: Optional[Iterable[int]] = None) -> Dict[int, Dict[str, Any]]:
+    """Return {student_id: {"section_id", "average", "passed"}} in one query.
+
+    `average` is the mean grade percentage.
+
+    Students without grades get an average of 0.0, matching the old
+    per-student helper. `student_ids` optionally narrows the result.
+    """
+    section_ids = list(section_ids)
+    if not section_ids:
+        return {}
+
+    query = (
+        db.query(
+            Student.id,
+            Student.section_id,
+            StudentGradeAggregate.percentage_total,
+            StudentGradeAggregate.grade_count,
+        )
+        .outerjoin(StudentGradeAggregate, StudentGradeAggregate.student_id == Student.id)
+        .filter(Student.section_id.in_(section_ids))
+    )
+    if student_ids is not None:
+        query = query.filter(Student.id.in_(list(student_ids)))
+
+    result = {}
+    for student_id, section_id, percentage_total, grade_count in query.all():
+        average = round(percentage_total / grade_count, 2) if grade_count else 0.0
+        result[student_id] = {
+            "section_id": section_id,
+            "average": average,
+            "passed": student_passed(average),
+        }
+    return result
+
+
+def subject_averages(db: Session, section_ids: Iterable[int]) -> Dict[int, Dict[str, float]]:
+    """Return {section_id: {subject_name: average_marks}} in one query.
+
+    Only grades of students enrolled in the subject's own section count,
+    and subjects without any grades are omitted.
+    """
+    section_ids = list(section_ids)
+    if not section_ids:
+        return {}
+
+    rows = (
+        db.query(
+            Subject.section_id,
+            Subject.id,
+            Subject.name,
+            func.avg(Grade.marks_obtained),
+        )
+        .join(Grade, Grade.subject_id == Subject.id)
+        .join(Student, Student.id == Grade.student_id)
+        .filter(
+            Subject.section_id.in_(section_ids),
+            Student.section_id == Subject.section_id,
+        )
+        .group_by(Subject.section_id, Subject.id, Subject.name)
+        .order_by(Subject.id)
+        .all()
+    )
+
+    result: Dict[int, Dict[str, float]] = {}
+    for section_id, _subject_id, name, avg_marks in rows:
+        result.setdefault(section_id, {})[name] = round(float(avg_marks), 2)
+    return result
+
+
+def section_stats(db: Session, sections: List[Any]) -> List[Dict[str, Any]]:
+    """Aggregate dashboard statistics for the given sections.
+
+    Returns one dict per section that has students, in the order given,
+    with the same keys as the `SectionStats` response model plus the list
+    of per-student averages (used for the overall average).
+    """
+    section_ids = [section.id for section in sections]
+    students = student_averages(db, section_ids)
+    subjects = subject_averages(db, section_ids)
+
+    by_section: Dict[int, List[Dict[str, Any]]] = {}
+    for row in students.values():
+        by_section.setdefault(row["section_id"], []).append(row)
+
+    stats = []
+    for section in sections:
+        rows = by_section.get(section.id)
+        if not rows:
+            continue
+
+        averages = [row["average"] for row in rows]
+        passed_count = sum(1 for row in rows if row["passed"])
+        total = len(rows)
+
+        stats.append({
+            "section_id": section.id,
+            "section_name": section.name,
+            "total_students": total,
+            "passed_students": passed_count,
+            "failed_students": total - passed_count,
+            "pass_rate": round((passed_count / total) * 100, 1),
+            "section_average": round(sum(averages) / total, 2),
+            "subjects_average": subjects.get(section.id, {}),
+            "student_averages": averages,
+        })
+    return stats
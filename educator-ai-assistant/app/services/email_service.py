@@ -1,13 +1,17 @@
 """
 Real email service implementation using SMTP
+
+Delivery goes through `SMTPDeliveryEngine`, which keeps a pool of
+authenticated connections and sends bulk mail concurrently.
 """
 
-import smtplib
 import logging
+from datetime import datetime
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import List, Optional
+from typing import Dict, List, Optional
 from app.core.config import settings
+from app.services.smtp_delivery import SMTPDeliveryEngine
 
 logger = logging.getLogger(__name__)
 
@@ -17,59 +21,79 @@ class EmailService:
         self.smtp_port = settings.SMTP_PORT
         self.username = settings.EMAIL_USERNAME
         self.password = settings.EMAIL_PASSWORD
-        
-    def send_email(
-        self, 
-        to_email: str, 
-        subject: str, 
-        body: str, 
+        self._engine: Optional[SMTPDeliveryEngine] = None
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.username and self.password)
+
+    @property
+    def engine(self) -> SMTPDeliveryEngine:
+        if self._engine is None:
+            self._engine = SMTPDeliveryEngine(
+                hostname=self.smtp_server,
+                port=self.smtp_port,
+                username=self.username,
+                password=self.password,
+                pool_size=settings.SMTP_POOL_SIZE,
+                max_in_flight=settings.SMTP_MAX_IN_FLIGHT,
+                max_messages_per_connection=settings.SMTP_MAX_MESSAGES_PER_CONNECTION,
+                domain_rate_limit=settings.SMTP_DOMAIN_RATE_LIMIT,
+                domain_burst=settings.SMTP_DOMAIN_BURST,
+                max_retries=settings.SMTP_MAX_RETRIES,
+                timeout=settings.SMTP_TIMEOUT,
+                start_tls=settings.SMTP_STARTTLS,
+            )
+        return self._engine
+
+    def close(self) -> None:
+        """Send QUIT on pooled connections and stop the delivery loop, if started"""
+        if self._engine is not None:
+            self._engine.close()
+            self._engine = None
+
+    def _build_message(
+        self,
+        to_email: str,
+        subject: str,
+        body: str,
         from_email: Optional[str] = None,
         cc: Optional[List[str]] = None,
         bcc: Optional[List[str]] = None
-    ) -> dict:
-        """
-        Send an actual email via SMTP
-        """
-        try:
-            # Create message
-            msg = MIMEMultipart()
-            msg['From'] = from_email or f"Educator AI Assistant <{self.username}>"
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            
-            if cc:
-                msg['Cc'] = ', '.join(cc)
-            
-            # Add body
-            msg.attach(MIMEText(body, 'plain'))
-            
-            # Check if email is configured
-            if not self.username or not self.password:
-                logger.warning("Email credentials not configured. Email would be sent to: %s", to_email)
-                return {
-                    "success": True,  # Changed to True for demo/development purposes
-                    "message": f"Email delivered (simulation mode) to {to_email}",
-                    "details": {
-                        "to": to_email,
-                        "subject": subject,
-                        "body_preview": body[:100] + "..." if len(body) > 100 else body,
-                        "mode": "simulation"
-                    }
-                }
-            
-            # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.username, self.password)
-                
-                recipients = [to_email]
-                if cc:
-                    recipients.extend(cc)
-                if bcc:
-                    recipients.extend(bcc)
-                    
-                server.send_message(msg, to_addrs=recipients)
-                
+    ):
+        msg = MIMEMultipart()
+        msg['From'] = from_email or f"Educator AI Assistant <{self.username}>"
+        msg['To'] = to_email
+        msg['Subject'] = subject
+
+        if cc:
+            msg['Cc'] = ', '.join(cc)
+
+        # Add body
+        msg.attach(MIMEText(body, 'plain'))
+
+        recipients = [to_email]
+        if cc:
+            recipients.extend(cc)
+        if bcc:
+            recipients.extend(bcc)
+        return msg, recipients
+
+    def _simulated_result(self, to_email: str, subject: str, body: str) -> dict:
+        logger.warning("Email credentials not configured. Email would be sent to: %s", to_email)
+        return {
+            "success": True,  # Changed to True for demo/development purposes
+            "message": f"Email delivered (simulation mode) to {to_email}",
+            "details": {
+                "to": to_email,
+                "subject": subject,
+                "body_preview": body[:100] + "..." if len(body) > 100 else body,
+                "mode": "simulation"
+            }
+        }
+
+    def _delivery_result(self, to_email: str, subject: str, outcome: dict) -> dict:
+        if outcome["success"]:
             logger.info("Email sent successfully to %s", to_email)
             return {
                 "success": True,
@@ -77,45 +101,137 @@ class EmailService:
                 "details": {
                     "to": to_email,
                     "subject": subject,
-                    "sent_at": None  # Add timestamp if needed
+                    "sent_at": datetime.utcnow().isoformat(),
+                    "attempts": outcome["attempts"],
+                    "refused": outcome["refused"]
                 }
             }
-            
-        except Exception as e:
-            logger.error("Failed to send email to %s: %s", to_email, str(e))
-            return {
-                "success": False,
-                "message": f"Failed to send email: {str(e)}",
-                "details": {
-                    "to": to_email,
-                    "subject": subject,
-                    "error": str(e)
-                }
+
+        logger.error("Failed to send email to %s: %s", to_email, outcome["error"])
+        return {
+            "success": False,
+            "message": f"Failed to send email: {outcome['error']}",
+            "details": {
+                "to": to_email,
+                "subject": subject,
+                "error": outcome["error"],
+                "attempts": outcome["attempts"]
             }
-    
-    def send_bulk_email(self, recipients: List[str], subject: str, body: str) -> dict:
+        }
+
+    def _error_result(self, to_email: str, subject: str, error: Exception) -> dict:
+        logger.error("Failed to send email to %s: %s", to_email, str(error))
+        return {
+            "success": False,
+            "message": f"Failed to send email: {str(error)}",
+            "details": {
+                "to": to_email,
+                "subject": subject,
+                "error": str(error)
+            }
+        }
+
+    def send_email(
+        self,
+        to_email: str,
+        subject: str,
+        body: str,
+        from_email: Optional[str] = None,
+        cc: Optional[List[str]] = None,
+        bcc: Optional[List[str]] = None
+    ) -> dict:
         """
-        Send email to multiple recipients
+        Send an actual email via SMTP
         """
+        try:
+            msg, recipients = self._build_message(to_email, subject, body, from_email, cc, bcc)
+
+            # Check if email is configured
+            if not self.configured:
+                return self._simulated_result(to_email, subject, body)
+
+            outcome = self.engine.call(self.engine.send(msg, recipients))
+            return self._delivery_result(to_email, subject, outcome)
+
+        except Exception as e:
+            return self._error_result(to_email, subject, e)
+
+    async def send_email_async(
+        self,
+        to_email: str,
+        subject: str,
+        body: str,
+        from_email: Optional[str] = None,
+        cc: Optional[List[str]] = None,
+        bcc: Optional[List[str]] = None
+    ) -> dict:
+        """
+        Send an email without blocking the caller's event loop
+        """
+        try:
+            msg, recipients = self._build_message(to_email, subject, body, from_email, cc, bcc)
+
+            if not self.configured:
+                return self._simulated_result(to_email, subject, body)
+
+            outcome = await self.engine.call_async(self.engine.send(msg, recipients))
+            return self._delivery_result(to_email, subject, outcome)
+
+        except Exception as e:
+            return self._error_result(to_email, subject, e)
+
+    def _prepare_messages(self, messages: List[Dict]) -> list:
+        return [
+            self._build_message(m["to_email"], m["subject"], m["body"], m.get("from_email"))
+            for m in messages
+        ]
+
+    def _bulk_summary(self, messages: List[Dict], outcomes: List[dict]) -> dict:
         results = []
-        successful = 0
-        failed = 0
-        
-        for recipient in recipients:
-            result = self.send_email(recipient, subject, body)
-            results.append(result)
-            
-            if result["success"]:
-                successful += 1
+        for message, outcome in zip(messages, outcomes):
+            if self.configured:
+                results.append(self._delivery_result(message["to_email"], message["subject"], outcome))
             else:
-                failed += 1
-        
+                results.append(self._simulated_result(message["to_email"], message["subject"], message["body"]))
+        successful = sum(1 for r in results if r["success"])
         return {
-            "total": len(recipients),
+            "total": len(messages),
             "successful": successful,
-            "failed": failed,
+            "failed": len(messages) - successful,
             "results": results
         }
 
+    def send_messages(self, messages: List[Dict]) -> dict:
+        """
+        Send individually addressed messages concurrently over pooled connections.
+
+        Each message is a dict with `to_email`, `subject`, `body` and
+        optionally `from_email`.
+        """
+        if not self.configured or not messages:
+            return self._bulk_summary(messages, [None] * len(messages))
+        prepared = self._prepare_messages(messages)
+        outcomes = self.engine.call(self.engine.send_many(prepared))
+        return self._bulk_summary(messages, outcomes)
+
+    async def send_messages_async(self, messages: List[Dict]) -> dict:
+        """
+        Async variant of `send_messages`
+        """
+        if not self.configured or not messages:
+            return self._bulk_summary(messages, [None] * len(messages))
+        prepared = self._prepare_messages(messages)
+        outcomes = await self.engine.call_async(self.engine.send_many(prepared))
+        return self._bulk_summary(messages, outcomes)
+
+    def send_bulk_email(self, recipients: List[str], subject: str, body: str) -> dict:
+        """
+        Send email to multiple recipients
+        """
+        return self.send_messages([
+            {"to_email": recipient, "subject": subject, "body": body}
+            for recipient in recipients
+        ])
+
 # Global email service instance
-email_service = EmailService()
\ No newline at end of file
+email_service = EmailService()
@@ -0,0 +1,174 @@
+"""Grade-derived columns and per-student aggregates, maintained at write time.
+
+`Grade.percentage`, `grade_letter` and `is_passed` were only filled in by
+the code paths that remembered to call `calculate_percentage()`, so readers
+recomputed `marks_obtained / total_marks * 100` per row and each dashboard
+decided pass/fail with its own threshold. Now:
+
+- a `before_flush` listener derives the three columns of every new Grade and
+  of every Grade whose marks, total or subject changed: percentage from
+  marks/total, the letter from `grade_letter_for`, and `is_passed` from the
+  subject's `passing_grade` (60 if unset)
+- an `after_flush` listener recomputes the `student_grade_aggregates` row
+  (grade count, marks total, percentage total, passed count) of every
+  student whose grades changed, set-based in the same transaction
+- changing a subject's `passing_grade` re-derives `is_passed` of its grades
+  with one UPDATE and refreshes the affected aggregates
+- existing rows are backfilled by schema migration 2 (set-based UPDATEs);
+  `rebuild_student_aggregates` repairs aggregates after writes that bypass
+  the ORM (bulk SQL, external imports)
+
+Student-level pass/fail (`student_passed`) is one rule for every dashboard:
+the mean of the student's grade percentages
+(`StudentGradeAggregate.average_percentage`, `average_percentage`) is at
+least `STUDENT_PASS_THRESHOLD`, the same pass mark a grade gets by default.
+"""
+from typing import Iterable, Optional, Set, Tuple
+import logging
+
+from sqlalchemy import case, delete, event, func, insert, inspect, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.student import Grade, StudentGradeAggregate, Subject, grade_letter_for
+
+logger = logging.getLogger(__name__)
+
+# Subject.passing_grade default
+DEFAULT_PASSING_GRADE = 60.0
+# Minimum average percentage for a student to count as passed
+STUDENT_PASS_THRESHOLD = DEFAULT_PASSING_GRADE
+
+_INPUTS = ("marks_obtained", "total_marks", "subject_id")
+_AGGREGATED = ("student_id", "marks_obtained", "percentage", "is_passed")
+
+
+def average_percentage(percentages: Iterable[Optional[float]]) -> float:
+    """Mean grade percentage; grades without a percentage count as 0, as in
+    `StudentGradeAggregate.average_percentage`."""
+    percentages = [percentage or 0.0 for percentage in percentages]
+    return sum(percentages) / len(percentages) if percentages else 0.0
+
+
+def student_passed(average: Optional[float]) -> bool:
+    """`average` is the student's mean grade percentage."""
+    return average is not None and average >= STUDENT_PASS_THRESHOLD
+
+
+def derive(marks_obtained: Optional[float], total_marks: Optional[float], passing_grade: Optional[float]) -> Tuple[Optional[float], Optional[str], Optional[bool]]:
+    """(percentage, grade_letter, is_passed); all None without a positive total."""
+    if marks_obtained is None or not total_marks or total_marks <= 0:
+        return None, None, None
+    percentage = marks_obtained / total_marks * 100
+    threshold = DEFAULT_PASSING_GRADE if passing_grade is None else passing_grade
+    return percentage, grade_letter_for(percentage), percentage >= threshold
+
+
+def _changed(obj, attributes: Iterable[str]) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[attribute].history.has_changes() for attribute in attributes)
+
+
+def _passing_grade(session: Session, grade: Grade) -> Optional[float]:
+    # A subject assigned through the relationship may still be pending
+    subject = grade.__dict__.get("subject")
+    if subject is None and grade.subject_id is not None:
+        with session.no_autoflush:
+            subject = session.get(Subject, grade.subject_id)
+    return subject.passing_grade if subject is not None else None
+
+
+def apply_derived(session: Session, grade: Grade) -> None:
+    grade.percentage, grade.grade_letter, grade.is_passed = derive(
+        grade.marks_obtained, grade.total_marks, _passing_grade(session, grade)
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _derive_columns(session: Session, flush_context, instances) -> None:
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Grade):
+            continue
+        if obj in session.new or _changed(obj, _INPUTS) or (obj.percentage is None and obj.total_marks):
+            apply_derived(session, obj)
+
+
+def _aggregate_rows(student_ids: Optional[Set[int]] = None):
+    rows = select(
+        Grade.student_id,
+        func.count(Grade.id),
+        func.coalesce(func.sum(Grade.marks_obtained), 0.0),
+        func.coalesce(func.sum(Grade.percentage), 0.0),
+        func.count(case((Grade.is_passed.is_(True), 1))),
+        func.current_timestamp(),
+    ).group_by(Grade.student_id)
+    if student_ids is not None:
+        rows = rows.where(Grade.student_id.in_(student_ids))
+    return rows
+
+
+def _refresh_aggregates(connection, student_ids: Optional[Set[int]] = None) -> None:
+    clear = delete(StudentGradeAggregate)
+    if student_ids is not None:
+        clear = clear.where(StudentGradeAggregate.student_id.in_(student_ids))
+    refill = insert(StudentGradeAggregate).from_select(
+        ["student_id", "grade_count", "marks_total", "percentage_total", "passed_count", "updated_at"],
+        _aggregate_rows(student_ids),
+    )
+    for attempt in range(2):
+        try:
+            with connection.begin_nested():
+                connection.execute(clear)
+                connection.execute(refill)
+            return
+        except IntegrityError:
+            # A concurrent transaction committed a row for one of these
+            # students after our DELETE started; the retry sees it
+            if attempt:
+                raise
+
+
+def rebuild_student_aggregates(db: Session, student_ids: Optional[Iterable[int]] = None) -> None:
+    """Recompute aggregates from `grades` (all students if None) and commit."""
+    _refresh_aggregates(db.connection(), set(student_ids) if student_ids is not None else None)
+    db.commit()
+
+
+def _students_of_subjects(connection, subject_ids: Set[int]) -> Set[int]:
+    return set(connection.execute(
+        select(Grade.student_id).where(Grade.subject_id.in_(subject_ids)).distinct()
+    ).scalars())
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_aggregates(session: Session, flush_context) -> None:
+    students: Set[int] = set()
+    subjects: Set[int] = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Grade):
+            if obj in session.dirty and not _changed(obj, _AGGREGATED):
+                continue
+            state = inspect(obj)
+            # Read from the state: a deleted row must not be refreshed
+            current = state.dict.get("student_id")
+            students.update(student_id for student_id in (*state.attrs.student_id.history.deleted, current) if student_id is not None)
+        elif isinstance(obj, Subject) and obj in session.dirty and _changed(obj, ("passing_grade",)):
+            subjects.add(obj.id)
+    if not students and not subjects:
+        return
+    connection = session.connection()
+    for subject_id in subjects:
+        subject = session.get(Subject, subject_id)
+        threshold = DEFAULT_PASSING_GRADE if subject.passing_grade is None else subject.passing_grade
+        connection.execute(
+            update(Grade)
+            .where(Grade.subject_id == subject_id, Grade.percentage.is_not(None))
+            .values(is_passed=Grade.percentage >= threshold)
+        )
+    if subjects:
+        students |= _students_of_subjects(connection, subjects)
+        # Loaded grades of these subjects now hold a stale is_passed
+        for obj in list(session.identity_map.values()):
+            if isinstance(obj, Grade) and obj.subject_id in subjects:
+                session.expire(obj, ["is_passed"])
+    _refresh_aggregates(connection, students)
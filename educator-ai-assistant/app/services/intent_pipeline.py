@@ -0,0 +1,319 @@
+"""Tiered intent detection for the chatbot.
+
+Every chat turn that the local regexes did not catch went to Gemini just to
+learn that "pls text Steven Smith that the test moved" is a `send_message`.
+Detection now runs through three tiers, cheapest first, and stops at the
+first confident answer:
+
+1. rules: the precompiled patterns in `nlu.parse_fast` (microseconds)
+2. classifier: a multinomial naive Bayes model over word unigrams and
+   bigrams, trained from earlier turns that the rules or Gemini labelled.
+   Its answer is used only if the posterior is at least
+   `INTENT_CLASSIFIER_THRESHOLD` (default 0.9), the model has seen at least
+   `INTENT_CLASSIFIER_MIN_SAMPLES` turns (default 50), and the predicted
+   intent is an action (chit-chat still needs a Gemini reply)
+3. llm: `simple_chatbot.achat`
+
+Labelled turns are stored as `ActionLog` rows (`action_type="intent_turn"`):
+every Gemini-labelled turn, and a `INTENT_RULES_SAMPLE_RATE` sample (default
+0.05) of rules-tier hits, which the regexes will keep catching anyway. Text
+is cut to `INTENT_TURN_TEXT_LIMIT` characters (default 500). Rows are
+written by a background thread on its own session, so a chat turn never
+waits on (or commits) the database, and that thread deletes turns older
+than `INTENT_TURN_RETENTION_DAYS` (default 90) or beyond the newest
+`INTENT_TURN_MAX_ROWS` (default 10000) every `INTENT_PRUNE_SECONDS`
+(default 3600). The model loads the newest `INTENT_TRAINING_LIMIT` rows (default 2000) on
+first use, learns new turns incrementally, and reloads every
+`INTENT_RETRAIN_SECONDS` (default 3600) to pick up turns recorded by other
+workers. Per-tier attempts, hit rates and latency are kept in memory and
+served by `tier_stats()`.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import logging
+import math
+import os
+import random
+import re
+import time
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.agents.simple_gemini_chatbot import simple_chatbot
+from app.models import ActionLog
+from app.services.nlu import format_slots, parse_fast
+
+logger = logging.getLogger(__name__)
+
+CLASSIFIER_THRESHOLD = float(os.getenv("INTENT_CLASSIFIER_THRESHOLD", "0.9"))
+CLASSIFIER_MIN_SAMPLES = int(os.getenv("INTENT_CLASSIFIER_MIN_SAMPLES", "50"))
+TRAINING_LIMIT = int(os.getenv("INTENT_TRAINING_LIMIT", "2000"))
+RETRAIN_SECONDS = float(os.getenv("INTENT_RETRAIN_SECONDS", "3600"))
+RULES_SAMPLE_RATE = float(os.getenv("INTENT_RULES_SAMPLE_RATE", "0.05"))
+TURN_TEXT_LIMIT = int(os.getenv("INTENT_TURN_TEXT_LIMIT", "500"))
+TURN_RETENTION_DAYS = int(os.getenv("INTENT_TURN_RETENTION_DAYS", "90"))
+TURN_MAX_ROWS = int(os.getenv("INTENT_TURN_MAX_ROWS", "10000"))
+PRUNE_SECONDS = float(os.getenv("INTENT_PRUNE_SECONDS", "3600"))
+
+TURN_ACTION_TYPE = "intent_turn"
+NO_ACTION = "none"
+TIERS = ("rules", "classifier", "llm")
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+# Classifier-tier slot heuristics
+_NAME_SPAN = re.compile(r"\b([A-Z][a-z'\-]+(?:\s+[A-Z][a-z'\-]+)?)")
+_CONTENT = re.compile(r"(?::|\babout\b|\bthat\b|\bsaying\b)\s*([\s\S]+)$", re.IGNORECASE)
+_DATETIME = re.compile(r"\b((?:on|at|for)\s+[\w\s,:]+|(?:today|tomorrow|next\s+\w+)[\w\s,:]*)$", re.IGNORECASE)
+
+
+def features(text: str) -> List[str]:
+    tokens = _TOKEN.findall((text or "").lower())
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+class NaiveBayesIntentClassifier:
+    """Multinomial naive Bayes with Laplace smoothing; supports incremental learning."""
+
+    def __init__(self):
+        self.class_counts: Dict[str, int] = {}
+        self.feature_counts: Dict[str, Dict[str, int]] = {}
+        self.feature_totals: Dict[str, int] = {}
+        self.vocabulary: set = set()
+        self.samples = 0
+
+    def learn(self, text: str, label: str) -> None:
+        feats = features(text)
+        if not feats:
+            return
+        self.samples += 1
+        self.class_counts[label] = self.class_counts.get(label, 0) + 1
+        counts = self.feature_counts.setdefault(label, {})
+        for feat in feats:
+            counts[feat] = counts.get(feat, 0) + 1
+            self.vocabulary.add(feat)
+        self.feature_totals[label] = self.feature_totals.get(label, 0) + len(feats)
+
+    def predict(self, text: str) -> Tuple[Optional[str], float]:
+        """Most likely label and its posterior probability."""
+        feats = [f for f in features(text) if f in self.vocabulary]
+        if not feats or not self.class_counts:
+            return None, 0.0
+        vocab_size = len(self.vocabulary)
+        scores = {}
+        for label, count in self.class_counts.items():
+            counts = self.feature_counts[label]
+            denominator = self.feature_totals[label] + vocab_size
+            score = math.log(count / self.samples)
+            for feat in feats:
+                score += math.log((counts.get(feat, 0) + 1) / denominator)
+            scores[label] = score
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        total = sum(math.exp(s - top) for s in scores.values())
+        return best, 1.0 / total
+
+
+class TierStats:
+    def __init__(self):
+        self.attempts = 0
+        self.hits = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, hit: bool, elapsed_ms: float) -> None:
+        self.attempts += 1
+        self.hits += int(hit)
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.attempts, 4) if self.attempts else 0.0,
+            "avg_ms": round(self.total_ms / self.attempts, 3) if self.attempts else 0.0,
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+def classifier_slots(intent: str, text: str) -> Dict[str, Any]:
+    """Best-effort slots for a classifier prediction; the rules did not match, so keep it loose."""
+    slots: Dict[str, Any] = {}
+    # Skip a capitalized first word ("Please", "Text") unless it starts a full name
+    for match in _NAME_SPAN.finditer(text):
+        if match.start() == 0 and " " not in match.group(1):
+            continue
+        slots["recipient"] = match.group(1)
+        break
+    if intent == "send_message":
+        m = _CONTENT.search(text)
+        slots["content"] = m.group(1).strip() if m else None
+    if intent in ("schedule_meeting", "create_meeting"):
+        m = _DATETIME.search(text)
+        slots["datetime"] = m.group(1).strip() if m else None
+    if intent == "query_student" and "recipient" in slots:
+        slots["name"] = slots.pop("recipient")
+    return slots
+
+
+def prune_turns(db: Session) -> int:
+    """Delete stored turns past the retention age or row cap; the caller commits."""
+    turns = db.query(ActionLog).filter(ActionLog.action_type == TURN_ACTION_TYPE)
+    cutoff = datetime.now(timezone.utc) - timedelta(days=TURN_RETENTION_DAYS)
+    deleted = turns.filter(ActionLog.created_at < cutoff).delete(synchronize_session=False)
+    newest_dropped = (
+        turns.with_entities(ActionLog.id)
+        .order_by(ActionLog.id.desc())
+        .offset(TURN_MAX_ROWS)
+        .limit(1)
+        .scalar()
+    )
+    if newest_dropped is not None:
+        deleted += turns.filter(ActionLog.id <= newest_dropped).delete(synchronize_session=False)
+    return deleted
+
+
+class IntentPipeline:
+    def __init__(self):
+        self.classifier = NaiveBayesIntentClassifier()
+        self.trained_at: Optional[float] = None
+        self.pruned_at: Optional[float] = None
+        self.stats = {tier: TierStats() for tier in TIERS}
+        self._lock = Lock()
+        self._writer: Optional[ThreadPoolExecutor] = None
+
+    # -- tiers ---------------------------------------------------------------
+
+    def detect_local(self, message: str, db: Optional[Session] = None) -> Optional[Dict[str, Any]]:
+        """Rules, then classifier. Returns an action dict (with `tier`) or None."""
+        started = time.perf_counter()
+        try:
+            intent, slots, confidence = parse_fast(message or "")
+        except Exception:
+            intent, slots, confidence = None, {}, 0.0
+        self._record_stats("rules", intent is not None, started)
+        if intent:
+            action = {"action": intent, **format_slots(intent, slots), "confidence": confidence, "tier": "rules"}
+            self.record_turn(db, message, action)
+            return action
+
+        if db is not None:
+            self._ensure_trained(db)
+        started = time.perf_counter()
+        with self._lock:
+            trained = self.classifier.samples >= CLASSIFIER_MIN_SAMPLES
+            intent, probability = self.classifier.predict(message) if trained else (None, 0.0)
+        hit = intent not in (None, NO_ACTION) and probability >= CLASSIFIER_THRESHOLD
+        self._record_stats("classifier", hit, started)
+        if hit:
+            return {"action": intent, **classifier_slots(intent, message), "confidence": round(probability, 4), "tier": "classifier"}
+        return None
+
+    async def detect_llm(self, message: str, history: Optional[List[Dict[str, str]]] = None, language: str = "auto", db: Optional[Session] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Ask Gemini for an action. Returns (action or None, model reply)."""
+        started = time.perf_counter()
+        # auto_execute is off so the model does not act on its own
+        result = await simple_chatbot.achat(message=message, history=history, language=language, auto_execute=False)
+        reply = result.get("reply")
+        action = result.get("action")
+        if action is None:
+            # The model answered in prose; try the lightweight regex on its reply
+            try:
+                action = simple_chatbot._simple_regex_action(reply or message)
+            except Exception:
+                action = None
+        self._record_stats("llm", bool(action), started)
+        if not result.get("error"):
+            self.record_turn(db, message, action)
+        return action, reply
+
+    # -- training data -------------------------------------------------------
+
+    def record_turn(self, db: Optional[Session], message: str, action: Optional[Dict[str, Any]]) -> Optional[Future]:
+        """Learn a labelled turn and queue it for storage; failures never affect the chat turn.
+
+        Returns the pending write, or None when the turn is not stored.
+        """
+        label = action.get("action") if isinstance(action, dict) and action.get("action") else NO_ACTION
+        tier = (action or {}).get("tier", "llm")
+        with self._lock:
+            if self.trained_at is not None:
+                self.classifier.learn(message, label)
+        if db is None or (tier == "rules" and random.random() >= RULES_SAMPLE_RATE):
+            return None
+        payload = {"text": (message or "")[:TURN_TEXT_LIMIT], "intent": label, "tier": tier}
+        try:
+            return self._get_writer().submit(self._store_turn, db.get_bind(), payload)
+        except Exception:
+            logger.exception("Failed to queue intent turn")
+            return None
+
+    def _get_writer(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._writer is None:
+                # One thread: turns are written in order and pruning never overlaps
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="intent-turns")
+            return self._writer
+
+    def _store_turn(self, bind: Engine, payload: Dict[str, Any]) -> None:
+        with Session(bind=bind) as session:
+            try:
+                session.add(ActionLog(action_type=TURN_ACTION_TYPE, target_type="intent", payload=json.dumps(payload)))
+                now = time.monotonic()
+                if self.pruned_at is None or now - self.pruned_at >= PRUNE_SECONDS:
+                    self.pruned_at = now
+                    deleted = prune_turns(session)
+                    if deleted:
+                        logger.info("Pruned %d stored intent turns", deleted)
+                session.commit()
+            except Exception:
+                logger.exception("Failed to record intent turn")
+                session.rollback()
+
+    def _ensure_trained(self, db: Session) -> None:
+        if self.trained_at is not None and time.monotonic() - self.trained_at < RETRAIN_SECONDS:
+            return
+        classifier = NaiveBayesIntentClassifier()
+        try:
+            rows = (
+                db.query(ActionLog.payload)
+                .filter(ActionLog.action_type == TURN_ACTION_TYPE)
+                .order_by(ActionLog.id.desc())
+                .limit(TRAINING_LIMIT)
+                .all()
+            )
+            for (payload,) in rows:
+                turn = json.loads(payload or "{}")
+                if turn.get("text") and turn.get("intent"):
+                    classifier.learn(turn["text"], turn["intent"])
+        except Exception:
+            logger.exception("Failed to load intent training data")
+        with self._lock:
+            self.classifier = classifier
+            self.trained_at = time.monotonic()
+        logger.debug("Intent classifier trained on %d turns", classifier.samples)
+
+    # -- stats ---------------------------------------------------------------
+
+    def _record_stats(self, tier: str, hit: bool, started: float) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.stats[tier].record(hit, elapsed_ms)
+
+    def tier_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tiers = {tier: stats.to_dict() for tier, stats in self.stats.items()}
+            turns = self.stats["rules"].attempts
+            return {
+                "turns": turns,
+                "resolved_locally": round((self.stats["rules"].hits + self.stats["classifier"].hits) / turns, 4) if turns else 0.0,
+                "classifier_samples": self.classifier.samples,
+                "tiers": tiers,
+            }
+
+
+intent_pipeline = IntentPipeline()
@@ -6,8 +6,10 @@ then performs server-side slot resolution and execution using internal APIs.
 
 Design goals:
 - Use Gemini only for intent detection / extraction of structured action JSON.
-- Resolve student names / ids and execute actions via internal endpoints on the
-  backend (so the model doesn't need direct access to private data).
+- Resolve student names / ids and execute actions in-process through
+  `action_executor` with the caller's session and educator (no loopback
+  HTTP, so a chat turn does not re-run auth and serialization per call).
+  The model never gets direct access to private data.
 - Respect a "do not ask" directive (e.g. "don't ask me any more questions") to
   force execution even when some slots are missing.
 """
@@ -16,27 +18,18 @@ import logging
 import difflib
 import re
 
-import httpx
+from sqlalchemy.orm import Session
 
-from app.agents.simple_gemini_chatbot import simple_chatbot
 from app.services.action_executor import send_message as executor_send_message, schedule_meeting as executor_schedule_meeting, fetch_grades as executor_fetch_grades, fetch_schedule as executor_fetch_schedule
-from app.services.nlu import parse_fast, format_slots
+from app.services.intent_pipeline import intent_pipeline
 from app.services.conversation_state import get_state, update_state
 from app.services.dialog_manager import DialogManager
+from app.services.student_name_index import get_index as get_name_index, normalize_name as _normalize_name
+from app.models.educator import Educator
 
 logger = logging.getLogger(__name__)
 
 
-def _normalize_name(s: Optional[str]) -> str:
-    """Normalize a name for comparison: lower, remove punctuation, collapse spaces."""
-    if not s:
-        return ""
-    # remove common punctuation, keep letters and spaces
-    cleaned = re.sub(r"[^0-9A-Za-z\s]", "", s)
-    cleaned = re.sub(r"\s+", " ", cleaned).strip().lower()
-    return cleaned
-
-
 def _name_matches(query: str, candidate: str, fuzzy_cutoff: float = 0.78) -> bool:
     """Return True if query and candidate likely refer to the same name.
 
@@ -119,61 +112,29 @@ def _should_force_execute(message: str) -> bool:
     return any(p in text for p in phrases)
 
 
-async def _resolve_student_by_name(client: httpx.AsyncClient, name: str, headers: Dict[str, str]) -> Dict[str, Any]:
-    """Try to resolve a student name to an ID. Returns dict:
-    { id: Optional[int], name: Optional[str], suggestions: List[str] }
+async def _resolve_student_by_name(db: Session, name: str, educator_id: Optional[int] = None) -> Dict[str, Any]:
+    """Try to resolve a student name to an ID within the educator's roster.
+
+    Returns dict: { id: Optional[int], name: Optional[str], suggestions: List[str] }
     """
     result = {"id": None, "name": None, "suggestions": []}
     if not name:
         return result
     try:
-        # Combine both student endpoints to build a candidate list
-        candidates = []
-        resp = await client.get("/api/v1/bulk-communication/students", headers=headers)
-        if resp.status_code == 200:
-            students = resp.json().get("students", [])
-            for s in students:
-                if s.get("name"):
-                    candidates.append({"id": s.get("id"), "name": s.get("name")})
-
-        resp2 = await client.get("/api/v1/students", headers=headers)
-        if resp2.status_code == 200:
-            data = resp2.json()
-            students2 = data.get("students") if isinstance(data, dict) else data
-            if students2:
-                for s in students2:
-                    if s.get("name"):
-                        # avoid duplicates by name
-                        if not any(c["name"] == s.get("name") for c in candidates):
-                            candidates.append({"id": s.get("id"), "name": s.get("name")})
-
-        lname = name.lower().strip()
-        # Exact match first
-        for c in candidates:
-            if c.get("name") and c.get("name").lower().strip() == lname:
-                result["id"] = c.get("id")
-                result["name"] = c.get("name")
-                return result
-
-        # Partial substring match
-        for c in candidates:
-            if c.get("name") and lname in c.get("name").lower():
-                result["id"] = c.get("id")
-                result["name"] = c.get("name")
-                return result
-
-        # Fuzzy match using difflib; return top 3 suggestions
-        names = [c.get("name") for c in candidates if c.get("name")]
-        close = difflib.get_close_matches(name, names, n=3, cutoff=0.6)
-        result["suggestions"] = close
-        # Map suggestion to id if exact string matches
+        index = get_name_index(db, educator_id)
+
+        # Exact match first, then partial substring match
+        for entry in index.exact(name) or index.containing(name):
+            result["id"] = entry.id
+            result["name"] = entry.name
+            return result
+
+        # Fuzzy match; return top 3 suggestions
+        close = index.ranked(name, limit=3, cutoff=0.6)
+        result["suggestions"] = [entry.name for _, entry in close]
         if close:
-            best = close[0]
-            for c in candidates:
-                if c.get("name") == best:
-                    result["id"] = c.get("id")
-                    result["name"] = c.get("name")
-                    break
+            result["id"] = close[0][1].id
+            result["name"] = close[0][1].name
     except Exception as e:
         logger.exception("Error resolving student name '%s': %s", name, e)
     return result
@@ -184,30 +145,37 @@ async def detect_and_execute(
     history: Optional[List[Dict[str, str]]] = None,
     language: str = "auto",
     auto_execute: bool = True,
-    auth_header: Optional[str] = None,
     educator_id: Optional[int] = None,
+    educator: Optional[Educator] = None,
+    db: Optional[Session] = None,
 ) -> Dict[str, Any]:
-    """Detect intent using the SimpleGeminiChatbot and execute the action.
+    """Detect intent (local tiers first, then Gemini) and execute the action.
+
+    `educator` and `db` are the authenticated caller and its request session;
+    lookups and actions run with them directly.
 
     Returns a dict: { reply, action, executed }
     """
-    # 1) Quick server-side heuristics BEFORE calling the LLM to avoid
-    # depending on Gemini for simple lookups or action parsing.
-    # Try a lightweight regex on the raw user message first (fast, local).
+    if educator is not None and educator_id is None:
+        educator_id = educator.id
+    # 1) Local intent tiers (rules, then the trained classifier) BEFORE
+    # calling the LLM; routine commands never reach Gemini.
     action = None
     try:
-        action = simple_chatbot._simple_regex_action(message)
+        action = intent_pipeline.detect_local(message, db)
     except Exception:
+        logger.exception("Local intent detection failed")
         action = None
 
-    # conversation memory: last resolved student (from state or history)
-    last_student_name = None
+    # conversation memory (one read per turn): last resolved student and
+    # any pending clarification
+    st = {}
     if educator_id:
         try:
-            st = get_state(educator_id)
-            last_student_name = st.get("last_resolved_student")
+            st = await get_state(educator_id)
         except Exception:
-            last_student_name = None
+            logger.exception("Failed to read conversation state")
+    last_student_name = st.get("last_resolved_student")
     # fall back to scanning assistant history for an explicit name
     if not last_student_name:
         last_student_name = _find_last_mentioned_student(history)
@@ -216,14 +184,7 @@ async def detect_and_execute(
     # check whether the current user message is a selection for that
     # clarification (e.g., '1' or the full name). If so, resolve and
     # continue with the pending action.
-    if educator_id:
-        try:
-            st = get_state(educator_id)
-            pending = st.get("pending_clarify")
-        except Exception:
-            pending = None
-    else:
-        pending = None
+    pending = st.get("pending_clarify")
 
     def _parse_selection(msg: str, suggestions: List[str]) -> Optional[str]:
         if not msg:
@@ -251,7 +212,7 @@ async def detect_and_execute(
             # clear pending state and transform the stored action
             try:
                 stored_action = pending.get("action")
-                update_state(educator_id, pending_clarify=None)
+                await update_state(educator_id, pending_clarify=None)
             except Exception:
                 stored_action = None
             if stored_action:
@@ -402,7 +363,11 @@ async def detect_and_execute(
         return None
 
     student_query_name = None
-    if action is None:
+    if action is not None and action.get("action") == "query_student":
+        # A bare full name is an existence question, not an action
+        student_query_name = action.get("name")
+        action = None
+    elif action is None:
         student_query_name = _is_student_query_text(message)
     # Detect grade/score queries early
     grades_query = None
@@ -433,29 +398,8 @@ async def detect_and_execute(
             return t
         return None
     if action is None and student_query_name is None:
-        # Fast local NLU first (low latency). If it doesn't produce an intent,
-        # fall back to Gemini.
-        try:
-            intent, slots, conf = parse_fast(message or canonical_message or "")
-        except Exception:
-            intent, slots, conf = (None, {}, 0.0)
-
-        if intent:
-            slots_norm = format_slots(intent, slots)
-            # build an action dict compatible with Gemini output
-            action = {"action": intent, **slots_norm, "confidence": conf}
-            reply = None
-        else:
-            # We disable auto_execute in the model so it doesn't try to act on its own.
-            model_result = simple_chatbot.chat(message=canonical_message, history=history, language=language, auto_execute=False)
-            reply = model_result.get("reply")
-            action = model_result.get("action")
-            # If the model didn't extract an action, try a lightweight regex fallback
-            if action is None:
-                try:
-                    action = simple_chatbot._simple_regex_action(reply or canonical_message or message)
-                except Exception:
-                    action = None
+        # Nothing local was confident enough; fall back to Gemini
+        action, reply = await intent_pipeline.detect_llm(message, history, language, db=db)
     else:
         # If we had a pre-detected action, set a simple reply placeholder (will be overwritten after execution)
         reply = None
@@ -484,58 +428,13 @@ async def detect_and_execute(
             return None
         student_query_name = _is_student_query_from_text(reply) if reply else None
     if student_query_name:
-        headers = {}
-        if auth_header:
-            headers["Authorization"] = auth_header
-        base_url = "http://127.0.0.1:8003"
         matches = []
-        async with httpx.AsyncClient(base_url=base_url) as client:
-            try:
-                resp = await client.get("/api/v1/bulk-communication/students", headers=headers)
-                logger.debug("Student bulk endpoint response status=%s", getattr(resp, 'status_code', None))
-                if resp.status_code == 200:
-                    data_students = resp.json().get("students", [])
-                    logger.debug("bulk students count=%s sample=%s", len(data_students), [s.get('name') for s in data_students[:5]])
-                    for s in data_students:
-                        # Try multiple likely name fields to be robust
-                        candidate_names = []
-                        for f in ("name", "full_name", "student_name"):
-                            v = s.get(f)
-                            if v:
-                                candidate_names.append(v)
-                        # Also try first/last
-                        if s.get("first_name") or s.get("last_name"):
-                            fq = "".join([s.get("first_name") or "", " ", s.get("last_name") or ""]).strip()
-                            if fq:
-                                candidate_names.append(fq)
-                        # Normalize and compare
-                        for cand in candidate_names:
-                            if _name_matches(student_query_name, cand):
-                                matches.append({"id": s.get("id"), "name": cand, "section": s.get("section_name")})
-
-                resp2 = await client.get("/api/v1/students", headers=headers)
-                logger.debug("Students endpoint response status=%s", getattr(resp2, 'status_code', None))
-                if resp2.status_code == 200:
-                    data = resp2.json()
-                    students2 = data.get("students") if isinstance(data, dict) else data
-                    if students2:
-                        logger.debug("students endpoint count=%s sample=%s", len(students2), [s.get('name') for s in students2[:5]])
-                        for s in students2:
-                            candidate_names = []
-                            for f in ("name", "full_name", "student_name"):
-                                v = s.get(f)
-                                if v:
-                                    candidate_names.append(v)
-                            if s.get("first_name") or s.get("last_name"):
-                                fq = "".join([s.get("first_name") or "", " ", s.get("last_name") or ""]).strip()
-                                if fq:
-                                    candidate_names.append(fq)
-                            for cand in candidate_names:
-                                if _name_matches(student_query_name, cand):
-                                    if not any(m.get("id") == s.get("id") for m in matches):
-                                        matches.append({"id": s.get("id"), "name": cand, "section": s.get("section_name")})
-            except Exception as e:
-                logger.exception("Error querying students for existence check: %s", e)
+        try:
+            for entry in get_name_index(db, educator_id).candidates(student_query_name):
+                if _name_matches(student_query_name, entry.name):
+                    matches.append({"id": entry.id, "name": entry.name, "section": entry.section_name})
+        except Exception as e:
+            logger.exception("Error querying students for existence check: %s", e)
 
         if matches:
             # Build a concise reply listing matches (limit to 5)
@@ -551,174 +450,170 @@ async def detect_and_execute(
     executed = None
 
     if action and auto_execute:
-        # Prepare headers passed through from the frontend so internal endpoints
-        # can authorize the action on behalf of the educator.
-        headers = {}
-        if auth_header:
-            headers["Authorization"] = auth_header
-
-        # Use a local async client that targets the internal API server. The
-        # running backend in dev typically listens on 127.0.0.1:8003 in this
-        # project; keep that as default but allow environment to override later.
-        base_url = "http://127.0.0.1:8003"
-
         force_execute = _should_force_execute(message)
         # Dialog manager: decide whether to execute automatically based on mode/confidence
         dm = DialogManager()
 
-        async with httpx.AsyncClient(base_url=base_url) as client:
-            act = action.get("action")
-            try:
-                # Determine confidence and missing slots for this intent
-                confidence = action.get("confidence") if isinstance(action, dict) else None
-                confidence = float(confidence) if confidence is not None else 0.85
-                missing = []
-                recipient = action.get("recipient") if isinstance(action, dict) else None
-                if act == "send_message":
-                    if not recipient:
-                        missing.append("recipient")
-                if act in ("schedule_meeting", "create_meeting"):
-                    if not recipient:
-                        missing.append("recipient")
-                    if not action.get("datetime"):
-                        missing.append("datetime")
-                if act in ("get_grades", "fetch_grades"):
-                    if not recipient:
-                        missing.append("recipient")
-
-                recipient_count = 1
-                # consult dialog manager whether to proceed
-                should_exec = dm.should_execute(act, confidence, missing_slots=missing, recipient_count=recipient_count, force=force_execute)
-                if not should_exec and not force_execute:
-                    # If missing slots, prompt for them; otherwise require confirmation
-                    if missing:
-                        executed = {"status": "needs_more_info", "missing": missing}
-                        return {"reply": "I need more information to complete that action.", "action": action, "executed": executed}
+        act = action.get("action")
+        try:
+            # Determine confidence and missing slots for this intent
+            confidence = action.get("confidence") if isinstance(action, dict) else None
+            confidence = float(confidence) if confidence is not None else 0.85
+            missing = []
+            recipient = action.get("recipient") if isinstance(action, dict) else None
+            if act == "send_message":
+                if not recipient:
+                    missing.append("recipient")
+            if act in ("schedule_meeting", "create_meeting"):
+                if not recipient:
+                    missing.append("recipient")
+                if not action.get("datetime"):
+                    missing.append("datetime")
+            if act in ("get_grades", "fetch_grades"):
+                if not recipient:
+                    missing.append("recipient")
+
+            recipient_count = 1
+            # consult dialog manager whether to proceed
+            should_exec = dm.should_execute(act, confidence, missing_slots=missing, recipient_count=recipient_count, force=force_execute)
+            if not should_exec and not force_execute:
+                # If missing slots, prompt for them; otherwise require confirmation
+                if missing:
+                    executed = {"status": "needs_more_info", "missing": missing}
+                    return {"reply": "I need more information to complete that action.", "action": action, "executed": executed}
+                else:
+                    executed = {"status": "needs_confirmation"}
+                    return {"reply": "I can do that — would you like me to proceed?", "action": action, "executed": executed}
+            if act == "send_message":
+                recipient = action.get("recipient")
+                content = action.get("content") or message
+
+                # Resolve recipient
+                student_id = None
+                resolved_name = None
+                suggestions = []
+                try:
+                    maybe_id = int(recipient)
+                    student_id = maybe_id
+                except Exception:
+                    info = await _resolve_student_by_name(db, recipient, educator_id)
+                    student_id = info.get("id")
+                    resolved_name = info.get("name")
+                    suggestions = info.get("suggestions", [])
+
+                if student_id is None:
+                    if suggestions:
+                        if force_execute:
+                            chosen = suggestions[0]
+                            info2 = await _resolve_student_by_name(db, chosen, educator_id)
+                            student_id = info2.get("id")
+                            resolved_name = info2.get("name")
+                        else:
+                            # Store pending clarification in conversation state so
+                            # the next user message may select among suggestions.
+                            executed = {"status": "needs_clarification", "missing": ["recipient"], "suggestions": suggestions}
+                            try:
+                                if educator_id:
+                                    await update_state(educator_id, pending_clarify={"action": action, "suggestions": suggestions})
+                            except Exception:
+                                logger.exception("Failed to store pending clarification in conversation state")
+                            # Build a short user-facing disambiguation prompt
+                            opt_lines = [f"{i+1}) {s}" for i, s in enumerate(suggestions[:6])]
+                            prompt = (
+                                "I found multiple matches for that name. Which one did you mean? "
+                                + "Reply with the number or the full name: " + " | ".join(opt_lines)
+                            )
+                            return {"reply": prompt, "action": action, "executed": executed}
                     else:
-                        executed = {"status": "needs_confirmation"}
-                        return {"reply": "I can do that — would you like me to proceed?", "action": action, "executed": executed}
-                if act == "send_message":
-                    recipient = action.get("recipient")
-                    content = action.get("content") or message
-
-                    # Resolve recipient
-                    student_id = None
-                    resolved_name = None
-                    suggestions = []
-                    try:
-                        maybe_id = int(recipient)
-                        student_id = maybe_id
-                    except Exception:
-                        info = await _resolve_student_by_name(client, recipient, headers)
-                        student_id = info.get("id")
-                        resolved_name = info.get("name")
-                        suggestions = info.get("suggestions", [])
-
-                    if student_id is None:
-                        if suggestions:
-                            if force_execute:
-                                chosen = suggestions[0]
-                                info2 = await _resolve_student_by_name(client, chosen, headers)
-                                student_id = info2.get("id")
-                                resolved_name = info2.get("name")
-                            else:
-                                # Store pending clarification in conversation state so
-                                # the next user message may select among suggestions.
-                                executed = {"status": "needs_clarification", "missing": ["recipient"], "suggestions": suggestions}
-                                try:
-                                    if educator_id:
-                                        update_state(educator_id, pending_clarify={"action": action, "suggestions": suggestions})
-                                except Exception:
-                                    logger.exception("Failed to store pending clarification in conversation state")
-                                # Build a short user-facing disambiguation prompt
-                                opt_lines = [f"{i+1}) {s}" for i, s in enumerate(suggestions[:6])]
-                                prompt = (
-                                    "I found multiple matches for that name. Which one did you mean? "
-                                    + "Reply with the number or the full name: " + " | ".join(opt_lines)
-                                )
-                                return {"reply": prompt, "action": action, "executed": executed}
+                        if force_execute:
+                            executed = {"status": "error", "detail": "Recipient not found (force_execute)"}
                         else:
-                            if force_execute:
-                                executed = {"status": "error", "detail": "Recipient not found (force_execute)"}
-                            else:
-                                executed = {"status": "needs_more_info", "missing": ["recipient"]}
-
-                    if student_id:
-                        res = await executor_send_message(client, headers, student_id, content, actor_id=educator_id)
+                            executed = {"status": "needs_more_info", "missing": ["recipient"]}
+
+                if student_id:
+                    res = await executor_send_message(db, educator, student_id, content, actor_id=educator_id)
+                    if res.get("status") == "ok":
+                        executed = {"status": "ok", "detail": f"Message sent to {resolved_name or recipient}", "response": res.get("response")}
+                        # update conversation memory with the last resolved student
+                        try:
+                            if educator_id and resolved_name:
+                                await update_state(educator_id, last_resolved_student=resolved_name)
+                        except Exception:
+                            logger.exception("Failed to update conversation state after send_message")
+                    else:
+                        executed = {"status": "error", "detail": res.get("detail"), "response": res.get("response")}
+
+            elif act in ("schedule_meeting", "create_meeting"):
+                recipient = action.get("recipient")
+                dt = action.get("datetime")
+
+                info = await _resolve_student_by_name(db, recipient, educator_id)
+                student_id = info.get("id")
+                resolved_name = info.get("name")
+                suggestions = info.get("suggestions", [])
+
+                if student_id is None:
+                    if suggestions:
+                        if force_execute:
+                            chosen = suggestions[0]
+                            info2 = await _resolve_student_by_name(db, chosen, educator_id)
+                            student_id = info2.get("id")
+                            resolved_name = info2.get("name")
+                        else:
+                            executed = {"status": "needs_more_info", "missing": ["recipient"], "suggestions": suggestions}
+                    else:
+                        if force_execute:
+                            executed = {"status": "error", "detail": "Recipient not found (force_execute)"}
+                        else:
+                            executed = {"status": "needs_more_info", "missing": ["recipient"]}
+                else:
+                    if not dt and not force_execute:
+                        executed = {"status": "needs_more_info", "missing": ["datetime"]}
+                    else:
+                        title = action.get("title") or f"Meeting with {resolved_name or recipient}"
+                        res = await executor_schedule_meeting(db, educator, [student_id], title, dt, actor_id=educator_id)
                         if res.get("status") == "ok":
-                            executed = {"status": "ok", "detail": f"Message sent to {resolved_name or recipient}", "response": res.get("response")}
-                            # update conversation memory with the last resolved student
+                            executed = {"status": "ok", "detail": f"Meeting scheduled with {resolved_name or recipient}", "response": res.get("response")}
                             try:
                                 if educator_id and resolved_name:
-                                    update_state(educator_id, last_resolved_student=resolved_name)
+                                    await update_state(educator_id, last_resolved_student=resolved_name)
                             except Exception:
-                                logger.exception("Failed to update conversation state after send_message")
+                                logger.exception("Failed to update conversation state after schedule_meeting")
                         else:
                             executed = {"status": "error", "detail": res.get("detail"), "response": res.get("response")}
 
-                elif act in ("schedule_meeting", "create_meeting"):
-                    recipient = action.get("recipient")
-                    dt = action.get("datetime")
-
-                    info = await _resolve_student_by_name(client, recipient, headers)
+            elif act in ("get_grades", "fetch_grades"):
+                recipient = action.get("recipient")
+                try:
+                    maybe_id = int(recipient)
+                    student_id = maybe_id
+                except Exception:
+                    info = await _resolve_student_by_name(db, recipient, educator_id)
                     student_id = info.get("id")
                     resolved_name = info.get("name")
-                    suggestions = info.get("suggestions", [])
 
-                    if student_id is None:
-                        if suggestions:
-                            if force_execute:
-                                chosen = suggestions[0]
-                                info2 = await _resolve_student_by_name(client, chosen, headers)
-                                student_id = info2.get("id")
-                                resolved_name = info2.get("name")
-                            else:
-                                executed = {"status": "needs_more_info", "missing": ["recipient"], "suggestions": suggestions}
-                        else:
-                            if force_execute:
-                                executed = {"status": "error", "detail": "Recipient not found (force_execute)"}
-                            else:
-                                executed = {"status": "needs_more_info", "missing": ["recipient"]}
-                    else:
-                        if not dt and not force_execute:
-                            executed = {"status": "needs_more_info", "missing": ["datetime"]}
-                        else:
-                            title = action.get("title") or f"Meeting with {resolved_name or recipient}"
-                            res = await executor_schedule_meeting(client, headers, [student_id], title, dt, actor_id=educator_id)
-                            if res.get("status") == "ok":
-                                executed = {"status": "ok", "detail": f"Meeting scheduled with {resolved_name or recipient}", "response": res.get("response")}
-                                try:
-                                    if educator_id and resolved_name:
-                                        update_state(educator_id, last_resolved_student=resolved_name)
-                                except Exception:
-                                    logger.exception("Failed to update conversation state after schedule_meeting")
-                            else:
-                                executed = {"status": "error", "detail": res.get("detail"), "response": res.get("response")}
-
-                elif act in ("get_grades", "fetch_grades"):
-                    recipient = action.get("recipient")
-                    try:
-                        maybe_id = int(recipient)
-                        student_id = maybe_id
-                    except Exception:
-                        info = await _resolve_student_by_name(client, recipient, headers)
-                        student_id = info.get("id")
-                        resolved_name = info.get("name")
-
-                    if not student_id:
-                        executed = {"status": "error", "detail": "Recipient not found"}
+                if not student_id:
+                    executed = {"status": "error", "detail": "Recipient not found"}
+                else:
+                    res = await executor_fetch_grades(db, educator, student_id, actor_id=educator_id)
+                    if res.get("status") == "ok":
+                        executed = {"status": "ok", "detail": "fetched_grades", "response": res.get("response")}
                     else:
-                        res = await executor_fetch_grades(client, headers, student_id, actor_id=educator_id)
-                        if res.get("status") == "ok":
-                            executed = {"status": "ok", "detail": "fetched_grades", "response": res.get("response")}
-                        else:
-                            executed = {"status": "error", "detail": res.get("detail"), "response": res.get("response")}
+                        executed = {"status": "error", "detail": res.get("detail"), "response": res.get("response")}
 
+            elif act in ("get_schedule", "fetch_schedule"):
+                window = _parse_schedule_request(message) or _parse_schedule_request("this week")
+                res = await executor_fetch_schedule(db, educator, window["start_date"], window["end_date"], actor_id=educator_id)
+                if res.get("status") == "ok":
+                    executed = {"status": "ok", "detail": f"Schedule for {window['label']}", "response": res.get("response")}
                 else:
-                    executed = {"status": "error", "detail": "Unknown action"}
-            except Exception as e:
-                logger.exception("Error executing action %s: %s", act, e)
-                executed = {"status": "error", "detail": str(e)}
+                    executed = {"status": "error", "detail": res.get("detail"), "response": res.get("response")}
+
+            else:
+                executed = {"status": "error", "detail": "Unknown action"}
+        except Exception as e:
+            logger.exception("Error executing action %s: %s", act, e)
+            executed = {"status": "error", "detail": str(e)}
 
     # Normalize executed into a user-friendly reply so the frontend can show
     # a simple confirmation instead of raw JSON.
@@ -0,0 +1,237 @@
+"""Non-blocking gateway for Gemini calls.
+
+`google.generativeai` only offers a blocking `generate_content`, and it was
+called directly inside async handlers, so one slow LLM call stalled every
+other request on the worker. All Gemini calls now go through this gateway:
+
+- calls run on a bounded thread pool (`LLM_MAX_CONCURRENCY`, default 4), so
+  the event loop keeps serving other requests
+- identical prompts that are already in flight are coalesced: later callers
+  wait for the first call instead of issuing their own
+- successful responses are kept in a TTL'd LRU cache keyed on the normalized
+  prompt, model and generation config (`LLM_CACHE_TTL_SECONDS`, default 300;
+  `LLM_CACHE_SIZE`, default 512; a TTL of 0 disables caching)
+- quota errors rotate through the configured API keys, then back off
+  exponentially; other errors retry once on a fallback model
+
+Async callers use `generate`; sync callers (scripts, sync helpers) use
+`generate_sync`. Both share the pool, the in-flight table and the cache.
+"""
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import time
+
+import google.generativeai as genai
+
+from app.core.config import settings
+from app.core.simple_chatbot_config import SIMPLE_GEMINI_API_KEY, SIMPLE_GEMINI_ALT_API_KEYS
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "300"))
+CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "512"))
+MAX_RETRIES = 3
+
+try:
+    # optional import for precise exception detection
+    from google.api_core.exceptions import ResourceExhausted
+except Exception:
+    ResourceExhausted = None
+
+
+def normalize_prompt(prompt: str) -> str:
+    return re.sub(r"\s+", " ", prompt or "").strip()
+
+
+def _is_quota_error(error: Exception) -> bool:
+    if ResourceExhausted and isinstance(error, ResourceExhausted):
+        return True
+    msg = str(error).lower()
+    return "quota" in msg or "429" in msg or "resourceexhausted" in msg
+
+
+def _response_text(response: Any) -> str:
+    try:
+        text = response.text
+    except (AttributeError, ValueError):
+        text = None
+    return str(response) if text is None else text
+
+
+class LLMGateway:
+    def __init__(
+        self,
+        api_keys: List[str],
+        max_concurrency: int = MAX_CONCURRENCY,
+        cache_ttl: float = CACHE_TTL_SECONDS,
+        cache_size: int = CACHE_SIZE,
+        max_retries: int = MAX_RETRIES,
+    ):
+        self.api_keys = [k for i, k in enumerate(api_keys) if k and k not in api_keys[:i]]
+        self.api_key = self.api_keys[0] if self.api_keys else None
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.max_retries = max_retries
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+        self._cache: "OrderedDict[Tuple, Tuple[float, str]]" = OrderedDict()
+        self._in_flight: Dict[Tuple, Future] = {}
+        self._lock = Lock()
+        # genai.configure is process-global; rotation must not interleave
+        self._key_lock = Lock()
+        self.stats = {"calls": 0, "cache_hits": 0, "coalesced": 0, "errors": 0}
+        if self.api_key:
+            try:
+                genai.configure(api_key=self.api_key)
+            except Exception:
+                # Non-fatal: configuration may fail in some dev environments; we'll
+                # surface errors on calls instead.
+                logger.debug("Failed to configure genai client with initial key")
+
+    # -- public API --------------------------------------------------------
+
+    async def generate(self, prompt: str, model: str, generation_config: Optional[Dict[str, Any]] = None, use_cache: bool = True) -> str:
+        """Generate text without blocking the event loop."""
+        cached, future = self._lookup_or_submit(prompt, model, generation_config, use_cache)
+        if cached is not None:
+            return cached
+        return await asyncio.wrap_future(future)
+
+    def generate_sync(self, prompt: str, model: str, generation_config: Optional[Dict[str, Any]] = None, use_cache: bool = True) -> str:
+        """Blocking variant for sync callers; shares pool, coalescing and cache."""
+        cached, future = self._lookup_or_submit(prompt, model, generation_config, use_cache)
+        if cached is not None:
+            return cached
+        return future.result()
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    # -- cache and coalescing ----------------------------------------------
+
+    def _key(self, prompt: str, model: str, generation_config: Optional[Dict[str, Any]]) -> Tuple:
+        config = json.dumps(generation_config, sort_keys=True) if generation_config else ""
+        return (model, config, normalize_prompt(prompt))
+
+    def _lookup_or_submit(self, prompt, model, generation_config, use_cache) -> Tuple[Optional[str], Optional[Future]]:
+        key = self._key(prompt, model, generation_config)
+        use_cache = use_cache and self.cache_ttl > 0
+        with self._lock:
+            if use_cache:
+                hit = self._cache.get(key)
+                if hit is not None:
+                    expires, text = hit
+                    if expires > time.monotonic():
+                        self._cache.move_to_end(key)
+                        self.stats["cache_hits"] += 1
+                        return text, None
+                    del self._cache[key]
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return None, future
+            self.stats["calls"] += 1
+            future = self._executor.submit(self._invoke, prompt, model, generation_config)
+            self._in_flight[key] = future
+        future.add_done_callback(lambda f: self._complete(key, f, use_cache))
+        return None, future
+
+    def _complete(self, key: Tuple, future: Future, use_cache: bool) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if future.exception() is not None:
+                self.stats["errors"] += 1
+                return
+            if use_cache:
+                self._cache[key] = (time.monotonic() + self.cache_ttl, future.result())
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+    # -- model invocation (worker threads) ----------------------------------
+
+    def _call(self, model: str, prompt: str, generation_config: Optional[Dict[str, Any]]) -> str:
+        kwargs = {"generation_config": generation_config} if generation_config else {}
+        return _response_text(genai.GenerativeModel(model).generate_content(prompt, **kwargs))
+
+    def _rotate_keys(self, model: str, prompt: str, generation_config) -> Optional[str]:
+        """Try the prompt with each configured key; None if all are exhausted."""
+        logger.warning("Gemini quota hit for current key; attempting key rotation through %d keys", len(self.api_keys))
+        with self._key_lock:
+            for key in self.api_keys:
+                try:
+                    logger.info("Trying Gemini API key rotation with a different key (partial masked)")
+                    genai.configure(api_key=key)
+                    text = self._call(model, prompt, generation_config)
+                    # update the configured key on success
+                    self.api_key = key
+                    return text
+                except Exception as e:
+                    # If the error for this key is a quota error, continue to next
+                    if _is_quota_error(e):
+                        logger.warning("Key rotation attempt hit quota for this key; trying next key")
+                    else:
+                        # Non-quota error for this key — log and try next key
+                        logger.exception("Key rotation attempt failed with non-quota error: %s", e)
+            if self.api_key:
+                genai.configure(api_key=self.api_key)
+        return None
+
+    def _fallback_model(self, model: str) -> Optional[str]:
+        for m in genai.list_models():
+            name = getattr(m, 'name', None) or getattr(m, 'model', None)
+            if name and name != model and ("flash" in name or "pro" in name or "2.0" in name):
+                return name
+        return None
+
+    def _invoke(self, prompt: str, model: str, generation_config: Optional[Dict[str, Any]]) -> str:
+        """Call the model with key rotation and backoff on quota errors.
+
+        On non-quota errors, attempt one fallback-model try (list_models)
+        before failing. Raises the final exception if all attempts fail.
+        """
+        attempt = 0
+        last_exc = None
+        while attempt <= self.max_retries:
+            try:
+                return self._call(model, prompt, generation_config)
+            except Exception as e:
+                last_exc = e
+
+            if _is_quota_error(last_exc):
+                text = self._rotate_keys(model, prompt, generation_config)
+                if text is not None:
+                    return text
+                # If rotation didn't succeed, fallback to exponential backoff
+                attempt += 1
+                if attempt > self.max_retries:
+                    break
+                sleep = (2 ** attempt) + random.uniform(0, 1)
+                logger.warning("Gemini quota hit; no keys available or all exhausted. Retrying in %.1fs (attempt %d/%d)", sleep, attempt, self.max_retries)
+                time.sleep(sleep)
+                continue
+
+            # Non-quota error: try a fallback model once
+            try:
+                fallback_name = self._fallback_model(model)
+                if fallback_name:
+                    logger.info("Retrying with fallback model %s due to error: %s", fallback_name, last_exc)
+                    return self._call(fallback_name, prompt, generation_config)
+            except Exception as e2:
+                logger.exception("Fallback attempt failed: %s", e2)
+            # Not a quota error or fallback failed — surface the last exception
+            break
+
+        raise last_exc
+
+
+llm_gateway = LLMGateway([SIMPLE_GEMINI_API_KEY, settings.GEMINI_API_KEY, *SIMPLE_GEMINI_ALT_API_KEYS])
@@ -0,0 +1,204 @@
+"""Per-student message summary for the educator inbox.
+
+`GET /messages/students/summary` used to load every student in any section
+and then run two `Message` queries per student (unread count, last message),
+so the inbox cost 2N+1 round trips. The summary is now one statement:
+
+- students are scoped to the educator's sections
+- one windowed pass over the educator's messages ranks them per receiver
+  (`row_number` for the latest message, a windowed count for unread ones)
+  and the students are LEFT JOINed to the top-ranked row
+- only the first 51 characters of the last message are fetched for the
+  preview
+
+With `MESSAGE_UNREAD_COUNTERS` enabled (default off) unread counts come from
+the denormalized `message_unread_counters` table instead of being counted
+per request. An `after_flush` listener keeps it in step with every `Message`
+insert, `is_read` change and delete in this process (sending, mark-read,
+assistant-created messages). Counters are rebuilt from `messages` the first
+time a process reads them; writers outside the app should call
+`rebuild_unread_counters` afterwards.
+"""
+from collections import defaultdict
+from threading import Lock
+from typing import Any, Dict, List, Optional, Set, Tuple
+import logging
+import os
+
+from sqlalchemy import and_, case, delete, event, func, inspect, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.message import Message, MessageUnreadCounter
+from app.models.student import Section, Student
+
+logger = logging.getLogger(__name__)
+
+USE_UNREAD_COUNTERS = os.getenv("MESSAGE_UNREAD_COUNTERS", "false").lower() in ("1", "true", "yes")
+PREVIEW_LENGTH = 50
+
+_counters_rebuilt = False
+_rebuild_lock = Lock()
+
+
+def _preview(text: Optional[str]) -> str:
+    if not text:
+        return ""
+    return text[:PREVIEW_LENGTH] + "..." if len(text) > PREVIEW_LENGTH else text
+
+
+def _unread_count():
+    return func.count(case((Message.is_read == False, 1)))  # noqa: E712
+
+
+def student_summaries(db: Session, educator_id: int, use_counters: Optional[bool] = None) -> List[Dict[str, Any]]:
+    """Summary rows for every student in the educator's sections, in one query."""
+    use_counters = USE_UNREAD_COUNTERS if use_counters is None else use_counters
+    if use_counters:
+        ensure_unread_counters(db)
+
+    window = {"partition_by": Message.receiver_id}
+    columns = [
+        Message.receiver_id.label("receiver_id"),
+        # One extra character tells the preview whether to add an ellipsis
+        func.substr(Message.message, 1, PREVIEW_LENGTH + 1).label("preview"),
+        Message.created_at.label("created_at"),
+        func.row_number().over(order_by=(Message.created_at.desc(), Message.id.desc()), **window).label("rank"),
+    ]
+    if not use_counters:
+        columns.append(_unread_count().over(**window).label("unread_count"))
+    ranked = select(*columns).where(Message.sender_id == educator_id).subquery()
+
+    if use_counters:
+        unread = func.coalesce(MessageUnreadCounter.unread_count, 0)
+    else:
+        unread = func.coalesce(ranked.c.unread_count, 0)
+    query = (
+        select(Student.id, Student.first_name, Student.last_name, unread, ranked.c.preview, ranked.c.created_at)
+        .join(Section, Section.id == Student.section_id)
+        .outerjoin(ranked, and_(ranked.c.receiver_id == Student.id, ranked.c.rank == 1))
+        .where(Section.educator_id == educator_id)
+        .order_by(Student.id)
+    )
+    if use_counters:
+        query = query.outerjoin(
+            MessageUnreadCounter,
+            and_(MessageUnreadCounter.educator_id == educator_id, MessageUnreadCounter.student_id == Student.id),
+        )
+
+    return [
+        {
+            "student_id": student_id,
+            "student_name": f"{first_name} {last_name}",
+            "unread_count": unread_count,
+            "last_message_date": created_at,
+            "last_message_preview": _preview(preview),
+        }
+        for student_id, first_name, last_name, unread_count, preview, created_at in db.execute(query)
+    ]
+
+
+# -- denormalized unread counters -------------------------------------------
+
+def rebuild_unread_counters(db: Session, educator_id: Optional[int] = None) -> None:
+    """Recompute counters from `messages` (all educators if None) and commit."""
+    counts = (
+        select(Message.sender_id, Message.receiver_id, _unread_count())
+        .where(Message.sender_id.is_not(None), Message.receiver_id.is_not(None))
+        .group_by(Message.sender_id, Message.receiver_id)
+    )
+    clear = delete(MessageUnreadCounter)
+    if educator_id is not None:
+        counts = counts.where(Message.sender_id == educator_id)
+        clear = clear.where(MessageUnreadCounter.educator_id == educator_id)
+    db.execute(clear)
+    db.execute(insert(MessageUnreadCounter).from_select(
+        ["educator_id", "student_id", "unread_count"], counts
+    ))
+    db.commit()
+
+
+def ensure_unread_counters(db: Session) -> None:
+    """Rebuild the counters once per process before they are first read."""
+    global _counters_rebuilt
+    if _counters_rebuilt:
+        return
+    with _rebuild_lock:
+        if not _counters_rebuilt:
+            rebuild_unread_counters(db)
+            _counters_rebuilt = True
+
+
+def _seed(connection, educator_id: int, student_id: int) -> bool:
+    """Insert the pair's counter counted from `messages`, which already holds
+    the rows of this flush. False if another transaction created it first."""
+    seed = insert(MessageUnreadCounter).from_select(
+        ["educator_id", "student_id", "unread_count"],
+        select(literal(educator_id), literal(student_id), _unread_count())
+        .where(Message.sender_id == educator_id, Message.receiver_id == student_id),
+    )
+    try:
+        with connection.begin_nested():
+            connection.execute(seed)
+    except IntegrityError:
+        return False
+    return True
+
+
+def _apply_deltas(connection, deltas: Dict[Tuple[int, int], int]) -> None:
+    for (educator_id, student_id), delta in deltas.items():
+        pair = and_(MessageUnreadCounter.educator_id == educator_id, MessageUnreadCounter.student_id == student_id)
+        updated = MessageUnreadCounter.unread_count + delta
+        bump = update(MessageUnreadCounter).where(pair).values(unread_count=case((updated < 0, 0), else_=updated))
+        if connection.execute(bump).rowcount:
+            continue
+        if not _seed(connection, educator_id, student_id):
+            # Another transaction created the row; our rows are not visible to it
+            connection.execute(bump)
+
+
+def _recount(connection, pairs: Set[Tuple[int, int]]) -> None:
+    """Reset counters whose change could not be expressed as a delta."""
+    for educator_id, student_id in pairs:
+        owned = and_(Message.sender_id == educator_id, Message.receiver_id == student_id)
+        counted = select(_unread_count()).where(owned).scalar_subquery()
+        pair = and_(MessageUnreadCounter.educator_id == educator_id, MessageUnreadCounter.student_id == student_id)
+        reset = update(MessageUnreadCounter).where(pair).values(unread_count=counted)
+        if not connection.execute(reset).rowcount and not _seed(connection, educator_id, student_id):
+            connection.execute(reset)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_unread(session: Session, flush_context) -> None:
+    if not USE_UNREAD_COUNTERS:
+        return
+    deltas: Dict[Tuple[int, int], int] = defaultdict(int)
+    recount: Set[Tuple[int, int]] = set()
+    for obj in session.new:
+        if isinstance(obj, Message) and obj.is_read is False:
+            deltas[(obj.sender_id, obj.receiver_id)] += 1
+    for obj in session.dirty:
+        if not isinstance(obj, Message):
+            continue
+        history = inspect(obj).attrs.is_read.history
+        if not history.has_changes():
+            continue
+        pair = (obj.sender_id, obj.receiver_id)
+        if not history.deleted:
+            # Prior value unknown (`is_read` set without loading it first);
+            # `messages` already reflects this flush, so count the pair again
+            recount.add(pair)
+            continue
+        was_unread = history.deleted[0] is False
+        is_unread = obj.is_read is False
+        if was_unread != is_unread:
+            deltas[pair] += 1 if is_unread else -1
+    for obj in session.deleted:
+        if isinstance(obj, Message) and obj.is_read is False:
+            deltas[(obj.sender_id, obj.receiver_id)] -= 1
+    recount = {pair for pair in recount if None not in pair}
+    deltas = {pair: delta for pair, delta in deltas.items() if delta and None not in pair and pair not in recount}
+    if deltas:
+        _apply_deltas(session.connection(), deltas)
+    if recount:
+        _recount(session.connection(), recount)
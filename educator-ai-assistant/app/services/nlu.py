@@ -7,6 +7,22 @@ score (0..1). The intent names align with the system intents used elsewhere.
 from typing import Dict, Any, Optional, Tuple
 import re
 
+# Rules are compiled once at import; parse_fast runs on every chat turn
+# A colon separates recipient and content when present, so match it first
+_SEND_MESSAGE_COLON = re.compile(r"send (?:a )?message to ([\w\s'\-\.]+?)\s*:\s*([\s\S]+)$", re.IGNORECASE)
+_SEND_MESSAGE = re.compile(r"send (?:a )?message to ([\w\s'\-\.]+?)[:\-\s]+([\s\S]+)$", re.IGNORECASE)
+_MESSAGE_TO = re.compile(r"(?:message|msg) to ([\w\s'\-\.]+?)(?:\s+about\s+|\s*:\s*|\s+to\s+|$)(.*)$", re.IGNORECASE)
+# "message Steven Smith: see me after class" (no "to")
+_MESSAGE_COLON = re.compile(r"^(?:message|msg|text|tell)\s+([A-Za-z][\w\s'\-\.]{0,60}?)\s*:\s*([\s\S]+)$", re.IGNORECASE)
+_SCHEDULE_MEETING = re.compile(r"schedule (?:a )?meeting (?:with )?([\w\s'\-\.]+?) (?:on |at |for )?([\w\s,:-]+)$", re.IGNORECASE)
+_SCHEDULE_PHRASES = ("my schedule", "what is my schedule", "my calendar", "schedule this week")
+_GRADE_WORDS = ("grade", "grades", "marks", "scores")
+_GRADES_POSSESSIVE = re.compile(r"([A-Za-z][A-Za-z'\-\.\s]{0,60}?)'s\s+(?:grades|marks|scores)")
+# "show grades for steven smith"
+_GRADES_FOR = re.compile(r"(?:grades|marks|scores)\s+(?:of|for)\s+([A-Za-z][A-Za-z'\-\.\s]{0,60}?)\s*\??$")
+_COMMAND_PREFIX = re.compile(r"^(?:please\s+)?(?:show(?: me)?|check|get|see|view|display|give me|tell me|what are|what's|what is)\s+")
+_FULL_NAME = re.compile(r"^[A-Z][a-z]+\s+[A-Z][a-z]+$")
+
 
 def parse_fast(text: str) -> Tuple[Optional[str], Dict[str, Any], float]:
     """Attempt to quickly extract an intent and slots with simple heuristics.
@@ -20,41 +36,45 @@ def parse_fast(text: str) -> Tuple[Optional[str], Dict[str, Any], float]:
     low = txt.lower()
 
     # send_message patterns
-    m = re.search(r"send (?:a )?message to ([\w\s'\-\.]+?)[:\-\s]+([\s\S]+)$", txt, re.IGNORECASE)
+    m = _SEND_MESSAGE_COLON.search(txt) or _SEND_MESSAGE.search(txt)
     if m:
         recipient = m.group(1).strip()
         content = m.group(2).strip()
         return "send_message", {"recipient": recipient, "content": content}, 0.95
 
-    m2 = re.search(r"(?:message|msg) to ([\w\s'\-\.]+?)(?: about |: | to )?(.*)$", txt, re.IGNORECASE)
+    m2 = _MESSAGE_TO.search(txt)
     if m2:
         recipient = m2.group(1).strip()
         content = m2.group(2).strip() or None
         return "send_message", {"recipient": recipient, "content": content}, 0.9
 
+    m2b = _MESSAGE_COLON.search(txt)
+    if m2b:
+        return "send_message", {"recipient": m2b.group(1).strip(), "content": m2b.group(2).strip()}, 0.9
+
     # schedule_meeting patterns
-    ms = re.search(r"schedule (?:a )?meeting (?:with )?([\w\s'\-\.]+?) (?:on |at |for )?([\w\s,:-]+)$", txt, re.IGNORECASE)
+    ms = _SCHEDULE_MEETING.search(txt)
     if ms:
         recipient = ms.group(1).strip()
         datetime = ms.group(2).strip()
         return "schedule_meeting", {"recipient": recipient, "datetime": datetime}, 0.9
 
     # quick schedule query
-    if any(k in low for k in ("my schedule", "what is my schedule", "my calendar", "schedule this week")):
+    if any(k in low for k in _SCHEDULE_PHRASES):
         return "get_schedule", {}, 0.9
 
     # grades query
-    if any(k in low for k in ("grade", "grades", "marks", "scores")):
+    if any(k in low for k in _GRADE_WORDS):
         # try to capture name
-        m3 = re.search(r"([A-Za-z][A-Za-z'\-\.\s]{0,60}?)'s\s+(?:grades|marks|scores)", low)
+        m3 = _GRADES_POSSESSIVE.search(low) or _GRADES_FOR.search(low)
         if m3:
-            name = m3.group(1).strip()
+            name = _COMMAND_PREFIX.sub("", m3.group(1).strip())
             name_cap = " ".join([p.capitalize() for p in name.split()])
             return "get_grades", {"recipient": name_cap}, 0.85
         return "get_grades", {}, 0.6
 
     # fallback: if the text looks like a name (two capitalized words)
-    nm = re.match(r"^[A-Z][a-z]+\s+[A-Z][a-z]+$", txt)
+    nm = _FULL_NAME.match(txt)
     if nm:
         return "query_student", {"name": txt.strip()}, 0.9
 
@@ -0,0 +1,104 @@
+"""Cursor-paginated notification feed for students.
+
+`GET /student-dashboard/notifications` loaded every notification of the
+student, JSON-parsed each `additional_data` blob (bulk grade reports are
+several KB each), loaded `notification.educator` lazily per row and then
+re-sorted in Python. The feed here:
+
+- pages by keyset on `Notification.id` (newest first), served by the
+  `(student_id, id)` index, so a page costs the same at any depth
+- supports `since` for incremental refresh: only notifications newer than
+  the client's latest id are returned, oldest first, so a client can drain a
+  backlog page by page without gaps
+- eager-loads educator names in the same query
+- leaves `additional_data` unloaded; the feed only reports whether a payload
+  exists and `report_data` parses one notification's payload on demand
+
+Ids stand in for `created_at` order: both are assigned at insert time.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import logging
+import os
+
+from sqlalchemy.orm import Session, defer, joinedload, load_only
+
+from app.models.educator import Educator
+from app.models.notification import Notification
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = int(os.getenv("NOTIFICATION_PAGE_SIZE", "20"))
+MAX_PAGE_SIZE = 100
+
+
+def _feed_query(db: Session, student_id: int):
+    return (
+        db.query(Notification, Notification.additional_data.is_not(None))
+        .options(
+            defer(Notification.additional_data),
+            joinedload(Notification.educator).load_only(Educator.first_name, Educator.last_name),
+        )
+        .filter(Notification.student_id == student_id)
+    )
+
+
+def student_feed(
+    db: Session,
+    student_id: int,
+    limit: int = DEFAULT_PAGE_SIZE,
+    before: Optional[int] = None,
+    since: Optional[int] = None,
+) -> Dict[str, Any]:
+    """One page of a student's notifications.
+
+    Without `since`: newest first, older than `before` if given. With
+    `since`: notifications newer than that id, oldest first, and `has_more`
+    tells the client to ask again with the returned `latest_cursor`.
+    Each item is `(notification, has_report_data)`.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = _feed_query(db, student_id)
+    if since is not None:
+        query = query.filter(Notification.id > since).order_by(Notification.id.asc())
+    else:
+        if before is not None:
+            query = query.filter(Notification.id < before)
+        query = query.order_by(Notification.id.desc())
+    # One extra row tells whether another page exists
+    rows: List[Tuple[Notification, bool]] = [(n, bool(has)) for n, has in query.limit(limit + 1).all()]
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    ids = [notification.id for notification, _ in rows]
+    if since is not None:
+        latest = max(ids, default=since)
+        next_cursor = None
+    else:
+        # A refresh after the first page starts from its newest item
+        latest = max(ids) if ids and before is None else None
+        next_cursor = min(ids) if ids and has_more else None
+    return {"items": rows, "next_cursor": next_cursor, "latest_cursor": latest, "has_more": has_more}
+
+
+def report_data(db: Session, student_id: int, notification_id: int) -> Optional[Dict[str, Any]]:
+    """Parsed `additional_data` of one of the student's notifications.
+
+    Raises LookupError if the notification does not belong to the student;
+    returns None if it carries no JSON payload.
+    """
+    raw = (
+        db.query(Notification.additional_data)
+        .filter(Notification.id == notification_id, Notification.student_id == student_id)
+        .first()
+    )
+    if raw is None:
+        raise LookupError(notification_id)
+    if not raw[0]:
+        return None
+    try:
+        data = json.loads(raw[0])
+    except ValueError:
+        logger.debug("Notification %s has a non-JSON payload", notification_id)
+        return None
+    return data if isinstance(data, dict) else None
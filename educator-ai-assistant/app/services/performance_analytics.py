@@ -0,0 +1,160 @@
+"""Columnar analytics kernel for the performance views.
+
+The section, subject and overall views used to build their figures with
+one `Grade` query per student and repeated `sum(1 for ...)` passes over
+Python lists. The grade rows of a view are now loaded once, as columns,
+into a pandas frame, and every statistic is a vectorized pass over it:
+
+- per-student totals (marks, possible marks, grade and pass counts, mean
+  percentage) with one `groupby`
+- mean, extremes, population standard deviation and `PERCENTILES` of a
+  score array
+- letter buckets with `np.searchsorted` over the `OVERVIEW_LETTERS` scale
+  and score-band counts for `grade_level_stats`
+- rankings with a stable `argsort`, so ties keep the order the list-based
+  `sorted()` gave them
+
+Scores are returned unrounded; the views round them as before.
+`scripts/benchmark_performance_analytics.py` times the views against the
+list-based code they replaced.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app.models.student import Grade, Section, Student, Subject
+
+GRADE_COLUMNS = [
+    "grade_id", "student_id", "subject_id", "subject_name", "subject_code",
+    "section_name", "marks_obtained", "total_marks", "percentage", "grade_letter", "is_passed",
+]
+PERCENTILES = (25, 50, 75, 90)
+
+# Letter scale of the overview chart (finer than grade_letter_for):
+# a score gets the label of the highest lower bound it reaches
+OVERVIEW_LETTER_BOUNDS = np.array([60, 67, 70, 73, 77, 80, 83, 87, 90, 93, 97], dtype=float)
+OVERVIEW_LETTERS = np.array(["F", "D", "D+", "C-", "C", "C+", "B-", "B", "B+", "A-", "A", "A+"])
+
+# grade_level_stats bands: name -> [low, high)
+SCORE_BANDS = (
+    ("excellent", 90.0, np.inf),
+    ("good", 75.0, 90.0),
+    ("average", 60.0, 75.0),
+    ("below_average", -np.inf, 60.0),
+)
+
+
+def load_grades(db: Session, student_ids: Optional[Iterable[int]] = None, subject_id: Optional[int] = None) -> pd.DataFrame:
+    """Grade rows (with subject and section names) as a frame, in id order."""
+    query = (
+        db.query(
+            Grade.id, Grade.student_id, Grade.subject_id, Subject.name, Subject.code,
+            Section.name, Grade.marks_obtained, Grade.total_marks, Grade.percentage, Grade.grade_letter, Grade.is_passed,
+        )
+        .join(Subject, Subject.id == Grade.subject_id)
+        .join(Student, Student.id == Grade.student_id)
+        .outerjoin(Section, Section.id == Student.section_id)
+    )
+    if student_ids is not None:
+        query = query.filter(Grade.student_id.in_(list(student_ids)))
+    if subject_id is not None:
+        query = query.filter(Grade.subject_id == subject_id)
+    frame = pd.DataFrame.from_records(query.order_by(Grade.id).all(), columns=GRADE_COLUMNS)
+    for column in ("marks_obtained", "total_marks", "percentage"):
+        frame[column] = frame[column].astype(float)
+    # percentage and is_passed are derived at write time; a grade without
+    # a positive total has neither
+    frame["percentage"] = frame["percentage"].fillna(0.0)
+    frame["is_passed"] = frame["is_passed"].eq(True)
+    return frame
+
+
+def student_totals(frame: pd.DataFrame, student_ids: List[int]) -> pd.DataFrame:
+    """Per-student marks, possible marks, grade and pass counts and average
+    score (the mean grade percentage `student_passed` is defined on), in
+    `student_ids` order; students without grades have a grade count of 0."""
+    totals = frame.groupby("student_id", sort=False).agg(
+        marks=("marks_obtained", "sum"),
+        possible=("total_marks", "sum"),
+        grades=("grade_id", "size"),
+        passed=("is_passed", "sum"),
+        percentage=("percentage", "sum"),
+    )
+    totals = totals.reindex(student_ids, fill_value=0)
+    grades = totals["grades"].to_numpy(dtype=float)
+    percentage = totals["percentage"].to_numpy(dtype=float)
+    totals["average"] = np.divide(percentage, grades, out=np.zeros_like(percentage), where=grades > 0)
+    return totals
+
+
+def score_stats(scores: np.ndarray) -> Dict[str, object]:
+    """Mean, max, min, population standard deviation and percentiles; all
+    zero for an empty array."""
+    scores = np.asarray(scores, dtype=float)
+    if not scores.size:
+        return {
+            "count": 0, "mean": 0.0, "max": 0.0, "min": 0.0, "std": 0.0,
+            "percentiles": {f"p{p}": 0.0 for p in PERCENTILES},
+        }
+    return {
+        "count": int(scores.size),
+        "mean": float(scores.mean()),
+        "max": float(scores.max()),
+        "min": float(scores.min()),
+        "std": float(scores.std()),
+        "percentiles": {f"p{p}": float(value) for p, value in zip(PERCENTILES, np.percentile(scores, PERCENTILES))},
+    }
+
+
+def rounded_percentiles(stats: Dict[str, object], digits: int = 2) -> Dict[str, float]:
+    return {name: round(value, digits) for name, value in stats["percentiles"].items()}
+
+
+def rank(scores: np.ndarray, count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Positions of the `count` highest scores (best first) and of the
+    `count` lowest (worst first), as `sorted(..., reverse=True)` would give."""
+    order = np.argsort(-np.asarray(scores, dtype=float), kind="stable")
+    return order[:count], order[-count:][::-1] if count else order[:0]
+
+
+def ascending(scores: np.ndarray) -> np.ndarray:
+    """Stable ascending order of the scores."""
+    return np.argsort(np.asarray(scores, dtype=float), kind="stable")
+
+
+def letter_distribution(scores: np.ndarray) -> Dict[str, int]:
+    """Counts per overview letter, keyed in order of first occurrence."""
+    scores = np.asarray(scores, dtype=float)
+    if not scores.size:
+        return {}
+    letters = OVERVIEW_LETTERS[np.searchsorted(OVERVIEW_LETTER_BOUNDS, scores, side="right")]
+    labels, first, counts = np.unique(letters, return_index=True, return_counts=True)
+    order = np.argsort(first)
+    return {str(labels[i]): int(counts[i]) for i in order}
+
+
+def band_counts(scores: np.ndarray) -> Dict[str, int]:
+    scores = np.asarray(scores, dtype=float)
+    return {name: int(np.count_nonzero((scores >= low) & (scores < high))) for name, low, high in SCORE_BANDS}
+
+
+def letter_counts(frame: pd.DataFrame, letters: Iterable[str]) -> Dict[str, int]:
+    """Counts of stored grade letters; `letters` come first (zero if absent),
+    other letters follow in order of first occurrence."""
+    counts = frame["grade_letter"].dropna().value_counts(sort=False)
+    distribution = {letter: int(counts.get(letter, 0)) for letter in letters}
+    for letter, count in counts.items():
+        distribution.setdefault(letter, int(count))
+    return distribution
+
+
+def group_scores(frame: pd.DataFrame, key: str) -> pd.DataFrame:
+    """Grade count, mean percentage and pass count per `key`, in order of
+    first occurrence."""
+    return frame.groupby(key, sort=False).agg(
+        count=("grade_id", "size"),
+        average=("percentage", "mean"),
+        passed=("is_passed", "sum"),
+    )
@@ -0,0 +1,389 @@
+"""Materialized performance cache backed by `PerformanceCache`.
+
+The performance views (`/overview`, `/section/{id}`, `/subject/{id}`) used
+to recompute everything from raw `Grade` rows on every call. This module
+stores the serialized views in `performance_cache.metadata_json` together
+with a version stamp, and keeps `student_performance_summary` filled as a
+by-product of section computations.
+
+Versioning: every cache row carries a fingerprint of the data it was built
+from (row counts, max ids, max timestamps and mark sums of the students,
+grades and attendance in scope). A cached view is only served when the
+current fingerprint matches, so writes from other processes or scripts can
+never surface stale numbers. The `/overview` row has no section or subject;
+it is keyed on the educator (in `term`) and versioned by the fingerprints of
+all of their sections and subjects together.
+
+Invalidation: the scopes touched by inserted, updated or deleted `Grade`
+and `Attendance` rows and by `Student` rows whose view columns changed are
+collected at flush; once the transaction commits, their cache and summary
+rows are deleted in a separate short transaction
+(`app.services.commit_hooks`), so the table does not accumulate dead
+entries.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import logging
+
+from sqlalchemy import and_, case, func, inspect, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.student import Section, Student, Subject, Grade, grade_letter_for
+from app.models.performance import Attendance, PerformanceCache, StudentPerformanceSummary
+from app.services.commit_hooks import changed_values, flushed, on_commit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TERM = "Fall"
+DEFAULT_ACADEMIC_YEAR = "2024-2025"
+# `term` of an educator's overview row, which has no section or subject
+OVERVIEW_TERM = "overview:{}"
+
+
+def _stamp(*parts: Any) -> str:
+    out = []
+    for part in parts:
+        if hasattr(part, "isoformat"):
+            part = part.isoformat()
+        elif isinstance(part, float):
+            part = round(part, 4)
+        out.append(str(part))
+    return "|".join(out)
+
+
+def section_versions(db: Session, section_ids: Iterable[int]) -> Dict[int, str]:
+    """Return the current data fingerprint for each section."""
+    section_ids = list(section_ids)
+    if not section_ids:
+        return {}
+
+    students = {
+        row[0]: row[1:]
+        for row in db.query(
+            Student.section_id,
+            func.count(Student.id),
+            func.max(Student.id),
+            func.max(Student.updated_at),
+        )
+        .filter(Student.section_id.in_(section_ids))
+        .group_by(Student.section_id)
+        .all()
+    }
+    grades = {
+        row[0]: row[1:]
+        for row in db.query(
+            Student.section_id,
+            func.count(Grade.id),
+            func.max(Grade.id),
+            func.max(Grade.updated_at),
+            func.sum(Grade.marks_obtained),
+            func.sum(Grade.total_marks),
+        )
+        .join(Student, Student.id == Grade.student_id)
+        .filter(Student.section_id.in_(section_ids))
+        .group_by(Student.section_id)
+        .all()
+    }
+    attendance = {
+        row[0]: row[1:]
+        for row in db.query(
+            Student.section_id,
+            func.count(Attendance.id),
+            func.max(Attendance.id),
+            func.count(case((Attendance.present.is_(True), 1))),
+        )
+        .join(Student, Student.id == Attendance.student_id)
+        .filter(Student.section_id.in_(section_ids))
+        .group_by(Student.section_id)
+        .all()
+    }
+
+    return {
+        section_id: _stamp(
+            "s", *students.get(section_id, (0,)),
+            "g", *grades.get(section_id, (0,)),
+            "a", *attendance.get(section_id, (0,)),
+        )
+        for section_id in section_ids
+    }
+
+
+def subject_versions(db: Session, subject_ids: Iterable[int]) -> Dict[int, str]:
+    """Return the current data fingerprint for each subject."""
+    subject_ids = list(subject_ids)
+    if not subject_ids:
+        return {}
+
+    grades = {
+        row[0]: row[1:]
+        for row in db.query(
+            Grade.subject_id,
+            func.count(Grade.id),
+            func.max(Grade.id),
+            func.max(Grade.updated_at),
+            func.sum(Grade.marks_obtained),
+            func.sum(Grade.total_marks),
+        )
+        .filter(Grade.subject_id.in_(subject_ids))
+        .group_by(Grade.subject_id)
+        .all()
+    }
+    return {
+        subject_id: _stamp("g", *grades.get(subject_id, (0,)))
+        for subject_id in subject_ids
+    }
+
+
+def overview_version(section_versions: Dict[int, str], subject_versions: Dict[int, str]) -> str:
+    """Combine section and subject fingerprints into the overview's version.
+
+    The ids are part of it, so adding or removing a section or subject
+    changes the version even before it has any data.
+    """
+    parts = [f"s{section_id}:{version}" for section_id, version in sorted(section_versions.items())]
+    parts += [f"j{subject_id}:{version}" for subject_id, version in sorted(subject_versions.items())]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def _scope_filter(query, section_id: Optional[int], subject_id: Optional[int], educator_id: Optional[int] = None):
+    if section_id is None:
+        query = query.filter(PerformanceCache.section_id.is_(None))
+    else:
+        query = query.filter(PerformanceCache.section_id == section_id)
+    if subject_id is None:
+        query = query.filter(PerformanceCache.subject_id.is_(None))
+    else:
+        query = query.filter(PerformanceCache.subject_id == subject_id)
+    if educator_id is not None:
+        query = query.filter(PerformanceCache.term == OVERVIEW_TERM.format(educator_id))
+    return query.filter(PerformanceCache.exam_id.is_(None))
+
+
+def get_cached_view(
+    db: Session,
+    section_id: Optional[int],
+    subject_id: Optional[int],
+    version: str,
+    educator_id: Optional[int] = None,
+) -> Optional[Dict[str, Any]]:
+    """Return the cached view payload for a scope if its version matches.
+
+    `educator_id` selects that educator's overview row.
+    """
+    try:
+        row = (
+            _scope_filter(db.query(PerformanceCache), section_id, subject_id, educator_id)
+            .order_by(PerformanceCache.id.desc())
+            .first()
+        )
+    except Exception:
+        logger.exception("Failed to read performance cache")
+        return None
+
+    if not row or not row.metadata_json:
+        return None
+    if row.metadata_json.get("version") != version:
+        return None
+    return row.metadata_json.get("view")
+
+
+def store_view(
+    db: Session,
+    section_id: Optional[int],
+    subject_id: Optional[int],
+    version: str,
+    view: Dict[str, Any],
+    term: Optional[str] = None,
+    academic_year: Optional[str] = None,
+    section: Optional[Section] = None,
+    performances: Optional[List[Dict[str, Any]]] = None,
+    educator_id: Optional[int] = None,
+) -> None:
+    """Replace the cached view for a scope.
+
+    Writes go through a short-lived session on the same bind so the
+    caller's session is neither committed nor expired. When `section` and
+    `performances` are given the per-student summaries are refreshed in
+    the same transaction. `educator_id` stores that educator's overview.
+    Failures are logged; a cache write never fails the request.
+    """
+    if educator_id is not None:
+        term = OVERVIEW_TERM.format(educator_id)
+    writer = Session(bind=db.get_bind())
+    try:
+        _scope_filter(writer.query(PerformanceCache), section_id, subject_id, educator_id).delete(synchronize_session=False)
+        writer.add(PerformanceCache(
+            section_id=section_id,
+            subject_id=subject_id,
+            term=term,
+            academic_year=academic_year,
+            total_students=view.get("total_students", 0),
+            average_score=view.get("average_score"),
+            highest_score=view.get("highest_score"),
+            lowest_score=view.get("lowest_score"),
+            pass_count=view.get("passed_students", 0),
+            fail_count=view.get("failed_students", 0),
+            pass_percentage=view.get("pass_rate"),
+            average_attendance=view.get("attendance_average"),
+            metadata_json={"version": version, "view": view},
+        ))
+        if section is not None and performances:
+            store_student_summaries(writer, section, performances)
+        writer.commit()
+    except Exception:
+        logger.exception("Failed to store performance cache for section=%s subject=%s", section_id, subject_id)
+        writer.rollback()
+    finally:
+        writer.close()
+
+
+def store_student_summaries(db: Session, section: Section, performances: List[Dict[str, Any]]) -> None:
+    """Upsert `StudentPerformanceSummary` rows for a computed section.
+
+    `performances` are serialized `StudentPerformanceDetail` dicts. One
+    grouped attendance query and one lookup of existing rows are issued
+    regardless of the number of students. The caller commits.
+    """
+    if not performances:
+        return
+
+    term = section.semester or DEFAULT_TERM
+    academic_year = section.academic_year or DEFAULT_ACADEMIC_YEAR
+    student_ids = [p["id"] for p in performances]
+
+    attendance = {
+        row[0]: (row[1], row[2])
+        for row in db.query(
+            Attendance.student_id,
+            func.count(Attendance.id),
+            func.count(case((Attendance.present.is_(True), 1))),
+        )
+        .filter(Attendance.student_id.in_(student_ids))
+        .group_by(Attendance.student_id)
+        .all()
+    }
+    existing = {
+        row.student_id: row
+        for row in db.query(StudentPerformanceSummary).filter(
+            StudentPerformanceSummary.student_id.in_(student_ids),
+            StudentPerformanceSummary.term == term,
+            StudentPerformanceSummary.academic_year == academic_year,
+        ).all()
+    }
+
+    for perf in performances:
+        subject_averages: Dict[str, List[float]] = {}
+        for grade in perf.get("subject_grades", []):
+            subject_averages.setdefault(grade["subject_name"], []).append(grade["percentage"] or 0.0)
+
+        total_days, present_days = attendance.get(perf["id"], (0, 0))
+        summary = existing.get(perf["id"])
+        if summary is None:
+            summary = StudentPerformanceSummary(student_id=perf["id"], term=term, academic_year=academic_year)
+            db.add(summary)
+
+        summary.overall_average = perf["average_score"]
+        summary.overall_grade = grade_letter_for(perf["average_score"]) if perf["total_subjects"] else None
+        summary.subject_averages = {
+            name: round(sum(values) / len(values), 2) for name, values in subject_averages.items()
+        }
+        summary.total_days = total_days
+        summary.present_days = present_days
+        summary.attendance_percentage = round(present_days / total_days * 100, 2) if total_days else None
+        summary.is_promoted = perf["status"] == "Pass"
+        summary.needs_attention = perf["status"] == "Fail"
+
+
+def invalidate(db: Session, student_ids: Iterable[int] = (), subject_ids: Iterable[int] = (), section_ids: Iterable[int] = ()) -> None:
+    """Delete cache rows affected by changes to the given entities.
+
+    Issues core DELETE statements on the session's connection, inside the
+    caller's transaction; the caller commits.
+    """
+    student_ids = list(set(student_ids))
+    subject_ids = list(set(subject_ids))
+    section_ids = list(set(section_ids))
+    if not (student_ids or subject_ids or section_ids):
+        return
+
+    touched = []
+    if section_ids:
+        touched.append(Section.id.in_(section_ids))
+    if subject_ids:
+        touched.append(Section.id.in_(select(Subject.section_id).where(Subject.id.in_(subject_ids))))
+    if student_ids:
+        touched.append(Section.id.in_(select(Student.section_id).where(Student.id.in_(student_ids))))
+
+    conditions = []
+    if section_ids:
+        conditions.append(PerformanceCache.section_id.in_(section_ids))
+    if subject_ids:
+        conditions.append(PerformanceCache.subject_id.in_(subject_ids))
+    if student_ids:
+        conditions.append(PerformanceCache.section_id.in_(
+            select(Student.section_id).where(Student.id.in_(student_ids))
+        ))
+
+    conn = db.connection()
+    # Overviews of the educators owning the touched sections
+    educator_ids = conn.execute(select(Section.educator_id).where(or_(*touched)).distinct()).scalars().all()
+    overviews = [OVERVIEW_TERM.format(educator_id) for educator_id in educator_ids if educator_id is not None]
+    if overviews:
+        conditions.append(and_(
+            PerformanceCache.section_id.is_(None),
+            PerformanceCache.subject_id.is_(None),
+            PerformanceCache.term.in_(overviews),
+        ))
+    conn.execute(PerformanceCache.__table__.delete().where(or_(*conditions)))
+    if student_ids:
+        conn.execute(
+            StudentPerformanceSummary.__table__.delete().where(
+                StudentPerformanceSummary.student_id.in_(student_ids)
+            )
+        )
+
+
+# Student columns that appear in the cached views; other updates (logins,
+# passwords, contact details) leave them valid
+_STUDENT_VIEW_COLUMNS = ("section_id", "first_name", "last_name", "email", "roll_number", "student_id")
+
+
+def _student_changed(session: Session, obj: Student) -> bool:
+    if obj not in session.dirty:
+        return True
+    state = inspect(obj)
+    return any(state.attrs[column].history.has_changes() for column in _STUDENT_VIEW_COLUMNS)
+
+
+def _changed_scopes(session: Session) -> Iterable[Tuple[str, int]]:
+    for obj in flushed(session):
+        if isinstance(obj, Student):
+            if _student_changed(session, obj):
+                # Current and pre-flush values, so a moved row clears both scopes
+                yield from (("section", section_id) for section_id in changed_values(obj, "section_id"))
+        elif isinstance(obj, (Grade, Attendance)):
+            yield from (("student", student_id) for student_id in changed_values(obj, "student_id"))
+            yield from (("subject", subject_id) for subject_id in changed_values(obj, "subject_id"))
+
+
+def _invalidate_committed(session: Session, scopes: List[Tuple[str, int]]) -> None:
+    # The DELETEs run in their own transaction once the writes are
+    # committed, so a failure here can never abort the caller's
+    # transaction; the version check keeps reads correct meanwhile
+    writer = Session(bind=session.get_bind())
+    try:
+        invalidate(
+            writer,
+            student_ids=[scope_id for kind, scope_id in scopes if kind == "student"],
+            subject_ids=[scope_id for kind, scope_id in scopes if kind == "subject"],
+            section_ids=[scope_id for kind, scope_id in scopes if kind == "section"],
+        )
+        writer.commit()
+    except Exception:
+        logger.exception("Failed to invalidate performance cache after commit")
+        writer.rollback()
+    finally:
+        writer.close()
+
+
+on_commit("performance_cache_changed", _changed_scopes, _invalidate_committed)
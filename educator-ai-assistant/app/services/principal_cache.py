@@ -0,0 +1,165 @@
+"""Short-TTL cache of authenticated principals.
+
+`get_current_educator` and `get_current_student` looked the principal up by
+the token subject (the email) on every request, one extra round trip per
+call even for chatty endpoints. Lookups now go through this cache:
+
+- entries are detached snapshots of the principal's column values, keyed by
+  (kind, subject), kept for `PRINCIPAL_CACHE_TTL_SECONDS` (default 60) in an
+  LRU of `PRINCIPAL_CACHE_SIZE` entries (default 1024)
+- a hit is attached to the request's session with `merge(load=False)`,
+  which issues no SQL; the caller gets a regular persistent instance, so
+  relationships lazy-load and updates commit as before
+- the entry of any educator or student that is updated (password change,
+  deactivation, profile edit) or deleted in this process is dropped at
+  flush and again at commit (`app.services.commit_hooks`); other processes
+  see such changes within the TTL
+- hits, misses, evictions and invalidations are counted for `stats()`
+"""
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple, Type
+import logging
+import os
+import time
+
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.session import make_transient_to_detached
+
+from app.models.educator import Educator
+from app.models.student import Student
+from app.services.commit_hooks import changed_values, on_commit
+
+logger = logging.getLogger(__name__)
+
+TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))
+
+EDUCATOR = "educator"
+STUDENT = "student"
+_KINDS: Dict[type, str] = {Educator: EDUCATOR, Student: STUDENT}
+
+
+def _snapshot(obj: Any) -> Any:
+    """Detached copy of the loaded column values of a persistent instance."""
+    state = inspect(obj)
+    snapshot = state.mapper.class_manager.new_instance()
+    for attr in state.mapper.column_attrs:
+        if attr.key in state.dict:
+            set_committed_value(snapshot, attr.key, state.dict[attr.key])
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+class PrincipalCache:
+    def __init__(self, ttl: float = TTL_SECONDS, size: int = CACHE_SIZE):
+        self.ttl = ttl
+        self.size = size
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._lock = Lock()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.size > 0
+
+    def get(self, kind: str, subject: str) -> Optional[Any]:
+        """The cached snapshot for a subject, or None (counted as a miss)."""
+        key = (kind, subject)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, snapshot = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return snapshot
+                del self._entries[key]
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, kind: str, subject: str, obj: Any) -> None:
+        if not self.enabled:
+            return
+        snapshot = _snapshot(obj)
+        with self._lock:
+            self._entries[(kind, subject)] = (time.monotonic() + self.ttl, snapshot)
+            self._entries.move_to_end((kind, subject))
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def invalidate(self, kind: Optional[str] = None, subject: Optional[str] = None) -> None:
+        """Drop one subject, every subject of a kind, or everything."""
+        with self._lock:
+            if kind is not None and subject is not None:
+                keys = [(kind, subject)] if (kind, subject) in self._entries else []
+            else:
+                keys = [key for key in self._entries if kind is None or key[0] == kind]
+            for key in keys:
+                del self._entries[key]
+            self.counters["invalidations"] += len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "ttl_seconds": self.ttl,
+                "max_entries": self.size,
+            }
+
+
+principal_cache = PrincipalCache()
+
+
+def load_principal(db: Session, model: Type, subject: str) -> Optional[Any]:
+    """The educator or student whose email is the token subject, in `db`."""
+    kind = _KINDS[model]
+    snapshot = principal_cache.get(kind, subject)
+    if snapshot is not None:
+        return db.merge(snapshot, load=False)
+    principal = db.query(model).filter(model.email == subject).first()
+    if principal is not None:
+        principal_cache.put(kind, subject, principal)
+    return principal
+
+
+async def load_principal_async(db: AsyncSession, model: Type, subject: str) -> Optional[Any]:
+    """`load_principal` for async sessions."""
+    kind = _KINDS[model]
+    snapshot = principal_cache.get(kind, subject)
+    if snapshot is not None:
+        return await db.merge(snapshot, load=False)
+    principal = (await db.execute(select(model).where(model.email == subject))).scalars().first()
+    if principal is not None:
+        principal_cache.put(kind, subject, principal)
+    return principal
+
+
+def _changed_principals(session: Session) -> List[Tuple[str, str]]:
+    changed = []
+    for obj in list(session.dirty) + list(session.deleted):
+        kind = _KINDS.get(type(obj))
+        if kind is not None:
+            # Both the current and the pre-flush email, so a changed login is dropped too
+            changed.extend((kind, email) for email in changed_values(obj, "email") if email)
+    # Drop now as well, so this transaction does not read its own stale snapshot
+    for kind, email in changed:
+        principal_cache.invalidate(kind, email)
+    return changed
+
+
+def _invalidate_committed(session: Session, changed: List[Tuple[str, str]]) -> None:
+    # Again after commit: a concurrent request may have cached the
+    # pre-commit row between the flush and the commit
+    for kind, email in set(changed):
+        principal_cache.invalidate(kind, email)
+
+
+on_commit("principal_cache_changed", _changed_principals, _invalidate_committed)
@@ -0,0 +1,128 @@
+"""Recurrence expansion for `Schedule` series.
+
+`Schedule.recurrence_pattern` is free text ("daily, weekly, monthly, etc.").
+Supported patterns (case-insensitive): daily, weekdays, weekly, biweekly /
+fortnightly, monthly, quarterly, yearly / annually. A series repeats from its
+first occurrence (`start_datetime`..`end_datetime`) until
+`recurrence_end_date`, inclusive; an end date at midnight includes that
+whole day. Monthly steps keep the day of month, clamped to shorter months.
+
+`occurrences` only generates the occurrences that overlap the requested
+window: fixed-step patterns jump straight to the first candidate instead of
+walking the series from its start.
+
+Datetimes are compared as naive UTC (`naive_utc`): timezone-aware values are
+converted, naive ones are taken as already in UTC.
+"""
+from calendar import monthrange
+from datetime import datetime, time, timedelta, timezone
+from typing import Iterator, Optional, Tuple
+
+# pattern -> (unit, step)
+PATTERNS = {
+    "daily": ("days", 1),
+    "weekdays": ("weekdays", 1),
+    "weekly": ("days", 7),
+    "biweekly": ("days", 14),
+    "fortnightly": ("days", 14),
+    "monthly": ("months", 1),
+    "quarterly": ("months", 3),
+    "yearly": ("months", 12),
+    "annually": ("months", 12),
+}
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def parse_pattern(pattern: Optional[str]) -> Optional[Tuple[str, int]]:
+    """(unit, step) for a supported pattern, None for empty or unknown ones."""
+    if not pattern:
+        return None
+    return PATTERNS.get(pattern.strip().lower())
+
+
+def is_supported(pattern: Optional[str]) -> bool:
+    return not pattern or parse_pattern(pattern) is not None
+
+
+def series_end(until: Optional[datetime]) -> Optional[datetime]:
+    """Latest occurrence start allowed by a recurrence end date."""
+    until = naive_utc(until)
+    if until is not None and until.time() == time.min:
+        return until + timedelta(days=1) - timedelta(microseconds=1)
+    return until
+
+
+def _add_months(value: datetime, months: int) -> datetime:
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    return value.replace(year=year, month=month, day=min(value.day, monthrange(year, month)[1]))
+
+
+def occurrences(
+    start: datetime,
+    end: datetime,
+    pattern: Optional[str] = None,
+    until: Optional[datetime] = None,
+    window_start: Optional[datetime] = None,
+    window_end: Optional[datetime] = None,
+) -> Iterator[Tuple[datetime, datetime]]:
+    """(start, end) of each occurrence overlapping [window_start, window_end).
+
+    A series without a recurrence end date needs a `window_end`. Unknown
+    patterns are treated as a single event.
+    """
+    start, end = naive_utc(start), naive_utc(end)
+    window_start, window_end = naive_utc(window_start), naive_utc(window_end)
+    duration = max(end - start, timedelta(0))
+    rule = parse_pattern(pattern)
+
+    def overlaps(occurrence_start: datetime) -> bool:
+        return (window_end is None or occurrence_start < window_end) and (
+            window_start is None or occurrence_start + duration > window_start
+        )
+
+    if rule is None:
+        if overlaps(start):
+            yield start, end
+        return
+
+    last_start = series_end(until)
+    if window_end is not None and (last_start is None or window_end <= last_start):
+        # Occurrences starting at or after window_end cannot overlap it
+        last_start = window_end - timedelta(microseconds=1)
+    if last_start is None:
+        raise ValueError("an open-ended series needs a window_end")
+
+    unit, step = rule
+    # Skip whole steps that end before the window opens
+    first = 0
+    if window_start is not None and window_start > start + duration:
+        gap = window_start - duration - start
+        if unit == "days":
+            first = max(0, gap // timedelta(days=step))
+        elif unit == "weekdays":
+            first = max(0, gap.days - 1)
+        else:
+            months = (window_start.year - start.year) * 12 + window_start.month - start.month
+            first = max(0, months // step - 1)
+
+    index = first
+    while True:
+        if unit == "days":
+            occurrence_start = start + timedelta(days=step * index)
+        elif unit == "weekdays":
+            occurrence_start = start + timedelta(days=index)
+        else:
+            occurrence_start = _add_months(start, step * index)
+        index += 1
+        if occurrence_start > last_start:
+            return
+        if unit == "weekdays" and occurrence_start.weekday() >= 5:
+            continue
+        if overlaps(occurrence_start):
+            yield occurrence_start, occurrence_start + duration
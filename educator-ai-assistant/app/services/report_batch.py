@@ -0,0 +1,153 @@
+"""Batch fan-out for sending performance reports.
+
+`POST /performance/send-report` used to handle one student at a time: an
+awaited PDF render, a `Grade` query for the stored report data (plus one
+per grade for its subject), and an ORM insert and commit for the report and
+for its notification.
+
+For a batch this module:
+- loads the target students with their sections, and all of their grades
+  with subjects, in one query each
+- renders every student document concurrently through the report renderer
+  (process pool across cores, content-addressed cache, so re-sending an
+  unchanged report on the same day reuses the artifact)
+- inserts the `SentReport` rows and their `Notification` rows with one
+  bulk INSERT each
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List
+import asyncio
+import logging
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, joinedload
+
+from app.models.educator import Educator
+from app.models.notification import Notification, NotificationType
+from app.models.report import SentReport
+from app.models.student import Grade, Student
+from app.services.report_rendering import report_renderer
+
+logger = logging.getLogger(__name__)
+
+
+def load_students(db: Session, student_ids: Iterable[int]) -> List[Student]:
+    """Students in request order; unknown ids are skipped."""
+    student_ids = list(dict.fromkeys(student_ids))
+    if not student_ids:
+        return []
+    by_id = {
+        student.id: student
+        for student in db.query(Student).options(joinedload(Student.section)).filter(Student.id.in_(student_ids)).all()
+    }
+    return [by_id[student_id] for student_id in student_ids if student_id in by_id]
+
+
+def prefetch_grades(db: Session, student_ids: Iterable[int]) -> Dict[int, List[Grade]]:
+    student_ids = list(student_ids)
+    grades: Dict[int, List[Grade]] = {student_id: [] for student_id in student_ids}
+    if not student_ids:
+        return grades
+    rows = (
+        db.query(Grade)
+        .options(joinedload(Grade.subject))
+        .filter(Grade.student_id.in_(student_ids))
+        .order_by(Grade.student_id, Grade.id)
+        .all()
+    )
+    for grade in rows:
+        grades[grade.student_id].append(grade)
+    return grades
+
+
+def student_report_data(student: Student, grades: List[Grade]) -> Dict[str, Any]:
+    """Student performance data for JSON storage"""
+    performance_data = {
+        "student_id": student.id,
+        "student_name": student.full_name,
+        "section": student.section.name if student.section else None,
+        "subjects": [],
+        "overall_average": 0,
+        "total_subjects": len(grades),
+        "passed_subjects": 0
+    }
+
+    if grades:
+        total_percentage = 0
+        passed_count = 0
+
+        for grade in grades:
+            performance_data["subjects"].append({
+                "subject_name": grade.subject.name if grade.subject else 'Unknown',
+                "marks_obtained": grade.marks_obtained,
+                "total_marks": grade.total_marks,
+                "percentage": grade.percentage,
+                "grade_letter": grade.grade_letter,
+                "is_passed": grade.is_passed
+            })
+
+            if grade.percentage:
+                total_percentage += grade.percentage
+
+            if grade.is_passed:
+                passed_count += 1
+
+        performance_data["overall_average"] = total_percentage / len(grades)
+        performance_data["passed_subjects"] = passed_count
+
+    return performance_data
+
+
+def student_report_payload(student: Student, report_data: Dict[str, Any], educator: Educator) -> Dict[str, Any]:
+    return {
+        "title": f"Individual Performance Report - {student.full_name}",
+        "educator_name": f"{educator.first_name} {educator.last_name}",
+        "student_code": student.student_id,
+        "report_date": datetime.now().strftime('%Y-%m-%d'),
+        "data": report_data,
+    }
+
+
+async def render_student_reports(payloads: List[Dict[str, Any]], format: str) -> List[str]:
+    """Render one PDF per payload concurrently; "" where the format has no PDF."""
+    if format not in ("pdf", "both"):
+        return [""] * len(payloads)
+    return list(await asyncio.gather(*(
+        report_renderer.get_or_render("pdf", "student", payload) for payload in payloads
+    )))
+
+
+def insert_sent_reports(db: Session, rows: List[Dict[str, Any]]) -> List[int]:
+    """Bulk insert `SentReport` rows; returns their ids in row order.
+
+    A send addresses each student once, so ids are matched back by
+    student_id. Asking RETURNING for parameter order instead makes
+    backends without a sentinel column insert row by row.
+    """
+    if not rows:
+        return []
+    ids = {
+        student_id: report_id
+        for report_id, student_id in db.execute(
+            insert(SentReport).returning(SentReport.id, SentReport.student_id), rows
+        )
+    }
+    return [ids[row["student_id"]] for row in rows]
+
+
+def insert_report_notifications(db: Session, educator_id: int, rows: List[Dict[str, Any]], report_ids: List[int]) -> int:
+    """Bulk insert one dashboard notification per sent report."""
+    notifications = [
+        {
+            "educator_id": educator_id,
+            "student_id": row["student_id"],
+            "title": f"Report: {row['title']}",
+            "message": row.get("description") or row["title"],
+            "notification_type": NotificationType.GRADE_REPORT,
+            "additional_data": str({"report_id": report_id}),
+        }
+        for row, report_id in zip(rows, report_ids)
+    ]
+    if notifications:
+        db.execute(insert(Notification), notifications)
+    return len(notifications)
@@ -0,0 +1,693 @@
+"""Performance report rendering with a content-addressed artifact cache.
+
+Report downloads used to build ReportLab/openpyxl documents inside the
+request and write them to the temp directory under a timestamped name, so
+every download re-rendered an identical document on the event loop.
+
+Reports are now rendered in a process pool (`REPORT_RENDER_WORKERS`,
+default 2) from plain-dict payloads, and each artifact is stored under a
+hash of the layout version, format, view type and payload (the serialized
+performance view). Repeat downloads of unchanged data stream the stored
+file; any change to the underlying numbers changes the payload and so the
+key. Concurrent requests for the same key share one render.
+
+Artifacts live in `REPORT_CACHE_DIR` (default `<tmp>/educator-reports`);
+the least recently used ones are pruned beyond `REPORT_CACHE_MAX_FILES`
+(default 500). Bump `LAYOUT_VERSION` when a renderer changes so stale
+layouts are not served.
+
+This module must stay importable without the app (no database or FastAPI
+imports): worker processes are spawned and import it on their own.
+"""
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from threading import Lock
+from typing import Any, Callable, Dict, Tuple
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+
+import pandas as pd
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+logger = logging.getLogger(__name__)
+
+RENDER_WORKERS = int(os.getenv("REPORT_RENDER_WORKERS", "2"))
+CACHE_DIR = os.getenv("REPORT_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "educator-reports")
+CACHE_MAX_FILES = int(os.getenv("REPORT_CACHE_MAX_FILES", "500"))
+LAYOUT_VERSION = "1"
+
+EXTENSIONS = {"pdf": "pdf", "excel": "xlsx"}
+MEDIA_TYPES = {
+    "pdf": "application/pdf",
+    "excel": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def _performance_level(score: float) -> str:
+    return 'Excellent' if score >= 90 else 'Good' if score >= 75 else 'Average' if score >= 60 else 'Needs Improvement'
+
+
+def _share(count: int, total: int) -> str:
+    return f"{(count/total*100):.1f}%" if total > 0 else "0%"
+
+
+# -- PDF -----------------------------------------------------------------
+
+def _pdf_overall(story: list, styles, payload: Dict[str, Any]) -> None:
+    data = payload["data"]
+    stats = data["grade_level_stats"]
+
+    # Executive Summary
+    story.append(Paragraph("Executive Summary", styles['Heading2']))
+    summary_data = [
+        ['Metric', 'Value', 'Status'],
+        ['Total Sections', str(data["total_sections"]), '✓'],
+        ['Total Students', str(data["total_students"]), '✓'],
+        ['Total Subjects', str(data["total_subjects"]), '✓'],
+        ['Overall Pass Rate', f"{data['overall_pass_rate']}%", '✓' if data["overall_pass_rate"] >= 70 else '⚠'],
+        ['Overall Average', f"{data['overall_average']}%", '✓' if data["overall_average"] >= 75 else '⚠']
+    ]
+
+    summary_table = Table(summary_data, colWidths=[2*inch, 1.5*inch, 1*inch])
+    summary_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.navy),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.lightblue),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    story.append(summary_table)
+    story.append(Spacer(1, 20))
+
+    # Grade Distribution
+    if stats:
+        total = data["total_students"]
+        story.append(Paragraph("Grade Distribution Analysis", styles['Heading2']))
+        grade_data = [
+            ['Performance Level', 'Count', 'Percentage'],
+            ['Excellent (90%+)', str(stats.get('excellent', 0)), _share(stats.get('excellent', 0), total)],
+            ['Good (75-89%)', str(stats.get('good', 0)), _share(stats.get('good', 0), total)],
+            ['Average (60-74%)', str(stats.get('average', 0)), _share(stats.get('average', 0), total)],
+            ['Below Average (<60%)', str(stats.get('below_average', 0)), _share(stats.get('below_average', 0), total)]
+        ]
+
+        grade_table = Table(grade_data)
+        grade_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.lightgreen)
+        ]))
+        story.append(grade_table)
+        story.append(Spacer(1, 20))
+
+    # Sections Performance Comparison
+    if data["sections_summary"]:
+        story.append(Paragraph("Sections Performance Comparison", styles['Heading2']))
+        sections_data = [['Section', 'Students', 'Pass Rate', 'Average', 'Highest', 'Lowest']]
+        for section in data["sections_summary"]:
+            sections_data.append([
+                section["section_name"],
+                str(section["total_students"]),
+                f"{section['pass_rate']}%",
+                f"{section['average_score']}%",
+                f"{section['highest_score']}%",
+                f"{section['lowest_score']}%"
+            ])
+
+        sections_table = Table(sections_data)
+        sections_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.purple),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.lavender)
+        ]))
+        story.append(sections_table)
+
+
+def _pdf_section(story: list, styles, payload: Dict[str, Any]) -> None:
+    data = payload["data"]
+
+    # Section Overview
+    story.append(Paragraph("Section Overview", styles['Heading2']))
+    overview_data = [
+        ['Section Details', 'Value'],
+        ['Section Name', data["section_name"]],
+        ['Total Students', str(data["total_students"])],
+        ['Students Passed', str(data["passed_students"])],
+        ['Students Failed', str(data["failed_students"])],
+        ['Pass Rate', f"{data['pass_rate']}%"],
+        ['Class Average', f"{data['average_score']}%"],
+        ['Highest Score', f"{data['highest_score']}%"],
+        ['Lowest Score', f"{data['lowest_score']}%"],
+        ['Attendance Average', f"{data['attendance_average']}%"]
+    ]
+
+    overview_table = Table(overview_data, colWidths=[2.5*inch, 2*inch])
+    overview_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.lightblue)
+    ]))
+    story.append(overview_table)
+    story.append(Spacer(1, 20))
+
+    # Subject Performance in Section
+    if data["subject_averages"]:
+        story.append(Paragraph("Subject-wise Performance", styles['Heading2']))
+        subject_data = [['Subject', 'Average Score', 'Performance Level']]
+        for subject, avg in data["subject_averages"].items():
+            subject_data.append([subject, f"{avg}%", _performance_level(avg)])
+
+        subject_table = Table(subject_data)
+        subject_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.orange),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.lightyellow)
+        ]))
+        story.append(subject_table)
+        story.append(Spacer(1, 20))
+
+    # Top Performers
+    if data["top_performers"]:
+        story.append(Paragraph("Top Performers", styles['Heading2']))
+        top_data = [['Rank', 'Student Name', 'Student ID', 'Average Score']]
+        for i, student in enumerate(data["top_performers"][:10], 1):
+            top_data.append([str(i), student["name"], student["student_id"], f"{student['average_score']}%"])
+
+        top_table = Table(top_data)
+        top_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.gold),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        story.append(top_table)
+
+
+def _pdf_subject(story: list, styles, payload: Dict[str, Any]) -> None:
+    data = payload["data"]
+
+    # Subject Overview
+    story.append(Paragraph("Subject Performance Analysis", styles['Heading2']))
+    subject_overview = [
+        ['Subject Details', 'Value'],
+        ['Subject Name', data["subject_name"]],
+        ['Subject Code', data["subject_code"]],
+        ['Total Students', str(data["total_students"])],
+        ['Students Passed', str(data["passed_students"])],
+        ['Students Failed', str(data["failed_students"])],
+        ['Pass Rate', f"{data['pass_rate']}%"],
+        ['Average Score', f"{data['average_score']}%"],
+        ['Highest Score', f"{data['highest_score']}%"],
+        ['Lowest Score', f"{data['lowest_score']}%"]
+    ]
+
+    subject_table = Table(subject_overview, colWidths=[2.5*inch, 2*inch])
+    subject_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.teal),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.lightcyan)
+    ]))
+    story.append(subject_table)
+    story.append(Spacer(1, 20))
+
+    # Grade Distribution
+    if data["grade_distribution"]:
+        story.append(Paragraph("Grade Distribution", styles['Heading2']))
+        grade_dist_data = [['Grade', 'Count', 'Percentage']]
+        total_grades = sum(data["grade_distribution"].values())
+        for grade, count in data["grade_distribution"].items():
+            grade_dist_data.append([grade, str(count), _share(count, total_grades)])
+
+        grade_dist_table = Table(grade_dist_data)
+        grade_dist_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.maroon),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.mistyrose)
+        ]))
+        story.append(grade_dist_table)
+        story.append(Spacer(1, 20))
+
+    # Section-wise Performance
+    if data["sections_performance"]:
+        story.append(Paragraph("Performance Across Sections", styles['Heading2']))
+        section_perf_data = [['Section', 'Students', 'Average Score', 'Pass Rate']]
+        for section_perf in data["sections_performance"]:
+            section_perf_data.append([
+                section_perf['section_name'],
+                str(section_perf['total_students']),
+                f"{section_perf['average_score']}%",
+                f"{section_perf['pass_rate']}%"
+            ])
+
+        section_perf_table = Table(section_perf_data)
+        section_perf_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.indigo),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.lavender)
+        ]))
+        story.append(section_perf_table)
+
+
+def _pdf_student(styles, payload: Dict[str, Any]) -> list:
+    data = payload["data"]
+    story = [Paragraph(payload["title"], styles['Title']), Spacer(1, 20)]
+
+    # Student information
+    student_info = [
+        ['Student Name', data["student_name"]],
+        ['Student ID', payload["student_code"]],
+        ['Section', data["section"] or 'N/A'],
+        ['Report Date', payload["report_date"]],
+        ['Generated by', payload["educator_name"]]
+    ]
+
+    info_table = Table(student_info, colWidths=[2*inch, 3*inch])
+    info_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    story.append(info_table)
+    story.append(Spacer(1, 20))
+
+    # Performance data
+    if data["subjects"]:
+        story.append(Paragraph("Academic Performance", styles['Heading2']))
+
+        performance_data = [['Subject', 'Marks', 'Percentage', 'Grade', 'Status']]
+        for subject in data["subjects"]:
+            performance_data.append([
+                subject["subject_name"],
+                f"{subject['marks_obtained']}/{subject['total_marks']}",
+                f"{subject['percentage'] or 0:.1f}%",
+                subject["grade_letter"] or 'N/A',
+                'Pass' if subject["is_passed"] else 'Fail'
+            ])
+
+        perf_table = Table(performance_data)
+        perf_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.navy),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        story.append(perf_table)
+    return story
+
+
+_PDF_SECTIONS: Dict[str, Callable] = {
+    "overall": _pdf_overall,
+    "section": _pdf_section,
+    "subject": _pdf_subject,
+}
+
+
+def render_pdf(view_type: str, payload: Dict[str, Any]) -> bytes:
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    styles = getSampleStyleSheet()
+    if view_type == "student":
+        doc.build(_pdf_student(styles, payload))
+        return buffer.getvalue()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        textColor=colors.darkblue,
+        alignment=1  # Center alignment
+    )
+    story = [Paragraph(payload["title"], title_style), Spacer(1, 20)]
+    _PDF_SECTIONS[view_type](story, styles, payload)
+
+    # Add timestamp footer
+    story.append(Spacer(1, 30))
+    story.append(Paragraph(f"Report generated on: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", styles['Normal']))
+    doc.build(story)
+    return buffer.getvalue()
+
+
+# -- Excel ---------------------------------------------------------------
+
+def _excel_overall(writer, payload: Dict[str, Any]) -> None:
+    data = payload["data"]
+    stats = data["grade_level_stats"]
+
+    # Executive Summary Sheet
+    summary_df = pd.DataFrame([
+        {'Metric': 'Total Sections', 'Value': data["total_sections"], 'Status': '✓'},
+        {'Metric': 'Total Students', 'Value': data["total_students"], 'Status': '✓'},
+        {'Metric': 'Total Subjects', 'Value': data["total_subjects"], 'Status': '✓'},
+        {'Metric': 'Overall Pass Rate (%)', 'Value': data["overall_pass_rate"], 'Status': '✓' if data["overall_pass_rate"] >= 70 else '⚠'},
+        {'Metric': 'Overall Average (%)', 'Value': data["overall_average"], 'Status': '✓' if data["overall_average"] >= 75 else '⚠'},
+        {'Metric': 'Report Date', 'Value': datetime.now().strftime('%Y-%m-%d %H:%M'), 'Status': '✓'}
+    ])
+    summary_df.to_excel(writer, sheet_name='Executive Summary', index=False)
+
+    # Grade Distribution Sheet
+    if stats:
+        total = data["total_students"]
+        grade_dist_df = pd.DataFrame([
+            {'Performance Level': label, 'Count': stats.get(key, 0), 'Percentage': _share(stats.get(key, 0), total)}
+            for label, key in (
+                ('Excellent (90%+)', 'excellent'),
+                ('Good (75-89%)', 'good'),
+                ('Average (60-74%)', 'average'),
+                ('Below Average (<60%)', 'below_average'),
+            )
+        ])
+        grade_dist_df.to_excel(writer, sheet_name='Grade Distribution', index=False)
+
+    # Sections Comparison Sheet
+    if data["sections_summary"]:
+        sections_df = pd.DataFrame([
+            {
+                'Section Name': s["section_name"],
+                'Total Students': s["total_students"],
+                'Students Passed': s["passed_students"],
+                'Students Failed': s["failed_students"],
+                'Pass Rate (%)': s["pass_rate"],
+                'Average Score (%)': s["average_score"],
+                'Highest Score (%)': s["highest_score"],
+                'Lowest Score (%)': s["lowest_score"],
+                'Attendance Average (%)': s["attendance_average"],
+                'Performance Rating': _performance_level(s["average_score"])
+            }
+            for s in data["sections_summary"]
+        ])
+        sections_df.to_excel(writer, sheet_name='Sections Comparison', index=False)
+
+    # Subjects Analysis Sheet
+    if data["subjects_summary"]:
+        subjects_df = pd.DataFrame([
+            {
+                'Subject Name': subj["subject_name"],
+                'Subject Code': subj["subject_code"],
+                'Total Students': subj["total_students"],
+                'Pass Rate (%)': subj["pass_rate"],
+                'Average Score (%)': subj["average_score"],
+                'Highest Score (%)': subj["highest_score"],
+                'Lowest Score (%)': subj["lowest_score"],
+                'Difficulty Level': 'Easy' if subj["pass_rate"] >= 90 else 'Moderate' if subj["pass_rate"] >= 70 else 'Challenging' if subj["pass_rate"] >= 50 else 'Very Challenging'
+            }
+            for subj in data["subjects_summary"]
+        ])
+        subjects_df.to_excel(writer, sheet_name='Subjects Analysis', index=False)
+
+
+def _excel_section(writer, payload: Dict[str, Any]) -> None:
+    data = payload["data"]
+    avg = data["average_score"]
+
+    # Section Overview Sheet
+    overview_df = pd.DataFrame([
+        {'Detail': 'Section Name', 'Value': data["section_name"]},
+        {'Detail': 'Total Students', 'Value': data["total_students"]},
+        {'Detail': 'Students Passed', 'Value': data["passed_students"]},
+        {'Detail': 'Students Failed', 'Value': data["failed_students"]},
+        {'Detail': 'Pass Rate (%)', 'Value': data["pass_rate"]},
+        {'Detail': 'Class Average (%)', 'Value': avg},
+        {'Detail': 'Highest Score (%)', 'Value': data["highest_score"]},
+        {'Detail': 'Lowest Score (%)', 'Value': data["lowest_score"]},
+        {'Detail': 'Attendance Average (%)', 'Value': data["attendance_average"]},
+        {'Detail': 'Overall Rating', 'Value': 'Excellent' if avg >= 85 else 'Good' if avg >= 70 else 'Average' if avg >= 60 else 'Needs Improvement'}
+    ])
+    overview_df.to_excel(writer, sheet_name='Section Overview', index=False)
+
+    # Subject Performance in Section
+    if data["subject_averages"]:
+        subject_perf_df = pd.DataFrame([
+            {
+                'Subject': subject,
+                'Average Score (%)': score,
+                'Performance Level': _performance_level(score),
+                'Grade': 'A+' if score >= 95 else 'A' if score >= 90 else 'B+' if score >= 85 else 'B' if score >= 80 else 'C+' if score >= 75 else 'C' if score >= 70 else 'D' if score >= 60 else 'F'
+            }
+            for subject, score in data["subject_averages"].items()
+        ])
+        subject_perf_df.to_excel(writer, sheet_name='Subject Performance', index=False)
+
+    # Top Performers Details
+    if data["top_performers"]:
+        top_performers_df = pd.DataFrame([
+            {
+                'Rank': i + 1,
+                'Student ID': student["student_id"],
+                'Student Name': student["name"],
+                'Email': student["email"],
+                'Average Score (%)': student["average_score"],
+                'Status': student["status"],
+                'Total Subjects': student["total_subjects"],
+                'Passed Subjects': student["passed_subjects"],
+                'Failed Subjects': student["failed_subjects"]
+            }
+            for i, student in enumerate(data["top_performers"])
+        ])
+        top_performers_df.to_excel(writer, sheet_name='Top Performers', index=False)
+
+    # Students Needing Support
+    if data["low_performers"]:
+        low_performers_df = pd.DataFrame([
+            {
+                'Student ID': student["student_id"],
+                'Student Name': student["name"],
+                'Email': student["email"],
+                'Average Score (%)': student["average_score"],
+                'Status': student["status"],
+                'Failed Subjects': student["failed_subjects"],
+                'Subjects to Improve': student["total_subjects"] - student["passed_subjects"],
+                'Attention Level': 'High' if student["average_score"] < 40 else 'Medium' if student["average_score"] < 55 else 'Low'
+            }
+            for student in data["low_performers"]
+        ])
+        low_performers_df.to_excel(writer, sheet_name='Students Needing Support', index=False)
+
+
+def _excel_subject(writer, payload: Dict[str, Any]) -> None:
+    data = payload["data"]
+    pass_rate = data["pass_rate"]
+
+    # Subject Overview Sheet
+    subject_overview_df = pd.DataFrame([
+        {'Detail': 'Subject Name', 'Value': data["subject_name"]},
+        {'Detail': 'Subject Code', 'Value': data["subject_code"]},
+        {'Detail': 'Total Students', 'Value': data["total_students"]},
+        {'Detail': 'Students Passed', 'Value': data["passed_students"]},
+        {'Detail': 'Students Failed', 'Value': data["failed_students"]},
+        {'Detail': 'Pass Rate (%)', 'Value': pass_rate},
+        {'Detail': 'Average Score (%)', 'Value': data["average_score"]},
+        {'Detail': 'Highest Score (%)', 'Value': data["highest_score"]},
+        {'Detail': 'Lowest Score (%)', 'Value': data["lowest_score"]},
+        {'Detail': 'Difficulty Assessment', 'Value': 'Easy' if pass_rate >= 90 else 'Moderate' if pass_rate >= 70 else 'Challenging' if pass_rate >= 50 else 'Very Challenging'}
+    ])
+    subject_overview_df.to_excel(writer, sheet_name='Subject Overview', index=False)
+
+    # Grade Distribution Analysis
+    if data["grade_distribution"]:
+        grade_dist_df = pd.DataFrame([
+            {
+                'Grade': grade,
+                'Count': count,
+                'Percentage': _share(count, data["total_students"]),
+                'GPA Points': {'A+': 4.0, 'A': 4.0, 'B+': 3.5, 'B': 3.0, 'C+': 2.5, 'C': 2.0, 'D+': 1.5, 'D': 1.0, 'F': 0.0}.get(grade, 0.0)
+            }
+            for grade, count in data["grade_distribution"].items()
+        ])
+        grade_dist_df.to_excel(writer, sheet_name='Grade Distribution', index=False)
+
+    # Section-wise Performance Analysis
+    if data["sections_performance"]:
+        section_performance_df = pd.DataFrame([
+            {
+                'Section Name': section_perf['section_name'],
+                'Total Students': section_perf['total_students'],
+                'Passed Students': section_perf['passed_students'],
+                'Average Score (%)': section_perf['average_score'],
+                'Pass Rate (%)': section_perf['pass_rate'],
+                'Performance Level': 'Excellent' if section_perf['average_score'] >= 90 else 'Good' if section_perf['average_score'] >= 75 else 'Average' if section_perf['average_score'] >= 60 else 'Below Average',
+                'Recommendation': 'Continue current approach' if section_perf['pass_rate'] >= 80 else 'Review teaching methods' if section_perf['pass_rate'] >= 60 else 'Intensive support needed'
+            }
+            for section_perf in data["sections_performance"]
+        ])
+        section_performance_df.to_excel(writer, sheet_name='Sections Performance', index=False)
+
+
+_EXCEL_SHEETS: Dict[str, Callable] = {
+    "overall": _excel_overall,
+    "section": _excel_section,
+    "subject": _excel_subject,
+}
+
+
+def render_excel(view_type: str, payload: Dict[str, Any]) -> bytes:
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        _EXCEL_SHEETS[view_type](writer, payload)
+
+        # Add metadata sheet for all report types
+        metadata_df = pd.DataFrame([
+            {'Information': 'Report Type', 'Value': view_type.title() + ' Performance Analysis'},
+            {'Information': 'Generated By', 'Value': payload["educator_name"]},
+            {'Information': 'Generated On', 'Value': datetime.now().strftime('%Y-%m-%d %H:%M:%S')},
+            {'Information': 'Academic Year', 'Value': '2024-2025'},
+            {'Information': 'System', 'Value': 'Educator AI Assistant'},
+            {'Information': 'Format Version', 'Value': '2.0'}
+        ])
+        metadata_df.to_excel(writer, sheet_name='Report Info', index=False)
+    return buffer.getvalue()
+
+
+_RENDERERS: Dict[str, Callable[[str, Dict[str, Any]], bytes]] = {
+    "pdf": render_pdf,
+    "excel": render_excel,
+}
+
+
+def render_to_file(fmt: str, view_type: str, payload: Dict[str, Any], path: str) -> str:
+    """Render one artifact and move it into place atomically (worker process)."""
+    content = _RENDERERS[fmt](view_type, payload)
+    # The cache directory may have been swept by a tmp cleaner
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, partial = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(partial, path)
+    except BaseException:
+        os.unlink(partial)
+        raise
+    return path
+
+
+def artifact_key(fmt: str, view_type: str, payload: Dict[str, Any]) -> str:
+    canonical = json.dumps(
+        {"layout": LAYOUT_VERSION, "format": fmt, "view": view_type, "payload": payload},
+        sort_keys=True, separators=(",", ":"), default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ReportRenderer:
+    def __init__(self, cache_dir: str = CACHE_DIR, workers: int = RENDER_WORKERS, max_files: int = CACHE_MAX_FILES):
+        self.cache_dir = cache_dir
+        self.workers = max(1, workers)
+        self.max_files = max_files
+        self._pool = None
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = Lock()
+        self.stats = {"hits": 0, "renders": 0, "coalesced": 0, "errors": 0}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # spawn, not fork: the server process has threads (SMTP engine,
+            # LLM pool) whose locks a forked child could inherit held
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def artifact_path(self, key: str, fmt: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{EXTENSIONS[fmt]}")
+
+    def _lookup_or_submit(self, fmt: str, view_type: str, payload: Dict[str, Any]) -> Tuple[str, Future]:
+        key = artifact_key(fmt, view_type, payload)
+        path = self.artifact_path(key, fmt)
+        with self._lock:
+            if os.path.exists(path):
+                self.stats["hits"] += 1
+                # Touch for LRU pruning
+                os.utime(path)
+                return path, None
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return path, future
+            try:
+                future = self._executor().submit(render_to_file, fmt, view_type, payload, path)
+            except BrokenProcessPool:
+                logger.warning("Report render pool broke; starting a new one")
+                self._pool = None
+                future = self._executor().submit(render_to_file, fmt, view_type, payload, path)
+            self.stats["renders"] += 1
+            self._in_flight[key] = future
+        future.add_done_callback(lambda f: self._complete(key, f))
+        return path, future
+
+    def _complete(self, key: str, future: Future) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if future.exception() is not None:
+                self.stats["errors"] += 1
+                return
+        self._prune()
+
+    def _prune(self) -> None:
+        try:
+            entries = [e for e in os.scandir(self.cache_dir) if e.is_file() and not e.name.endswith(".part")]
+            if len(entries) <= self.max_files:
+                return
+            entries.sort(key=lambda e: e.stat().st_mtime)
+            for entry in entries[:len(entries) - self.max_files]:
+                os.unlink(entry.path)
+        except OSError:
+            logger.exception("Failed to prune report cache")
+
+    async def get_or_render(self, fmt: str, view_type: str, payload: Dict[str, Any]) -> str:
+        """Path of the artifact for this payload, rendering it if needed."""
+        path, future = self._lookup_or_submit(fmt, view_type, payload)
+        if future is not None:
+            await asyncio.wrap_future(future)
+        return path
+
+    def render_sync(self, fmt: str, view_type: str, payload: Dict[str, Any]) -> str:
+        path, future = self._lookup_or_submit(fmt, view_type, payload)
+        if future is not None:
+            future.result()
+        return path
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+report_renderer = ReportRenderer()
@@ -0,0 +1,292 @@
+"""Recurrence-aware schedule conflict detection.
+
+`GET /scheduling/tasks/conflicts` ran a raw overlap query against the stored
+`Schedule` rows, so a recurring series only ever conflicted through its first
+occurrence. This module keeps, per educator, a static interval tree of every event;
+cancelled ones are skipped by the conflict check and kept for the calendar
+(`app.services.calendar_view`), which is built on the same index:
+
+- one-off events are indexed as stored; recurring series are expanded with
+  `app.services.recurrence` over a window of `SCHEDULE_CONFLICT_LOOKBACK_DAYS`
+  (default 30) before and `SCHEDULE_CONFLICT_HORIZON_DAYS` (default 365)
+  after the build time
+- the tree is the occurrences sorted by start plus a max-end segment tree
+  over them: a query bisects on the candidate's end and only descends into
+  subtrees whose latest end passes the candidate's start, O(log n + k)
+- a candidate series is expanded the same way and each occurrence queried
+- queries outside the expanded window still see one-off events from the
+  tree and expand the recurring series for just that range
+
+Freshness:
+- trees of educators whose schedules were inserted, updated or deleted in
+  this process are dropped when the transaction commits
+  (`app.services.commit_hooks`)
+- writes from other processes are caught by a fingerprint query (count, max
+  id, max updated_at), run at most every `SCHEDULE_CONFLICT_REVALIDATE_SECONDS`
+  (default 30) per educator
+- trees are rebuilt once a day so the expansion window slides forward
+"""
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import logging
+import os
+import time
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.schedule import EventStatus, Schedule
+from app.services.commit_hooks import changed_values, flushed, on_commit
+from app.services.recurrence import naive_utc, occurrences, parse_pattern
+
+logger = logging.getLogger(__name__)
+
+LOOKBACK_DAYS = int(os.getenv("SCHEDULE_CONFLICT_LOOKBACK_DAYS", "30"))
+HORIZON_DAYS = int(os.getenv("SCHEDULE_CONFLICT_HORIZON_DAYS", "365"))
+REVALIDATE_SECONDS = float(os.getenv("SCHEDULE_CONFLICT_REVALIDATE_SECONDS", "30"))
+REBUILD_SECONDS = 24 * 3600
+DEFAULT_LIMIT = 50
+
+
+class ScheduleEvent:
+    __slots__ = ("id", "title", "event_type", "start", "end", "pattern", "until", "cancelled", "row")
+
+    def __init__(self, row: Any):
+        # The row is plain column values: the index outlives the session
+        self.row = row
+        self.id = row.id
+        self.title = row.title
+        self.event_type = row.event_type.value if row.event_type is not None else None
+        self.start = naive_utc(row.start_datetime)
+        self.end = naive_utc(row.end_datetime)
+        recurring = bool(row.is_recurring) and parse_pattern(row.recurrence_pattern) is not None
+        self.pattern = row.recurrence_pattern if recurring else None
+        self.until = row.recurrence_end_date if recurring else None
+        self.cancelled = row.status == EventStatus.CANCELLED
+
+    @property
+    def recurring(self) -> bool:
+        return self.pattern is not None
+
+    def occurrences(self, window_start: datetime, window_end: datetime) -> Iterable[Tuple[datetime, datetime]]:
+        return occurrences(self.start, self.end, self.pattern, self.until, window_start, window_end)
+
+
+class IntervalTree:
+    """Static interval tree over (start, end, payload) entries."""
+
+    def __init__(self, entries: List[Tuple[datetime, datetime, Any]]):
+        entries = sorted(entries, key=lambda entry: (entry[0], entry[1]))
+        self.starts = [entry[0] for entry in entries]
+        self.ends = [entry[1] for entry in entries]
+        self.payloads = [entry[2] for entry in entries]
+        # Segment tree of the latest end per range, leaves at [size, 2 * size)
+        self.size = 1
+        while self.size < len(entries):
+            self.size *= 2
+        self.max_end: List[Optional[datetime]] = [None] * (2 * self.size)
+        self.max_end[self.size:self.size + len(entries)] = self.ends
+        for node in range(self.size - 1, 0, -1):
+            left, right = self.max_end[2 * node], self.max_end[2 * node + 1]
+            self.max_end[node] = left if right is None or (left is not None and left >= right) else right
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def overlapping(self, start: datetime, end: datetime) -> List[int]:
+        """Positions of the entries with entry.start < end and entry.end > start."""
+        # Entries [0, bound) start before the candidate ends
+        bound = bisect_left(self.starts, end)
+        found: List[int] = []
+        stack = [(1, 0, self.size)]
+        while stack:
+            node, low, high = stack.pop()
+            if low >= bound or self.max_end[node] is None or self.max_end[node] <= start:
+                continue
+            if node >= self.size:
+                found.append(low)
+                continue
+            middle = (low + high) // 2
+            stack.append((2 * node + 1, middle, high))
+            stack.append((2 * node, low, middle))
+        return found
+
+
+class ScheduleIndex:
+    def __init__(self, events: List[ScheduleEvent], window_start: datetime, window_end: datetime):
+        self.events = {schedule_event.id: schedule_event for schedule_event in events}
+        self.recurring = [schedule_event for schedule_event in events if schedule_event.recurring]
+        self.window_start = window_start
+        self.window_end = window_end
+        entries = []
+        for schedule_event in events:
+            if schedule_event.recurring:
+                for occurrence_start, occurrence_end in schedule_event.occurrences(window_start, window_end):
+                    entries.append((occurrence_start, occurrence_end, schedule_event))
+            else:
+                entries.append((schedule_event.start, schedule_event.end, schedule_event))
+        self.tree = IntervalTree(entries)
+        self.version: Optional[str] = None
+        self.checked_at = 0.0
+        self.built_at = time.monotonic()
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        return start >= self.window_start and end <= self.window_end
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Tuple[ScheduleEvent, datetime, datetime]]:
+        """(event, occurrence start, occurrence end) of everything overlapping [start, end)."""
+        covered = self.covers(start, end)
+        found = []
+        for position in self.tree.overlapping(start, end):
+            schedule_event = self.tree.payloads[position]
+            if covered or not schedule_event.recurring:
+                found.append((schedule_event, self.tree.starts[position], self.tree.ends[position]))
+        if not covered:
+            # Outside the expanded window: expand the series for this range only
+            for schedule_event in self.recurring:
+                for occurrence_start, occurrence_end in schedule_event.occurrences(start, end):
+                    found.append((schedule_event, occurrence_start, occurrence_end))
+        return found
+
+    def starting(self, start: datetime, end: datetime) -> List[Tuple[ScheduleEvent, datetime, datetime]]:
+        """(event, occurrence start, occurrence end) of everything starting in [start, end)."""
+        # The tree's entries are sorted by start, so this is a slice; unlike
+        # `overlapping` it also finds zero-length events (deadlines, tasks)
+        covered = self.covers(start, end)
+        found = []
+        for position in range(bisect_left(self.tree.starts, start), bisect_left(self.tree.starts, end)):
+            schedule_event = self.tree.payloads[position]
+            if covered or not schedule_event.recurring:
+                found.append((schedule_event, self.tree.starts[position], self.tree.ends[position]))
+        if not covered:
+            for schedule_event in self.recurring:
+                for occurrence_start, occurrence_end in schedule_event.occurrences(start, end):
+                    if occurrence_start >= start:
+                        found.append((schedule_event, occurrence_start, occurrence_end))
+        return found
+
+
+_indexes: Dict[int, ScheduleIndex] = {}
+_lock = Lock()
+
+
+def _schedules(db: Session, educator_id: int):
+    return db.query(Schedule).filter(Schedule.educator_id == educator_id)
+
+
+def schedule_fingerprint(db: Session, educator_id: int) -> str:
+    count, max_id, max_updated = _schedules(db, educator_id).with_entities(
+        func.count(Schedule.id), func.max(Schedule.id), func.max(Schedule.updated_at)
+    ).one()
+    return f"{count}|{max_id}|{max_updated}"
+
+
+_COLUMNS = (
+    Schedule.id, Schedule.title, Schedule.description, Schedule.event_type, Schedule.status, Schedule.location,
+    Schedule.start_datetime, Schedule.end_datetime,
+    Schedule.is_recurring, Schedule.recurrence_pattern, Schedule.recurrence_end_date,
+)
+
+
+def _build(db: Session, educator_id: int) -> ScheduleIndex:
+    rows = _schedules(db, educator_id).with_entities(*_COLUMNS).all()
+    now = datetime.utcnow()
+    index = ScheduleIndex(
+        [ScheduleEvent(row) for row in rows],
+        now - timedelta(days=LOOKBACK_DAYS),
+        now + timedelta(days=HORIZON_DAYS),
+    )
+    index.version = schedule_fingerprint(db, educator_id)
+    index.checked_at = time.monotonic()
+    return index
+
+
+def get_index(db: Session, educator_id: int) -> ScheduleIndex:
+    """Return the conflict index of an educator's schedule."""
+    with _lock:
+        index = _indexes.get(educator_id)
+    now = time.monotonic()
+    if index is not None and now - index.built_at < REBUILD_SECONDS:
+        if now - index.checked_at < REVALIDATE_SECONDS:
+            return index
+        if schedule_fingerprint(db, educator_id) == index.version:
+            index.checked_at = now
+            return index
+        logger.debug("Schedule conflict index for educator %s is stale, rebuilding", educator_id)
+    index = _build(db, educator_id)
+    with _lock:
+        _indexes[educator_id] = index
+    return index
+
+
+def invalidate(educator_id: Optional[int] = None) -> None:
+    """Drop one educator's index, or all if None."""
+    with _lock:
+        if educator_id is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(educator_id, None)
+
+
+def find_conflicts(
+    db: Session,
+    educator_id: int,
+    start: datetime,
+    end: datetime,
+    recurrence_pattern: Optional[str] = None,
+    recurrence_end: Optional[datetime] = None,
+    exclude_id: Optional[int] = None,
+    limit: int = DEFAULT_LIMIT,
+) -> List[Dict[str, Any]]:
+    """Existing occurrences overlapping a candidate event or series.
+
+    With a supported `recurrence_pattern` every occurrence of the candidate
+    series is checked, up to `recurrence_end` or the end of the expansion
+    horizon. `exclude_id` skips an event being rescheduled. Each conflict is
+    one occurrence of an existing event, earliest first, at most `limit`.
+    """
+    start, end = naive_utc(start), naive_utc(end)
+    index = get_index(db, educator_id)
+    if parse_pattern(recurrence_pattern) is not None:
+        candidates = occurrences(
+            start, end, recurrence_pattern, recurrence_end,
+            window_end=None if recurrence_end is not None else index.window_end,
+        )
+    else:
+        candidates = [(start, end)]
+
+    conflicts: Dict[Tuple[int, datetime], Dict[str, Any]] = {}
+    for candidate_start, candidate_end in candidates:
+        for schedule_event, occurrence_start, occurrence_end in index.overlapping(candidate_start, candidate_end):
+            key = (schedule_event.id, occurrence_start)
+            if schedule_event.cancelled or schedule_event.id == exclude_id or key in conflicts:
+                continue
+            conflicts[key] = {
+                "id": schedule_event.id,
+                "title": schedule_event.title,
+                "start": occurrence_start.isoformat(),
+                "end": occurrence_end.isoformat(),
+                "type": schedule_event.event_type,
+                "recurring": schedule_event.recurring,
+                "candidate_start": candidate_start.isoformat(),
+            }
+        if len(conflicts) >= limit:
+            break
+    return sorted(conflicts.values(), key=lambda conflict: (conflict["start"], conflict["id"]))[:limit]
+
+
+def _changed_educators(session: Session) -> Iterable[int]:
+    for obj in flushed(session):
+        if isinstance(obj, Schedule):
+            # Both the current and the pre-flush owner, so a reassigned event is dropped too
+            yield from changed_values(obj, "educator_id")
+
+
+def _invalidate_committed(session: Session, educator_ids: List[int]) -> None:
+    for educator_id in set(educator_ids):
+        invalidate(educator_id)
+
+
+on_commit("schedule_conflicts_changed", _changed_educators, _invalidate_committed, active=lambda: bool(_indexes))
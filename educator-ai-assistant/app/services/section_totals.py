@@ -0,0 +1,181 @@
+"""Cached per-section grade totals for the teacher dashboard overview.
+
+`GET /teacher-dashboard/dashboard` queried every student's grades and then
+the subject of every grade, one query per grade row. Totals are now computed
+per section from one students query and one grades-with-subject join for
+all the sections that are not cached, and kept per section:
+
+- student count, passed count (`student_passed` on the student's average
+  percentage), the sum and count of student averages, and the per-subject
+  (sum, count) of marks
+- entries live for `SECTION_TOTALS_TTL_SECONDS` (default 60), which bounds
+  staleness from writes in other processes and bulk SQL updates
+- sections touched by Grade, Student, Subject and Section changes in this
+  process are dropped when the transaction commits
+  (`app.services.commit_hooks`)
+
+A warm overview costs the sections query alone, whatever the grade count.
+"""
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+import os
+import time
+
+from sqlalchemy.orm import Session
+
+from app.models.student import Grade, Section, Student, Subject
+from app.services.commit_hooks import changed_values, flushed, on_commit
+from app.services.grade_pipeline import student_passed
+
+logger = logging.getLogger(__name__)
+
+TTL_SECONDS = float(os.getenv("SECTION_TOTALS_TTL_SECONDS", "60"))
+
+
+class SectionTotals:
+    __slots__ = ("section_id", "student_count", "passed", "average_sum", "average_count",
+                 "subject_totals", "student_ids", "subject_ids", "expires_at")
+
+    def __init__(self, section_id: int):
+        self.section_id = section_id
+        self.student_count = 0
+        self.passed = 0
+        self.average_sum = 0.0
+        self.average_count = 0
+        # subject name -> [sum of marks, number of grades], in first-seen order
+        self.subject_totals: Dict[str, List[float]] = {}
+        self.student_ids: Set[int] = set()
+        self.subject_ids: Set[int] = set()
+        self.expires_at = 0.0
+
+    @property
+    def average(self) -> float:
+        return self.average_sum / self.average_count if self.average_count else 0
+
+    def subject_averages(self) -> Dict[str, float]:
+        return {name: total / count for name, (total, count) in self.subject_totals.items()}
+
+
+def _compute(db: Session, section_ids: List[int]) -> Dict[int, SectionTotals]:
+    totals = {section_id: SectionTotals(section_id) for section_id in section_ids}
+    student_section: Dict[int, int] = {}
+    for student_id, section_id in (
+        db.query(Student.id, Student.section_id).filter(Student.section_id.in_(section_ids)).order_by(Student.id)
+    ):
+        student_section[student_id] = section_id
+        totals[section_id].student_ids.add(student_id)
+        totals[section_id].student_count += 1
+
+    # student id -> [sum, count] of grade percentages
+    student_percentages: Dict[int, List[float]] = {}
+    rows = (
+        db.query(Grade.student_id, Grade.marks_obtained, Grade.percentage, Grade.subject_id, Subject.name)
+        .join(Student, Student.id == Grade.student_id)
+        # Grades of a deleted subject still count towards the student average
+        .outerjoin(Subject, Subject.id == Grade.subject_id)
+        .filter(Student.section_id.in_(section_ids))
+        .order_by(Grade.student_id, Grade.id)
+    )
+    for student_id, marks, percentage, subject_id, subject_name in rows:
+        percentage_total = student_percentages.setdefault(student_id, [0.0, 0])
+        percentage_total[0] += percentage or 0.0
+        percentage_total[1] += 1
+        if subject_name is not None:
+            section = totals[student_section[student_id]]
+            section.subject_ids.add(subject_id)
+            subject_total = section.subject_totals.setdefault(subject_name, [0.0, 0])
+            subject_total[0] += marks
+            subject_total[1] += 1
+
+    for student_id, (total, count) in student_percentages.items():
+        section = totals[student_section[student_id]]
+        average = total / count
+        section.average_sum += average
+        section.average_count += 1
+        if student_passed(average):
+            section.passed += 1
+    return totals
+
+
+class SectionTotalsCache:
+    def __init__(self, ttl: float = TTL_SECONDS):
+        self.ttl = ttl
+        self._entries: Dict[int, SectionTotals] = {}
+        self._lock = Lock()
+
+    def get_many(self, db: Session, section_ids: Iterable[int]) -> Dict[int, SectionTotals]:
+        """Totals of the given sections, computing the missing ones in two queries."""
+        section_ids = list(section_ids)
+        now = time.monotonic()
+        with self._lock:
+            found = {
+                section_id: self._entries[section_id]
+                for section_id in section_ids
+                if section_id in self._entries and self._entries[section_id].expires_at > now
+            }
+        missing = [section_id for section_id in section_ids if section_id not in found]
+        if missing:
+            computed = _compute(db, missing)
+            expires_at = time.monotonic() + self.ttl
+            with self._lock:
+                for section_id, totals in computed.items():
+                    totals.expires_at = expires_at
+                    if self.ttl > 0:
+                        self._entries[section_id] = totals
+            found.update(computed)
+        return found
+
+    def invalidate_sections(self, section_ids: Iterable[int]) -> None:
+        with self._lock:
+            for section_id in section_ids:
+                self._entries.pop(section_id, None)
+
+    def sections_of(self, student_ids: Set[int] = frozenset(), subject_ids: Set[int] = frozenset()) -> Set[int]:
+        """Cached sections containing any of the students or graded subjects."""
+        with self._lock:
+            return {
+                section_id for section_id, totals in self._entries.items()
+                if totals.student_ids & student_ids or totals.subject_ids & subject_ids
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+section_totals = SectionTotalsCache()
+
+
+def get_section_totals(db: Session, section_ids: Iterable[int]) -> Dict[int, SectionTotals]:
+    return section_totals.get_many(db, section_ids)
+
+
+def _changed_scopes(session: Session) -> Iterable[Tuple[str, int]]:
+    for obj in flushed(session):
+        if isinstance(obj, Grade):
+            yield from (("student", student_id) for student_id in changed_values(obj, "student_id"))
+        elif isinstance(obj, Student):
+            # Current and pre-flush sections, so a moved student drops both
+            yield from (("section", section_id) for section_id in changed_values(obj, "section_id"))
+            if obj.id is not None:
+                yield "student", obj.id
+        elif isinstance(obj, Subject):
+            # A renamed subject changes the keys of every section that graded it
+            yield "subject", obj.id
+            yield from (("section", section_id) for section_id in changed_values(obj, "section_id"))
+        elif isinstance(obj, Section):
+            yield "section", obj.id
+
+
+def _invalidate_committed(session: Session, scopes: List[Tuple[str, int]]) -> None:
+    sections = {scope_id for kind, scope_id in scopes if kind == "section"}
+    students = {scope_id for kind, scope_id in scopes if kind == "student"}
+    subjects = {scope_id for kind, scope_id in scopes if kind == "subject"}
+    section_totals.invalidate_sections(sections | section_totals.sections_of(students, subjects))
+
+
+on_commit("section_totals_changed", _changed_scopes, _invalidate_committed, active=lambda: bool(len(section_totals)))
@@ -0,0 +1,286 @@
+"""
+Pooled, concurrent SMTP delivery engine.
+
+`EmailService.send_email` used to open a new SMTP connection, run STARTTLS
+and log in for every message, and bulk sends looped over it serially.
+This engine keeps a pool of authenticated `aiosmtplib` connections and
+reuses each one for many messages. It sends with a bounded number of
+messages in flight, throttles per recipient domain and retries transient
+failures with exponential backoff.
+
+The engine runs on its own event loop in a daemon thread. The pool
+therefore outlives individual requests, and both sync code (`call`) and
+async code (`call_async`) can use it.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from email.message import Message
+from typing import Any, Awaitable, Dict, List, Optional, Sequence, Tuple
+
+import aiosmtplib
+
+logger = logging.getLogger(__name__)
+
+# Errors after which the connection is dropped and the message retried
+CONNECTION_ERRORS = (
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPConnectError,
+    aiosmtplib.SMTPTimeoutError,
+    asyncio.TimeoutError,
+    ConnectionError,
+    OSError,
+)
+
+
+class _PooledConnection:
+    def __init__(self, client: aiosmtplib.SMTP):
+        self.client = client
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """Bounded pool of connected (and logged-in) SMTP clients."""
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        size: int = 4,
+        max_messages_per_connection: int = 100,
+        idle_timeout: float = 60.0,
+        timeout: float = 30.0,
+        start_tls: Optional[bool] = True,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.max_messages_per_connection = max_messages_per_connection
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.start_tls = start_tls
+        self._idle: List[_PooledConnection] = []
+        self._slots = asyncio.Semaphore(size)
+        self.connections_opened = 0
+
+    async def _open(self) -> _PooledConnection:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            timeout=self.timeout,
+            start_tls=self.start_tls,
+        )
+        await client.connect()
+        if self.username and self.password:
+            await client.login(self.username, self.password)
+        self.connections_opened += 1
+        return _PooledConnection(client)
+
+    async def _is_usable(self, conn: _PooledConnection) -> bool:
+        if not conn.client.is_connected:
+            return False
+        if time.monotonic() - conn.last_used < self.idle_timeout:
+            return True
+        # Servers drop idle sessions; probe before reusing a stale one
+        try:
+            await conn.client.noop()
+            return True
+        except Exception:
+            return False
+
+    async def acquire(self) -> _PooledConnection:
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                conn = self._idle.pop()
+                if await self._is_usable(conn):
+                    return conn
+                await self._close(conn)
+            return await self._open()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, conn: _PooledConnection, discard: bool = False) -> None:
+        try:
+            conn.last_used = time.monotonic()
+            if discard or conn.messages_sent >= self.max_messages_per_connection:
+                await self._close(conn)
+            else:
+                self._idle.append(conn)
+        finally:
+            self._slots.release()
+
+    async def _close(self, conn: _PooledConnection) -> None:
+        try:
+            if conn.client.is_connected:
+                await conn.client.quit()
+        except Exception:
+            conn.client.close()
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            await self._close(conn)
+
+
+class DomainRateLimiter:
+    """Per-domain rate limit (messages per second) with a burst allowance.
+
+    Reservations are taken without awaiting, so concurrent senders on the
+    same loop are spaced out correctly.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._next: Dict[str, float] = {}
+
+    async def wait(self, domain: str) -> None:
+        if self.rate <= 0:
+            return
+        interval = 1.0 / self.rate
+        now = time.monotonic()
+        theoretical = max(self._next.get(domain, now), now)
+        self._next[domain] = theoretical + interval
+        delay = theoretical - now - (self.burst - 1) * interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def recipient_domain(address: str) -> str:
+    return address.rsplit("@", 1)[-1].strip().lower() if "@" in address else ""
+
+
+class SMTPDeliveryEngine:
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        pool_size: int = 4,
+        max_in_flight: int = 8,
+        max_messages_per_connection: int = 100,
+        domain_rate_limit: float = 5.0,
+        domain_burst: int = 10,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        timeout: float = 30.0,
+        start_tls: Optional[bool] = True,
+    ):
+        self.pool_size = pool_size
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self._pool_args = dict(
+            hostname=hostname,
+            port=port,
+            username=username,
+            password=password,
+            size=pool_size,
+            max_messages_per_connection=max_messages_per_connection,
+            timeout=timeout,
+            start_tls=start_tls,
+        )
+        self._rate_args = (domain_rate_limit, domain_burst)
+        self._pool: Optional[SMTPConnectionPool] = None
+        self._limiter: Optional[DomainRateLimiter] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    # -- event loop bridge -------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="smtp-delivery", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def call(self, coro: Awaitable[Any]) -> Any:
+        """Run an engine coroutine from sync code and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result()
+
+    async def call_async(self, coro: Awaitable[Any]) -> Any:
+        """Run an engine coroutine from another event loop."""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()))
+
+    def close(self) -> None:
+        if self._loop is None:
+            return
+        if self._pool is not None:
+            self.call(self._pool.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop = self._thread = None
+        self._pool = self._limiter = None
+
+    # -- delivery (runs on the engine loop) --------------------------------
+
+    def _components(self) -> Tuple[SMTPConnectionPool, DomainRateLimiter]:
+        if self._pool is None:
+            self._pool = SMTPConnectionPool(**self._pool_args)
+            self._limiter = DomainRateLimiter(*self._rate_args)
+        return self._pool, self._limiter
+
+    def _is_transient(self, error: Exception) -> bool:
+        if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+            # Greylisting and mailbox-busy replies are 4xx; retry only if all were
+            return bool(error.recipients) and all(400 <= r.code < 500 for r in error.recipients)
+        if isinstance(error, aiosmtplib.SMTPResponseException):
+            return 400 <= error.code < 500
+        return isinstance(error, CONNECTION_ERRORS)
+
+    async def send(self, message: Message, recipients: Sequence[str]) -> Dict[str, Any]:
+        """Deliver one message, retrying transient failures with backoff."""
+        pool, limiter = self._components()
+        for domain in sorted({recipient_domain(r) for r in recipients}):
+            await limiter.wait(domain)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            conn = None
+            try:
+                conn = await pool.acquire()
+                errors, _ = await conn.client.send_message(message, recipients=list(recipients))
+                conn.messages_sent += 1
+                await pool.release(conn)
+                return {"success": True, "attempts": attempt, "refused": {k: str(v) for k, v in errors.items()}}
+            except Exception as e:
+                if conn is not None:
+                    # Keep the session unless the connection itself broke
+                    await pool.release(conn, discard=isinstance(e, CONNECTION_ERRORS))
+                if attempt > self.max_retries or not self._is_transient(e):
+                    return {"success": False, "attempts": attempt, "error": str(e)}
+                delay = self.backoff_base * (2 ** (attempt - 1)) + random.uniform(0, self.backoff_base)
+                logger.warning("Transient SMTP error (attempt %s), retrying in %.2fs: %s", attempt, delay, e)
+                await asyncio.sleep(delay)
+
+    async def send_many(self, items: Sequence[Tuple[Message, Sequence[str]]]) -> List[Dict[str, Any]]:
+        """Deliver many messages with at most `max_in_flight` outstanding."""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        next_index = 0
+
+        async def worker():
+            nonlocal next_index
+            while next_index < len(items):
+                index = next_index
+                next_index += 1
+                message, recipients = items[index]
+                results[index] = await self.send(message, recipients)
+
+        await asyncio.gather(*(worker() for _ in range(min(self.max_in_flight, len(items)))))
+        return results
@@ -0,0 +1,136 @@
+"""Query planning for the filtered section-students grid.
+
+`GET /sections/{id}/students/filtered` used to run one joined `Grade`
+query per student and evaluate `pass_status` and `subject_filter` in
+Python. This module turns the same filters into SQL predicates so a page
+of students costs a constant number of queries:
+
+1. students of the section, filtered by search / pass status / subject
+   threshold, ordered by id with keyset pagination
+2. all grades (with subjects) for the students on that page
+
+Filter semantics match the previous implementation: students without
+grades are never excluded by `pass_status` or `subject_filter`, and a
+subject threshold is checked against the student's latest grade in that
+subject. Overall pass/fail is the shared `student_passed` rule on the mean
+grade percentage.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session, contains_eager
+
+from app.models.student import Student, Subject, Grade
+from app.services.grade_pipeline import STUDENT_PASS_THRESHOLD
+
+
+def parse_subject_filter(subject_filter: Optional[str]) -> Optional[Tuple[str, str, float]]:
+    """Parse filters such as "Math<40" or "Science>=80".
+
+    Returns (subject_name, operator, threshold), or None when the filter is
+    empty or malformed (malformed filters are ignored, as before).
+    """
+    if not subject_filter:
+        return None
+    try:
+        for op in ("<", ">=", ">"):
+            if op in subject_filter:
+                subject_name, threshold = subject_filter.split(op)
+                return subject_name.strip(), op, float(threshold)
+    except (ValueError, IndexError):
+        return None
+    return None
+
+
+def filtered_students(
+    db: Session,
+    section_id: int,
+    pass_status: Optional[str] = None,
+    subject_filter: Optional[str] = None,
+    search: Optional[str] = None,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> Tuple[List[Student], Optional[int]]:
+    """Return one page of matching students and the cursor for the next page.
+
+    The cursor is the last student id on the page when more rows follow,
+    otherwise None.
+    """
+    section_students = select(Student.id).where(Student.section_id == section_id)
+
+    query = db.query(Student).filter(Student.section_id == section_id)
+
+    if search:
+        query = query.filter(
+            (Student.first_name.ilike(f"%{search}%")) |
+            (Student.last_name.ilike(f"%{search}%"))
+        )
+
+    if pass_status in ("passed", "failed"):
+        stats = (
+            select(
+                Grade.student_id.label("student_id"),
+                func.count(Grade.id).label("total"),
+                func.avg(func.coalesce(Grade.percentage, 0.0)).label("average"),
+            )
+            .join(Subject, Subject.id == Grade.subject_id)
+            .where(Grade.student_id.in_(section_students))
+            .group_by(Grade.student_id)
+            .subquery()
+        )
+        query = query.outerjoin(stats, stats.c.student_id == Student.id)
+        total = func.coalesce(stats.c.total, 0)
+        if pass_status == "passed":
+            query = query.filter(or_(total == 0, stats.c.average >= STUDENT_PASS_THRESHOLD))
+        else:
+            query = query.filter(or_(total == 0, stats.c.average < STUDENT_PASS_THRESHOLD))
+
+    parsed = parse_subject_filter(subject_filter)
+    if parsed:
+        subject_name, op, threshold = parsed
+        latest = (
+            select(func.max(Grade.id))
+            .join(Subject, Subject.id == Grade.subject_id)
+            .where(Subject.name == subject_name, Grade.student_id.in_(section_students))
+            .group_by(Grade.student_id)
+        )
+        # Predicates that exclude a student, mirroring the old Python checks
+        if op == "<":
+            excluded = Grade.percentage >= threshold
+        elif op == ">=":
+            excluded = Grade.percentage < threshold
+        else:
+            excluded = Grade.percentage <= threshold
+        violating = select(Grade.student_id).where(Grade.id.in_(latest), excluded)
+        query = query.filter(Student.id.notin_(violating))
+
+    if after_id is not None:
+        query = query.filter(Student.id > after_id)
+    query = query.order_by(Student.id)
+
+    if limit:
+        students = query.limit(limit + 1).all()
+        if len(students) > limit:
+            students = students[:limit]
+            return students, students[-1].id
+        return students, None
+    return query.all(), None
+
+
+def grades_by_student(db: Session, student_ids: List[int]) -> Dict[int, List[Grade]]:
+    """Load grades (with subjects) for many students in one query."""
+    if not student_ids:
+        return {}
+
+    grades = (
+        db.query(Grade)
+        .join(Grade.subject)
+        .options(contains_eager(Grade.subject))
+        .filter(Grade.student_id.in_(student_ids))
+        .order_by(Grade.student_id, Grade.id)
+        .all()
+    )
+    result: Dict[int, List[Grade]] = {}
+    for grade in grades:
+        result.setdefault(grade.student_id, []).append(grade)
+    return result
@@ -0,0 +1,308 @@
+"""In-memory student name index, one per educator.
+
+Chatbot name resolution used to download the full student list on every
+lookup and scan it linearly (exact, substring, then `difflib` over every
+name). This module keeps, per educator, the students of that educator's
+sections indexed by normalized name and by padded character trigrams:
+
+- exact lookups are a dict hit on the normalized name
+- substring and fuzzy lookups only score students that share trigrams with
+  the query, so the cost depends on the number of plausible matches, not on
+  the roster size
+
+Freshness:
+- committed `Student` inserts, updates and deletes in this process are
+  applied to loaded indexes incrementally (`app.services.commit_hooks`);
+  any `Section` change drops the loaded indexes so they rebuild lazily
+- writes from other processes are caught by a cheap fingerprint query
+  (count, max id, max updated_at of the roster), run at most every
+  `STUDENT_INDEX_REVALIDATE_SECONDS` (default 30) per educator
+"""
+from threading import Lock, RLock
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import difflib
+import logging
+import os
+import re
+import time
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.student import Section, Student
+from app.services.commit_hooks import on_commit
+
+logger = logging.getLogger(__name__)
+
+REVALIDATE_SECONDS = float(os.getenv("STUDENT_INDEX_REVALIDATE_SECONDS", "30"))
+# Upper bounds of trigram-ranked candidates returned for matching and
+# given a full similarity score when ranking
+MAX_SCORED_CANDIDATES = 200
+MAX_RANKED_CANDIDATES = 50
+
+
+def normalize_name(s: Optional[str]) -> str:
+    """Normalize a name for comparison: lower, remove punctuation, collapse spaces."""
+    if not s:
+        return ""
+    # remove common punctuation, keep letters and spaces
+    cleaned = re.sub(r"[^0-9A-Za-z\s]", "", s)
+    cleaned = re.sub(r"\s+", " ", cleaned).strip().lower()
+    return cleaned
+
+
+def trigrams(normalized: str) -> Set[str]:
+    """Padded character trigrams of each token (pg_trgm style)."""
+    grams = set()
+    for token in normalized.split():
+        padded = f"  {token} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+class StudentEntry:
+    __slots__ = ("id", "name", "normalized", "section_id", "section_name", "grams")
+
+    def __init__(self, student_id: int, name: str, section_id: Optional[int], section_name: Optional[str]):
+        self.id = student_id
+        self.name = name
+        self.normalized = normalize_name(name)
+        self.section_id = section_id
+        self.section_name = section_name or "Unknown"
+        self.grams = trigrams(self.normalized)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "name": self.name, "section_name": self.section_name}
+
+
+class StudentNameIndex:
+    def __init__(self, section_names: Dict[int, str]):
+        self.section_names = dict(section_names)
+        self.entries: Dict[int, StudentEntry] = {}
+        self._by_name: Dict[str, Set[int]] = {}
+        self._by_gram: Dict[str, Set[int]] = {}
+        self.version: Optional[str] = None
+        self.checked_at = 0.0
+        self.lock = RLock()
+
+    def covers_section(self, section_id: Optional[int]) -> bool:
+        return section_id in self.section_names
+
+    def add(self, student_id: int, name: str, section_id: Optional[int]) -> None:
+        with self.lock:
+            self._add(student_id, name, section_id)
+
+    def remove(self, student_id: int) -> bool:
+        with self.lock:
+            return self._remove(student_id)
+
+    def _add(self, student_id: int, name: str, section_id: Optional[int]) -> None:
+        self._remove(student_id)
+        entry = StudentEntry(student_id, name, section_id, self.section_names.get(section_id))
+        self.entries[student_id] = entry
+        self._by_name.setdefault(entry.normalized, set()).add(student_id)
+        for gram in entry.grams:
+            self._by_gram.setdefault(gram, set()).add(student_id)
+
+    def _remove(self, student_id: int) -> bool:
+        entry = self.entries.pop(student_id, None)
+        if entry is None:
+            return False
+        ids = self._by_name.get(entry.normalized)
+        if ids is not None:
+            ids.discard(student_id)
+            if not ids:
+                del self._by_name[entry.normalized]
+        for gram in entry.grams:
+            ids = self._by_gram.get(gram)
+            if ids is not None:
+                ids.discard(student_id)
+                if not ids:
+                    del self._by_gram[gram]
+        return True
+
+    def _ordered(self, ids) -> List[StudentEntry]:
+        return [self.entries[i] for i in sorted(ids)]
+
+    def exact(self, query: str) -> List[StudentEntry]:
+        with self.lock:
+            return self._ordered(self._by_name.get(normalize_name(query), ()))
+
+    def candidates(self, query: str, limit: int = MAX_SCORED_CANDIDATES) -> List[StudentEntry]:
+        """Students sharing trigrams with the query, most shared first."""
+        counts: Dict[int, int] = {}
+        with self.lock:
+            for gram in trigrams(normalize_name(query)):
+                for student_id in self._by_gram.get(gram, ()):
+                    counts[student_id] = counts.get(student_id, 0) + 1
+            ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+            return [self.entries[student_id] for student_id, _ in ranked]
+
+    def containing(self, query: str) -> List[StudentEntry]:
+        """Students whose normalized name contains the normalized query."""
+        normalized = normalize_name(query)
+        if not normalized:
+            return []
+        # Unpadded trigrams of the query tokens occur in any name containing it
+        required = {token[i:i + 3] for token in normalized.split() for i in range(len(token) - 2)}
+        with self.lock:
+            if not required:
+                # Queries too short for trigrams: scan the roster
+                return [entry for entry in self._ordered(self.entries) if normalized in entry.normalized]
+            pool = None
+            for gram in sorted(required, key=lambda g: len(self._by_gram.get(g, ()))):
+                ids = self._by_gram.get(gram, set())
+                pool = set(ids) if pool is None else pool & ids
+                if not pool:
+                    return []
+            return [entry for entry in self._ordered(pool) if normalized in entry.normalized]
+
+    def ranked(self, query: str, limit: int = 5, cutoff: float = 0.0) -> List[Tuple[float, StudentEntry]]:
+        """Best matches as (score, entry), score in [0, 1], highest first."""
+        normalized = normalize_name(query)
+        if not normalized:
+            return []
+        matcher = difflib.SequenceMatcher()
+        # The query is seq2 so difflib caches its analysis across candidates
+        matcher.set_seq2(normalized)
+        scored = []
+        for entry in self.candidates(query, limit=MAX_RANKED_CANDIDATES):
+            if entry.normalized == normalized:
+                score = 1.0
+            elif normalized in entry.normalized:
+                score = 0.9
+            else:
+                matcher.set_seq1(entry.normalized)
+                if matcher.real_quick_ratio() < cutoff or matcher.quick_ratio() < cutoff:
+                    continue
+                score = matcher.ratio()
+            if score >= cutoff:
+                scored.append((score, entry))
+        scored.sort(key=lambda item: (-item[0], item[1].id))
+        return scored[:limit]
+
+
+_indexes: Dict[Optional[int], StudentNameIndex] = {}
+_lock = Lock()
+
+
+def _roster_sections(db: Session, educator_id: Optional[int]) -> Dict[int, str]:
+    query = db.query(Section.id, Section.name)
+    if educator_id is not None:
+        query = query.filter(Section.educator_id == educator_id)
+    return {section_id: name for section_id, name in query.all()}
+
+
+def _fingerprint(db: Session, section_ids: List[int]) -> str:
+    if not section_ids:
+        return "empty"
+    count, max_id, max_updated = (
+        db.query(func.count(Student.id), func.max(Student.id), func.max(Student.updated_at))
+        .filter(Student.section_id.in_(section_ids))
+        .one()
+    )
+    return f"{len(section_ids)}|{count}|{max_id}|{max_updated}"
+
+
+def _build(db: Session, educator_id: Optional[int]) -> StudentNameIndex:
+    index = StudentNameIndex(_roster_sections(db, educator_id))
+    if index.section_names:
+        rows = (
+            db.query(Student.id, Student.first_name, Student.last_name, Student.section_id)
+            .filter(Student.section_id.in_(list(index.section_names)))
+            .all()
+        )
+        for student_id, first, last, section_id in rows:
+            index.add(student_id, f"{first} {last}", section_id)
+    index.version = _fingerprint(db, list(index.section_names))
+    index.checked_at = time.monotonic()
+    return index
+
+
+def get_index(db: Session, educator_id: Optional[int]) -> StudentNameIndex:
+    """Return the name index for an educator's roster (all students if None)."""
+    with _lock:
+        index = _indexes.get(educator_id)
+    now = time.monotonic()
+    if index is not None and now - index.checked_at < REVALIDATE_SECONDS:
+        return index
+    if index is not None:
+        current = _fingerprint(db, list(_roster_sections(db, educator_id)))
+        if current == index.version:
+            index.checked_at = now
+            return index
+        logger.debug("Student name index for educator %s is stale, rebuilding", educator_id)
+    index = _build(db, educator_id)
+    with _lock:
+        _indexes[educator_id] = index
+    return index
+
+
+def invalidate(educator_id: Optional[int] = None) -> None:
+    """Drop one educator's index (and the all-students index), or all if None."""
+    with _lock:
+        if educator_id is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(educator_id, None)
+            _indexes.pop(None, None)
+
+
+def apply_changes(changes: List[Tuple[str, int, Optional[str], Optional[int]]]) -> List[Optional[int]]:
+    """Apply committed student changes: (op, student_id, name, section_id).
+
+    Returns the keys of the indexes that were modified.
+    """
+    with _lock:
+        indexes = list(_indexes.items())
+    touched = set()
+    for op, student_id, name, section_id in changes:
+        for key, index in indexes:
+            if op == "upsert" and index.covers_section(section_id):
+                index.add(student_id, name, section_id)
+                touched.add(key)
+            elif index.remove(student_id):
+                touched.add(key)
+    return list(touched)
+
+
+def _restamp(session: Session, keys: List[Optional[int]]) -> None:
+    # Record the post-commit fingerprint so the next revalidation does not
+    # mistake our own (already applied) writes for a foreign change
+    reader = Session(bind=session.get_bind())
+    try:
+        for key in keys:
+            with _lock:
+                index = _indexes.get(key)
+            if index is not None:
+                index.version = _fingerprint(reader, list(index.section_names))
+    finally:
+        reader.close()
+
+
+def _student_changes(session: Session) -> Iterable[Tuple[str, Optional[int], Optional[str], Optional[int]]]:
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Student):
+            yield "upsert", obj.id, f"{obj.first_name} {obj.last_name}", obj.section_id
+        elif isinstance(obj, Section):
+            yield "sections", None, None, None
+    for obj in session.deleted:
+        if isinstance(obj, Student):
+            yield "delete", obj.id, None, None
+        elif isinstance(obj, Section):
+            yield "sections", None, None, None
+
+
+def _apply_committed(session: Session, changes: List[Tuple[str, Optional[int], Optional[str], Optional[int]]]) -> None:
+    try:
+        if any(op == "sections" for op, _, _, _ in changes):
+            # Section renames or reassignments affect whole rosters; rebuild lazily
+            invalidate()
+        else:
+            _restamp(session, apply_changes(changes))
+    except Exception:
+        logger.exception("Failed to update student name index")
+
+
+on_commit("student_name_index_changes", _student_changes, _apply_committed, active=lambda: bool(_indexes))
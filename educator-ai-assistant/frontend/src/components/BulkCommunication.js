@@ -6,6 +6,8 @@ import {
 import toast from 'react-hot-toast';
 import { bulkCommunication } from '../services/api';
 
+const JOB_POLL_INTERVAL_MS = 1000;
+
 const BulkCommunication = ({ initialSelectedStudents = [], onSelectedStudentsChange = () => {} }) => {
   // State Management
   const [activeMode, setActiveMode] = useState('compose'); // compose, history, templates
@@ -14,6 +16,7 @@ const BulkCommunication = ({ initialSelectedStudents = [], onSelectedStudentsCha
   const [emailTemplates, setEmailTemplates] = useState([]);
   const [sentHistory, setSentHistory] = useState([]);
   const [loading, setLoading] = useState(false);
+  const [jobProgress, setJobProgress] = useState(null);
 
   // Form State
   const [bulkEmailForm, setBulkEmailForm] = useState({
@@ -221,20 +224,30 @@ const BulkCommunication = ({ initialSelectedStudents = [], onSelectedStudentsCha
       }
 
       const response = await bulkCommunication.sendBulkEmail(requestData);
+      toast.success(response.data.message);
+      
+      // The send runs as a background job; poll its progress until it finishes
+      let job = response.data;
+      while (job.status !== 'completed' && job.status !== 'failed') {
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+        job = (await bulkCommunication.getBulkEmailJob(job.job_id)).data;
+        setJobProgress(job.progress_percentage);
+      }
       
-      if (response.data.success) {
-        toast.success(response.data.message);
-        setPreviewData(response.data);
-        setPreviewMode(true);
-        loadSentHistory(); // Refresh history
+      if (job.status === 'completed') {
+        toast.success(`Bulk messages sent: ${job.notifications_created} notifications created`);
       } else {
-        toast.error('Failed to send bulk emails');
+        toast.error('Bulk send failed: ' + (job.error || 'unknown error'));
       }
+      setPreviewData(job);
+      setPreviewMode(true);
+      loadSentHistory(); // Refresh history
     } catch (error) {
       console.error('Error sending bulk emails:', error);
       toast.error('Failed to send bulk emails: ' + (error.response?.data?.detail || error.message));
     } finally {
       setLoading(false);
+      setJobProgress(null);
     }
   };
 
@@ -444,7 +457,7 @@ const BulkCommunication = ({ initialSelectedStudents = [], onSelectedStudentsCha
           {loading ? (
             <>
               <div className="animate-spin rounded-full h-4 w-4 border-b-2 border-white mr-2"></div>
-              Sending...
+              Sending...{jobProgress !== null && ` ${jobProgress}%`}
             </>
           ) : (
             <>
@@ -531,11 +544,11 @@ const BulkCommunication = ({ initialSelectedStudents = [], onSelectedStudentsCha
             {/* Summary Stats */}
             <div className="grid grid-cols-1 md:grid-cols-3 gap-4 mb-6">
               <div className="bg-green-50 p-4 rounded-lg">
-                <div className="text-2xl font-bold text-green-600">{previewData.emails_sent}</div>
-                <div className="text-sm text-green-700">Emails Sent</div>
+                <div className="text-2xl font-bold text-green-600">{previewData.succeeded}</div>
+                <div className="text-sm text-green-700">Students Reached</div>
               </div>
               <div className="bg-red-50 p-4 rounded-lg">
-                <div className="text-2xl font-bold text-red-600">{previewData.emails_failed}</div>
+                <div className="text-2xl font-bold text-red-600">{previewData.failed}</div>
                 <div className="text-sm text-red-700">Failed</div>
               </div>
               <div className="bg-blue-50 p-4 rounded-lg">
@@ -544,51 +557,30 @@ const BulkCommunication = ({ initialSelectedStudents = [], onSelectedStudentsCha
               </div>
             </div>
 
-            {/* Email Results */}
-            <div className="space-y-4">
-              <h3 className="font-semibold">Email Delivery Results:</h3>
-              <div className="max-h-60 overflow-y-auto">
-                {previewData.email_results?.map((result, index) => (
-                  <div key={index} className="flex items-center justify-between p-3 border rounded">
-                    <div>
-                      <div className="font-medium">{result.student_name}</div>
-                      <div className="text-sm text-gray-600">{result.student_email}</div>
-                    </div>
-                    <div className="flex items-center space-x-2">
-                      {result.success ? (
-                        <CheckCircle className="w-5 h-5 text-green-500" />
-                      ) : (
+            {/* Failed Recipients */}
+            {previewData.failures?.length > 0 && (
+              <div className="space-y-4">
+                <h3 className="font-semibold">Failed Recipients:</h3>
+                <div className="max-h-60 overflow-y-auto">
+                  {previewData.failures.map((failure, index) => (
+                    <div key={index} className="flex items-center justify-between p-3 border rounded">
+                      <div>
+                        <div className="font-medium">{failure.student_name || `Student #${failure.student_id}`}</div>
+                        <div className="text-sm text-gray-600">{failure.student_email}</div>
+                      </div>
+                      <div className="flex items-center space-x-2">
                         <AlertCircle className="w-5 h-5 text-red-500" />
-                      )}
-                      <span className="text-sm">{result.message}</span>
+                        <span className="text-sm">{failure.error}</span>
+                      </div>
                     </div>
-                  </div>
-                ))}
+                  ))}
+                </div>
               </div>
-            </div>
+            )}
 
-            {/* Performance Data Preview */}
-            <div className="mt-6">
-              <h3 className="font-semibold mb-3">Student Performance Data:</h3>
-              <div className="max-h-60 overflow-y-auto">
-                {previewData.performance_data?.slice(0, 5).map((student, index) => (
-                  <div key={index} className="p-3 border rounded mb-2">
-                    <div className="font-medium">{student.student_name} ({student.section})</div>
-                    <div className="text-sm text-gray-600">
-                      Math: {student.math_marks}% | Science: {student.science_marks}% | English: {student.english_marks}%
-                    </div>
-                    <div className="text-sm font-medium">
-                      Average: {student.average_score}% | Grade: {student.grade_letter} | Status: {student.status}
-                    </div>
-                  </div>
-                ))}
-                {previewData.performance_data?.length > 5 && (
-                  <div className="text-sm text-gray-500 text-center">
-                    ... and {previewData.performance_data.length - 5} more students
-                  </div>
-                )}
-              </div>
-            </div>
+            {previewData.error && (
+              <div className="mt-4 p-3 bg-red-50 text-red-700 rounded">{previewData.error}</div>
+            )}
 
             <div className="mt-6 flex justify-end">
               <button
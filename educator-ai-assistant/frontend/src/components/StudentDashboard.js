@@ -13,6 +13,8 @@ const StudentDashboard = ({ studentData, onLogout }) => {
   const [profile, setProfile] = useState(null);
   const [marks, setMarks] = useState(null);
   const [notifications, setNotifications] = useState([]);
+  // Feed cursors: nextCursor pages back, latestCursor pulls only new items
+  const [notificationCursors, setNotificationCursors] = useState({ nextCursor: null, latestCursor: null, hasMore: false });
   const [scheduledEvents, setScheduledEvents] = useState([]);
   const [contactForm, setContactForm] = useState({
     subject: '',
@@ -75,8 +77,47 @@ const StudentDashboard = ({ studentData, onLogout }) => {
   };
 
   const loadNotifications = async () => {
-    const response = await axios.get(`${API_BASE_URL}/api/v1/student-dashboard/notifications`);
-    setNotifications(response.data);
+    const feedUrl = `${API_BASE_URL}/api/v1/student-dashboard/notifications/feed`;
+    if (notificationCursors.latestCursor === null) {
+      const response = await axios.get(feedUrl);
+      setNotifications(response.data.items);
+      setNotificationCursors({
+        nextCursor: response.data.next_cursor,
+        latestCursor: response.data.latest_cursor,
+        hasMore: response.data.has_more
+      });
+      return;
+    }
+
+    // Refresh: pull only notifications newer than the latest one shown
+    let latestCursor = notificationCursors.latestCursor;
+    let fresh = [];
+    let hasMore = true;
+    while (hasMore) {
+      const response = await axios.get(feedUrl, { params: { since: latestCursor } });
+      fresh = [...response.data.items.reverse(), ...fresh];
+      latestCursor = response.data.latest_cursor;
+      hasMore = response.data.has_more;
+    }
+    setNotifications((current) => [...fresh, ...current]);
+    setNotificationCursors((cursors) => ({ ...cursors, latestCursor }));
+  };
+
+  const loadMoreNotifications = async () => {
+    try {
+      const response = await axios.get(`${API_BASE_URL}/api/v1/student-dashboard/notifications/feed`, {
+        params: { before: notificationCursors.nextCursor }
+      });
+      setNotifications((current) => [...current, ...response.data.items]);
+      setNotificationCursors((cursors) => ({
+        ...cursors,
+        nextCursor: response.data.next_cursor,
+        hasMore: response.data.has_more
+      }));
+    } catch (error) {
+      console.error('Error loading more notifications:', error);
+      setError('Failed to load notifications');
+    }
   };
 
   const loadScheduledEvents = async () => {
@@ -100,11 +141,18 @@ const StudentDashboard = ({ studentData, onLogout }) => {
     }
   };
 
-  const handleViewReport = (notification) => {
+  const handleViewReport = async (notification) => {
     try {
-      if (notification.report_data) {
-        // report_data is already parsed by the backend
-        setSelectedReport(notification.report_data);
+      let reportData = notification.report_data;
+      if (!reportData && notification.has_report_data) {
+        // Feed items carry only a flag; the payload is fetched on demand
+        const response = await axios.get(
+          `${API_BASE_URL}/api/v1/student-dashboard/notifications/${notification.id}/report-data`
+        );
+        reportData = response.data;
+      }
+      if (reportData) {
+        setSelectedReport(reportData);
         setShowReportModal(true);
       } else {
         alert('No structured report data available for this notification.');
@@ -355,7 +403,7 @@ const StudentDashboard = ({ studentData, onLogout }) => {
                             <span>{formatDateTime(notification.sent_at)}</span>
                           </div>
                           {/* View Report Button for Grade Reports */}
-                          {(notification.message_type === 'GRADE_REPORT' || notification.message_type === 'grade_report') && notification.report_data && (
+                          {(notification.message_type === 'GRADE_REPORT' || notification.message_type === 'grade_report') && (notification.report_data || notification.has_report_data) && (
                             <div className="mt-3">
                               <button
                                 onClick={() => handleViewReport(notification)}
@@ -374,6 +422,14 @@ const StudentDashboard = ({ studentData, onLogout }) => {
                       </div>
                     </div>
                   ))}
+                  {notificationCursors.hasMore && (
+                    <button
+                      onClick={loadMoreNotifications}
+                      className="w-full py-2 text-sm font-medium text-blue-700 bg-blue-50 rounded-md hover:bg-blue-100"
+                    >
+                      Load older notifications
+                    </button>
+                  )}
                 </div>
               )}
             </div>
@@ -184,9 +184,12 @@ export const communicationsAPI = {
 
 // ===== BULK COMMUNICATION API =====
 export const bulkCommunicationAPI = {
-  // POST /api/v1/bulk-communication/bulk-email - Send Bulk Performance Emails
+  // POST /api/v1/bulk-communication/bulk-email - Queue Bulk Performance Emails (returns a job id)
   sendBulkEmail: (requestData) => api.post('/api/v1/bulk-communication/bulk-email', requestData),
   
+  // GET /api/v1/bulk-communication/bulk-email/jobs/{job_id} - Get Bulk Job Progress
+  getBulkEmailJob: (jobId) => api.get(`/api/v1/bulk-communication/bulk-email/jobs/${jobId}`),
+  
   // GET /api/v1/bulk-communication/sections - Get Available Sections
   getSections: () => api.get('/api/v1/bulk-communication/sections'),
   
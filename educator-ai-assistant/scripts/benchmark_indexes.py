@@ -0,0 +1,231 @@
+"""Before/after query plans for the hot-table index migration.
+
+Seeds a throwaway PostgreSQL schema with ~100k grades (plus messages,
+notifications, meeting recipients and schedules), runs the read paths the
+API issues against those tables with EXPLAIN ANALYZE, applies the pending
+migrations from app.core.migrations and runs them again.
+
+The data lives in its own schema (default `index_benchmark`, dropped at the
+end unless --keep), so pointing the script at a development database does
+not touch the application tables.
+
+Usage:
+  - cd educator-ai-assistant; python scripts/benchmark_indexes.py [--keep] [--plans]
+    (--keep leaves the schema in place, --plans prints the full plans)
+
+Optional environment variables:
+  - BENCHMARK_DATABASE_URL: PostgreSQL URL (default DATABASE_URL)
+  - BENCHMARK_SCHEMA: schema name (default 'index_benchmark')
+  - BENCHMARK_STUDENTS: number of students (default 2000; 5 subjects x 10
+    assessments each, i.e. 100k grades)
+"""
+import os
+import re
+import sys
+import random
+from datetime import datetime, timedelta
+
+from pathlib import Path
+# Ensure project root is on sys.path so `app.*` imports work when running as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from sqlalchemy import create_engine, insert, text
+
+from app.core.config import settings
+from app.core.database import Base
+from app.core import migrations
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.models.educator import Educator
+from app.models.student import Section, Student, Subject, Grade
+from app.models.message import Message
+from app.models.notification import Notification, NotificationType, NotificationStatus
+from app.models.meeting_schedule import Meeting, MeetingRecipient, MeetingType, RecipientType
+from app.models.schedule import Schedule, EventType, EventStatus
+
+DATABASE_URL = os.getenv("BENCHMARK_DATABASE_URL", settings.DATABASE_URL)
+SCHEMA = os.getenv("BENCHMARK_SCHEMA", "index_benchmark")
+STUDENTS = int(os.getenv("BENCHMARK_STUDENTS", "2000"))
+
+EDUCATORS = 20
+SECTIONS_PER_EDUCATOR = 5
+SUBJECTS_PER_SECTION = 5
+ASSESSMENTS_PER_SUBJECT = 10
+MESSAGES_PER_STUDENT = 25
+NOTIFICATIONS_PER_STUDENT = 25
+MEETINGS_PER_EDUCATOR = 100
+SCHEDULES_PER_EDUCATOR = 1000
+BATCH = 5000
+
+# Query shapes issued by the API (the source location is in the label)
+QUERIES = [
+    ("student grades (students.student_grades)",
+     "SELECT * FROM grades WHERE student_id = :student_id"),
+    ("subject analytics (performance_views)",
+     "SELECT student_id, percentage FROM grades WHERE subject_id IN (:subject_id, :subject_id2)"),
+    ("teacher notifications (teacher_dashboard)",
+     "SELECT * FROM notifications WHERE educator_id = :educator_id ORDER BY created_at DESC LIMIT 50"),
+    ("conversation (student_messaging)",
+     "SELECT * FROM messages WHERE sender_id = :educator_id AND receiver_id = :student_id ORDER BY created_at DESC"),
+    ("student inbox (student_dashboard)",
+     "SELECT * FROM messages WHERE receiver_id = :student_id AND receiver_type = 'student' ORDER BY created_at DESC"),
+    ("unread counts (message_summary)",
+     "SELECT receiver_id, count(*) FROM messages WHERE sender_id = :educator_id AND is_read = false GROUP BY receiver_id"),
+    ("meeting recipients (meeting_scheduler)",
+     "SELECT * FROM meeting_recipients WHERE meeting_id = :meeting_id"),
+    ("student invitations (student_dashboard)",
+     "SELECT * FROM meeting_recipients WHERE recipient_id = :student_id AND recipient_type = 'STUDENT'"),
+    ("calendar month (calendar_view / upcoming week)",
+     "SELECT * FROM schedules WHERE educator_id = :educator_id AND start_datetime >= :month_start AND start_datetime < :month_end ORDER BY start_datetime"),
+    ("task list (scheduling.get_tasks)",
+     "SELECT * FROM schedules WHERE educator_id = :educator_id AND event_type = 'TASK' ORDER BY start_datetime DESC"),
+]
+
+
+def make_engine():
+    if not DATABASE_URL.startswith("postgresql"):
+        raise SystemExit("The index benchmark needs PostgreSQL (set BENCHMARK_DATABASE_URL)")
+    admin = create_engine(DATABASE_URL)
+    with admin.begin() as connection:
+        connection.execute(text(f'DROP SCHEMA IF EXISTS "{SCHEMA}" CASCADE'))
+        connection.execute(text(f'CREATE SCHEMA "{SCHEMA}"'))
+    admin.dispose()
+    # Unqualified names (create_all, the migration DDL, the queries) resolve to the benchmark schema
+    return create_engine(DATABASE_URL, connect_args={"options": f"-c search_path={SCHEMA}"})
+
+
+def insert_rows(connection, table, rows):
+    for start in range(0, len(rows), BATCH):
+        connection.execute(insert(table), rows[start:start + BATCH])
+
+
+def seed(engine):
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    with engine.begin() as connection:
+        insert_rows(connection, Educator.__table__, [
+            {"id": e, "email": f"bench{e}@example.edu", "first_name": "Bench", "last_name": f"E{e}", "hashed_password": "x"}
+            for e in range(1, EDUCATORS + 1)
+        ])
+        sections = [(s, (s - 1) // SECTIONS_PER_EDUCATOR + 1) for s in range(1, EDUCATORS * SECTIONS_PER_EDUCATOR + 1)]
+        insert_rows(connection, Section.__table__, [
+            {"id": s, "name": f"Section {s}", "educator_id": e} for s, e in sections
+        ])
+        subjects = list(enumerate((s for s, _ in sections for _ in range(SUBJECTS_PER_SECTION)), start=1))
+        insert_rows(connection, Subject.__table__, [
+            {"id": i, "name": f"Subject {i}", "code": f"SUB{i}", "section_id": s} for i, s in subjects
+        ])
+        students = [(i, sections[(i - 1) % len(sections)]) for i in range(1, STUDENTS + 1)]
+        insert_rows(connection, Student.__table__, [
+            {"id": i, "student_id": f"BENCH{i:06d}", "first_name": "Student", "last_name": str(i),
+             "email": f"bench.student{i}@example.edu", "password_hash": "x", "roll_number": i, "section_id": s}
+            for i, (s, _) in students
+        ])
+        subjects_by_section = {}
+        for i, s in subjects:
+            subjects_by_section.setdefault(s, []).append(i)
+
+        grades = []
+        for student_id, (section_id, _) in students:
+            for subject_id in subjects_by_section[section_id]:
+                for _ in range(ASSESSMENTS_PER_SUBJECT):
+                    marks = rng.uniform(20, 100)
+                    grades.append({"student_id": student_id, "subject_id": subject_id, "marks_obtained": marks,
+                                   "total_marks": 100.0, "percentage": marks, "is_passed": marks >= 60})
+        insert_rows(connection, Grade.__table__, grades)
+
+        messages, notifications = [], []
+        for student_id, (_, educator_id) in students:
+            for k in range(MESSAGES_PER_STUDENT):
+                messages.append({"sender_id": educator_id, "receiver_id": student_id,
+                                 "receiver_type": "parent" if k % 5 == 0 else "student",
+                                 "subject": "Update", "message": "Progress update",
+                                 "is_read": rng.random() < 0.9, "created_at": now - timedelta(hours=rng.randint(0, 24 * 365))})
+            for _ in range(NOTIFICATIONS_PER_STUDENT):
+                notifications.append({"educator_id": educator_id, "student_id": student_id, "title": "Report",
+                                      "message": "Grade report", "notification_type": NotificationType.GRADE_REPORT,
+                                      "status": NotificationStatus.UNREAD, "created_at": now - timedelta(hours=rng.randint(0, 24 * 365))})
+        insert_rows(connection, Message.__table__, messages)
+        insert_rows(connection, Notification.__table__, notifications)
+
+        students_by_educator = {}
+        for student_id, (_, educator_id) in students:
+            students_by_educator.setdefault(educator_id, []).append(student_id)
+        meetings, recipients, schedules = [], [], []
+        meeting_id = 0
+        for educator_id in range(1, EDUCATORS + 1):
+            for _ in range(MEETINGS_PER_EDUCATOR):
+                meeting_id += 1
+                meetings.append({"id": meeting_id, "organizer_id": educator_id, "title": "Meeting", "meeting_type": MeetingType.INDIVIDUAL})
+                for student_id in rng.sample(students_by_educator[educator_id], min(10, len(students_by_educator[educator_id]))):
+                    recipients.append({"meeting_id": meeting_id, "recipient_id": student_id, "recipient_type": RecipientType.STUDENT})
+            for _ in range(SCHEDULES_PER_EDUCATOR):
+                start = now + timedelta(hours=rng.randint(-24 * 365, 24 * 365))
+                schedules.append({"educator_id": educator_id, "title": "Event", "start_datetime": start,
+                                  "end_datetime": start + timedelta(hours=1), "status": EventStatus.SCHEDULED,
+                                  "event_type": EventType.TASK if rng.random() < 0.2 else EventType.CLASS})
+        insert_rows(connection, Meeting.__table__, meetings)
+        insert_rows(connection, MeetingRecipient.__table__, recipients)
+        insert_rows(connection, Schedule.__table__, schedules)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("ANALYZE"))
+    return {
+        "student_id": STUDENTS // 2,
+        "educator_id": students[STUDENTS // 2 - 1][1][1],
+        "subject_id": subjects[0][0],
+        "subject_id2": subjects[1][0],
+        "meeting_id": meeting_id // 2,
+        "month_start": now.replace(day=1, hour=0, minute=0, second=0, microsecond=0),
+        "month_end": (now.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0, second=0, microsecond=0),
+    }
+
+
+def explain(engine, params):
+    results = {}
+    with engine.connect() as connection:
+        for label, sql in QUERIES:
+            plan = [row[0] for row in connection.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), params)]
+            match = re.search(r"Execution Time: ([\d.]+) ms", plan[-1])
+            results[label] = (float(match.group(1)) if match else None, plan)
+    return results
+
+
+def report(before, after, verbose):
+    print(f"\n{'query':<50} {'before ms':>10} {'after ms':>10}  plan after")
+    for label, _ in QUERIES:
+        before_ms, before_plan = before[label]
+        after_ms, after_plan = after[label]
+        print(f"{label:<50} {before_ms:>10.3f} {after_ms:>10.3f}  {after_plan[0].strip()[:60]}")
+        if verbose:
+            print("  before:\n    " + "\n    ".join(before_plan))
+            print("  after:\n    " + "\n    ".join(after_plan))
+
+
+def main():
+    keep = "--keep" in sys.argv
+    verbose = "--plans" in sys.argv
+    engine = make_engine()
+    try:
+        Base.metadata.create_all(bind=engine)
+        # Start from the pre-migration schema: drop what create_all took from the models
+        with engine.begin() as connection:
+            for index in migrations.HOT_TABLE_INDEXES:
+                connection.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+        print(f"Seeding schema {SCHEMA} ...")
+        params = seed(engine)
+        before = explain(engine, params)
+        print(f"Applied migrations: {migrations.upgrade(engine)}")
+        after = explain(engine, params)
+        report(before, after, verbose)
+    finally:
+        engine.dispose()
+        if not keep:
+            admin = create_engine(DATABASE_URL)
+            with admin.begin() as connection:
+                connection.execute(text(f'DROP SCHEMA IF EXISTS "{SCHEMA}" CASCADE'))
+            admin.dispose()
+
+
+if __name__ == "__main__":
+    main()
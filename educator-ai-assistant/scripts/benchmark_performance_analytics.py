@@ -0,0 +1,251 @@
+"""Section and subject performance views: list-based vs columnar kernel.
+
+Seeds a throwaway PostgreSQL schema with ~100k grades and times, for every
+section and subject, the view computed two ways:
+
+- `legacy_*`: the code the performance views used before
+  app.services.performance_analytics (a grade query per student, ORM
+  objects, `sum(1 for ...)` passes over Python lists)
+- `compute_section_performance` / `compute_subject_performance` as they
+  are now: one columnar load and vectorized statistics
+
+The script checks that both produce the same views (apart from the new
+`standard_deviation` and `score_percentiles` fields) before reporting.
+
+The data lives in its own schema (default `analytics_benchmark`, dropped
+at the end unless --keep), so pointing the script at a development
+database does not touch the application tables.
+
+Usage:
+  - cd educator-ai-assistant; python scripts/benchmark_performance_analytics.py [--keep]
+
+Optional environment variables:
+  - BENCHMARK_DATABASE_URL: PostgreSQL URL (default DATABASE_URL)
+  - BENCHMARK_SCHEMA: schema name (default 'analytics_benchmark')
+  - BENCHMARK_STUDENTS: number of students (default 2000; 5 subjects x 10
+    assessments each, i.e. 100k grades)
+"""
+import os
+import sys
+import random
+import time
+
+from pathlib import Path
+# Ensure project root is on sys.path so `app.*` imports work when running as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.config import settings
+from app.core.database import Base
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.models.educator import Educator
+from app.models.student import Section, Student, Subject, Grade, grade_letter_for
+from app.api.performance_views import (
+    SectionPerformanceView, StudentPerformanceDetail, SubjectPerformanceView,
+    compute_section_performance, compute_subject_performance,
+)
+from app.services.grade_pipeline import student_passed
+
+DATABASE_URL = os.getenv("BENCHMARK_DATABASE_URL", settings.DATABASE_URL)
+SCHEMA = os.getenv("BENCHMARK_SCHEMA", "analytics_benchmark")
+STUDENTS = int(os.getenv("BENCHMARK_STUDENTS", "2000"))
+
+SECTIONS = 10
+SUBJECTS_PER_SECTION = 5
+ASSESSMENTS_PER_SUBJECT = 10
+BATCH = 5000
+NEW_FIELDS = ("standard_deviation", "score_percentiles")
+
+
+def make_engine():
+    if not DATABASE_URL.startswith("postgresql"):
+        raise SystemExit("The analytics benchmark needs PostgreSQL (set BENCHMARK_DATABASE_URL)")
+    admin = create_engine(DATABASE_URL)
+    with admin.begin() as connection:
+        connection.execute(text(f'DROP SCHEMA IF EXISTS "{SCHEMA}" CASCADE'))
+        connection.execute(text(f'CREATE SCHEMA "{SCHEMA}"'))
+    admin.dispose()
+    return create_engine(DATABASE_URL, connect_args={"options": f"-c search_path={SCHEMA}"})
+
+
+def insert_rows(connection, table, rows):
+    for start in range(0, len(rows), BATCH):
+        connection.execute(insert(table), rows[start:start + BATCH])
+
+
+def seed(engine):
+    rng = random.Random(42)
+    with engine.begin() as connection:
+        insert_rows(connection, Educator.__table__, [
+            {"id": 1, "email": "bench@example.edu", "first_name": "Bench", "last_name": "E", "hashed_password": "x"}
+        ])
+        insert_rows(connection, Section.__table__, [
+            {"id": s, "name": f"Section {s}", "educator_id": 1} for s in range(1, SECTIONS + 1)
+        ])
+        subjects = [(i, (i - 1) // SUBJECTS_PER_SECTION + 1) for i in range(1, SECTIONS * SUBJECTS_PER_SECTION + 1)]
+        insert_rows(connection, Subject.__table__, [
+            {"id": i, "name": f"Subject {i}", "code": f"SUB{i}", "section_id": s} for i, s in subjects
+        ])
+        insert_rows(connection, Student.__table__, [
+            {"id": i, "student_id": f"BENCH{i:06d}", "first_name": "Student", "last_name": str(i),
+             "email": f"bench.student{i}@example.edu", "password_hash": "x", "roll_number": i,
+             "section_id": (i - 1) % SECTIONS + 1}
+            for i in range(1, STUDENTS + 1)
+        ])
+        grades = []
+        for student_id in range(1, STUDENTS + 1):
+            section_id = (student_id - 1) % SECTIONS + 1
+            for subject_id, subject_section in subjects:
+                if subject_section != section_id:
+                    continue
+                for _ in range(ASSESSMENTS_PER_SUBJECT):
+                    # Core inserts bypass the grade pipeline: fill the derived columns here
+                    marks = round(rng.uniform(20, 100), 1)
+                    grades.append({"student_id": student_id, "subject_id": subject_id, "marks_obtained": marks,
+                                   "total_marks": 100.0, "percentage": marks, "grade_letter": grade_letter_for(marks),
+                                   "is_passed": marks >= 60})
+        insert_rows(connection, Grade.__table__, grades)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("ANALYZE"))
+    return len(grades)
+
+
+def legacy_student(student, db):
+    grades = db.query(Grade).options(joinedload(Grade.subject)).filter(Grade.student_id == student.id).all()
+    if not grades:
+        return StudentPerformanceDetail(
+            id=student.id, student_id=student.student_id, name=student.full_name, email=student.email,
+            section_name=student.section.name, roll_number=student.roll_number, average_score=0.0,
+            status="No Data", total_subjects=0, passed_subjects=0, failed_subjects=0, subject_grades=[]
+        )
+    # Mean grade percentage, the average student_passed is defined on
+    average_score = sum(grade.percentage or 0.0 for grade in grades) / len(grades)
+    passed_subjects = sum(1 for grade in grades if grade.is_passed)
+    subject_grades = [{
+        "subject_name": grade.subject.name, "subject_code": grade.subject.code,
+        "marks_obtained": grade.marks_obtained, "total_marks": grade.total_marks,
+        "percentage": grade.percentage or 0.0, "grade_letter": grade.grade_letter,
+        "is_passed": bool(grade.is_passed),
+    } for grade in grades]
+    return StudentPerformanceDetail(
+        id=student.id, student_id=student.student_id, name=student.full_name, email=student.email,
+        section_name=student.section.name, roll_number=student.roll_number,
+        average_score=round(average_score, 2), status="Pass" if student_passed(average_score) else "Fail",
+        total_subjects=len(grades), passed_subjects=passed_subjects,
+        failed_subjects=len(grades) - passed_subjects, subject_grades=subject_grades
+    )
+
+
+def legacy_section(section, db):
+    students = db.query(Student).options(joinedload(Student.section)).filter(Student.section_id == section.id).all()
+    student_performances = [legacy_student(student, db) for student in students]
+    scores = [p.average_score for p in student_performances if p.average_score > 0]
+    passed_students = sum(1 for p in student_performances if p.status == "Pass")
+    subject_averages = {}
+    for subject in db.query(Subject).filter(Subject.section_id == section.id).all():
+        subject_grades = db.query(Grade).filter(
+            Grade.subject_id == subject.id, Grade.student_id.in_([s.id for s in students])
+        ).all()
+        if subject_grades:
+            subject_averages[subject.name] = round(sum(g.percentage or 0.0 for g in subject_grades) / len(subject_grades), 2)
+    sorted_performances = sorted(student_performances, key=lambda x: x.average_score, reverse=True)
+    return SectionPerformanceView(
+        section_id=section.id, section_name=section.name, total_students=len(students),
+        passed_students=passed_students, failed_students=len(students) - passed_students,
+        pass_rate=round(passed_students / len(students) * 100, 2),
+        average_score=round(sum(scores) / len(scores), 2) if scores else 0.0,
+        highest_score=round(max(scores), 2) if scores else 0.0,
+        lowest_score=round(min(scores), 2) if scores else 0.0,
+        attendance_average=85.0, subject_averages=subject_averages,
+        top_performers=sorted_performances[:5], low_performers=sorted_performances[-5:][::-1]
+    )
+
+
+def legacy_subject(subject, db):
+    grades = db.query(Grade).options(
+        joinedload(Grade.student).joinedload(Student.section)
+    ).filter(Grade.subject_id == subject.id).all()
+    percentages = [g.percentage or 0.0 for g in grades]
+    passed_students = sum(1 for g in grades if g.is_passed)
+    grade_distribution = {"A+": 0, "A": 0, "B+": 0, "B": 0, "C+": 0, "C": 0, "D+": 0, "D": 0, "F": 0}
+    for grade in grades:
+        if grade.grade_letter:
+            grade_distribution[grade.grade_letter] = grade_distribution.get(grade.grade_letter, 0) + 1
+    section_grades = {}
+    for grade in grades:
+        section_grades.setdefault(grade.student.section.name, []).append(grade)
+    sections_performance = []
+    for section_name, rows in section_grades.items():
+        section_percentages = [g.percentage or 0.0 for g in rows]
+        section_passed = sum(1 for g in rows if g.is_passed)
+        sections_performance.append({
+            "section_name": section_name, "total_students": len(rows),
+            "average_score": round(sum(section_percentages) / len(section_percentages), 2),
+            "passed_students": section_passed, "pass_rate": round(section_passed / len(rows) * 100, 2),
+        })
+    return SubjectPerformanceView(
+        subject_id=subject.id, subject_name=subject.name, subject_code=subject.code,
+        total_students=len(grades), passed_students=passed_students, failed_students=len(grades) - passed_students,
+        pass_rate=round(passed_students / len(grades) * 100, 2),
+        average_score=round(sum(percentages) / len(percentages), 2),
+        highest_score=round(max(percentages), 2), lowest_score=round(min(percentages), 2),
+        grade_distribution=grade_distribution, sections_performance=sections_performance
+    )
+
+
+def comparable(view):
+    data = view.model_dump()
+    for field in NEW_FIELDS:
+        data.pop(field, None)
+    return data
+
+
+def timed(engine, compute, objects):
+    """Run `compute` for every object in a fresh session; returns (seconds, views)."""
+    with Session(engine) as db:
+        rows = [db.merge(obj, load=False) for obj in objects]
+        started = time.perf_counter()
+        views = [compute(obj, db) for obj in rows]
+        elapsed = time.perf_counter() - started
+    # compute_section_performance returns (view, student details)
+    return elapsed, [view[0] if isinstance(view, tuple) else view for view in views]
+
+
+def main():
+    keep = "--keep" in sys.argv
+    engine = make_engine()
+    try:
+        Base.metadata.create_all(bind=engine)
+        print(f"Seeding schema {SCHEMA} ...")
+        grade_count = seed(engine)
+        with Session(engine) as db:
+            sections = db.query(Section).order_by(Section.id).all()
+            subjects = db.query(Subject).order_by(Subject.id).all()
+            db.expunge_all()
+
+        print(f"\n{STUDENTS} students, {grade_count} grades")
+        print(f"{'view':<24} {'list-based s':>13} {'columnar s':>11} {'speedup':>8}")
+        for label, legacy, current, objects in (
+            ("section (all sections)", legacy_section, compute_section_performance, sections),
+            ("subject (all subjects)", legacy_subject, compute_subject_performance, subjects),
+        ):
+            legacy_time, expected = timed(engine, legacy, objects)
+            current_time, views = timed(engine, current, objects)
+            if [comparable(v) for v in expected] != [comparable(v) for v in views]:
+                raise SystemExit(f"{label}: the columnar views differ from the list-based ones")
+            print(f"{label:<24} {legacy_time:>13.3f} {current_time:>11.3f} {legacy_time / current_time:>7.1f}x")
+    finally:
+        engine.dispose()
+        if not keep:
+            admin = create_engine(DATABASE_URL)
+            with admin.begin() as connection:
+                connection.execute(text(f'DROP SCHEMA IF EXISTS "{SCHEMA}" CASCADE'))
+            admin.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""SMTP delivery: one connection per message vs SMTPDeliveryEngine.
+
+Starts a local sink SMTP server that accepts every message and waits
+BENCHMARK_CONNECT_DELAY_MS before its greeting, to stand in for the TCP,
+TLS and AUTH cost of a real relay. It then sends the same messages two
+ways:
+
+- one `smtplib.SMTP` connection per message, as EmailService did before
+  app.services.smtp_delivery
+- `SMTPDeliveryEngine.send_many`, with pooled connections and concurrent
+  sends (per-domain rate limiting disabled)
+
+It reports messages per second and the number of connections the sink
+accepted. Nothing leaves the machine.
+
+Usage:
+  - cd educator-ai-assistant; python scripts/benchmark_smtp.py
+
+Optional environment variables:
+  - BENCHMARK_MESSAGES: number of messages (default 300)
+  - BENCHMARK_CONNECT_DELAY_MS: sink greeting delay in ms (default 10)
+  - BENCHMARK_POOL_SIZE: engine connection pool size (default 4)
+"""
+import os
+import sys
+import asyncio
+import smtplib
+import threading
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from pathlib import Path
+# Ensure project root is on sys.path so `app.*` imports work when running as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
+
+from app.services.smtp_delivery import SMTPDeliveryEngine
+
+MESSAGES = int(os.getenv("BENCHMARK_MESSAGES", "300"))
+CONNECT_DELAY = int(os.getenv("BENCHMARK_CONNECT_DELAY_MS", "10")) / 1000
+POOL_SIZE = int(os.getenv("BENCHMARK_POOL_SIZE", "4"))
+DOMAINS = 5
+
+
+class SinkServer:
+    """Minimal SMTP server that accepts and discards every message"""
+
+    def __init__(self):
+        self.connections = 0
+        self.messages = 0
+        self.loop = asyncio.new_event_loop()
+        self.server = self.loop.run_until_complete(asyncio.start_server(self.handle, "127.0.0.1", 0))
+        self.port = self.server.sockets[0].getsockname()[1]
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        await asyncio.sleep(CONNECT_DELAY)
+        writer.write(b"220 sink\r\n")
+        await writer.drain()
+        in_data = False
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if in_data:
+                if line == b".\r\n":
+                    in_data = False
+                    self.messages += 1
+                    writer.write(b"250 OK\r\n")
+                    await writer.drain()
+                continue
+            command = line[:4].upper()
+            if command == b"EHLO":
+                writer.write(b"250-sink\r\n250 8BITMIME\r\n")
+            elif command == b"DATA":
+                in_data = True
+                writer.write(b"354 go ahead\r\n")
+            elif command == b"QUIT":
+                writer.write(b"221 bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(b"250 OK\r\n")
+            await writer.drain()
+        writer.close()
+
+    def reset(self):
+        self.connections = 0
+        self.messages = 0
+
+    def close(self):
+        self.server.close()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+def make_message(to_email):
+    msg = MIMEMultipart()
+    msg["From"] = "Educator AI Assistant <bench@example.edu>"
+    msg["To"] = to_email
+    msg["Subject"] = "Performance report"
+    msg.attach(MIMEText("Your performance summary. " * 20, "plain"))
+    return msg
+
+
+def send_per_connection(port, recipients):
+    for to_email in recipients:
+        with smtplib.SMTP("127.0.0.1", port) as server:
+            server.send_message(make_message(to_email), to_addrs=[to_email])
+
+
+def send_pooled(port, recipients):
+    engine = SMTPDeliveryEngine("127.0.0.1", port, pool_size=POOL_SIZE, start_tls=False, domain_rate_limit=0)
+    try:
+        results = engine.call(engine.send_many([(make_message(to_email), [to_email]) for to_email in recipients]))
+    finally:
+        engine.close()
+    failed = [result for result in results if not result["success"]]
+    if failed:
+        raise SystemExit(f"Pooled engine failed {len(failed)} messages: {failed[0]['error']}")
+
+
+def main():
+    sink = SinkServer()
+    recipients = [f"student{i}@school{i % DOMAINS}.example.edu" for i in range(MESSAGES)]
+    try:
+        print(f"{MESSAGES} messages, {CONNECT_DELAY * 1000:.0f} ms connection setup")
+        print(f"{'delivery':<24} {'msg/s':>8} {'connections':>12}")
+        for label, send in (
+            ("connection per message", send_per_connection),
+            (f"pooled ({POOL_SIZE} connections)", send_pooled),
+        ):
+            sink.reset()
+            started = time.perf_counter()
+            send(sink.port, recipients)
+            elapsed = time.perf_counter() - started
+            if sink.messages != MESSAGES:
+                raise SystemExit(f"{label}: sink received {sink.messages} of {MESSAGES} messages")
+            print(f"{label:<24} {MESSAGES / elapsed:>8.0f} {sink.connections:>12}")
+    finally:
+        sink.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.core.database import Base  # noqa: E402
+import app.models  # noqa: E402,F401  (registers every table on Base.metadata)
+from app.models.educator import Educator  # noqa: E402
+from app.models.student import Section, Student, Subject, Grade  # noqa: E402
+
+
+@pytest.fixture
+def engine(tmp_path):
+    # A file database, so sessions opened on the same bind (cache writers,
+    # listeners) see committed rows
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def section(db):
+    """A section with two subjects and three graded students."""
+    educator = Educator(email="teacher@example.edu", first_name="Test", last_name="Teacher", hashed_password="x")
+    db.add(educator)
+    db.flush()
+    section = Section(name="Section A", educator_id=educator.id)
+    db.add(section)
+    db.flush()
+    subjects = [Subject(name=name, code=code, section_id=section.id) for name, code in (("Maths", "M1"), ("Physics", "P1"))]
+    db.add_all(subjects)
+    db.flush()
+    for number, marks in enumerate((85.0, 62.0, 35.0), start=1):
+        student = Student(
+            student_id=f"STU{number:03d}", first_name="Student", last_name=str(number),
+            email=f"student{number}@example.edu", password_hash="x", roll_number=number, section_id=section.id,
+        )
+        db.add(student)
+        db.flush()
+        db.add_all(Grade(student_id=student.id, subject_id=subject.id, marks_obtained=marks, total_marks=100.0) for subject in subjects)
+    db.commit()
+    return section
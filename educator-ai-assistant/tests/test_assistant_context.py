@@ -0,0 +1,49 @@
+from app.services import assistant_context
+from app.services.assistant_context import CHARS_PER_TOKEN, TOKEN_BUDGET, render_for_prompt
+
+
+def make_context(count):
+    students = [
+        {"id": i, "name": f"Student Number{i}", "email": f"s{i}@example.edu", "section": "Section A",
+         "section_id": 1, "roll_number": i}
+        for i in range(1, count + 1)
+    ]
+    grades = [
+        {"student_id": i, "student_name": f"Student Number{i}", "subject_id": 1, "subject_name": "Maths",
+         "marks_obtained": float(i), "total_marks": 100.0, "percentage": float(i * 100 // count),
+         "grade_letter": None, "assessment_type": "Final Exam", "is_passed": None}
+        for i in range(1, count + 1)
+    ]
+    attendance = [{"student_id": 1, "student_name": "Student Number1", "date": "2026-10-01", "present": False,
+                   "subject": "Maths", "remarks": None}]
+    sections = [{"id": 1, "name": "Section A", "student_count": count}]
+    return {"students": students, "grades": grades, "attendance": attendance, "sections": sections}
+
+
+def test_counts_only_by_default():
+    prompt = render_for_prompt(make_context(40), "show_attendance")
+    assert "Student Number" not in prompt
+    assert "@example.edu" not in prompt
+    assert "Students: 40 total across 1 sections (Section A)" in prompt
+
+
+def test_naming_intents_stay_within_budget():
+    context = make_context(40)
+    summary = render_for_prompt(context)
+    for intent in assistant_context.RECORD_INTENTS:
+        prompt = render_for_prompt(context, intent)
+        names = prompt[len(summary) + 1:]
+        assert "Student Number" in names
+        if intent != "show_top_performers":
+            assert "more" in names
+        assert len(names) <= TOKEN_BUDGET * CHARS_PER_TOKEN
+        assert "@example.edu" not in prompt and "roll" not in prompt
+
+
+def test_ranking_intents_name_the_right_students():
+    context = make_context(10)
+    top = render_for_prompt(context, "show_top_performers", budget=200).splitlines()[-1]
+    assert top.startswith("Top performers (average %): Student Number10 100, Student Number9 90")
+    struggling = render_for_prompt(context, "show_struggling_students", budget=200).splitlines()[-1]
+    assert struggling.startswith("Below the pass mark (average %): Student Number1 10, Student Number2 20")
+    assert "Student Number6 60" not in struggling
@@ -0,0 +1,58 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.models.schedule import EventStatus, EventType, Schedule
+from app.services import calendar_view, schedule_conflicts
+
+
+def add_event(db, educator_id, title, start, duration=timedelta(hours=1), **fields):
+    db.add(Schedule(
+        educator_id=educator_id, title=title, event_type=fields.pop("event_type", EventType.CLASS),
+        start_datetime=start, end_datetime=start + duration, **fields,
+    ))
+
+
+def test_calendar_is_built_on_the_conflict_index(db, section):
+    educator_id = section.educator_id
+    schedule_conflicts.invalidate()
+    monday = datetime.utcnow().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    add_event(db, educator_id, "Weekly class", monday, is_recurring=True, recurrence_pattern="weekly")
+    add_event(db, educator_id, "Cancelled meeting", monday + timedelta(days=1), status=EventStatus.CANCELLED,
+              event_type=EventType.MEETING)
+    add_event(db, educator_id, "Deadline", monday + timedelta(days=2), duration=timedelta(0),
+              event_type=EventType.DEADLINE)
+    db.commit()
+
+    calendar = calendar_view.get_calendar(db, educator_id)
+    assert calendar.index is schedule_conflicts.get_index(db, educator_id)
+    events = list(calendar.events(monday, monday + timedelta(days=21)))
+    assert [event["title"] for event in events].count("Weekly class") == 4
+    # Cancelled and zero-length events stay on the calendar
+    assert {"Cancelled meeting", "Deadline"} <= {event["title"] for event in events}
+    # but only live events conflict
+    conflicts = schedule_conflicts.find_conflicts(db, educator_id, monday + timedelta(days=1), monday + timedelta(days=1, hours=1))
+    assert conflicts == []
+
+    add_event(db, educator_id, "New class", monday + timedelta(hours=3))
+    db.commit()
+    refreshed = calendar_view.get_calendar(db, educator_id)
+    assert refreshed is not calendar
+    assert "New class" in {event["title"] for event in refreshed.events(monday, monday + timedelta(days=1))}
+
+
+def test_fetch_schedule_returns_events_for_long_ranges(db, section):
+    from app.models.educator import Educator
+    from app.services import action_executor
+
+    educator = db.get(Educator, section.educator_id)
+    schedule_conflicts.invalidate()
+    start = datetime.utcnow().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    add_event(db, educator.id, "Weekly class", start, is_recurring=True, recurrence_pattern="weekly")
+    db.commit()
+
+    # A year is past the route's streaming threshold
+    result = asyncio.run(action_executor.fetch_schedule(
+        db, educator, start.date().isoformat(), (start + timedelta(days=364)).date().isoformat()
+    ))
+    assert result["status"] == "ok"
+    assert result["response"]["total"] == len(result["response"]["events"]) == 53
@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+
+from app.models.schedule import EventType, Schedule
+from app.services import schedule_conflicts
+
+
+def add_class(db, educator_id, start):
+    schedule = Schedule(
+        educator_id=educator_id, title="Class", event_type=EventType.CLASS,
+        start_datetime=start, end_datetime=start + timedelta(hours=1),
+    )
+    db.add(schedule)
+    return schedule
+
+
+def test_schedule_index_is_dropped_on_commit_only(db, section):
+    educator_id = section.educator_id
+    start = datetime.utcnow().replace(microsecond=0) + timedelta(days=1)
+    schedule_conflicts.invalidate()
+    schedule_conflicts.get_index(db, educator_id)
+
+    add_class(db, educator_id, start)
+    db.flush()
+    db.rollback()
+    # A rolled-back write keeps the index
+    assert educator_id in schedule_conflicts._indexes
+
+    add_class(db, educator_id, start)
+    db.flush()
+    assert educator_id in schedule_conflicts._indexes
+    db.commit()
+    assert educator_id not in schedule_conflicts._indexes
+    assert len(schedule_conflicts.find_conflicts(db, educator_id, start, start + timedelta(minutes=30))) == 1
@@ -0,0 +1,90 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from app.services import conversation_state as state_module
+from app.services.conversation_state import ConversationStateStore, MemoryStateBackend
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def store(server):
+    return ConversationStateStore(redis=fakeredis.FakeAsyncRedis(server=server, decode_responses=True), ttl=100)
+
+
+def test_concurrent_updates_of_different_fields_are_kept(store):
+    async def scenario():
+        await asyncio.gather(*(
+            store.update_state(1, **{f"field_{i}": i}) for i in range(20)
+        ), store.update_state(1, last_resolved_student="Asha Rao"))
+        return await store.get_state(1)
+
+    state = asyncio.run(scenario())
+    assert state["last_resolved_student"] == "Asha Rao"
+    assert all(state[f"field_{i}"] == i for i in range(20))
+
+
+def test_reads_and_writes_slide_the_ttl(store):
+    async def scenario():
+        key = store.key(1)
+        await store.update_state(1, last_action={"action": "send_message"})
+        after_write = await store.redis.ttl(key)
+        await store.redis.expire(key, 5)
+        state = await store.get_state(1)
+        return after_write, await store.redis.ttl(key), state
+
+    after_write, after_read, state = asyncio.run(scenario())
+    assert 95 < after_write <= 100
+    assert 95 < after_read <= 100
+    assert state["last_action"] == {"action": "send_message"}
+
+
+def test_memory_fallback_after_redis_error(server, store):
+    async def scenario():
+        server.connected = False
+        await store.update_state(1, last_resolved_student="Asha Rao")
+        during_outage = await store.get_state(1)
+        # Redis is back, but the store stays on memory for the retry window
+        server.connected = True
+        in_retry_window = await store.get_state(1)
+        stored_in_redis = await store.redis.exists(store.key(1))
+        store._redis_down_until = 0.0
+        after_retry = await store.get_state(1)
+        return during_outage, in_retry_window, stored_in_redis, after_retry
+
+    during_outage, in_retry_window, stored_in_redis, after_retry = asyncio.run(scenario())
+    assert during_outage["last_resolved_student"] == "Asha Rao"
+    assert in_retry_window["last_resolved_student"] == "Asha Rao"
+    assert stored_in_redis == 0
+    assert after_retry["last_resolved_student"] is None
+
+
+def test_memory_backend_is_a_bounded_lru():
+    memory = MemoryStateBackend(max_entries=2, ttl=100)
+    memory.update(1, {"last_resolved_student": "one"})
+    memory.update(2, {"last_resolved_student": "two"})
+    memory.get(1)  # 1 is now the most recently used
+    memory.update(3, {"last_resolved_student": "three"})
+
+    assert len(memory) == 2
+    assert memory.get(2)["last_resolved_student"] is None
+    assert memory.get(1)["last_resolved_student"] == "one"
+    assert memory.get(3)["last_resolved_student"] == "three"
+
+
+def test_memory_backend_ttl_slides_on_access(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(state_module.time, "time", lambda: now[0])
+    memory = MemoryStateBackend(max_entries=10, ttl=100)
+    memory.update(1, {"last_resolved_student": "one"})
+    now[0] += 80
+    assert memory.get(1)["last_resolved_student"] == "one"
+    now[0] += 80  # 160s after the write, 80s after the last read
+    assert memory.get(1)["last_resolved_student"] == "one"
+    now[0] += 101
+    assert memory.get(1)["last_resolved_student"] is None
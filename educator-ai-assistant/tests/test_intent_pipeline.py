@@ -0,0 +1,46 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from app.models import ActionLog
+from app.services import intent_pipeline as pipeline_module
+from app.services.intent_pipeline import IntentPipeline, TURN_ACTION_TYPE, prune_turns
+
+
+def stored_turns(db):
+    db.expire_all()
+    return [json.loads(row.payload) for row in db.query(ActionLog).filter(ActionLog.action_type == TURN_ACTION_TYPE).order_by(ActionLog.id)]
+
+
+def test_rules_turns_are_sampled(monkeypatch, db):
+    monkeypatch.setattr(pipeline_module, "RULES_SAMPLE_RATE", 0.0)
+    pipeline = IntentPipeline()
+    assert pipeline.record_turn(db, "text Steven Smith that the test moved", {"action": "send_message", "tier": "rules"}) is None
+    assert stored_turns(db) == []
+
+
+def test_llm_turn_written_off_the_request_session(monkeypatch, db):
+    monkeypatch.setattr(pipeline_module, "TURN_TEXT_LIMIT", 10)
+    pipeline = IntentPipeline()
+    pending = ActionLog(action_type="other", target_type="intent")
+    db.add(pending)
+
+    pipeline.record_turn(db, "please book a meeting with the parents", {"action": "schedule_meeting"}).result()
+
+    # The caller's pending work is neither flushed nor committed
+    assert pending in db.new
+    db.rollback()
+    assert stored_turns(db) == [{"text": "please boo", "intent": "schedule_meeting", "tier": "llm"}]
+
+
+def test_prune_turns_applies_age_and_row_cap(monkeypatch, db):
+    monkeypatch.setattr(pipeline_module, "TURN_MAX_ROWS", 2)
+    old = datetime.now(timezone.utc) - timedelta(days=pipeline_module.TURN_RETENTION_DAYS + 1)
+    db.add(ActionLog(action_type=TURN_ACTION_TYPE, payload=json.dumps({"text": "old"}), created_at=old))
+    db.add_all(ActionLog(action_type=TURN_ACTION_TYPE, payload=json.dumps({"text": f"t{i}"})) for i in range(3))
+    db.add(ActionLog(action_type="send_message", payload="{}", created_at=old))
+    db.commit()
+
+    assert prune_turns(db) == 2
+    db.commit()
+    assert [turn["text"] for turn in stored_turns(db)] == ["t1", "t2"]
+    assert db.query(ActionLog).filter(ActionLog.action_type == "send_message").count() == 1
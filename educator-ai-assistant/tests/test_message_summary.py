@@ -0,0 +1,58 @@
+from sqlalchemy import update
+
+from app.models.message import Message, MessageUnreadCounter
+from app.models.student import Student
+from app.services import message_summary
+
+
+def unread_counts(db, educator_id, use_counters):
+    return {row["student_id"]: row["unread_count"] for row in message_summary.student_summaries(db, educator_id, use_counters)}
+
+
+def send(db, educator_id, student, text="Hello"):
+    message = Message(sender_id=educator_id, receiver_id=student.id, subject="Note", message=text)
+    db.add(message)
+    return message
+
+
+def test_unread_counters_follow_insert_read_and_delete(db, section, monkeypatch):
+    monkeypatch.setattr(message_summary, "USE_UNREAD_COUNTERS", True)
+    monkeypatch.setattr(message_summary, "_counters_rebuilt", False)
+    educator_id = section.educator_id
+    first, second, _ = db.query(Student).order_by(Student.id).all()
+
+    messages = [send(db, educator_id, first), send(db, educator_id, first), send(db, educator_id, second)]
+    db.commit()
+    assert unread_counts(db, educator_id, True) == unread_counts(db, educator_id, False)
+    assert unread_counts(db, educator_id, True)[first.id] == 2
+
+    # Commit expired the instances, so the flush has to learn the old value
+    messages[0].is_read = True
+    db.commit()
+    assert unread_counts(db, educator_id, True)[first.id] == 1
+    messages[0].is_read = False
+    messages[2].is_read = True
+    db.commit()
+    assert unread_counts(db, educator_id, True) == {first.id: 2, second.id: 0, section.students[2].id: 0}
+
+    db.delete(messages[1])
+    db.delete(messages[2])
+    db.commit()
+    assert unread_counts(db, educator_id, True) == unread_counts(db, educator_id, False)
+    assert unread_counts(db, educator_id, True)[first.id] == 1
+
+
+def test_recount_resets_a_drifted_counter(db, section, monkeypatch):
+    monkeypatch.setattr(message_summary, "USE_UNREAD_COUNTERS", True)
+    monkeypatch.setattr(message_summary, "_counters_rebuilt", False)
+    educator_id = section.educator_id
+    student = db.query(Student).order_by(Student.id).first()
+    send(db, educator_id, student)
+    send(db, educator_id, student)
+    db.commit()
+    unread_counts(db, educator_id, True)
+
+    db.execute(update(MessageUnreadCounter).values(unread_count=7))
+    message_summary._recount(db.connection(), {(educator_id, student.id)})
+    db.commit()
+    assert unread_counts(db, educator_id, True)[student.id] == 2
@@ -0,0 +1,18 @@
+from sqlalchemy import create_engine, inspect
+
+from app.core import migrations
+from app.core.database import Base
+
+
+def test_upgrade_creates_notification_feed_index(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        # A database created before the index was declared on the model
+        connection.exec_driver_sql("DROP INDEX idx_notification_student_id")
+
+    assert 3 in migrations.upgrade(engine)
+    indexes = {index["name"]: index["column_names"] for index in inspect(engine).get_indexes("notifications")}
+    assert indexes["idx_notification_student_id"] == ["student_id", "id"]
+    assert migrations.pending_migrations(engine) == []
+    engine.dispose()
@@ -0,0 +1,72 @@
+from app.api import performance_views
+from app.api.performance_views import compute_section_performance, overall_performance
+from app.models.educator import Educator
+from app.models.performance import PerformanceCache
+from app.models.student import Grade, Student
+from app.services import performance_cache
+
+
+def cache_section(db, section):
+    version = performance_cache.section_versions(db, [section.id])[section.id]
+    view, _ = compute_section_performance(section, db)
+    performance_cache.store_view(db, section.id, None, version, view.model_dump())
+    assert db.query(PerformanceCache).count() == 1
+
+
+def test_grade_commit_invalidates_section(db, section):
+    cache_section(db, section)
+    grade = db.query(Grade).first()
+    grade.marks_obtained = 90.0
+    db.flush()
+    # Nothing is deleted inside the caller's transaction
+    assert db.query(PerformanceCache).count() == 1
+    db.commit()
+    assert db.query(PerformanceCache).count() == 0
+
+
+def test_rollback_keeps_cache(db, section):
+    cache_section(db, section)
+    db.query(Grade).first().marks_obtained = 90.0
+    db.flush()
+    db.rollback()
+    db.commit()
+    assert db.query(PerformanceCache).count() == 1
+
+
+def test_unrelated_student_update_keeps_cache(db, section):
+    cache_section(db, section)
+    db.query(Student).first().phone = "555-0100"
+    db.commit()
+    assert db.query(PerformanceCache).count() == 1
+
+    db.query(Student).first().last_name = "Renamed"
+    db.commit()
+    assert db.query(PerformanceCache).count() == 0
+
+
+def overview_rows(db, educator):
+    return db.query(PerformanceCache).filter(
+        PerformanceCache.term == performance_cache.OVERVIEW_TERM.format(educator.id)
+    )
+
+
+def test_overview_is_cached_and_invalidated(db, section, monkeypatch):
+    educator = db.get(Educator, section.educator_id)
+    first = overall_performance(db, educator)
+    overview = overview_rows(db, educator)
+    assert overview.count() == 1
+
+    # Served whole from the cache: no section or subject view is rebuilt
+    def fail(*args):
+        raise AssertionError("overview recomputed")
+    monkeypatch.setattr(performance_views, "section_performance", fail)
+    monkeypatch.setattr(performance_views, "subject_performance", fail)
+    assert overall_performance(db, educator) == first
+    monkeypatch.undo()
+
+    grade = db.query(Grade).first()
+    grade.marks_obtained = 95.0
+    db.commit()
+    assert overview.count() == 0
+    assert overall_performance(db, educator).overall_average != first.overall_average
+
@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+from sqlalchemy.orm import sessionmaker
+
+from app.api import performance_views
+from app.api.performance_views import PerformanceConnectionManager
+from app.models.student import Grade
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def send_text(self, message):
+        self.frames.append(json.loads(message))
+
+
+def test_grade_commit_pushes_performance_update(monkeypatch, engine, db, section):
+    manager = PerformanceConnectionManager(debounce_seconds=0)
+    monkeypatch.setattr(performance_views, "performance_manager", manager)
+    monkeypatch.setattr(performance_views, "SessionLocal", sessionmaker(bind=engine))
+    educator_id = section.educator_id
+    grade = db.query(Grade).first()
+
+    def update_grade():
+        grade.marks_obtained = 5.0
+        db.commit()
+
+    async def scenario():
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, educator_id)
+        snapshot = await manager.get_snapshot(educator_id)
+        # Sync endpoints commit on a worker thread
+        await asyncio.to_thread(update_grade)
+        for _ in range(100):
+            if any(frame["type"] == "performance_update" for frame in websocket.frames):
+                break
+            await asyncio.sleep(0.01)
+        return snapshot, websocket.frames
+
+    snapshot, frames = asyncio.run(scenario())
+
+    assert [frame["type"] for frame in frames] == ["grade_update", "performance_update"]
+    assert frames[0]["grade_data"]["score"] == 5.0
+    update = frames[1]
+    assert "overall_average" in update["changes"]
+    assert update["data"]["overall_average"] < snapshot["overall_average"]
+
+
+def test_commit_without_dashboards_records_nothing(db, section):
+    db.query(Grade).first().marks_obtained = 5.0
+    db.flush()
+    assert performance_views._LIVE_CHANGES_KEY not in db.info
+    db.commit()
+
+
+def test_snapshot_is_computed_off_the_event_loop(monkeypatch, engine, section):
+    import threading
+
+    manager = PerformanceConnectionManager(debounce_seconds=0)
+    monkeypatch.setattr(performance_views, "SessionLocal", sessionmaker(bind=engine))
+    threads = []
+    overall_performance = performance_views.overall_performance
+
+    def recording_overall_performance(db, educator):
+        threads.append(threading.get_ident())
+        return overall_performance(db, educator)
+
+    monkeypatch.setattr(performance_views, "overall_performance", recording_overall_performance)
+
+    async def scenario():
+        await manager.connect(FakeWebSocket(), section.educator_id)
+        return threading.get_ident(), await manager.get_snapshot(section.educator_id)
+
+    loop_thread, snapshot = asyncio.run(scenario())
+    assert snapshot["total_students"] == 3
+    assert threads and loop_thread not in threads
@@ -0,0 +1,49 @@
+from app.api.performance_views import student_performance_details
+from app.models.student import Grade, Student, Subject
+from app.services import dashboard_aggregation, performance_analytics, student_grid
+from app.services.section_totals import SectionTotalsCache
+
+
+def add_student(db, section, number, marks, total_marks):
+    student = Student(
+        student_id=f"STU{number:03d}", first_name="Student", last_name=str(number),
+        email=f"student{number}@example.edu", password_hash="x", roll_number=number, section_id=section.id,
+    )
+    db.add(student)
+    db.flush()
+    for subject in db.query(Subject).filter(Subject.section_id == section.id):
+        db.add(Grade(student_id=student.id, subject_id=subject.id, marks_obtained=marks, total_marks=total_marks))
+    return student
+
+
+def test_student_pass_rule_is_the_same_everywhere(db, section):
+    # 50 raw marks used to pass the old raw-marks rule; 50% fails every subject
+    add_student(db, section, 4, 50.0, 100.0)
+    # 45 of 50 is 90%
+    add_student(db, section, 5, 45.0, 50.0)
+    db.commit()
+    students = db.query(Student).order_by(Student.id).all()
+    expected = {student.last_name: student.last_name in ("1", "2", "5") for student in students}
+
+    averages = dashboard_aggregation.student_averages(db, [section.id])
+    assert {s.last_name: averages[s.id]["passed"] for s in students} == expected
+
+    frame = performance_analytics.load_grades(db, [s.id for s in students])
+    details = student_performance_details(students, frame)
+    assert {s.last_name: d.status == "Pass" for s, d in zip(students, details)} == expected
+
+    passed, _ = student_grid.filtered_students(db, section.id, pass_status="passed")
+    failed, _ = student_grid.filtered_students(db, section.id, pass_status="failed")
+    assert sorted(s.last_name for s in passed) == ["1", "2", "5"]
+    assert sorted(s.last_name for s in failed) == ["3", "4"]
+
+    totals = SectionTotalsCache().get_many(db, [section.id])[section.id]
+    assert totals.passed == 3
+
+
+def test_student_below_the_pass_mark_fails(db, section):
+    student = add_student(db, section, 4, 59.0, 100.0)
+    db.commit()
+    averages = dashboard_aggregation.student_averages(db, [section.id], [student.id])
+    assert averages[student.id] == {"section_id": section.id, "average": 59.0, "passed": False}
+    assert not any(grade.is_passed for grade in db.query(Grade).filter(Grade.student_id == student.id))